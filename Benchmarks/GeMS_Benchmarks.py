@@ -0,0 +1,378 @@
+# GeMS_Benchmarks.py
+# Times the logic of several GeMS tools on synthetic databases of increasing size
+#   (see GeMS_SyntheticDatabase.py) and reports throughput and peak memory.
+#
+# Usage:  python GeMS_Benchmarks.py [maxArcs] [workFolder] [stages]
+#   maxArcs     largest database to time, in ContactsAndFaults features (default 1000000).
+#               Databases of 1000, 10000, ... features are timed, up to maxArcs
+#   workFolder  where synthetic databases and GeMS_Benchmarks.csv are written (default:
+#               the current folder). Databases are reused if they already exist
+#   stages      comma-separated list of stages to run (default: all of them)
+#
+# Stages. Each runs in its own process, reading the GeoPackage through GeMS_DataAccess,
+#   so that its peak memory is measured separately. Runs without arcpy.
+#   generate      GeMS_SyntheticDatabase.makeDatabase
+#   validate      GeMS_ValidateScan.scanTables on every table, and the Glossary, DataSources,
+#                 MapUnit, and _ID cross-checks of GeMS_ValidateDatabase_Arc10.py
+#   topology      TopologyCheck without its geoprocessing: arc ends grouped into nodes with
+#                 GeMS_Linework.NodeBuilder and ArcStore, GeMS_TopologyRules.processNodes,
+#                 and arcs to be merged grouped with DisjointSet. Left and right map units,
+#                 which TopologyCheck gets from Identity_analysis, are found here by
+#                 point-in-polygon tests against MapUnitPolys, and that time is included
+#   plotatscales  GeMS_PointThinning.plotAtScales on OrientationPoints
+#   setsymbols    GeMS_SymbolRules line and orientation-point rules on ContactsAndFaults
+#                 and OrientationPoints
+#   reid          reID logic: new _ID values for every table, in reID's sort order, and
+#                 lookup of every foreign-key value, with the per-row steps of reID
+#                 (newPrimaryKey, remapForeignKeys). The number of foreign-key values that
+#                 match no primary key is printed. Nothing is written back
+#   makepolys     MakePolys3 logic: GeMS_Polygonizer polygons from non-concealed
+#                 ContactsAndFaults, labeled from MapUnitPolys at their inside points, and
+#                 the multi-label and unlabeled checks. Nothing is written back
+# Throughput is rows per second, rows being ContactsAndFaults features for topology and
+#   setsymbols and makepolys, OrientationPoints for plotatscales, and all rows for the other stages.
+#   Peak memory is the peak resident set size of the stage's process, which includes
+#   the Python interpreter. It is not measured on Windows unless psutil is installed.
+# 18 October 2026: first version
+# 18 October 2026: reid calls the reID per-row functions; empty peak-memory field in the CSV
+#   when memory is not measured
+
+import sys, os, os.path, math, time, subprocess
+from array import array
+
+scriptsFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts')
+sys.path.insert(0, scriptsFolder)
+
+stageNames = ['generate','validate','topology','plotatscales','setsymbols','reid','makepolys']
+
+# as in GeMS_TopologyCheck_Arc10.py
+arcFields = ['Type','IsConcealed','ExistenceConfidence',
+             'IdentityConfidence','LocationConfidenceMeters',
+             'DataSourceID','Notes']
+zeroValue = 2 * 0.001    # 2 * default XYTolerance of a projected spatial reference, in meters
+hKeyTestValue = '2'
+# as in GeMS_SetPlotAtScales_Arc10.py, with minimum separation 2 mm and maximum PlotAtScale 100,000
+minSeparationMapUnits = 2 / 1000.0
+searchRadius = minSeparationMapUnits * 100000
+# as in GeMS_SetSymbols_Arc10.py, at 1:24,000
+mapScale = 24000.0
+approxThreshold = mapScale * 1.0 / 1000.0
+inferredThreshold = mapScale * 2.0 / 1000.0
+orientThresholdDegrees = 5.0
+
+def peakRSS():
+    # peak resident set size of this process, in MB, or None
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            return rss / 1048576.0   # bytes
+        return rss / 1024.0          # kilobytes
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1048576.0
+    except (ImportError, AttributeError):
+        return None
+
+##############################
+# stages. Each takes the path of a GeoPackage and returns the number of rows processed
+
+def generateStage(gpkg, nArcs):
+    from GeMS_SyntheticDatabase import makeDatabase
+    counts = makeDatabase(gpkg, nArcs)
+    return sum(counts.values())
+
+def totalRows(gpkg):
+    import GeMS_DataAccess
+    n = 0
+    for table in GeMS_DataAccess.listTables(gpkg) + GeMS_DataAccess.listFeatureClasses(gpkg):
+        n = n + GeMS_DataAccess.getCount(gpkg+'/'+table)
+    return n
+
+def validateStage(gpkg):
+    from GeMS_ValidateScan import scanTables, workspaceJobs, KeyRegistry
+    keys = {'Glossary':KeyRegistry(), 'DataSources':KeyRegistry(), 'MapUnit':KeyRegistry(), '_ID':KeyRegistry()}
+    for scan in scanTables(workspaceJobs(gpkg)):
+        # as mergeScan in GeMS_ValidateDatabase_Arc10.py
+        table = scan.table
+        for xx in scan.glossaryTerms:
+            keys['Glossary'].define(xx, table)
+        for xx in scan.IDs:
+            keys['_ID'].define(xx, table)
+        for xx in scan.dataSourceIDs:
+            keys['DataSources'].define(xx, table)
+        for xx in scan.dmuMapUnits:
+            keys['MapUnit'].define(xx, table)
+        for xx in scan.mapUnitRefs:
+            keys['MapUnit'].addRef(xx[0], xx[1], table)
+        for xx in scan.glossaryRefs:
+            keys['Glossary'].addRef(xx[0], xx[1], table)
+        for xx in scan.dataSourceRefs:
+            keys['DataSources'].addRef(xx[0], xx[1], table)
+    for k in keys.values():
+        k.missing(); k.unused(); k.duplicateDefinitions()
+    return totalRows(gpkg)
+
+class PolygonIndex:
+    # grid index of polygon bounding boxes, for finding the polygon that contains a point
+    def __init__(self, cellSize):
+        self.cellSize = float(cellSize)
+        self.cells = {}
+        self.rings = []    # per polygon, list of array('d') of x0, y0, x1, y1, ...
+        self.values = []
+    def add(self, paths, value):
+        n = len(self.values)
+        rings = []
+        for path in paths:
+            a = array('d')
+            for p in path:
+                a.append(p[0]); a.append(p[1])
+            rings.append(a)
+        self.rings.append(rings)
+        self.values.append(value)
+        xs = [p[0] for path in paths for p in path]
+        ys = [p[1] for path in paths for p in path]
+        cs = self.cellSize
+        for i in range(int(math.floor(min(xs)/cs)), int(math.floor(max(xs)/cs)) + 1):
+            for j in range(int(math.floor(min(ys)/cs)), int(math.floor(max(ys)/cs)) + 1):
+                self.cells.setdefault((i, j), []).append(n)
+    def find(self, x, y):
+        # value of first polygon that contains (x, y), or None
+        cell = (int(math.floor(x/self.cellSize)), int(math.floor(y/self.cellSize)))
+        for n in self.cells.get(cell, ()):
+            inside = False
+            for a in self.rings[n]:
+                for k in range(0, len(a) - 2, 2):
+                    x0 = a[k]; y0 = a[k+1]; x1 = a[k+2]; y1 = a[k+3]
+                    if (y0 > y) <> (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+                        inside = not inside
+            if inside:
+                return self.values[n]
+        return None
+
+def leftRightPoints(pts, offset):
+    # points just left and right of the middle of the first segment of a line
+    (x0, y0), (x1, y1) = pts[0][:2], pts[1][:2]
+    dx = x1 - x0; dy = y1 - y0
+    d = math.hypot(dx, dy)
+    mx = (x0 + x1) / 2.0; my = (y0 + y1) / 2.0
+    nx = -dy / d * offset; ny = dx / d * offset
+    return (mx + nx, my + ny), (mx - nx, my - ny)
+
+def topologyStage(gpkg):
+    import GeMS_DataAccess
+    from GeMS_Linework import NodeBuilder, ArcStore, DisjointSet
+    from GeMS_TopologyRules import processNodes, ptsGeographicAzimuth
+    hKeyDict = {None:None, '':None}
+    with GeMS_DataAccess.searchCursor(gpkg+'/DescriptionOfMapUnits', ['MapUnit','HierarchyKey']) as cursor:
+        for row in cursor:
+            hKeyDict[row[0]] = row[1]
+    nPolys = GeMS_DataAccess.getCount(gpkg+'/MapUnitPolys')
+    with GeMS_DataAccess.searchCursor(gpkg+'/MapUnitPolys', ['SHAPE@AREA']) as cursor:
+        area = sum([row[0] for row in cursor])
+    polys = PolygonIndex(math.sqrt(area / max(nPolys, 1)))
+    with GeMS_DataAccess.searchCursor(gpkg+'/MapUnitPolys', ['SHAPE@','MapUnit']) as cursor:
+        for row in cursor:
+            polys.add(row[0].paths, row[1])
+    nodes = NodeBuilder(zeroValue)
+    arcStore = ArcStore()
+    with GeMS_DataAccess.searchCursor(gpkg+'/ContactsAndFaults', ['SHAPE@','OID@'] + arcFields) as cursor:
+        for row in cursor:
+            pts = row[0].paths[0]
+            startAzi = ptsGeographicAzimuth(pts[0], pts[1])
+            endAzi = ptsGeographicAzimuth(pts[-1], pts[-2])
+            left, right = leftRightPoints(pts, zeroValue)
+            lmu = polys.find(*left); rmu = polys.find(*right)
+            attribs = row[2:]
+            nodes.add(pts[0][0], pts[0][1], arcStore.add(attribs, startAzi, 'From', rmu, lmu, row[1]))
+            nodes.add(pts[-1][0], pts[-1][1], arcStore.add(attribs, endAzi, 'To', rmu, lmu, row[1]))
+    nodeList = nodes.sortedNodes(arcStore.lineDir.__getitem__)
+    badNodes, faultFlipNodes, missingConcealedArcNodes, connectFIDs = processNodes(nodeList, hKeyDict, arcStore, hKeyTestValue)
+    newLineIDs = DisjointSet()
+    for pair in connectFIDs:
+        newLineIDs.union(pair[0], pair[1])
+    newLineIDs.groups()
+    return len(arcStore) / 2
+
+def plotAtScalesStage(gpkg):
+    import GeMS_DataAccess
+    from GeMS_PointThinning import plotAtScales
+    points = {}
+    with GeMS_DataAccess.searchCursor(gpkg+'/OrientationPoints', ['OID@','SHAPE@XY']) as cursor:
+        for row in cursor:
+            points[row[0]] = row[1]
+    plotAtScales(points, searchRadius, minSeparationMapUnits)
+    return len(points)
+
+def setSymbolsStage(gpkg):
+    import GeMS_DataAccess
+    from GeMS_SymbolRules import buildSymbolDicts, lineSymbol, orientationPointSymbol
+    dictionaryFile = os.path.join(scriptsFolder, '..', 'Resources', 'Type-FgdcSymbol.txt')
+    EightfoldLineDict, TwofoldOrientPointDict, MySymbolDict = buildSymbolDicts(dictionaryFile)
+    n = 0
+    fields = ['Type','IsConcealed','LocationConfidenceMeters','ExistenceConfidence','IdentityConfidence']
+    with GeMS_DataAccess.searchCursor(gpkg+'/ContactsAndFaults', fields) as cursor:
+        for row in cursor:
+            lineSymbol(EightfoldLineDict, MySymbolDict, row[0], row[1], row[2], row[3], row[4],
+                       approxThreshold, inferredThreshold, True)
+            n += 1
+    with GeMS_DataAccess.searchCursor(gpkg+'/OrientationPoints', ['Type','OrientationConfidenceDegrees']) as cursor:
+        for row in cursor:
+            orientationPointSymbol(TwofoldOrientPointDict, MySymbolDict, row[0], row[1],
+                                   orientThresholdDegrees, True)
+    return n
+
+def reIDStage(gpkg):
+    import GeMS_DataAccess
+    from GeMS_ReIDRules import idRoot, idWidth, newPrimaryKey, remapForeignKeys, purgeQuasiNullKeys, IdRemap
+    # inventory, as inventoryDatabase and getPFKeys
+    fctbs = []
+    for table in GeMS_DataAccess.listTables(gpkg) + GeMS_DataAccess.listFeatureClasses(gpkg):
+        pKey = ''
+        fKeys = []
+        for field in GeMS_DataAccess.listFields(gpkg+'/'+table):
+            if field.name == table+'_ID':
+                pKey = field.name
+            elif field.name.find('ID') > 0 and field.type == 'String':
+                fKeys.append(field.name)
+        fctbs.append([table, pKey, fKeys])
+    # new primary keys, as buildIdDict
+    remap = IdRemap()
+    rootCounter = 0
+    nRows = 0
+    for table, pKey, fKeys in fctbs:
+        if table == 'Glossary': sortKey = 'Term'
+        elif table == 'DescriptionOfMapUnits': sortKey = 'HierarchyKey'
+        else: sortKey = 'OBJECTID'
+        keyRoot, rootCounter = idRoot(table, rootCounter)
+        if pKey <> '':
+            nrows = GeMS_DataAccess.getCount(gpkg+'/'+table)
+            width = idWidth(nrows)
+            remap.startTable(keyRoot, width, nrows)
+            n = 1
+            with GeMS_DataAccess.searchCursor(gpkg+'/'+table, [pKey], None, sortKey) as cursor:
+                for row in cursor:
+                    newPrimaryKey(remap, row[0], n, keyRoot, width, False)
+                    n = n+1
+            nRows = nRows + n - 1
+    purgeQuasiNullKeys(remap.ids)
+    # foreign keys, as reID
+    unmatched = 0
+    for table, pKey, fKeys in fctbs:
+        if pKey <> '' and len(fKeys) > 0:
+            with GeMS_DataAccess.searchCursor(gpkg+'/'+table, fKeys) as cursor:
+                for row in cursor:
+                    unmatched += len(remapForeignKeys(remap, list(row)))
+    print 'NOTE', unmatched, 'foreign-key values match no primary key'
+    return nRows
+
+def makePolysStage(gpkg):
+    import GeMS_DataAccess
+    from GeMS_Polygonizer import Polygonizer, polygonIndex, findPolygon, labelFaces, labelErrors
+    oldPolygons = []
+    with GeMS_DataAccess.searchCursor(gpkg+'/MapUnitPolys', ['SHAPE@','MapUnit']) as cursor:
+        for row in cursor:
+            oldPolygons.append([row[0].paths, row[1]])
+    oldIndex = polygonIndex(oldPolygons)
+    polygonizer = Polygonizer(zeroValue / 2)
+    n = 0
+    with GeMS_DataAccess.searchCursor(gpkg+'/ContactsAndFaults', ['SHAPE@','IsConcealed']) as cursor:
+        for row in cursor:
+            n = n + 1
+            if not row[1] in ('Y','y'):
+                for path in row[0].paths:
+                    polygonizer.addLine(path)
+    faces = polygonizer.faces()
+    labels = []
+    for i in range(len(faces)):
+        x, y = faces[i].interiorPoint()
+        mapUnit = findPolygon(oldIndex, x, y)
+        labels.append([x, y, i, mapUnit, None])
+    labelFaces(faces, labels)
+    labelErrors(faces)
+    return n
+
+def runStage(stage, gpkg, nArcs):
+    if stage == 'generate':
+        return generateStage(gpkg, nArcs)
+    return {'validate':validateStage, 'topology':topologyStage, 'plotatscales':plotAtScalesStage,
+            'setsymbols':setSymbolsStage, 'reid':reIDStage, 'makepolys':makePolysStage}[stage](gpkg)
+
+##############################
+
+def runChild(stage, gpkg, nArcs):
+    # runs one stage in a new process, returns (rows, seconds, peak MB) or None if it failed
+    command = [sys.executable, os.path.abspath(__file__), '--stage', stage, gpkg, str(nArcs)]
+    p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = p.communicate()[0]
+    for aline in output.splitlines():
+        if aline.startswith('NOTE '):
+            print '%10i %-13s (%s)' % (nArcs, stage, aline[5:])
+        if aline.startswith('RESULT '):
+            words = aline.split()
+            peak = None
+            if words[3] <> 'None':
+                peak = float(words[3])
+            return int(words[1]), float(words[2]), peak
+    print output
+    return None
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--stage':
+        stage, gpkg, nArcs = sys.argv[2], sys.argv[3], int(sys.argv[4])
+        t0 = time.time()
+        rows = runStage(stage, gpkg, nArcs)
+        seconds = time.time() - t0
+        print 'RESULT', rows, seconds, peakRSS()
+        sys.exit(0)
+
+    maxArcs = 1000000
+    workFolder = os.getcwd()
+    stages = stageNames
+    if len(sys.argv) > 1:
+        maxArcs = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        workFolder = sys.argv[2]
+    if len(sys.argv) > 3:
+        stages = sys.argv[3].split(',')
+        for stage in stages:
+            if not stage in stageNames:
+                print 'Unknown stage '+stage+'. Stages are '+', '.join(stageNames)
+                sys.exit(1)
+
+    csvPath = os.path.join(workFolder, 'GeMS_Benchmarks.csv')
+    newCsv = not os.path.exists(csvPath)
+    csv = open(csvPath, 'a')
+    if newCsv:
+        csv.write('date,arcs,stage,rows,seconds,rowsPerSecond,peakMB\n')
+    print '%10s %-13s %10s %10s %12s %10s' % ('arcs','stage','rows','seconds','rows/s','peak MB')
+    nArcs = 1000
+    while nArcs <= maxArcs:
+        gpkg = os.path.join(workFolder, 'GeMS_synthetic_'+str(nArcs)+'.gpkg')
+        for stage in stages:
+            if stage == 'generate' and os.path.exists(gpkg):
+                continue
+            if stage <> 'generate' and not os.path.exists(gpkg):
+                runChild('generate', gpkg, nArcs)
+            result = runChild(stage, gpkg, nArcs)
+            if result == None:
+                print '%10i %-13s failed' % (nArcs, stage)
+                continue
+            rows, seconds, peak = result
+            rate = rows / max(seconds, 1e-9)
+            peakStr = '-'
+            if peak <> None:
+                peakStr = '%.1f' % peak
+            print '%10i %-13s %10i %10.2f %12.0f %10s' % (nArcs, stage, rows, seconds, rate, peakStr)
+            peakField = ''
+            if peak <> None:
+                peakField = peakStr
+            csv.write('%s,%i,%s,%i,%.3f,%.0f,%s\n' % (time.strftime('%Y-%m-%d %H:%M'), nArcs, stage, rows, seconds, rate, peakField))
+            csv.flush()
+        if nArcs * 10 > maxArcs and nArcs < maxArcs:
+            nArcs = maxArcs
+        else:
+            nArcs = nArcs * 10
+    csv.close()
@@ -0,0 +1,105 @@
+# GeMS_DisjointSetBenchmark.py
+# Times the grouping of connectFIDs pairs, as done in TopologyCheck.unplanarize, with
+#   the old dictionary-relabelling method and with GeMS_Linework.DisjointSet.
+#
+# Usage:  python GeMS_DisjointSetBenchmark.py [maxPairs] [maxOldPairs]
+#   maxPairs     largest number of pairs to time with DisjointSet (default 1000000)
+#   maxOldPairs  largest number of pairs to time with the old method (default 20000),
+#                beyond which it takes minutes to hours
+#
+# Pairs are synthetic planarized arcs: chains of segments of random length, listed in
+#   random order so that partial groups are built and then joined, which is the case
+#   that made the old method quadratic. Runs without arcpy.
+# 18 October 2026: first version
+
+import sys, os, random, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts'))
+from GeMS_Linework import DisjointSet
+
+def makePairs(nPairs, maxChain=200, seed=1):
+    # returns list of [fid1, fid2] pairs and list of chains (lists of fids)
+    rnd = random.Random(seed)
+    pairs = []; chains = []
+    fid = 1
+    while len(pairs) < nPairs:
+        n = min(rnd.randint(2, maxChain), nPairs - len(pairs) + 1)
+        chain = range(fid, fid + n)
+        rnd.shuffle(chain)
+        for i in range(n - 1):
+            pairs.append([chain[i], chain[i+1]])
+        chains.append(chain)
+        fid = fid + n + 1   # leave a gap: an arc that joins nothing
+    rnd.shuffle(pairs)
+    return pairs, chains
+
+def oldNewLineIDs(connectFIDs):
+    # the method formerly used in TopologyCheck.unplanarize
+    newLineIDs = {}
+    for pair in connectFIDs:
+        f1 = pair[0]; f2 = pair[1]
+        if newLineIDs.has_key(f1):
+            if newLineIDs.has_key(f2):
+                for i in newLineIDs.keys():
+                    if newLineIDs[i]==f2:
+                        newLineIDs[i] = newLineIDs[f1]
+            else:
+                newLineIDs[f2] = newLineIDs[f1]
+        elif newLineIDs.has_key(f2):
+            newLineIDs[f1] = newLineIDs[f2]
+        else:
+            newLineIDs[f1] = f1
+            newLineIDs[f2] = f1
+    return newLineIDs
+
+def newNewLineIDs(connectFIDs):
+    newLineIDs = DisjointSet()
+    for pair in connectFIDs:
+        newLineIDs.union(pair[0], pair[1])
+    # resolve every label, as the NewLineID UpdateCursor does
+    labels = {}
+    for fid in newLineIDs.parent.keys():
+        labels[fid] = newLineIDs.find(fid)
+    return labels
+
+def checkLabels(labels, chains):
+    # every chain gets one label, and no two chains share a label
+    used = set()
+    for chain in chains:
+        chainLabels = set(labels[fid] for fid in chain)
+        if len(chainLabels) <> 1:
+            return False
+        label = chainLabels.pop()
+        if label in used:
+            return False
+        used.add(label)
+    return True
+
+def timeIt(function, arg):
+    t0 = time.time()
+    result = function(arg)
+    return time.time() - t0, result
+
+if __name__ == '__main__':
+    maxPairs = 1000000
+    maxOldPairs = 20000
+    if len(sys.argv) > 1:
+        maxPairs = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        maxOldPairs = int(sys.argv[2])
+
+    print '%10s %12s %14s %12s %14s  %s' % ('pairs','old (s)','old pairs/s','new (s)','new pairs/s','groups ok')
+    nPairs = 1000
+    while nPairs <= maxPairs:
+        pairs, chains = makePairs(nPairs)
+        if nPairs <= maxOldPairs:
+            oldT, oldLabels = timeIt(oldNewLineIDs, pairs)
+            oldCol = '%12.3f %14.0f' % (oldT, nPairs/max(oldT, 1e-9))
+        else:
+            oldCol = '%12s %14s' % ('-', '-')
+        newT, newLabels = timeIt(newNewLineIDs, pairs)
+        print '%10i %s %12.3f %14.0f  %s' % (nPairs, oldCol, newT, nPairs/max(newT, 1e-9), checkLabels(newLabels, chains))
+        if nPairs * 10 > maxPairs and nPairs < maxPairs:
+            nPairs = maxPairs
+        else:
+            nPairs = nPairs * 10
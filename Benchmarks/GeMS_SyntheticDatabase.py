@@ -0,0 +1,269 @@
+# GeMS_SyntheticDatabase.py
+# Builds a synthetic GeMS database in a GeoPackage, for timing tools at sizes that
+#   real maps seldom reach. Tables and fields are taken from GeMS_Definition.tableDict.
+#
+# Usage:  python GeMS_SyntheticDatabase.py <output.gpkg> <nArcs> [pointsPerPoly] [seed]
+#   nArcs          approximate number of ContactsAndFaults features
+#   pointsPerPoly  average number of OrientationPoints in each map-unit polygon (default 1)
+#   seed           random seed (default 1). The same arguments always give the same database
+#
+# The map is a wall of bricks: rows of polygons, each 2 * spacing wide and spacing tall,
+#   with alternate rows offset by half a brick, so that every interior node joins 3 arcs.
+#   Nodes are jittered and arcs are given a few wiggly vertices, never so much that arcs
+#   can cross, so ContactsAndFaults is planar and each MapUnitPolys ring is built from
+#   exactly the vertices of the arcs that bound it. There are about nArcs/3 polygons.
+# Each polygon gets one of nUnits map units, usually different from its neighbours.
+#   Arcs between different units are contacts, arcs between polygons of the same unit
+#   (sameUnitFraction of polygons choose a neighbour's unit) are faults, and the edge
+#   of the map is map boundary. DescriptionOfMapUnits, Glossary, and DataSources define
+#   every MapUnit, term, and DataSources_ID that is used, and nothing else.
+# Rows are generated one brick-row at a time, so memory use does not grow with nArcs.
+# 18 October 2026: first version
+
+import sys, os, math, random, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts'))
+from GeMS_Definition import tableDict
+import GeMS_DataAccess
+from GeMS_DataAccess import Geometry
+
+unitNames = ['Qal','Qls','Qt','Qoa','Tb','Tss','Tv','Kgr','Jm','Trs','Pzs','pCm']
+faultTypes = ['fault','normal fault','thrust fault']
+orientationTypes = ['bedding','inclined bedding','overturned bedding','vertical bedding','foliation']
+glossaryTerms = {
+    'contact':'Boundary between map units',
+    'fault':'Fracture along which there has been displacement',
+    'normal fault':'Fault on which the hanging wall has moved down',
+    'thrust fault':'Low-angle fault on which the hanging wall has moved up',
+    'map boundary':'Edge of mapped area',
+    'bedding':'Planar layering in sedimentary rocks',
+    'inclined bedding':'Bedding that dips',
+    'overturned bedding':'Bedding that has been rotated past vertical',
+    'vertical bedding':'Bedding that dips 90 degrees',
+    'foliation':'Planar fabric in metamorphic rocks',
+    'certain':'Identity and existence of a feature are certain',
+    'questionable':'Identity or existence of a feature is questionable',
+    'Heading1':'Paragraph style for headings in the DMU',
+    'Standard':'Paragraph style for map units in the DMU'}
+sourceID = 'DAS1'
+
+def fieldNames(table):
+    return [f[0] for f in tableDict[table]]
+
+def makeRow(table, values):
+    # list of values in tableDict order, None for fields not in values
+    return [values.get(f) for f in fieldNames(table)]
+
+def mapUnitList(nUnits):
+    units = list(unitNames[:nUnits])
+    for i in range(len(units), nUnits):
+        units.append('U'+str(i+1).zfill(3))
+    return units
+
+def brickBreaks(row, nBricks):
+    # x values (in half-brick units) of the ends of the bricks in a row
+    if row % 2 == 0:
+        return range(0, 2*nBricks + 1, 2)
+    return [0] + range(1, 2*nBricks, 2) + [2*nBricks]
+
+class BrickWall:
+    # geometry of the map. Node (i, j) is at half-brick column i, row line j
+    def __init__(self, nRows, nBricks, spacing, seed, wiggles=3):
+        self.nRows = nRows
+        self.nBricks = nBricks
+        self.nColumns = 2*nBricks
+        self.spacing = float(spacing)
+        self.seed = seed
+        self.wiggles = wiggles
+        self.nodeCache = {}
+    def rnd(self, *key):
+        return random.Random(hash((self.seed,) + key))
+    def node(self, i, j):
+        # jittered position of node (i, j). Nodes on the edge of the map stay on it
+        if not (i, j) in self.nodeCache:
+            r = self.rnd('node', i, j)
+            dx = dy = 0.0
+            if 0 < i < self.nColumns:
+                dx = r.uniform(-0.15, 0.15)
+            if 0 < j < self.nRows:
+                dy = r.uniform(-0.15, 0.15)
+            self.nodeCache[(i, j)] = ((i + dx) * self.spacing, (j + dy) * self.spacing)
+        return self.nodeCache[(i, j)]
+    def forgetRow(self, j):
+        # drop cached nodes on row line j
+        for i in range(self.nColumns + 1):
+            self.nodeCache.pop((i, j), None)
+    def edge(self, i0, j0, i1, j1):
+        # vertices of the arc from node (i0, j0) to node (i1, j1), which are adjacent
+        x0, y0 = self.node(i0, j0)
+        x1, y1 = self.node(i1, j1)
+        pts = [(x0, y0)]
+        onEdge = (i0 == i1 and i0 in (0, self.nColumns)) or (j0 == j1 and j0 in (0, self.nRows))
+        if not onEdge:
+            r = self.rnd('edge', i0, j0, i1, j1)
+            dx = x1 - x0; dy = y1 - y0
+            length = math.hypot(dx, dy)
+            nx = -dy / length; ny = dx / length
+            for k in range(1, self.wiggles + 1):
+                t = float(k) / (self.wiggles + 1)
+                off = r.uniform(-0.08, 0.08) * self.spacing
+                pts.append((x0 + t*dx + off*nx, y0 + t*dy + off*ny))
+        pts.append((x1, y1))
+        return pts
+
+def chooseUnit(rnd, units, neighbours, sameUnitFraction):
+    neighbours = [u for u in neighbours if u <> None]
+    if len(neighbours) > 0 and rnd.random() < sameUnitFraction:
+        return rnd.choice(neighbours)
+    candidates = [u for u in units if not u in neighbours]
+    if len(candidates) == 0:
+        candidates = units
+    return rnd.choice(candidates)
+
+def makeDatabase(path, nArcs, pointsPerPoly=1.0, nUnits=12, sameUnitFraction=0.05,
+                 spacing=100.0, seed=1):
+    # writes a new GeoPackage at path, returns dictionary of table: number of rows
+    nRows = max(2, int(round(math.sqrt(2.0 * nArcs / 3.0))))
+    nBricks = max(1, int(round(nArcs / (3.0 * nRows))))
+    wall = BrickWall(nRows, nBricks, spacing, seed)
+    units = mapUnitList(nUnits)
+    rnd = random.Random(seed)
+
+    GeMS_DataAccess.createGeoPackage(path)
+    for table in ('DataSources','Glossary','DescriptionOfMapUnits'):
+        GeMS_DataAccess.createTable(path, table, tableDict[table])
+    GeMS_DataAccess.createTable(path, 'ContactsAndFaults', tableDict['ContactsAndFaults'], 'Polyline')
+    GeMS_DataAccess.createTable(path, 'MapUnitPolys', tableDict['MapUnitPolys'], 'Polygon')
+    GeMS_DataAccess.createTable(path, 'OrientationPoints', tableDict['OrientationPoints'], 'Point')
+
+    cafFields = ['SHAPE@'] + fieldNames('ContactsAndFaults')
+    mupFields = ['SHAPE@'] + fieldNames('MapUnitPolys')
+    orpFields = ['SHAPE@XY'] + fieldNames('OrientationPoints')
+    counts = {'ContactsAndFaults':0, 'MapUnitPolys':0, 'OrientationPoints':0}
+    usedTerms = set(['certain', 'Standard'])
+    usedUnits = set()
+
+    def addArc(cursor, pts, left, right):
+        if left == None or right == None:
+            typ = 'map boundary'
+        elif left == right:
+            typ = faultTypes[hash((seed, pts[0])) % len(faultTypes)]
+        else:
+            typ = 'contact'
+        exConf = 'certain'
+        if rnd.random() < 0.05:
+            exConf = 'questionable'
+        usedTerms.add(typ); usedTerms.add(exConf)
+        counts['ContactsAndFaults'] += 1
+        values = {'Type':typ, 'IsConcealed':'N', 'LocationConfidenceMeters':rnd.choice((10.0, 25.0, 50.0)),
+                  'ExistenceConfidence':exConf, 'IdentityConfidence':'certain', 'DataSourceID':sourceID,
+                  'ContactsAndFaults_ID':'CAF'+str(counts['ContactsAndFaults'])}
+        cursor.insertRow([Geometry('polyline', [pts])] + makeRow('ContactsAndFaults', values))
+
+    with GeMS_DataAccess.insertCursor(path+'/ContactsAndFaults', cafFields) as cafCursor, \
+         GeMS_DataAccess.insertCursor(path+'/MapUnitPolys', mupFields) as mupCursor, \
+         GeMS_DataAccess.insertCursor(path+'/OrientationPoints', orpFields) as orpCursor:
+        below = [None] * wall.nColumns  # unit of brick in row below, by half-brick column
+        for j in range(nRows + 1):
+            # map units of bricks in row j, by half-brick column
+            here = [None] * wall.nColumns
+            if j < nRows:
+                breaks = brickBreaks(j, nBricks)
+                for b in range(len(breaks) - 1):
+                    i0, i1 = breaks[b], breaks[b+1]
+                    neighbours = set(below[i0:i1])
+                    if i0 > 0:
+                        neighbours.add(here[i0-1])
+                    unit = chooseUnit(rnd, units, neighbours, sameUnitFraction)
+                    usedUnits.add(unit)
+                    for i in range(i0, i1):
+                        here[i] = unit
+            # arcs along row line j: left of an arc drawn to the east is the row above
+            for i in range(wall.nColumns):
+                addArc(cafCursor, wall.edge(i, j, i+1, j), here[i], below[i])
+            if j < nRows:
+                # arcs between bricks of row j, drawn to the north
+                for i in breaks:
+                    left = right = None
+                    if i > 0:
+                        left = here[i-1]
+                    if i < wall.nColumns:
+                        right = here[i]
+                    addArc(cafCursor, wall.edge(i, j, i, j+1), left, right)
+                # bricks of row j, as clockwise rings
+                for b in range(len(breaks) - 1):
+                    i0, i1 = breaks[b], breaks[b+1]
+                    ring = wall.edge(i0, j, i0, j+1)
+                    for i in range(i0, i1):
+                        ring = ring + wall.edge(i, j+1, i+1, j+1)[1:]
+                    ring = ring + list(reversed(wall.edge(i1, j, i1, j+1)))[1:]
+                    for i in range(i1, i0, -1):
+                        ring = ring + list(reversed(wall.edge(i-1, j, i, j)))[1:]
+                    unit = here[i0]
+                    counts['MapUnitPolys'] += 1
+                    values = {'MapUnit':unit, 'IdentityConfidence':'certain', 'Label':unit,
+                              'DataSourceID':sourceID, 'MapUnitPolys_ID':'MUP'+str(counts['MapUnitPolys'])}
+                    mupCursor.insertRow([Geometry('polygon', [ring])] + makeRow('MapUnitPolys', values))
+                    # orientation points, well inside the brick
+                    nPoints = int(pointsPerPoly)
+                    if rnd.random() < pointsPerPoly - nPoints:
+                        nPoints += 1
+                    for n in range(nPoints):
+                        x = ((i0 + i1) / 2.0 + rnd.uniform(-0.4, 0.4) * (i1 - i0) / 2.0) * spacing
+                        y = (j + 0.5 + rnd.uniform(-0.25, 0.25)) * spacing
+                        typ = rnd.choice(orientationTypes)
+                        usedTerms.add(typ)
+                        counts['OrientationPoints'] += 1
+                        values = {'Type':typ, 'Azimuth':float(rnd.randint(0, 359)), 'Inclination':float(rnd.randint(5, 85)),
+                                  'LocationConfidenceMeters':10.0, 'IdentityConfidence':'certain',
+                                  'OrientationConfidenceDegrees':rnd.choice((5.0, 10.0, 15.0)), 'PlotAtScale':0.0,
+                                  'MapUnit':unit, 'LocationSourceID':sourceID, 'OrientationSourceID':sourceID,
+                                  'OrientationPoints_ID':'ORP'+str(counts['OrientationPoints'])}
+                        orpCursor.insertRow([(x, y)] + makeRow('OrientationPoints', values))
+            if j > 0:
+                wall.forgetRow(j - 1)
+            below = here
+
+    with GeMS_DataAccess.insertCursor(path+'/DescriptionOfMapUnits', fieldNames('DescriptionOfMapUnits')) as cursor:
+        n = 0
+        for unit in units:
+            if unit in usedUnits:
+                n += 1
+                values = {'MapUnit':unit, 'Name':'Unit '+unit, 'FullName':'Unit '+unit+' (synthetic)',
+                          'Age':'unknown', 'Description':'Synthetic map unit',
+                          'HierarchyKey':str(units.index(unit)+1).zfill(3),
+                          'ParagraphStyle':'Standard', 'Label':unit, 'DescriptionSourceID':sourceID,
+                          'DescriptionOfMapUnits_ID':'DMU'+str(n)}
+                cursor.insertRow(makeRow('DescriptionOfMapUnits', values))
+        counts['DescriptionOfMapUnits'] = n
+    with GeMS_DataAccess.insertCursor(path+'/Glossary', fieldNames('Glossary')) as cursor:
+        n = 0
+        for term in sorted(usedTerms):
+            n += 1
+            values = {'Term':term, 'Definition':glossaryTerms[term], 'DefinitionSourceID':sourceID,
+                      'Glossary_ID':'GLO'+str(n)}
+            cursor.insertRow(makeRow('Glossary', values))
+        counts['Glossary'] = n
+    with GeMS_DataAccess.insertCursor(path+'/DataSources', fieldNames('DataSources')) as cursor:
+        values = {'Source':'Synthetic data from GeMS_SyntheticDatabase.py', 'DataSources_ID':sourceID}
+        cursor.insertRow(makeRow('DataSources', values))
+        counts['DataSources'] = 1
+    return counts
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print 'Usage:  python GeMS_SyntheticDatabase.py <output.gpkg> <nArcs> [pointsPerPoly] [seed]'
+        sys.exit(1)
+    path = sys.argv[1]
+    nArcs = int(sys.argv[2])
+    pointsPerPoly = 1.0
+    seed = 1
+    if len(sys.argv) > 3:
+        pointsPerPoly = float(sys.argv[3])
+    if len(sys.argv) > 4:
+        seed = int(sys.argv[4])
+    t0 = time.time()
+    counts = makeDatabase(path, nArcs, pointsPerPoly, seed=seed)
+    for table in sorted(counts):
+        print '%-24s %10i' % (table, counts[table])
+    print 'built %s in %.1f s' % (path, time.time() - t0)
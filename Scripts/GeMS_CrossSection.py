@@ -0,0 +1,268 @@
+# GeMS_CrossSection.py
+# Column-at-a-time arithmetic for projecting map points onto a cross section, shared by
+#   GeMS_ProjectCrossSectionData_Arc10.py and GeMS_ProjectPtsToCrossSection_Arc10.py.
+#   The tools read whole columns (M, Z, LOC_ANGLE, Azimuth, Inclination, Type, ...) with
+#   one da cursor pass or FeatureClassToNumPyArray, call these functions once per column
+#   set, and write the results with one insert cursor or NumPyArrayToFeatureClass. Functions
+#   take sequences (lists, tuples, numpy arrays) with one value per point and return numpy
+#   arrays of floats. Missing input values are None or NaN; missing results are NaN (see
+#   valueOrNone). Angles are in degrees. Only openDEM and surfaceZ use arcpy.
+# 18 October 2026: first version, from the row-at-a-time functions of the two tools.
+#   Obliquity is folded modulo 180, so azimuths outside 0..360 no longer give negative
+#   values, and both tools use the same plot azimuth rule: a symbol plots rightward-down
+#   when its inclination direction is within 90 degrees of the section direction
+# 18 October 2026: SectionLine, for locating points along a section line in memory (station,
+#   signed offset, and line angle, as LocateFeaturesAlongRoutes and MakeRouteEventLayer give
+#   them), with orientSection, linearDistance, and surfaceZ. Points are selected by distance
+#   from the line, as the tools did by Buffer and Clip
+# 18 October 2026: openDEM, and surfaceZ reads Z values with GeMS_DEMSampler, without 3D
+#   Analyst, from DEMs that are GeoTIFF or .flt files in the coordinate system of the points
+# 18 October 2026: sectionAzimuths, sectionShapes, alongAndAcross, and apparentInclinations are
+#   numpy expressions over whole columns rather than loops over points. Results are rounded
+#   by numpy.round, which rounds exact halves to even
+# 18 October 2026: SectionLine raises ValueError for a line with fewer than two distinct
+#   vertices, rather than failing in max()
+
+import math, struct
+from array import array
+import numpy
+from GeMS_Polygonizer import STRtree
+from GeMS_DEMSampler import DEMSampler, isDEMFile
+
+nan = float('nan')
+
+def valueOrNone(v):
+    # NaN results are written as nulls
+    if v <> v:
+        return None
+    return v
+
+def cartesianToGeographic(angles):
+    # geographic azimuths (clockwise from north, 0..360) of cartesian angles (counterclockwise
+    #   from east, -270..90)
+    ctg = -90 - angles
+    return numpy.where(ctg < 0, ctg + 360, ctg)
+
+def isAxial(ptType):
+    m = False
+    if ptType == None:
+        return m
+    for s in ('axis','lineation',' L'):
+        if ptType.upper().find(s.upper()) > -1:
+            m = True
+    return m
+
+def obliq(theta1,theta2):
+    # angles between two directions, as lines: 0 (parallel) to 90 (at right angles)
+    obl = numpy.abs(theta1-theta2) % 180
+    return numpy.where(obl > 90, 180 - obl, obl)
+
+def azimuthDifference(a,b):
+    # a, b are azimuths in clockwise geographic notation
+    # azDiff is in range -180..180
+    # if azDiff < 0, a is counterclockwise of b
+    # if azDiff > 0, a is clockwise of b
+    azDiff = (a - b) % 360
+    return numpy.where(azDiff > 180, azDiff - 360, azDiff)
+
+def plotAzimuth(inclinationDirection, thetaXS, apparentInclination):
+    azDiff = azimuthDifference(thetaXS,inclinationDirection)
+    return numpy.where((azDiff >= -90) & (azDiff <= 90), 270 + apparentInclination, 270 - apparentInclination)
+
+def floatColumn(values, n=None):
+    # values as a numpy array of floats, with NaN for None. A single number is repeated n times
+    if isinstance(values, (int, long, float)):
+        return numpy.repeat(float(values), n)
+    return numpy.array(values, dtype=float)
+
+def sectionAzimuths(locAngles):
+    # geographic azimuths of the section line from LOC_ANGLE (cartesian, CCW from grid E)
+    with numpy.errstate(invalid='ignore'):
+        return cartesianToGeographic(floatColumn(locAngles))
+
+def sectionShapes(ms, zs, vertEx, missingZ=-999):
+    # section x (= M) and y (= Z * vertEx) of each point. Points without Z get y = missingZ
+    zs = floatColumn(zs)
+    ys = zs * vertEx
+    ys[zs <> zs] = missingZ
+    return floatColumn(ms), ys
+
+def alongAndAcross(xs, ys, x0, y0, thetaXS):
+    # distances of points along a straight section line that starts at (x0, y0) and runs
+    #   at cartesian angle thetaXS, and from it (+ = right of the line, toward the viewer)
+    c = math.cos(math.radians(thetaXS))
+    s = math.sin(math.radians(thetaXS))
+    x = floatColumn(xs) - x0
+    y = floatColumn(ys) - y0
+    return x*c + y*s, x*s - y*c
+
+def apparentInclinations(azimuths, inclinations, axial, csAzimuths, vertEx):
+    # apparent inclination, obliquity, and plot azimuth (rounded to 0.01 degree) of
+    #   orientation measurements on a section of vertical exaggeration vertEx.
+    #   azimuths are strikes (right-hand rule) of planes, or trends of lines where axial
+    #   is true; csAzimuths are geographic azimuths of the section, or a single azimuth
+    azi = floatColumn(azimuths)
+    inc = floatColumn(inclinations)
+    thetaXS = floatColumn(csAzimuths, len(azi))
+    axial = numpy.array(axial, dtype=bool)
+    with numpy.errstate(invalid='ignore'):
+        oblique = obliq(azi,thetaXS)
+        factor = numpy.where(axial, numpy.cos(numpy.radians(oblique)), numpy.sin(numpy.radians(oblique)))
+        inclinationDirection = numpy.where(axial, azi, azi + 90)
+        appIncs = numpy.degrees(numpy.arctan(vertEx * numpy.tan(numpy.radians(inc)) * factor))
+        plotAzimuths = plotAzimuth(inclinationDirection,thetaXS,appIncs)
+    missing = (azi <> azi) | (inc <> inc) | (thetaXS <> thetaXS)
+    results = []
+    for values in (appIncs, oblique, plotAzimuths):
+        values = numpy.round(values, 2)
+        values[missing] = nan
+        results.append(values)
+    return results
+
+# Section lines
+
+startCorners = {'UPPER_LEFT':(0, 1), 'NW':(0, 1), 'UPPER_RIGHT':(1, 1), 'NE':(1, 1),
+                'LOWER_LEFT':(0, 0), 'SW':(0, 0), 'LOWER_RIGHT':(1, 0), 'SE':(1, 0)}
+
+def orientSection(vertices, startCorner):
+    # vertices in the order that CreateRoutes_lr measures them: from the end nearest the
+    #   startCorner (UPPER_LEFT, LOWER_LEFT, UPPER_RIGHT, LOWER_RIGHT, or NW, SW, NE, SE)
+    #   of the line's envelope
+    xs = [v[0] for v in vertices]
+    ys = [v[1] for v in vertices]
+    cx, cy = startCorners[startCorner.upper()]
+    cornerX = [min(xs), max(xs)][cx]
+    cornerY = [min(ys), max(ys)][cy]
+    d0 = math.hypot(vertices[0][0] - cornerX, vertices[0][1] - cornerY)
+    d1 = math.hypot(vertices[-1][0] - cornerX, vertices[-1][1] - cornerY)
+    if d1 < d0:
+        return vertices[::-1]
+    return list(vertices)
+
+linearUnitMeters = {'meters':1.0, 'meter':1.0, 'kilometers':1000.0, 'centimeters':0.01, 'millimeters':0.001,
+                    'decimeters':0.1, 'feet':0.3048, 'foot':0.3048, 'internationalfeet':0.3048,
+                    'usfeet':1200.0/3937, 'us_feet':1200.0/3937, 'inches':0.0254, 'yards':0.9144,
+                    'miles':1609.344, 'nauticalmiles':1852.0}
+
+def linearDistance(text, metersPerUnit=1.0):
+    # a distance such as '500' or '500 Meters' (as given to Buffer_analysis), in units of
+    #   metersPerUnit meters. A distance without units is taken to be in those units
+    words = text.split()
+    d = float(words[0])
+    if len(words) > 1 and words[1].lower() in linearUnitMeters:
+        d = d * linearUnitMeters[words[1].lower()] / metersPerUnit
+    return d
+
+class SectionLine:
+    # A section line, for linear referencing of points without route feature classes.
+    #   vertices are (x, y) in measure order (see orientSection). Stations are the length
+    #   along the line from its first vertex, as CreateRoutes_lr LENGTH makes them, unless
+    #   measures (one per vertex, as from a line that has M values) are given.
+    # Segments are held in an STRtree, so that the segment nearest a point is found
+    #   among those within the search distance only
+    def __init__(self, vertices, measures=None):
+        self.vertices = [(float(v[0]), float(v[1])) for v in vertices]
+        if measures == None:
+            measures = [0.0]
+            for i in range(1, len(vertices)):
+                measures.append(measures[-1] + math.hypot(vertices[i][0] - vertices[i-1][0],
+                                                          vertices[i][1] - vertices[i-1][1]))
+        self.measures = list(measures)
+        items = []
+        for i in range(len(self.vertices) - 1):
+            (x0, y0), (x1, y1) = self.vertices[i], self.vertices[i+1]
+            if x0 <> x1 or y0 <> y1:
+                items.append([min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), i])
+        if len(items) == 0:
+            raise ValueError('Section line has no segments of non-zero length')
+        self.lastSegment = max([it[4] for it in items])
+        self.firstSegment = min([it[4] for it in items])
+        self.index = STRtree(items)
+    def locate(self, x, y, maxDistance, flatEnds=False):
+        # returns (station, offset, angle) of (x, y) on the nearest segment, or None if no
+        #   segment is within maxDistance. offset is the distance from the line, + to the right
+        #   looking in the measure direction (toward the viewer of the section); angle is that of
+        #   the segment, in degrees counterclockwise from grid east, as LOC_ANGLE from
+        #   MakeRouteEventLayer with TANGENT angles. With flatEnds, points beyond the ends of
+        #   the line are not located, as by a buffer with FLAT ends
+        best = None
+        for i in self.index.search(x - maxDistance, y - maxDistance, x + maxDistance, y + maxDistance):
+            (x0, y0), (x1, y1) = self.vertices[i], self.vertices[i+1]
+            dx = x1 - x0
+            dy = y1 - y0
+            t = ((x - x0)*dx + (y - y0)*dy) / (dx*dx + dy*dy)
+            tc = min(max(t, 0.0), 1.0)
+            d = math.hypot(x - x0 - tc*dx, y - y0 - tc*dy)
+            if best == None or d < best[0] or (d == best[0] and i < best[1]):
+                best = (d, i, t, tc)
+        if best == None or best[0] > maxDistance:
+            return None
+        d, i, t, tc = best
+        if flatEnds and ((i == self.firstSegment and t < 0) or (i == self.lastSegment and t > 1)):
+            return None
+        (x0, y0), (x1, y1) = self.vertices[i], self.vertices[i+1]
+        dx = x1 - x0
+        dy = y1 - y0
+        station = self.measures[i] + tc * (self.measures[i+1] - self.measures[i])
+        if dx*(y - y0) - dy*(x - x0) > 0:   # left of the line
+            d = -d
+        return station, d, math.degrees(math.atan2(dy, dx))
+    def locatePoints(self, xys, maxDistance, flatEnds=False):
+        # locates each of xys, a sequence of (x, y). Returns (indexes of the points that are
+        #   located, and their stations, offsets, and angles)
+        located = array('l')
+        stations = array('d')
+        offsets = array('d')
+        angles = array('d')
+        for n in xrange(len(xys)):
+            x, y = xys[n][:2]
+            if x == None or y == None:
+                continue
+            loc = self.locate(x, y, maxDistance, flatEnds)
+            if loc <> None:
+                located.append(n)
+                stations.append(loc[0])
+                offsets.append(loc[1])
+                angles.append(loc[2])
+        return located, stations, offsets, angles
+
+# DEMs
+
+demSamplers = {}   # DEM catalog path: DEMSampler, or None if it can't be read
+
+def openDEM(dem, spatialReference):
+    # DEMSampler of dem, if it is a file that GeMS_DEMSampler reads and is in spatialReference,
+    #   else None. Samplers are kept open, so their block caches are shared by later calls
+    import arcpy
+    desc = arcpy.Describe(dem)
+    path = desc.catalogPath
+    if not path in demSamplers:
+        sampler = None
+        demSR = desc.spatialReference
+        if isDEMFile(path) and demSR.name == spatialReference.name and demSR.factoryCode == spatialReference.factoryCode:
+            try:
+                sampler = DEMSampler(path)
+            except (ValueError, KeyError, EnvironmentError, struct.error):
+                sampler = None
+        demSamplers[path] = sampler
+    return demSamplers[path]
+
+def surfaceZ(xys, dem, spatialReference):
+    # Z values from dem at each of xys, bilinearly interpolated, None where the DEM has no value.
+    #   Read by openDEM's sampler where there is one, else by AddSurfaceInformation_3d
+    #   (LINEAR), which needs 3D Analyst
+    sampler = openDEM(dem, spatialReference)
+    if sampler <> None:
+        return sampler.values(xys)
+    import arcpy
+    fc = 'in_memory/xxxSurfaceZ'
+    if arcpy.Exists(fc):
+        arcpy.Delete_management(fc)
+    arcpy.CreateFeatureclass_management('in_memory', 'xxxSurfaceZ', 'POINT', '', '', '', spatialReference)
+    with arcpy.da.InsertCursor(fc, ['SHAPE@XY']) as cursor:
+        for xy in xys:
+            cursor.insertRow([xy[:2]])
+    arcpy.AddSurfaceInformation_3d(fc, dem, 'Z', 'LINEAR')
+    zs = [row[0] for row in arcpy.da.SearchCursor(fc, ['Z'], sql_clause=(None, 'ORDER BY OBJECTID'))]
+    arcpy.Delete_management(fc)
+    return zs
@@ -0,0 +1,372 @@
+# GeMS_DEMSampler.py
+# Reads elevations from a DEM file without arcpy or 3D Analyst, for the cross-section tools
+#   (see GeMS_CrossSection.surfaceZ), in place of AddSurfaceInformation_3d and InterpolateShape_3d.
+#   Nothing here imports arcpy.
+#
+#   dem = DEMSampler(path)
+#   zs = dem.sample(xs, ys)          numpy array, NaN where there is no value
+#   zs = dem.values(xys)             list, None where there is no value
+#   pts = dem.profile(vertices)      [(x, y, z), ...] along a line, at cell-size spacing
+#   dem.close()
+#
+# The file is memory-mapped, and only the blocks (strips or tiles) that sampled points fall
+#   in are read. A block is unpacked into a numpy array once and kept in a cache of the most
+#   recently used blocks, so that points near one another, such as those along a section
+#   line, cost few reads. Points are sampled a whole column at a time, with numpy (which
+#   ArcGIS installs with arcpy). Readable files are
+#     uncompressed GeoTIFF (classic or BigTIFF, stripped or tiled, one band, integer or
+#       floating-point samples, georeferenced by ModelPixelScale and ModelTiepoint or by an
+#       unrotated ModelTransformation; nodata from the GDAL_NODATA tag)
+#     ESRI float grids (.flt, with a .hdr)
+#   Other files raise ValueError. Coordinates are not projected: points must be in the
+#   coordinate system of the DEM
+# 18 October 2026: first version
+# 18 October 2026: nodata is cast to the cell type before cells are compared with it, so that
+#   nodata values that float32 can't hold exactly, such as -3.402823e+38, are found.
+#   Run this file to check that
+# 18 October 2026: blocks are numpy arrays, with NaN for nodata cells, and sample works on
+#   numpy columns rather than point by point
+
+import sys, os.path, struct, math, mmap
+from array import array
+from collections import OrderedDict
+import numpy
+
+nan = float('nan')
+defaultMaxBlocks = 64
+fltBlockRows = 256
+maxFloat32 = 3.4028234663852886e+38
+if sys.byteorder == 'little':
+    nativeOrder = '<'
+else:
+    nativeOrder = '>'
+
+# TIFF field types: struct format
+tiffTypes = {1:'B', 2:'c', 3:'H', 4:'I', 5:'II', 6:'b', 7:'B', 8:'h', 9:'i', 10:'ii', 11:'f', 12:'d',
+             16:'Q', 17:'q', 18:'Q'}
+# (SampleFormat, BitsPerSample): array typecode
+sampleTypes = {(1, 8):'B', (1, 16):'H', (1, 32):'I', (2, 8):'b', (2, 16):'h', (2, 32):'i',
+               (3, 32):'f', (3, 64):'d'}
+
+def cellNodata(typecode, nodata):
+    # nodata as a cell of typecode holds it, so that it compares equal to nodata cells, or None
+    #   if no cell of typecode can have that value
+    if nodata == None or nodata <> nodata:
+        return None
+    if typecode in ('f', 'd'):
+        if typecode == 'f':
+            nodata = max(min(nodata, maxFloat32), -maxFloat32)
+        return array(typecode, [nodata])[0]
+    if nodata <> int(nodata):
+        return None
+    try:
+        return array(typecode, [int(nodata)])[0]
+    except OverflowError:
+        return None
+
+def isDEMFile(path):
+    return os.path.splitext(path)[1].lower() in ('.tif', '.tiff', '.flt')
+
+def densify(vertices, step):
+    # vertices of a line, with points added so that none is farther than step from the next
+    out = [tuple(vertices[0][:2])]
+    for i in range(1, len(vertices)):
+        x0, y0 = vertices[i-1][:2]
+        x1, y1 = vertices[i][:2]
+        n = int(math.ceil(math.hypot(x1 - x0, y1 - y0) / step))
+        for k in range(1, n):
+            out.append((x0 + (x1 - x0) * k / n, y0 + (y1 - y0) * k / n))
+        out.append((x1, y1))
+    return out
+
+class DEMSampler:
+    # A single-band raster, as width x height cells of cellWidth x cellHeight whose upper left
+    #   corner is at (x0, y0). Cells are stored in blocks of blockWidth x blockHeight
+    def __init__(self, path, maxBlocks=defaultMaxBlocks):
+        self.path = path
+        self.maxBlocks = maxBlocks
+        self.blocks = OrderedDict()   # block number: array of cell values
+        self.blockReads = 0
+        self.nodata = None
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if os.path.splitext(path)[1].lower() == '.flt':
+            self.readFltHeader()
+        else:
+            self.readTiffHeader()
+        self.nodata = cellNodata(self.typecode, self.nodata)
+        self.blocksAcross = int(math.ceil(self.width / float(self.blockWidth)))
+        self.dtype = numpy.dtype(self.byteOrder + self.typecode)
+
+    def close(self):
+        self.blocks.clear()
+        self.map.close()
+        self.file.close()
+
+    ## headers
+
+    def readFltHeader(self):
+        hdr = {}
+        for line in open(os.path.splitext(self.path)[0] + '.hdr'):
+            words = line.split()
+            if len(words) >= 2:
+                hdr[words[0].lower()] = words[1]
+        self.width = int(hdr['ncols'])
+        self.height = int(hdr['nrows'])
+        self.cellWidth = self.cellHeight = float(hdr['cellsize'])
+        if 'xllcenter' in hdr:
+            self.x0 = float(hdr['xllcenter']) - self.cellWidth / 2
+            yll = float(hdr['yllcenter']) - self.cellHeight / 2
+        else:
+            self.x0 = float(hdr['xllcorner'])
+            yll = float(hdr['yllcorner'])
+        self.y0 = yll + self.height * self.cellHeight
+        if 'nodata_value' in hdr:
+            self.nodata = float(hdr['nodata_value'])
+        if hdr.get('byteorder', 'LSBFIRST').upper() in ('MSBFIRST', 'M'):
+            self.byteOrder = '>'
+        else:
+            self.byteOrder = '<'
+        self.typecode = 'f'
+        self.blockWidth = self.width
+        self.blockHeight = fltBlockRows
+        rowBytes = self.width * 4
+        self.blockOffsets = [r * rowBytes for r in range(0, self.height, fltBlockRows)]
+        self.blockSizes = [min(fltBlockRows, self.height - r) * rowBytes for r in range(0, self.height, fltBlockRows)]
+
+    def readTiffHeader(self):
+        m = self.map
+        order = m[0:2]
+        if order == 'II':
+            self.byteOrder = '<'
+        elif order == 'MM':
+            self.byteOrder = '>'
+        else:
+            raise ValueError(self.path+' is not a TIFF file')
+        bo = self.byteOrder
+        version = struct.unpack(bo+'H', m[2:4])[0]
+        if version == 42:
+            ifd = struct.unpack(bo+'I', m[4:8])[0]
+            nEntries = struct.unpack(bo+'H', m[ifd:ifd+2])[0]
+            entryFormat, entrySize, inlineSize, first = bo+'HHI4s', 12, 4, ifd + 2
+        elif version == 43:
+            ifd = struct.unpack(bo+'Q', m[8:16])[0]
+            nEntries = struct.unpack(bo+'Q', m[ifd:ifd+8])[0]
+            entryFormat, entrySize, inlineSize, first = bo+'HHQ8s', 20, 8, ifd + 8
+        else:
+            raise ValueError(self.path+' is not a TIFF file')
+        tags = {}
+        for n in range(nEntries):
+            start = first + n * entrySize
+            tag, fieldType, count, value = struct.unpack(entryFormat, m[start:start+entrySize])
+            if not fieldType in tiffTypes:
+                continue
+            fmt = tiffTypes[fieldType]
+            size = struct.calcsize(bo + fmt) * count
+            if size > inlineSize:
+                offset = struct.unpack(bo + (inlineSize == 4 and 'I' or 'Q'), value)[0]
+                value = m[offset:offset+size]
+            else:
+                value = value[:size]
+            if fieldType == 2:
+                tags[tag] = value.rstrip('\x00')
+            else:
+                tags[tag] = struct.unpack(bo + fmt * count, value)
+
+        def tag(t, default=None):
+            if t in tags:
+                return tags[t]
+            if default == None:
+                raise ValueError(self.path+' has no TIFF tag '+str(t))
+            return default
+
+        if tag(259, (1,))[0] <> 1:
+            raise ValueError(self.path+' is compressed')
+        if tag(277, (1,))[0] <> 1:
+            raise ValueError(self.path+' has more than one sample per cell')
+        self.width = tag(256)[0]
+        self.height = tag(257)[0]
+        sampleType = (tag(339, (1,))[0], tag(258, (1,))[0])
+        if not sampleType in sampleTypes:
+            raise ValueError(self.path+' has cells of an unsupported type '+str(sampleType))
+        self.typecode = sampleTypes[sampleType]
+        if 322 in tags:
+            self.blockWidth = tag(322)[0]
+            self.blockHeight = tag(323)[0]
+            self.blockOffsets = tag(324)
+            self.blockSizes = tag(325)
+        else:
+            self.blockWidth = self.width
+            self.blockHeight = min(tag(278, (self.height,))[0], self.height)
+            self.blockOffsets = tag(273)
+            self.blockSizes = tag(279)
+        # georeferencing
+        if 33550 in tags and 33922 in tags:
+            sx, sy = tags[33550][:2]
+            i, j, k, x, y, z = tags[33922][:6]
+            self.cellWidth = sx
+            self.cellHeight = sy
+            self.x0 = x - i * sx
+            self.y0 = y + j * sy
+        elif 34264 in tags:
+            t = tags[34264]
+            if t[1] <> 0 or t[4] <> 0:
+                raise ValueError(self.path+' is rotated')
+            self.cellWidth = t[0]
+            self.cellHeight = -t[5]
+            self.x0 = t[3]
+            self.y0 = t[7]
+        else:
+            raise ValueError(self.path+' is not georeferenced')
+        # GTRasterTypeGeoKey (1025) = RasterPixelIsPoint: tie point is at the cell center
+        keys = tags.get(34735, ())
+        for n in range(4, len(keys) - 3, 4):
+            if keys[n] == 1025 and keys[n+1] == 0 and keys[n+3] == 2:
+                self.x0 = self.x0 - self.cellWidth / 2
+                self.y0 = self.y0 + self.cellHeight / 2
+        if 42113 in tags:
+            try:
+                self.nodata = float(tags[42113])
+            except ValueError:
+                pass
+
+    ## cells
+
+    def block(self, b):
+        # cell values of block b, as a numpy array of floats with NaN for nodata, from the
+        #   cache or from the file. A block at the edge of the raster that is stored short is
+        #   filled out with NaN
+        blocks = self.blocks
+        if b in blocks:
+            values = blocks.pop(b)
+        else:
+            offset = self.blockOffsets[b]
+            cells = numpy.frombuffer(self.map[offset:offset+self.blockSizes[b]], self.dtype)
+            values = numpy.empty(self.blockWidth * self.blockHeight)
+            values.fill(nan)
+            values[:len(cells)] = cells
+            if self.nodata <> None:
+                values[:len(cells)][cells == self.nodata] = nan
+            self.blockReads += 1
+            if len(blocks) >= self.maxBlocks:
+                blocks.popitem(last=False)
+        blocks[b] = values
+        return values
+
+    def cell(self, row, col):
+        # value of cell (row, col), or NaN if it has no value
+        bw = self.blockWidth
+        bh = self.blockHeight
+        return self.block((row // bh) * self.blocksAcross + col // bw)[(row % bh) * bw + col % bw]
+
+    def cells(self, rows, cols):
+        # values of cells (rows[i], cols[i]), NaN where there is no value. rows and cols are
+        #   numpy arrays of ints. Each block is read once
+        bw = self.blockWidth
+        bh = self.blockHeight
+        blockNumbers = (rows // bh) * self.blocksAcross + cols // bw
+        indexes = (rows % bh) * bw + cols % bw
+        out = numpy.empty(len(rows))
+        for b in numpy.unique(blockNumbers):
+            inBlock = blockNumbers == b
+            out[inBlock] = self.block(int(b))[indexes[inBlock]]
+        return out
+
+    ## sampling
+
+    def sample(self, xs, ys, method='bilinear'):
+        # values at points (xs[i], ys[i]), as a numpy array: NaN outside the DEM or where it
+        #   has no value. method is 'bilinear', from the four nearest cell centers (those with
+        #   no value are left out and the others reweighted), or 'nearest', the value of the
+        #   cell the point is in. xs and ys may have None or NaN for missing coordinates
+        xs = numpy.array(xs, dtype=float)
+        ys = numpy.array(ys, dtype=float)
+        out = numpy.empty(len(xs))
+        out.fill(nan)
+        fc = (xs - self.x0) / self.cellWidth
+        fr = (self.y0 - ys) / self.cellHeight
+        with numpy.errstate(invalid='ignore'):   # NaN coordinates are not inside
+            inside = numpy.flatnonzero((fc >= 0) & (fr >= 0) & (fc <= self.width) & (fr <= self.height))
+        if len(inside) == 0:
+            return out
+        fc = fc[inside]
+        fr = fr[inside]
+        lastCol = self.width - 1
+        lastRow = self.height - 1
+        v = self.cells(numpy.minimum(fr.astype(int), lastRow), numpy.minimum(fc.astype(int), lastCol))
+        if method <> 'bilinear':
+            out[inside] = v
+            return out
+        fc = fc - 0.5
+        fr = fr - 0.5
+        c0 = numpy.floor(fc).astype(int)
+        r0 = numpy.floor(fr).astype(int)
+        tx = fc - c0
+        ty = fr - r0
+        c1 = numpy.minimum(c0 + 1, lastCol)
+        r1 = numpy.minimum(r0 + 1, lastRow)
+        c0 = numpy.maximum(c0, 0)
+        r0 = numpy.maximum(r0, 0)
+        total = numpy.zeros(len(v))
+        weights = numpy.zeros(len(v))
+        for r, c, w in ((r0, c0, (1 - tx) * (1 - ty)), (r0, c1, tx * (1 - ty)),
+                        (r1, c0, (1 - tx) * ty), (r1, c1, tx * ty)):
+            z = self.cells(r, c)
+            use = (w > 0) & (z == z)
+            total[use] += w[use] * z[use]
+            weights[use] += w[use]
+        # points in cells without a value stay NaN
+        interpolated = (weights > 0) & (v == v)
+        v[interpolated] = total[interpolated] / weights[interpolated]
+        out[inside] = v
+        return out
+
+    def values(self, xys, method='bilinear'):
+        # values at points xys, a sequence of (x, y), as a list with None where there is no value
+        out = []
+        for z in self.sample([xy[0] for xy in xys], [xy[1] for xy in xys], method).tolist():
+            if z <> z:
+                out.append(None)
+            else:
+                out.append(z)
+        return out
+
+    def profile(self, vertices, step=None, method='bilinear'):
+        # [(x, y, z), ...] along the line through vertices, with points added at step (by
+        #   default, the cell size) spacing, as InterpolateShape_3d makes them. Points where
+        #   the DEM has no value are left out
+        if step == None:
+            step = min(self.cellWidth, self.cellHeight)
+        pts = densify(vertices, step)
+        zs = self.sample([p[0] for p in pts], [p[1] for p in pts], method)
+        return [(pts[i][0], pts[i][1], zs[i]) for i in range(len(pts)) if zs[i] == zs[i]]
+
+if __name__ == '__main__':
+    # self-check: a 4 x 3 .flt whose nodata value float32 can't hold exactly
+    import tempfile, shutil
+    folder = tempfile.mkdtemp()
+    try:
+        path = os.path.join(folder, 'check.flt')
+        cells = array('f', [1, 2, 3, 4,
+                            5, -3.402823e+38, 7, 8,
+                            9, 10, 11, 12])
+        if nativeOrder == '>':
+            cells.byteswap()
+        f = open(path, 'wb')
+        f.write(cells.tostring())
+        f.close()
+        f = open(os.path.join(folder, 'check.hdr'), 'w')
+        f.write('ncols 4\nnrows 3\nxllcorner 0\nyllcorner 0\ncellsize 1\n'
+                'NODATA_value -3.402823e+38\nbyteorder LSBFIRST\n')
+        f.close()
+        dem = DEMSampler(path)
+        zs = dem.sample([1.5, 0.9, 0.5, 2.0], [1.5, 1.5, 2.5, 1.0])
+        dem.close()
+        # in the nodata cell; in cell 5, beside the nodata cell, which is left out; a cell center;
+        #   between cells 7, 10, 11, and the nodata cell, which is left out
+        expected = [nan, 5.0, 1.0, (7 + 10 + 11) / 3.0]
+        for z, e in zip(zs, expected):
+            assert (z <> z and e <> e) or abs(z - e) < 1e-9, (list(zs), expected)
+        print 'DEMSampler nodata check passed'
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,1004 @@
+# GeMS_DataAccess.py
+# thin workspace and cursor layer, so that code that reads GeMS tables can run with
+#   arcpy (file geodatabases, as always) or without ArcGIS, reading a GeoPackage or
+#   plain SQLite database with the standard sqlite3 module.
+#
+# Everything is addressed by path, as with arcpy. A path with a component ending in
+#   .gpkg, .sqlite, or .db is handled by SqliteWorkspace; anything else goes to arcpy.
+#   GeoPackages have no feature datasets, so in 'x.gpkg/GeologicMap/ContactsAndFaults'
+#   the GeologicMap part is ignored.
+#
+#   listFields(table)          Field objects with name, baseName, type, length, isNullable
+#                              (type as arcpy reports it: String, Integer, Double, Date, OID, Geometry ...)
+#   describe(table)            object with dataType, hasOID, OIDFieldName, shapeType,
+#                              shapeFieldName, editorTrackingEnabled
+#   searchCursor(table, fields, where=None, orderBy=None)
+#                              iterator of row tuples, usable in a with statement. fields may
+#                              include OID@, SHAPE@, SHAPE@XY, SHAPE@WKB, SHAPE@LENGTH, SHAPE@AREA
+#   getCount(table), exists(path)
+#   listTables(workspace), listFeatureClasses(workspace, dataset=''), listDatasets(workspace)
+#   createGeoPackage(path)     makes a new, empty GeoPackage
+#   createTable(workspace, table, fieldDefs, shapeType=None, srid=0)
+#                              fieldDefs as in GeMS_Definition.tableDict. shapeType is
+#                              Point, Multipoint, Polyline, or Polygon for a feature class
+#   insertCursor(table, fields)
+#                              object with insertRow(row), usable in a with statement. fields may
+#                              include SHAPE@ (a Geometry, which keeps its Z and M), SHAPE@XY,
+#                              and SHAPE@WKB
+#   createSpatialIndex(table)  R-tree index on a GeoPackage feature class, once it is written
+#
+# SHAPE@ returns a Geometry (see below) from SqliteWorkspace, an arcpy geometry from arcpy.
+#   Both have firstPoint, lastPoint, getPart(i), partCount, pointCount, length, and
+#   area. Points have X, Y, Z, and M.
+#
+# 18 October 2026: first version
+# 18 October 2026: createGeoPackage, createTable, and insertCursor, for writing GeoPackages
+# 18 October 2026: createSpatialIndex(table) adds a GeoPackage R-tree spatial index (with the
+#   triggers that the extension requires, whose ST_ functions are registered on every
+#   connection so that the table can still be written here), and addSpatialRefSys adds a
+#   spatial reference system. Multipoints can be written. polygonRings groups the rings of
+#   a polygon into outer rings and their holes
+# 18 October 2026: spatialRefSysID and unusedSpatialRefSysID, for finding and numbering rows of
+#   gpkg_spatial_ref_sys
+# 18 October 2026: Z and M survive a trip through a Geometry. WKB is read with M as well as Z,
+#   geometryToWkb writes Z and M when asked, geometryPaths reads the Z and M of an arcpy
+#   geometry, and insertCursor takes a Geometry for SHAPE@ from arcpy too (ArcpyInsertCursor)
+
+import os, os.path, struct, math, datetime, sqlite3
+
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+
+sqliteExtensions = ('.gpkg', '.sqlite', '.db')
+
+def isSqlitePath(path):
+    for part in path.replace('\\', '/').split('/'):
+        if os.path.splitext(part)[1].lower() in sqliteExtensions:
+            return True
+    return False
+
+def splitSqlitePath(path):
+    # returns (database file, table name or '')
+    parts = path.replace('\\', '/').split('/')
+    for n in range(len(parts)):
+        if os.path.splitext(parts[n])[1].lower() in sqliteExtensions:
+            db = '/'.join(parts[:n+1])
+            rest = [p for p in parts[n+1:] if p <> '']
+            if len(rest) > 0:
+                return db, rest[-1]
+            return db, ''
+    raise ValueError(path+' is not in a GeoPackage or SQLite database')
+
+##############################
+# Geometry, for SqliteWorkspace
+
+class Point:
+    def __init__(self, X, Y, Z=None, M=None):
+        self.X = X
+        self.Y = Y
+        self.Z = Z
+        self.M = M
+    def __repr__(self):
+        return 'Point('+str(self.X)+', '+str(self.Y)+')'
+
+def ringArea(pts):
+    # signed area, positive if counterclockwise
+    a = 0.0
+    for i in range(len(pts) - 1):
+        a = a + pts[i][0]*pts[i+1][1] - pts[i+1][0]*pts[i][1]
+    return a / 2.0
+
+def pathLength(pts):
+    length = 0.0
+    for i in range(len(pts) - 1):
+        length = length + math.hypot(pts[i+1][0]-pts[i][0], pts[i+1][1]-pts[i][1])
+    return length
+
+class Geometry:
+    # Minimal geometry, built from WKB.
+    #   type is 'point', 'multipoint', 'polyline', or 'polygon'
+    #   paths is a list of lists of coordinate tuples: the points of a (multi)point, the
+    #     lines of a polyline, or all rings (outer and inner) of a polygon. A tuple is
+    #     (x, y), (x, y, z), or (x, y, z, m), with z None if there is m but no z
+    def __init__(self, type, paths):
+        self.type = type
+        self.paths = paths
+    def getPart(self, i=None):
+        if i == None:
+            return [[Point(*p) for p in path] for path in self.paths]
+        return [Point(*p) for p in self.paths[i]]
+    def _partCount(self):
+        return len(self.paths)
+    partCount = property(_partCount)
+    def _pointCount(self):
+        return sum([len(p) for p in self.paths])
+    pointCount = property(_pointCount)
+    def _firstPoint(self):
+        if len(self.paths) == 0 or len(self.paths[0]) == 0:
+            return None
+        return Point(*self.paths[0][0])
+    firstPoint = property(_firstPoint)
+    def _lastPoint(self):
+        if len(self.paths) == 0 or len(self.paths[-1]) == 0:
+            return None
+        return Point(*self.paths[-1][-1])
+    lastPoint = property(_lastPoint)
+    def _length(self):
+        if self.type in ('polyline', 'polygon'):
+            return sum([pathLength(p) for p in self.paths])
+        return 0.0
+    length = property(_length)
+    def _area(self):
+        # rings are taken to be correctly nested: holes subtract, whatever their orientation
+        if self.type <> 'polygon' or len(self.paths) == 0:
+            return 0.0
+        areas = [ringArea(p) for p in self.paths]
+        outerSign = 1
+        if areas[0] < 0:
+            outerSign = -1
+        return abs(sum([a * outerSign for a in areas]))
+    area = property(_area)
+    def _centroid(self):
+        # as SHAPE@XY: the point, the mean of multipoints, the length-weighted center
+        #   of lines, and the area-weighted center of polygons
+        if self.pointCount == 0:
+            return (None, None)
+        if self.type in ('point', 'multipoint'):
+            pts = [p for path in self.paths for p in path]
+            return (sum([p[0] for p in pts]) / len(pts), sum([p[1] for p in pts]) / len(pts))
+        sx = sy = w = 0.0
+        if self.type == 'polygon':
+            for path in self.paths:
+                for i in range(len(path) - 1):
+                    x0, y0 = path[i][:2]; x1, y1 = path[i+1][:2]
+                    c = x0*y1 - x1*y0
+                    w = w + c; sx = sx + (x0 + x1)*c; sy = sy + (y0 + y1)*c
+            if w <> 0:
+                return (sx / (3.0*w), sy / (3.0*w))
+        else:
+            for path in self.paths:
+                for i in range(len(path) - 1):
+                    x0, y0 = path[i][:2]; x1, y1 = path[i+1][:2]
+                    d = math.hypot(x1-x0, y1-y0)
+                    w = w + d; sx = sx + (x0 + x1)/2.0*d; sy = sy + (y0 + y1)/2.0*d
+            if w > 0:
+                return (sx / w, sy / w)
+        # degenerate: fall back to mean of vertices
+        pts = [p for path in self.paths for p in path]
+        return (sum([p[0] for p in pts]) / len(pts), sum([p[1] for p in pts]) / len(pts))
+    centroid = property(_centroid)
+
+wkbTypeNames = {1:'point', 2:'polyline', 3:'polygon', 4:'multipoint', 5:'polyline', 6:'polygon'}
+
+def _readWkb(wkb, pos, paths):
+    # reads one WKB geometry starting at pos, appending its paths; returns (base type, new pos)
+    if ord(wkb[pos]) == 0:
+        bo = '>'
+    else:
+        bo = '<'
+    wkbType = struct.unpack(bo+'I', wkb[pos+1:pos+5])[0]
+    pos = pos + 5
+    # EWKB flags
+    hasZ = bool(wkbType & 0x80000000)
+    hasM = bool(wkbType & 0x40000000)
+    if wkbType & 0x20000000:
+        pos = pos + 4   # skip SRID
+    wkbType = wkbType & 0x0fffffff
+    # ISO flags
+    if wkbType >= 3000:
+        hasZ = hasM = True
+    elif wkbType >= 2000:
+        hasM = True
+    elif wkbType >= 1000:
+        hasZ = True
+    baseType = wkbType % 1000
+    nd = 2 + hasZ + hasM
+    coordFormat = bo + 'd'*nd
+    coordSize = 8 * nd
+    def readPoints(pos, n):
+        pts = []
+        for i in range(n):
+            c = struct.unpack(coordFormat, wkb[pos:pos+coordSize])
+            if hasM:
+                pts.append((c[0], c[1], c[2] if hasZ else None, c[-1]))
+            elif hasZ:
+                pts.append((c[0], c[1], c[2]))
+            else:
+                pts.append((c[0], c[1]))
+            pos = pos + coordSize
+        return pts, pos
+    if baseType == 1:
+        pts, pos = readPoints(pos, 1)
+        if not (pts[0][0] <> pts[0][0]):   # NaN coordinates mean an empty point
+            paths.append(pts)
+    elif baseType == 2:
+        n = struct.unpack(bo+'I', wkb[pos:pos+4])[0]
+        pts, pos = readPoints(pos+4, n)
+        paths.append(pts)
+    elif baseType == 3:
+        nRings = struct.unpack(bo+'I', wkb[pos:pos+4])[0]
+        pos = pos + 4
+        for r in range(nRings):
+            n = struct.unpack(bo+'I', wkb[pos:pos+4])[0]
+            pts, pos = readPoints(pos+4, n)
+            paths.append(pts)
+    elif baseType in (4, 5, 6, 7):
+        n = struct.unpack(bo+'I', wkb[pos:pos+4])[0]
+        pos = pos + 4
+        if baseType == 4:
+            # multipoint: collect all points into one path
+            points = []
+            for i in range(n):
+                pos = _readWkb(wkb, pos, points)[1]
+            paths.append([p[0] for p in points])
+        else:
+            for i in range(n):
+                pos = _readWkb(wkb, pos, paths)[1]
+    else:
+        raise ValueError('unsupported WKB geometry type '+str(wkbType))
+    return baseType, pos
+
+def geometryFromWkb(wkb):
+    wkb = str(wkb)
+    paths = []
+    baseType = _readWkb(wkb, 0, paths)[0]
+    return Geometry(wkbTypeNames.get(baseType, 'polyline'), paths)
+
+def gpkgBlobToWkb(blob):
+    # strips the GeoPackage binary header, if there is one. Returns None for empty geometries
+    if blob == None:
+        return None
+    blob = str(blob)
+    if blob[:2] <> 'GP':
+        return blob
+    flags = ord(blob[3])
+    if flags & 0x10:
+        return None
+    envelopeSize = {0:0, 1:32, 2:48, 3:48, 4:64}[(flags >> 1) & 0x07]
+    return blob[8+envelopeSize:]
+
+def geometryDims(paths):
+    # returns (hasZ, hasM) for paths of coordinate tuples
+    hasZ = hasM = False
+    for path in paths:
+        for p in path:
+            if len(p) > 2 and p[2] <> None:
+                hasZ = True
+            if len(p) > 3 and p[3] <> None:
+                hasM = True
+    return hasZ, hasM
+
+def _wkbCoords(p, hasZ, hasM):
+    # coordinates of point tuple p to write: a missing z is 0, a missing m is NaN
+    c = [p[0], p[1]]
+    if hasZ:
+        if len(p) > 2 and p[2] <> None:
+            c.append(p[2])
+        else:
+            c.append(0.0)
+    if hasM:
+        if len(p) > 3 and p[3] <> None:
+            c.append(p[3])
+        else:
+            c.append(float('nan'))
+    return c
+
+def _wkbPoints(pts, hasZ=False, hasM=False):
+    format = '<' + 'd' * (2 + hasZ + hasM)
+    return struct.pack('<I', len(pts)) + ''.join([struct.pack(format, *_wkbCoords(p, hasZ, hasM)) for p in pts])
+
+def polygonRings(paths):
+    # groups the rings of a polygon: a ring with the same orientation as the first ring starts
+    #   a new polygon, a ring with the opposite orientation is a hole in the polygon before it.
+    #   Returns list of polygons, each a list of rings
+    polygons = []
+    firstSign = None
+    for path in paths:
+        sign = ringArea(path) > 0
+        if firstSign == None:
+            firstSign = sign
+        if sign == firstSign:
+            polygons.append([path])
+        else:
+            polygons[-1].append(path)
+    return polygons
+
+def geometryToWkb(geometry, hasZ=False, hasM=False):
+    # little-endian WKB for a Geometry, 2D unless hasZ or hasM (then ISO WKB, with Z and M
+    #   as in _wkbCoords). Polylines are written as MultiLineStrings. Polygons are written
+    #   as MultiPolygons, with rings grouped by polygonRings
+    paths = geometry.paths
+    dims = 1000 * hasZ + 2000 * hasM
+    coordFormat = '<' + 'd' * (2 + hasZ + hasM)
+    def wkbPoint(p):
+        return struct.pack('<BI', 1, 1 + dims) + struct.pack(coordFormat, *_wkbCoords(p, hasZ, hasM))
+    if geometry.type == 'point':
+        return wkbPoint(paths[0][0])
+    if geometry.type == 'multipoint':
+        pts = [p for path in paths for p in path]
+        return struct.pack('<BII', 1, 4 + dims, len(pts)) + ''.join([wkbPoint(p) for p in pts])
+    if geometry.type == 'polyline':
+        parts = [struct.pack('<BI', 1, 2 + dims) + _wkbPoints(path, hasZ, hasM) for path in paths]
+        return struct.pack('<BII', 1, 5 + dims, len(parts)) + ''.join(parts)
+    if geometry.type == 'polygon':
+        parts = []
+        for rings in polygonRings(paths):
+            parts.append(struct.pack('<BII', 1, 3 + dims, len(rings)) + ''.join([_wkbPoints(r, hasZ, hasM) for r in rings]))
+        return struct.pack('<BII', 1, 6 + dims, len(parts)) + ''.join(parts)
+    raise ValueError('cannot write WKB for '+str(geometry.type))
+
+def geometryPaths(shape):
+    # paths of shape, a Geometry or an arcpy geometry (as read with SHAPE@), with the Z and M
+    #   values of arcpy points, which SHAPE@WKB may not carry
+    if shape == None:
+        return []
+    if isinstance(shape, Geometry):
+        return shape.paths
+    paths = []
+    for part in shape:
+        path = []
+        for pt in part:
+            if pt == None:  # a polygon ring ends
+                paths.append(path)
+                path = []
+                continue
+            m = pt.M
+            if m <> None and m <> m:  # NaN, no M
+                m = None
+            if m <> None:
+                path.append((pt.X, pt.Y, pt.Z, m))
+            elif pt.Z <> None:
+                path.append((pt.X, pt.Y, pt.Z))
+            else:
+                path.append((pt.X, pt.Y))
+        paths.append(path)
+    return paths
+
+def arcpyGeometry(geometry, spatialReference=None):
+    # arcpy geometry for a Geometry, with Z and M if its points have them
+    hasZ, hasM = geometryDims(geometry.paths)
+    def point(p):
+        c = list(p) + [None] * (4 - len(p))
+        return arcpy.Point(c[0], c[1], c[2], c[3])
+    if geometry.type == 'point':
+        return arcpy.PointGeometry(point(geometry.paths[0][0]), spatialReference, hasZ, hasM)
+    if geometry.type == 'multipoint':
+        return arcpy.Multipoint(arcpy.Array([point(p) for path in geometry.paths for p in path]),
+                                spatialReference, hasZ, hasM)
+    parts = arcpy.Array([arcpy.Array([point(p) for p in path]) for path in geometry.paths])
+    if geometry.type == 'polygon':
+        return arcpy.Polygon(parts, spatialReference, hasZ, hasM)
+    return arcpy.Polyline(parts, spatialReference, hasZ, hasM)
+
+def gpkgBlob(wkb, srid, paths=None):
+    # GeoPackage geometry blob: header, with an xy envelope if paths are given, then wkb
+    if paths:
+        xs = [p[0] for path in paths for p in path]
+        ys = [p[1] for path in paths for p in path]
+        return 'GP' + struct.pack('<BBidddd', 0, 0x03, srid, min(xs), max(xs), min(ys), max(ys)) + wkb
+    return 'GP' + struct.pack('<BBi', 0, 0x01, srid) + wkb
+
+def gpkgBlobEnvelope(blob):
+    # returns (minX, maxX, minY, maxY) of a GeoPackage geometry blob, or None if it is empty
+    if blob == None:
+        return None
+    blob = str(blob)
+    flags = ord(blob[3])
+    if flags & 0x10:
+        return None
+    if (flags >> 1) & 0x07:
+        return struct.unpack('<dddd', blob[8:40])
+    g = geometryFromWkb(gpkgBlobToWkb(blob))
+    pts = [p for path in g.paths for p in path]
+    if len(pts) == 0:
+        return None
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    return (min(xs), max(xs), min(ys), max(ys))
+
+def _envelopeFunction(i):
+    # SQL function ST_MinX etc. for GeoPackage R-tree triggers
+    def f(blob):
+        e = gpkgBlobEnvelope(blob)
+        if e == None:
+            return None
+        return e[i]
+    return f
+
+##############################
+# SQLite and GeoPackage
+
+# declared SQLite / GeoPackage column types, as arcpy field types
+sqliteFieldTypes = {'TEXT':'String', 'VARCHAR':'String', 'CHAR':'String',
+                    'INTEGER':'Integer', 'INT':'Integer', 'MEDIUMINT':'Integer',
+                    'SMALLINT':'SmallInteger', 'TINYINT':'SmallInteger', 'BOOLEAN':'SmallInteger',
+                    'DOUBLE':'Double', 'REAL':'Double', 'FLOAT':'Single',
+                    'DATE':'Date', 'DATETIME':'Date', 'BLOB':'Blob'}
+
+# GeMS_Definition field types, as SQLite column types
+gemsSqliteTypes = {'String':'TEXT', 'Integer':'INTEGER', 'SmallInteger':'SMALLINT',
+                   'Double':'DOUBLE', 'Single':'FLOAT', 'Date':'DATETIME', 'Blob':'BLOB'}
+
+# GeMS_Definition field types, as arcpy AddField types
+gemsArcpyTypes = {'String':'TEXT', 'Integer':'LONG', 'SmallInteger':'SHORT',
+                  'Double':'DOUBLE', 'Single':'FLOAT', 'Date':'DATE', 'Blob':'BLOB'}
+
+gpkgGeometryTypes = {'Point':'POINT', 'Multipoint':'MULTIPOINT', 'Polyline':'MULTILINESTRING', 'Polygon':'MULTIPOLYGON'}
+
+class Field:
+    # arcpy.Field look-alike
+    def __init__(self, name, type, length=0, isNullable=True):
+        self.name = name
+        self.baseName = name
+        self.aliasName = name
+        self.type = type
+        self.length = length
+        self.isNullable = isNullable
+    def __repr__(self):
+        return 'Field('+self.name+', '+self.type+')'
+
+class TableInfo:
+    # arcpy Describe look-alike, for tables and feature classes
+    def __init__(self, name, dataType, OIDFieldName, shapeFieldName=None, shapeType=None):
+        self.name = name
+        self.baseName = name
+        self.dataType = dataType
+        self.hasOID = OIDFieldName <> None
+        self.OIDFieldName = OIDFieldName
+        self.shapeFieldName = shapeFieldName
+        self.shapeType = shapeType
+        self.editorTrackingEnabled = False
+
+def parseDate(value):
+    if not isinstance(value, basestring):
+        return value
+    v = value.rstrip('Z')
+    for f in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.datetime.strptime(v, f)
+        except ValueError:
+            pass
+    return value
+
+def quoteName(name):
+    return '"'+name.replace('"', '""')+'"'
+
+class SqliteCursor:
+    # iterator over rows of a query, usable in a with statement like arcpy.da cursors
+    def __init__(self, cursor, converters):
+        self.cursor = cursor
+        self.converters = converters
+    def __iter__(self):
+        return self
+    def next(self):
+        row = self.cursor.next()
+        return tuple([c(v) for c, v in zip(self.converters, row)])
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.cursor.close()
+        return False
+
+class SqliteWorkspace:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.isGpkg = self._hasTable('gpkg_contents')
+        self.infoCache = {}
+        # used by the triggers of GeoPackage R-tree indexes
+        c = self.connection
+        c.create_function('ST_IsEmpty', 1, lambda blob: int(gpkgBlobEnvelope(blob) == None))
+        c.create_function('ST_MinX', 1, _envelopeFunction(0))
+        c.create_function('ST_MaxX', 1, _envelopeFunction(1))
+        c.create_function('ST_MinY', 1, _envelopeFunction(2))
+        c.create_function('ST_MaxY', 1, _envelopeFunction(3))
+    def _hasTable(self, name):
+        c = self.connection.execute("SELECT 1 FROM sqlite_master WHERE type IN ('table','view') AND name = ?", (name,))
+        return c.fetchone() <> None
+    def _userTables(self):
+        names = []
+        for row in self.connection.execute("SELECT name FROM sqlite_master WHERE type IN ('table','view') ORDER BY name"):
+            n = row[0]
+            if not (n.startswith('gpkg_') or n.startswith('rtree_') or n.startswith('sqlite_')):
+                names.append(n)
+        return names
+    def _geometryColumns(self):
+        geomCols = {}
+        if self._hasTable('gpkg_geometry_columns'):
+            for row in self.connection.execute('SELECT table_name, column_name, geometry_type_name FROM gpkg_geometry_columns'):
+                geomCols[row[0]] = (row[1], row[2])
+        return geomCols
+    def listTables(self):
+        geomCols = self._geometryColumns()
+        return [t for t in self._userTables() if not t in geomCols]
+    def listFeatureClasses(self, dataset='', featureType=''):
+        # no feature datasets in a GeoPackage, so dataset is ignored
+        geomCols = self._geometryColumns()
+        fcs = []
+        for t in self._userTables():
+            if t in geomCols:
+                if featureType == '' or shapeTypeName(geomCols[t][1]).lower() == featureType.lower():
+                    fcs.append(t)
+        return fcs
+    def listDatasets(self):
+        return []
+    def exists(self, table):
+        if table == '':
+            return True
+        return self._hasTable(table)
+    def _info(self, table):
+        if not table in self.infoCache:
+            if not self._hasTable(table):
+                raise ValueError(table+' does not exist in '+self.path)
+            geomCols = self._geometryColumns()
+            fields = []
+            oidField = None
+            shapeField = None
+            shapeType = None
+            for cid, name, declType, notNull, default, pk in self.connection.execute('PRAGMA table_info('+quoteName(table)+')'):
+                declType = (declType or '').upper()
+                baseType = declType.split('(')[0].strip()
+                length = 0
+                if '(' in declType:
+                    try:
+                        length = int(declType.split('(')[1].split(')')[0])
+                    except ValueError:
+                        pass
+                if table in geomCols and name == geomCols[table][0]:
+                    fType = 'Geometry'
+                    shapeField = name
+                    shapeType = shapeTypeName(geomCols[table][1])
+                elif pk and baseType == 'INTEGER' and oidField == None:
+                    fType = 'OID'
+                    oidField = name
+                    length = 4
+                else:
+                    fType = sqliteFieldTypes.get(baseType, 'String')
+                fields.append(Field(name, fType, length, not (notNull or pk)))
+            if shapeField <> None:
+                dataType = 'FeatureClass'
+            else:
+                dataType = 'Table'
+            self.infoCache[table] = (fields, TableInfo(table, dataType, oidField, shapeField, shapeType))
+        return self.infoCache[table]
+    def listFields(self, table):
+        return list(self._info(table)[0])
+    def describe(self, table):
+        return self._info(table)[1]
+    def getCount(self, table):
+        return self.connection.execute('SELECT COUNT(*) FROM '+quoteName(table)).fetchone()[0]
+    def searchCursor(self, table, fields, where=None, orderBy=None):
+        fieldObjs, info = self._info(table)
+        fieldTypes = dict([(f.name.lower(), f.type) for f in fieldObjs])
+        columns = []
+        converters = []
+        identity = lambda v: v
+        for f in fields:
+            fu = f.upper()
+            if fu == 'OID@':
+                columns.append(quoteName(info.OIDFieldName)); converters.append(identity)
+            elif fu.startswith('SHAPE@') or fieldTypes.get(f.lower()) == 'Geometry':
+                if info.shapeFieldName == None:
+                    raise ValueError(table+' has no geometry')
+                columns.append(quoteName(info.shapeFieldName))
+                converters.append(shapeConverter(fu))
+            elif fieldTypes.get(f.lower()) == 'Date':
+                columns.append(quoteName(f)); converters.append(parseDate)
+            else:
+                columns.append(quoteName(f)); converters.append(identity)
+        sql = 'SELECT '+', '.join(columns)+' FROM '+quoteName(table)
+        if where:
+            sql = sql+' WHERE '+where
+        if orderBy:
+            sql = sql+' ORDER BY '+orderBy
+        return SqliteCursor(self.connection.execute(sql), converters)
+    def createTable(self, table, fieldDefs, shapeType=None, srid=0):
+        # as in GeMS_CreateDatabase_Arc10.py, all fields are nullable. NoNulls is checked
+        #   when validating
+        if not self.isGpkg:
+            raise ValueError(self.path+' is not a GeoPackage')
+        if self._hasTable(table):
+            raise ValueError(table+' already exists in '+self.path)
+        columns = ['OBJECTID INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL']
+        if shapeType <> None:
+            columns.append('Shape '+gpkgGeometryTypes[shapeType])
+        for fDef in fieldDefs:
+            colType = gemsSqliteTypes[fDef[1]]
+            if fDef[1] == 'String' and len(fDef) > 3:
+                colType = colType+'('+str(fDef[3])+')'
+            columns.append(quoteName(fDef[0])+' '+colType)
+        c = self.connection
+        c.execute('CREATE TABLE '+quoteName(table)+' ('+', '.join(columns)+')')
+        now = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        if shapeType <> None:
+            c.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, last_change, srs_id) VALUES (?, 'features', ?, ?, ?)",
+                      (table, table, now, srid))
+            c.execute('INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, 0, 0)',
+                      (table, 'Shape', gpkgGeometryTypes[shapeType], srid))
+        else:
+            c.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, last_change) VALUES (?, 'attributes', ?, ?)",
+                      (table, table, now))
+        c.commit()
+        self.infoCache.pop(table, None)
+    def insertCursor(self, table, fields):
+        return SqliteInsertCursor(self, table, fields)
+    def addSpatialRefSys(self, srid, name, organization, organizationId, definition, description=''):
+        # adds a row to gpkg_spatial_ref_sys, unless srid is already there
+        c = self.connection
+        if c.execute('SELECT 1 FROM gpkg_spatial_ref_sys WHERE srs_id = ?', (srid,)).fetchone() == None:
+            c.execute('INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)',
+                      (name, srid, organization, organizationId, definition, description))
+            c.commit()
+    def spatialRefSysID(self, organization, organizationId=None, definition=None):
+        # srs_id of the first row of gpkg_spatial_ref_sys with organization (in any case) and,
+        #   if they are given, organizationId and definition. None if there is no such row
+        sql = 'SELECT srs_id FROM gpkg_spatial_ref_sys WHERE upper(organization) = ?'
+        args = [organization.upper()]
+        if organizationId <> None:
+            sql = sql + ' AND organization_coordsys_id = ?'
+            args.append(organizationId)
+        if definition <> None:
+            sql = sql + ' AND definition = ?'
+            args.append(definition)
+        row = self.connection.execute(sql + ' ORDER BY srs_id', args).fetchone()
+        if row == None:
+            return None
+        return row[0]
+    def unusedSpatialRefSysID(self, srid=100000):
+        # srid, or the first number after it, that no row of gpkg_spatial_ref_sys has as srs_id
+        c = self.connection
+        while c.execute('SELECT 1 FROM gpkg_spatial_ref_sys WHERE srs_id = ?', (srid,)).fetchone() <> None:
+            srid = srid + 1
+        return srid
+    def createSpatialIndex(self, table):
+        # adds a GeoPackage R-tree index (extension gpkg_rtree_index) on the geometry of
+        #   table, and sets the extent of table in gpkg_contents
+        fieldObjs, info = self._info(table)
+        t = table
+        g = info.shapeFieldName
+        i = info.OIDFieldName
+        rtree = quoteName('rtree_'+t+'_'+g)
+        c = self.connection
+        c.execute('CREATE VIRTUAL TABLE '+rtree+' USING rtree(id, minx, maxx, miny, maxy)')
+        rows = []
+        extent = None
+        for oid, blob in c.execute('SELECT '+quoteName(i)+', '+quoteName(g)+' FROM '+quoteName(t)):
+            e = gpkgBlobEnvelope(blob)
+            if e == None:
+                continue
+            rows.append((oid,) + tuple(e))
+            if extent == None:
+                extent = list(e)
+            else:
+                extent = [min(extent[0], e[0]), max(extent[1], e[1]), min(extent[2], e[2]), max(extent[3], e[3])]
+            if len(rows) >= SqliteInsertCursor.batchSize:
+                c.executemany('INSERT INTO '+rtree+' VALUES (?, ?, ?, ?, ?)', rows)
+                rows = []
+        c.executemany('INSERT INTO '+rtree+' VALUES (?, ?, ?, ?, ?)', rows)
+        names = {'t':quoteName(t), 'c':quoteName(g), 'i':quoteName(i), 'r':rtree,
+                 'trigger':'rtree_'+t+'_'+g}
+        for sql in rtreeTriggers:
+            c.execute(sql % names)
+        c.execute('CREATE TABLE IF NOT EXISTS gpkg_extensions (table_name TEXT, column_name TEXT, '
+                  'extension_name TEXT NOT NULL, definition TEXT NOT NULL, scope TEXT NOT NULL, '
+                  'CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name))')
+        c.execute("INSERT INTO gpkg_extensions VALUES (?, ?, 'gpkg_rtree_index', "
+                  "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')", (t, g))
+        if extent <> None:
+            c.execute('UPDATE gpkg_contents SET min_x = ?, max_x = ?, min_y = ?, max_y = ? WHERE table_name = ?',
+                      tuple(extent) + (t,))
+        c.commit()
+
+# triggers that keep a GeoPackage R-tree index up to date, from the GeoPackage standard
+rtreeTriggers = [
+    'CREATE TRIGGER "%(trigger)s_insert" AFTER INSERT ON %(t)s '
+    'WHEN (new.%(c)s NOT NULL AND NOT ST_IsEmpty(NEW.%(c)s)) BEGIN '
+    'INSERT OR REPLACE INTO %(r)s VALUES (NEW.%(i)s, ST_MinX(NEW.%(c)s), ST_MaxX(NEW.%(c)s), ST_MinY(NEW.%(c)s), ST_MaxY(NEW.%(c)s)); END',
+    'CREATE TRIGGER "%(trigger)s_update1" AFTER UPDATE OF %(c)s ON %(t)s '
+    'WHEN OLD.%(i)s = NEW.%(i)s AND (NEW.%(c)s NOTNULL AND NOT ST_IsEmpty(NEW.%(c)s)) BEGIN '
+    'INSERT OR REPLACE INTO %(r)s VALUES (NEW.%(i)s, ST_MinX(NEW.%(c)s), ST_MaxX(NEW.%(c)s), ST_MinY(NEW.%(c)s), ST_MaxY(NEW.%(c)s)); END',
+    'CREATE TRIGGER "%(trigger)s_update2" AFTER UPDATE OF %(c)s ON %(t)s '
+    'WHEN OLD.%(i)s = NEW.%(i)s AND (NEW.%(c)s ISNULL OR ST_IsEmpty(NEW.%(c)s)) BEGIN '
+    'DELETE FROM %(r)s WHERE id = OLD.%(i)s; END',
+    'CREATE TRIGGER "%(trigger)s_update3" AFTER UPDATE ON %(t)s '
+    'WHEN OLD.%(i)s != NEW.%(i)s AND (NEW.%(c)s NOTNULL AND NOT ST_IsEmpty(NEW.%(c)s)) BEGIN '
+    'DELETE FROM %(r)s WHERE id = OLD.%(i)s; '
+    'INSERT OR REPLACE INTO %(r)s VALUES (NEW.%(i)s, ST_MinX(NEW.%(c)s), ST_MaxX(NEW.%(c)s), ST_MinY(NEW.%(c)s), ST_MaxY(NEW.%(c)s)); END',
+    'CREATE TRIGGER "%(trigger)s_update4" AFTER UPDATE ON %(t)s '
+    'WHEN OLD.%(i)s != NEW.%(i)s AND (NEW.%(c)s ISNULL OR ST_IsEmpty(NEW.%(c)s)) BEGIN '
+    'DELETE FROM %(r)s WHERE id IN (OLD.%(i)s, NEW.%(i)s); END',
+    'CREATE TRIGGER "%(trigger)s_delete" AFTER DELETE ON %(t)s '
+    'WHEN old.%(c)s NOT NULL BEGIN '
+    'DELETE FROM %(r)s WHERE id = OLD.%(i)s; END'
+    ]
+
+class SqliteInsertCursor:
+    # arcpy.da.InsertCursor look-alike. Rows are written in batches, and committed when
+    #   the cursor is closed (or leaves a with statement). insertRow does not return an OID
+    batchSize = 10000
+    def __init__(self, workspace, table, fields):
+        fieldObjs, info = workspace._info(table)
+        fieldTypes = dict([(f.name.lower(), f.type) for f in fieldObjs])
+        self.connection = workspace.connection
+        srid = 0
+        zm = (0, 0)
+        if info.shapeFieldName <> None:
+            row = self.connection.execute('SELECT srs_id, z, m FROM gpkg_geometry_columns WHERE table_name = ?', (table,)).fetchone()
+            if row <> None:
+                srid = row[0]
+                zm = row[1:]
+        columns = []
+        self.converters = []
+        identity = lambda v: v
+        for f in fields:
+            fu = f.upper()
+            if fu == 'OID@':
+                columns.append(quoteName(info.OIDFieldName)); self.converters.append(identity)
+            elif fu.startswith('SHAPE@') or fieldTypes.get(f.lower()) == 'Geometry':
+                if info.shapeFieldName == None:
+                    raise ValueError(table+' has no geometry')
+                columns.append(quoteName(info.shapeFieldName))
+                self.converters.append(shapeWriter(fu, srid, zm))
+            elif fieldTypes.get(f.lower()) == 'Date':
+                columns.append(quoteName(f)); self.converters.append(formatDate)
+            else:
+                columns.append(quoteName(f)); self.converters.append(identity)
+        self.sql = ('INSERT INTO '+quoteName(table)+' ('+', '.join(columns)+') VALUES ('+
+                    ', '.join(['?'] * len(columns))+')')
+        self.rows = []
+    def insertRow(self, row):
+        self.rows.append([c(v) for c, v in zip(self.converters, row)])
+        if len(self.rows) >= self.batchSize:
+            self.flush()
+    def flush(self):
+        if len(self.rows) > 0:
+            self.connection.executemany(self.sql, self.rows)
+            self.rows = []
+    def close(self):
+        self.flush()
+        self.connection.commit()
+    def __enter__(self):
+        return self
+    def __exit__(self, excType, excValue, tb):
+        if excType == None:
+            self.close()
+        else:
+            self.rows = []
+            self.connection.rollback()
+        return False
+
+def formatDate(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+def shapeWriter(token, srid, zm=(0, 0)):
+    # returns function that turns the value written for token into a GeoPackage geometry blob.
+    #   zm are the z and m values of gpkg_geometry_columns: a Geometry keeps its Z and M
+    #   unless they are prohibited (0)
+    def fromGeometry(g):
+        if g == None or len(g.paths) == 0:
+            return None
+        hasZ, hasM = geometryDims(g.paths)
+        wkb = geometryToWkb(g, hasZ and zm[0] <> 0, hasM and zm[1] <> 0)
+        return sqlite3.Binary(gpkgBlob(wkb, srid, g.paths))
+    def fromXY(xy):
+        if xy == None or xy[0] == None:
+            return None
+        return sqlite3.Binary(gpkgBlob(struct.pack('<BIdd', 1, 1, xy[0], xy[1]), srid))
+    def fromWkb(wkb):
+        if wkb == None:
+            return None
+        g = geometryFromWkb(wkb)
+        return sqlite3.Binary(gpkgBlob(str(wkb), srid, g.paths))
+    if token == 'SHAPE@XY':
+        return fromXY
+    if token == 'SHAPE@WKB':
+        return fromWkb
+    return fromGeometry
+
+gpkgSpatialRefSys = [
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', 'undefined cartesian coordinate reference system'),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', 'undefined geographic coordinate reference system'),
+    ('WGS 84 geodetic', 4326, 'EPSG', 4326, 'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,'
+        'AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],'
+        'UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]',
+        'longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid')]
+
+def _createGeoPackage(path):
+    c = sqlite3.connect(path)
+    c.execute('PRAGMA application_id = 1196444487')   # 'GPKG'
+    c.execute('PRAGMA user_version = 10200')
+    c.execute('CREATE TABLE gpkg_spatial_ref_sys (srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY, '
+              'organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, description TEXT)')
+    c.executemany('INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)', gpkgSpatialRefSys)
+    c.execute("CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, "
+              "identifier TEXT UNIQUE, description TEXT DEFAULT '', "
+              "last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')), "
+              "min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER, "
+              "CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id))")
+    c.execute('CREATE TABLE gpkg_geometry_columns (table_name TEXT NOT NULL, column_name TEXT NOT NULL, '
+              'geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL, '
+              'CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name), '
+              'CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name), '
+              'CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id))')
+    c.commit()
+    c.close()
+
+def shapeTypeName(gpkgType):
+    gpkgType = gpkgType.upper()
+    if gpkgType == 'POINT':
+        return 'Point'
+    if gpkgType == 'MULTIPOINT':
+        return 'Multipoint'
+    if 'LINE' in gpkgType or ('CURVE' in gpkgType and not 'POLYGON' in gpkgType):
+        return 'Polyline'
+    if 'POLYGON' in gpkgType or 'SURFACE' in gpkgType:
+        return 'Polygon'
+    return 'Polyline'
+
+def shapeConverter(token):
+    # returns function that turns a GeoPackage geometry blob into the value for token
+    def toGeometry(blob):
+        wkb = gpkgBlobToWkb(blob)
+        if wkb == None:
+            return None
+        return geometryFromWkb(wkb)
+    if token == 'SHAPE@WKB':
+        return gpkgBlobToWkb
+    if token == 'SHAPE@':
+        return toGeometry
+    if token == 'SHAPE@LENGTH':
+        return lambda blob: getattr(toGeometry(blob), 'length', None)
+    if token == 'SHAPE@AREA':
+        return lambda blob: getattr(toGeometry(blob), 'area', None)
+    # SHAPE@XY, or the shape field by name (which arcpy.da also returns as centroid)
+    def toXY(blob):
+        g = toGeometry(blob)
+        if g == None:
+            return (None, None)
+        return g.centroid
+    return toXY
+
+##############################
+# arcpy
+
+class ArcpyWorkspace:
+    # Each method passes straight through to arcpy
+    def __init__(self, path):
+        self.path = path
+    def _list(self, function, *args):
+        oldWS = arcpy.env.workspace
+        arcpy.env.workspace = self.path
+        try:
+            result = function(*args)
+        finally:
+            arcpy.env.workspace = oldWS
+        if result == None:
+            return []
+        return result
+    def listTables(self):
+        return self._list(arcpy.ListTables)
+    def listFeatureClasses(self, dataset='', featureType=''):
+        return self._list(arcpy.ListFeatureClasses, '', featureType, dataset)
+    def listDatasets(self):
+        return self._list(arcpy.ListDatasets, '', 'Feature')
+
+##############################
+# path-based interface
+
+workspaces = {}   # (process id, database file): SqliteWorkspace
+
+def sqliteWorkspace(path):
+    # SqliteWorkspace for path, opened once per process
+    db = splitSqlitePath(path)[0]
+    key = (os.getpid(), os.path.abspath(db))
+    if not key in workspaces:
+        workspaces[key] = SqliteWorkspace(db)
+    return workspaces[key]
+
+def openWorkspace(path):
+    if isSqlitePath(path):
+        return sqliteWorkspace(path)
+    if arcpy == None:
+        raise ImportError('arcpy is needed to read '+path)
+    return ArcpyWorkspace(path)
+
+def listTables(workspace):
+    return openWorkspace(workspace).listTables()
+
+def listFeatureClasses(workspace, dataset='', featureType=''):
+    return openWorkspace(workspace).listFeatureClasses(dataset, featureType)
+
+def listDatasets(workspace):
+    return openWorkspace(workspace).listDatasets()
+
+def exists(path):
+    if isSqlitePath(path):
+        db, table = splitSqlitePath(path)
+        if not os.path.exists(db):
+            return False
+        return sqliteWorkspace(path).exists(table)
+    return arcpy.Exists(path)
+
+def listFields(table):
+    if isSqlitePath(table):
+        return sqliteWorkspace(table).listFields(splitSqlitePath(table)[1])
+    return arcpy.ListFields(table)
+
+def describe(table):
+    if isSqlitePath(table):
+        return sqliteWorkspace(table).describe(splitSqlitePath(table)[1])
+    return arcpy.Describe(table)
+
+def getCount(table):
+    if isSqlitePath(table):
+        return sqliteWorkspace(table).getCount(splitSqlitePath(table)[1])
+    return int(str(arcpy.GetCount_management(table)))
+
+def createGeoPackage(path):
+    # creates an empty GeoPackage at path, returns its SqliteWorkspace
+    if os.path.exists(path):
+        raise ValueError(path+' already exists')
+    _createGeoPackage(path)
+    return sqliteWorkspace(path)
+
+def createTable(workspace, table, fieldDefs, shapeType=None, srid=0):
+    # creates table, or feature class if shapeType is given. With arcpy, workspace may be
+    #   a geodatabase or a feature dataset, and srid is ignored (a feature class takes the
+    #   spatial reference of its feature dataset)
+    if isSqlitePath(workspace):
+        return sqliteWorkspace(workspace).createTable(table, fieldDefs, shapeType, srid)
+    if shapeType <> None:
+        arcpy.CreateFeatureclass_management(workspace, table, shapeType.upper())
+    else:
+        arcpy.CreateTable_management(workspace, table)
+    path = os.path.join(workspace, table)
+    for fDef in fieldDefs:
+        fType = gemsArcpyTypes[fDef[1]]
+        if fDef[1] == 'String' and len(fDef) > 3:
+            arcpy.AddField_management(path, fDef[0], fType, '#', '#', fDef[3], '#', 'NULLABLE')
+        else:
+            arcpy.AddField_management(path, fDef[0], fType, '#', '#', '#', '#', 'NULLABLE')
+
+def createSpatialIndex(table):
+    # GeoPackage feature classes only. arcpy feature classes in geodatabases always have one
+    if isSqlitePath(table):
+        return sqliteWorkspace(table).createSpatialIndex(splitSqlitePath(table)[1])
+
+class ArcpyInsertCursor:
+    # arcpy.da.InsertCursor that also takes a Geometry for SHAPE@, written as an arcpy
+    #   geometry in the spatial reference of table
+    def __init__(self, table, fields):
+        self.shapeIndex = [f.upper() for f in fields].index('SHAPE@')
+        self.spatialReference = arcpy.Describe(table).spatialReference
+        self.cursor = arcpy.da.InsertCursor(table, fields)
+    def insertRow(self, row):
+        shape = row[self.shapeIndex]
+        if isinstance(shape, Geometry):
+            row = list(row)
+            row[self.shapeIndex] = arcpyGeometry(shape, self.spatialReference)
+        return self.cursor.insertRow(row)
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        del self.cursor
+        return False
+
+def insertCursor(table, fields):
+    if isSqlitePath(table):
+        return sqliteWorkspace(table).insertCursor(splitSqlitePath(table)[1], fields)
+    if 'SHAPE@' in [f.upper() for f in fields]:
+        return ArcpyInsertCursor(table, fields)
+    return arcpy.da.InsertCursor(table, fields)
+
+def searchCursor(table, fields, where=None, orderBy=None):
+    if isSqlitePath(table):
+        return sqliteWorkspace(table).searchCursor(splitSqlitePath(table)[1], fields, where, orderBy)
+    if orderBy:
+        sqlClause = (None, 'ORDER BY '+orderBy)
+    else:
+        sqlClause = (None, None)
+    return arcpy.da.SearchCursor(table, fields, where, None, False, sqlClause)
@@ -2,14 +2,14 @@
 assumptions
     Nodes have 2, 3, or 4 arcs
         if 4 arcs, one is concealed
-    Nodes have sufficiently distinct positions that they can be identified as string(x)+string(y)
+    Nodes have sufficiently distinct positions that arc ends within searchRadius of each other
+       (in x and in y) are the same node
     all arcs that bound water have unique (not-contact, not-fault) types
 
 ***
-IDENTITY copyCAF with MapUnitPolys to get copy2CAF
-
-make list of nodes-arcIDs in copy2CAF
-sort list on XY
+read MapUnitPolys, and index the polygons
+read CAF once: group arc ends into nodes, and for each unconcealed arc find the map units
+   to its left and right
 if 3 arcs at node:
    figure out which two arcs have lowest hKey values for leftMapUnit or RightMapUnit
    set youngArcsDict[nodeID] = [youngArcID, youngArcID]
@@ -22,9 +22,7 @@ youngArcsDict for some nodes. Instead of a list of nodes-arcIDS, we could make a
 and only figure out youngArcsDict for those nodes where we will use the information
 
 ***
-Make list of nodes-arcIDs in copyCAF
-sort list on XY
-
+For each node
 if 2 arcs at node
     if arcsIdentical(), assign same mergeNumber to each
        (and if one already has a mergeNumber, assign this number to the other and to all other arcs with same mergeNumber
@@ -44,19 +42,32 @@ if 3 arcs at node
 if >3 arcs at node, raise an error flag
 
 
-Goal: dictionary of mergeNumbers, with arcIDs as keys
-    mergeNumberDict[arcID] = integer
+Goal: arcs to be merged are unioned in a DisjointSet; each set gets a mergeNumber
 
-Then, rename CAF to oldCAF
-Add field mergeNumber to oldCAF
-with updateCursor on oldCAF, set mergeNumber = mergeNumberDict[arcID]
-dissolve oldCAF on fields type, isConcealed, ExConf, IdConf, LCM, DataSourceID, mergeNumber
-  toget new CAF
-drop field mergeNumber and add any unconserved fields (Notes, Label, Symbol, ...)
+Then, copy CAF to savedCAF
+read CAF, and chain arcs with the same type, isConcealed, ExConf, IdConf, LCM, DataSourceID,
+  Label, Notes, and mergeNumber into one line each. Other fields (ContactsAndFaults_ID,
+  Symbol, ...) take the values of the first arc
+replace the arcs of CAF with the chained lines
 """
+# 18 October 2026: nodes are built once, in memory, from one read of ContactsAndFaults
+#   (GeMS_Linework.NodeBuilder), rather than twice from sorted scratch feature classes of
+#   line ends; left and right map units come from MapUnitPolys without Identity; and merge
+#   numbers come from a DisjointSet of arcs to be merged
+# 18 October 2026: arcs are merged by GeMS_LineChainer.py and written back to ContactsAndFaults,
+#   rather than by UnsplitLine from a temporary copy. ContactsAndFaults keeps its schema, and
+#   fields not compared take the values of the first arc, as FIRST statistics
+# 18 October 2026: left and right map units are found a few XY tolerances from each arc, so
+#   narrow polygons aren't skipped
+# 18 October 2026: arcs that are merged but don't connect become separate lines, not one multipart
+#   line. Lines keep their Z and M, and are all chained before ContactsAndFaults is emptied
 
 import arcpy, os.path, sys
 from GeMS_utilityFunctions import *
+from GeMS_Linework import NodeBuilder, DisjointSet, sidePoints
+from GeMS_Polygonizer import polygonIndex, findPolygon
+from GeMS_DataAccess import geometryFromWkb, geometryPaths
+from GeMS_LineChainer import LineChainer, writeLines
 
 versionString = 'GeMS_Deplanarize_Arc10.4.py, version of version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_Deplanarize_Arc10.4.py'
@@ -64,21 +75,17 @@ checkVersion(versionString, rawurl, 'gems-tools-arcmap')
 
 # globals
 debug1 = False
-mergeNumber2ArcsDict = {}  # key is mergeNumber, value is list of arcFIDs with this mergeNumber
-arc2MergeNumberDict = {}   # key is arcFID, value is mergeNumber
-nodeName2ArcsDict = {}     # key is nodeName, value is list [ [arcFID,rMapUnit,lMapUnit],[arcFID,rMapUnit,lMapUnit],...]
+mergeSets = DisjointSet()  # arcFIDs, with arcs to be merged in the same set
+arcSidesDict = {}          # key is arcFID of unconcealed arc, value is [arcFID,lMapUnit,rMapUnit]
 hKeyDict = {}              # key is MapUnit, value is HierarchyKey
 
 
 compareFields = ['Type','IsConcealed','ExistenceConfidence','IdentityConfidence',
                  'LocationConfidenceMeters','DataSourceID','Label','Notes']
-statFields = [['ContactsAndFaults_ID','FIRST'],['Symbol','FIRST']]
 compareFieldsTypeIndex = 0
 compareFieldsIsConcealedIndex = 1
 
 searchRadius = 0.01
-
-mergeNumber = 1  # counter values used to define which arcs to merge: we dissolve on fields AND mergeNumber
 ################################
 
 def smallerOf(a,b):
@@ -87,163 +94,48 @@ def smallerOf(a,b):
     else:
         return b
 
-def pointPairGeographicAzimuth(pt1,pt2):
-    dx = pt2[0]-pt1[0]
-    dy = pt2[1]-pt1[1]
-    azi = math.atan2(dy,dx)
-    azi = 90 - math.degrees(azi)
-    if azi < 0:
-        azi = azi + 360
-    return azi
-
-def startGeogDirection(lineSeg):
-    firstPoint = [lineSeg[0].X,lineSeg[0].Y]
-    secondPoint = [lineSeg[1].X,lineSeg[1].Y]
-    return pointPairGeographicAzimuth(firstPoint,secondPoint)
-
-def endGeogDirection(lineSeg):
-    lpt = len(lineSeg) - 1
-    ntlPoint = [lineSeg[lpt-1].X,lineSeg[lpt-1].Y]
-    lastPoint= [lineSeg[lpt].X,lineSeg[lpt].Y]
-    return pointPairGeographicAzimuth(lastPoint,ntlPoint)
-
-def nodeName(x,y):
-    xstr= str(int(round(x*100)))
-    ystr= str(int(round(y*100)))
-    return xstr+'_'+ystr
-
-def makeNodeName2ArcsDict(caf, fields):
-    # takes arc fc, list of fields (e.g. [Left_MapUnit, Right_MapUnit] )
-    #   makes to and from node fcs, concatenates, sorts, finds arc-ends
-    #   that share common XY values
-    # returns dictionary of arcs at each node, keyed to nodename
-    #    i.e., dict[nodename] = [[arc1 fields], [arc2 fields],...]
-    fv1 = os.path.dirname(caf)+'/xxxNfv1'
-    fv2 = os.path.dirname(caf)+'/xxxNfv12'
-
-    lenFields = len(fields)
-    addMsgAndPrint('  making endpoint feature classes')
-    testAndDelete(fv1)
-    arcpy.FeatureVerticesToPoints_management(caf,fv1, 'BOTH_ENDS')
-    addMsgAndPrint('  adding XY values and sorting by XY')
-    arcpy.AddXY_management(fv1)
-    testAndDelete(fv2)
-    arcpy.Sort_management(fv1,fv2,[["POINT_X","ASCENDING"],["POINT_Y","ASCENDING"]])
-    ##fix fields statement and following field references
-    fields.append('SHAPE@XY')
-    indexShape = len(fields)-1
-
-    isFirst = True
-    nArcs = 0
-    nodeList = []
-    with arcpy.da.SearchCursor(fv2, fields) as cursor:
+def readMapUnitPolys(mup):
+    # returns polygonIndex of MapUnitPolys, with MapUnit as value
+    polys = []
+    with arcpy.da.SearchCursor(mup, ['SHAPE@WKB','MapUnit']) as cursor:
         for row in cursor:
-            x = row[indexShape][0]; y = row[indexShape][1]
-            arcFields = row[0:lenFields]
-            if isFirst:
-                isFirst = False
-                lastX = x; lastY = y
-                arcs = [arcFields]
-            elif abs(x-lastX) < searchRadius and abs(y-lastY) < searchRadius:
-                arcs.append(arcFields)
-            else:
-                nodeList.append([nodeName(lastX,lastY),arcs])
-                lastX = x; lastY = y
-                arcs = [arcFields]
-        nodeList.append([nodeName(lastX,lastY),arcs])
-
-    addMsgAndPrint('  '+ str(len(nodeList))+' distinct nodes' )
-    addMsgAndPrint('  cleaning up')
-    for fc in fv1,fv2:
-        testAndDelete(fc)
-
-    nodeDict = {}
-    for n in nodeList:
-        nodeDict[n[0]] = n[1]
-    return nodeDict
-
-def makeNodeList(caf, fields1, arcDirs=False):
-    # takes arc fc, list of fields (e.g. [FID, Type, LocConfM] )
-    #   makes to and from node fcs, concatenates, sorts, finds arc-ends
-    #   that share common XY values
-    # returns list of arcs at each node, keyed to nodename
-    #    i.e., list of [nodename, [[arc1 fields], [arc2 fields],...] ]
-    #  and, if arcDirs == True, includes initial direction for each arc
-    tempCaf =  os.path.dirname(caf)+'/xxxtempCaf'
-    fv1 = os.path.dirname(caf)+'/xxxfv1'
-    fv1a = os.path.dirname(caf)+'/xxxfv1a'
-    fv2 = os.path.dirname(caf)+'/xxxfv12'
-
-    fields = list(fields1)  # make a copy of fields1, so that we don't modify it
-    lenFields = len(fields)
-    if not arcDirs:
-        xCaf = caf
-    else:
-        addMsgAndPrint('  calculating line directions at line ends')
-        fields.append('LineDir')
-        lineDirIndex = len(fields)-1
-        testAndDelete(tempCaf)
-        arcpy.Copy_management(caf,tempCaf)
-        xCaf = tempCaf
-        arcpy.AddField_management(tempCaf,'LineDir','FLOAT')
-        arcpy.AddField_management(tempCaf,'EndDir','FLOAT')
-        dirFields = ['SHAPE@','LineDir','EndDir']
-        with arcpy.da.UpdateCursor(tempCaf,dirFields) as cursor:
-            for row in cursor:
-                lineSeg = row[0].getPart(0)
-                row[1] = startGeogDirection(lineSeg)
-                row[2] = endGeogDirection(lineSeg)
-                cursor.updateRow(row)
-        xcaf = tempCaf
-        lenFields = lenFields+1
-    addMsgAndPrint('  making endpoint feature classes')
-    testAndDelete(fv1)
-    testAndDelete(fv1a)
-    arcpy.FeatureVerticesToPoints_management(xCaf,fv1, 'START')
-    arcpy.FeatureVerticesToPoints_management(xCaf,fv1a,'END')
-    if arcDirs:
-        arcpy.CalculateField_management(fv1a,'LineDir','!EndDir!','PYTHON')
-    arcpy.Append_management(fv1a,fv1)
-    addMsgAndPrint('  adding XY values and sorting by XY')
-    arcpy.AddXY_management(fv1)
-    testAndDelete(fv2)
-    arcpy.Sort_management(fv1,fv2,[["POINT_X","ASCENDING"],["POINT_Y","ASCENDING"]])
-
-    ##fix fields statement and following field references
-    fields.append('SHAPE@XY')
-    indexShape = len(fields)-1
-    FID = 'ORIG_FID'
-    fields.append(FID)
-    indexFID = len(fields)-1
-
-    
-    isFirst = True
-    nArcs = 0
-    nodeList = []
-    with arcpy.da.SearchCursor(fv2, fields) as cursor:
+            if row[0] <> None:
+                polys.append([geometryFromWkb(row[0]).paths, row[1]])
+    return polygonIndex(polys)
+
+def mapUnitAt(mupIndex, pt):
+    # MapUnit of polygon at pt, '' if none (as Identity leaves LEFT_ and RIGHT_MapUnit)
+    mu = findPolygon(mupIndex, pt[0], pt[1])
+    if mu == None:
+        return ''
+    return mu
+
+def buildNodes(caf, fields, mupIndex):
+    # one pass through caf. Groups arc ends into nodes, and fills arcSidesDict
+    #   with the map units left and right of each unconcealed arc
+    # returns list of nodes, each a list of arcs [arcFID, [field values]]
+    nodes = NodeBuilder(searchRadius)
+    tolerance = arcpy.Describe(caf).spatialReference.XYTolerance
+    with arcpy.da.SearchCursor(caf, ['OID@','SHAPE@WKB'] + fields) as cursor:
         for row in cursor:
-            x = row[indexShape][0]; y = row[indexShape][1]
-            origFID = row[indexFID]
-            arcFields = row[0:lenFields]
-            if isFirst:
-                lastX = x; lastY = y
-                isFirst = False
-                arcs = []
-            if abs(x-lastX) < searchRadius and abs(y-lastY) < searchRadius:
-                arcs.append([origFID,arcFields])
-            else:
-                nodeList.append([nodeName(lastX,lastY),arcs])
-                arcs = [[origFID,arcFields]]
-                lastX = x; lastY = y
-        nodeList.append([nodeName(lastX,lastY),arcs])
-
-    addMsgAndPrint('  '+ str(len(nodeList))+' distinct nodes' )
-    addMsgAndPrint('  cleaning up')
-    for fc in tempCaf,fv1,fv1a,fv2:
-        testAndDelete(fc)
-    return nodeList
-
-def threeArcsMeet(nodeName,arcs):
+            if row[1] == None:
+                continue
+            paths = geometryFromWkb(row[1]).paths
+            if len(paths) == 0 or len(paths[0]) < 2:
+                continue
+            arc = [row[0], row[2:]]
+            firstPt = paths[0][0]
+            lastPt = paths[-1][-1]
+            nodes.add(firstPt[0], firstPt[1], arc)
+            nodes.add(lastPt[0], lastPt[1], arc)
+            if row[2 + compareFieldsIsConcealedIndex] == 'N':
+                sides = sidePoints(paths[0], tolerance)
+                if sides <> None:
+                    arcSidesDict[row[0]] = [row[0], mapUnitAt(mupIndex, sides[0]), mapUnitAt(mupIndex, sides[1])]
+    addMsgAndPrint('  '+ str(len(nodes.nodes))+' distinct nodes' )
+    return [node[2] for node in nodes.sortedNodes()]
+
+def threeArcsMeet(arcs):
     # takes list of 3 as argument.
     # if number of not concealed arcs <> 3, writes an error message, sets
     #  sets oddArcs = [arcs], mergeArcs = [] and returns
@@ -259,10 +151,9 @@ def threeArcsMeet(nodeName,arcs):
         addMsgAndPrint('  Problem in adjoinYoungestPoly, '+str(len(arcs))+' arcs')
         addMsgAndPrint(str(arcs))
         return [], arcs
-    try:
-        arcPolyList = nodeName2ArcsDict[nodeName]
-    except:
-        addMsgAndPrint('  '+ nodeName+' has no entry in nodeName2ArcDict')
+    arcPolyList = [arcSidesDict[arc[0]] for arc in arcs if arc[0] in arcSidesDict]
+    if len(arcPolyList) <> 3:
+        addMsgAndPrint('  arcs '+str([arc[0] for arc in arcs])+' do not all have left and right map units')
         return [], arcs
     ay = []
     for arc in arcPolyList:
@@ -301,42 +192,18 @@ def arcAttribsSame(arcs):
         return arcsSame
 
 def setUniqueMergeNumbers(arcs):
-    global mergeNumber
+    # arcs not yet in a merge set get a set of their own
     if arcs <> [None]:
-        try:
-          for anArc in arcs:
-            if not anArc[0] in arc2MergeNumberDict.keys():
-                mergeNumber += 1
-                arc2MergeNumberDict[anArc[0]] = mergeNumber
-                mergeNumber2ArcsDict[mergeNumber] = [anArc[0]]
-        except:
-          addMsgAndPrint( '  setUniqueMergeNumbers failed')
-          addMsgAndPrint(str(arcs))
-          pass
+        for anArc in arcs:
+            mergeSets.find(anArc[0])
     return
 
 def setMatchingMergeNumbers(arcs):
-    global mergeNumber
-    # test that len(arcs) >= 2 else print error message and return
-    otherArcs = None
+    # arcs, and all arcs already to be merged with them, are to be merged
     if arcs <> None:
       if len(arcs) >= 2:
-        mn = 0
-        arcIDs = []
-        for anArc in arcs:
-            arcIDs.append(anArc[0])
-            if anArc[0] in arc2MergeNumberDict.keys():
-                mn = arc2MergeNumberDict[anArc[0]]
-                otherArcs = mergeNumber2ArcsDict[mn]
-        if mn == 0:  # no arc yet tagged with mergeNumber
-            mergeNumber += 1
-        else:   # got some arcs with this mn already
-            for oa in otherArcs:
-                if not oa in arcIDs:
-                    arcIDs.append(oa)
-        for anArc in arcs:
-            arc2MergeNumberDict[anArc[0]] = mergeNumber
-        mergeNumber2ArcsDict[mergeNumber] = arcIDs            
+        for anArc in arcs[1:]:
+            mergeSets.union(arcs[0][0], anArc[0])
       else:
         addMsgAndPrint('  Got an error in setMatchingMergeNumbers. Only '+str(len(arcs))+' arcs!')
         for anArc in arcs:
@@ -350,7 +217,6 @@ def setMatchingMergeNumbers(arcs):
 inGdb = sys.argv[1]
 inFds = inGdb+'/GeologicMap'
 inCaf = inFds+'/ContactsAndFaults'
-tempCaf = inFds+'/xxxTempCaf'
 inMup = inFds+'/MapUnitPolys'
 inDMU = os.path.dirname(inFds)+'/DescriptionOfMapUnits'
 
@@ -367,36 +233,15 @@ with arcpy.da.SearchCursor(inDMU, fields) as cursor:
 # and, for arcs that adjoin nothing (map boundaries!)
 hKeyDict[''] = '0'  
 
-copyCaf = inFds+'/xxxCopyCAF'
-copy2Caf = inFds+'/xxxCopy2CAF'
-#copy CAF to copyCAF
-addMsgAndPrint('Copying ContactsAndFaults to '+copyCaf)
-addMsgAndPrint('  and deleting concealed arcs')
-testAndDelete(copyCaf)
-arcpy.Copy_management(inCaf,copyCaf)
+addMsgAndPrint('Reading MapUnitPolys')
+mupIndex = readMapUnitPolys(inMup)
 
-# delete all concealed arcs in copyCAF
-isCon = arcpy.AddFieldDelimiters(copyCaf,"IsConcealed")
-testAndDelete('notConcealedCaf')
-arcpy.MakeFeatureLayer_management(copyCaf,'notConcealedCaf',isCon+" = 'N' ")
-
-# IDENTITY notConcealedCAF with MapUnitPolys to get copy2CAF
-addMsgAndPrint('Copying ContactsAndFaults to '+copy2Caf)
-addMsgAndPrint('  and IDENTITYing with MapUnitPolys')
-testAndDelete(copy2Caf)
-arcpy.Identity_analysis('notConcealedCaf',inMup,copy2Caf,'ALL','','KEEP_RELATIONSHIPS')
-# make dictionary Dict[nodeName] = [[arcFID,lMapUnit,rMapUnit],[arcFID,lMapUnit,rMapUnit],...] of arcs at each node
-addMsgAndPrint('Building nodeName2ArcsDict')
-nodeName2ArcsDict = makeNodeName2ArcsDict(copy2Caf, ['FID_'+os.path.basename(copyCaf),'LEFT_MapUnit','RIGHT_MapUnit'])
-
-addMsgAndPrint('Building allNodeList')
-
-allNodeList = makeNodeList(inCaf,compareFields)
+addMsgAndPrint('Building nodes')
+allNodeList = buildNodes(inCaf,compareFields,mupIndex)
+del mupIndex
 
 addMsgAndPrint('Iterating through nodes to find arcs to be unsplit')
-for node in allNodeList:
-    nodeName = node[0]
-    arcs = node[1]
+for arcs in allNodeList:
     oddArcs = []
     mergeArcs = []
     # remove concealed arcs
@@ -433,7 +278,7 @@ for node in allNodeList:
          # all arcs are contacts
         if len(arcTypes) == 1 and 'contact' in arcTypes and concealedStatus == 'NNN':
             if debug1: addMsgAndPrint('3 arcs, all are contacts')
-            mergeArcs, newOddArcs = threeArcsMeet(nodeName,arcs)
+            mergeArcs, newOddArcs = threeArcsMeet(arcs)
             for arc in newOddArcs:
                 oddArcs.append(arc)       
         # if only two arcs have same type (contact, normal fault, map boundary, waterline, ...)
@@ -472,37 +317,43 @@ for node in allNodeList:
 savedCaf = getSaveName(inCaf)
 addMsgAndPrint('Copying ContactsAndFaults to '+savedCaf)
 arcpy.Copy_management(inCaf,savedCaf)
-# copy CAF to tempCaf
-addMsgAndPrint('Copying ContactsAndFaults to '+tempCaf)
-testAndDelete(tempCaf)
-arcpy.Copy_management(inCaf,tempCaf)
-# delete CAF
-testAndDelete(inCaf)
-## now, need to add mergeNumber field
-addMsgAndPrint('Updating arcs with MergeNumber values')
-arcpy.AddField_management(tempCaf, 'MergeNumber','LONG')
-# open update cursor
-with arcpy.da.UpdateCursor(tempCaf, ['OBJECTID','MergeNumber']) as cursor:
+
+# number the merge sets
+mergeNumbers = {}  # key is representative arcFID of merge set, value is mergeNumber
+for arcID in sorted(mergeSets.parent.keys()):
+    root = mergeSets.find(arcID)
+    if not root in mergeNumbers:
+        mergeNumbers[root] = len(mergeNumbers) + 1
+mergeNumber = len(mergeNumbers)
+
+# chain arcs with the same compareFields values and mergeNumber
+addMsgAndPrint('Chaining arcs with the same MergeNumber')
+cafFields = [f.name for f in arcpy.ListFields(inCaf) if f.editable and not f.type in ('OID','Geometry','GlobalID')
+             and not f.name.lower() == 'shape_length']
+compareIndexes = [cafFields.index(f) for f in compareFields]
+chainer = LineChainer(searchRadius)
+with arcpy.da.SearchCursor(inCaf, ['OID@','SHAPE@'] + cafFields) as cursor:
     for row in cursor:
-        if row[0] in arc2MergeNumberDict.keys():
-            row[1] = arc2MergeNumberDict[row[0]]
+        if row[1] == None:
+            continue
+        if row[0] in mergeSets:
+            rowMergeNumber = mergeNumbers[mergeSets.find(row[0])]
         else:
             mergeNumber += 1
-            row[1] = mergeNumber
-            addMsgAndPrint('  OBJECTID = '+str(row[0])+' not in arc2MergeNumberDict')
-        cursor.updateRow(row)
-## merge tempCaf to CAF (and keep other fields!)
-addMsgAndPrint('Unsplitting '+tempCaf+' to ContactsAndFaults')
-arcpy.UnsplitLine_management(tempCaf,inCaf,compareFields,statFields)
-## drop mergeNumber field
-arcpy.DeleteField_management(inCaf,'MergeNumber')
-
-addMsgAndPrint(str(numberOfRows(tempCaf))+' rows in old CAF, '+str(numberOfRows(inCaf))+' rows in new CAF')
-
-addMsgAndPrint('Cleaning up')
-addMsgAndPrint('  but not deleting tempCaf = '+tempCaf)
-for fc in copyCaf,copy2Caf:   #,tempCaf:
-    testAndDelete(fc)
+            rowMergeNumber = mergeNumber
+            addMsgAndPrint('  OBJECTID = '+str(row[0])+' not in a merge set')
+        values = row[2:]
+        key = (rowMergeNumber,) + tuple([values[i] for i in compareIndexes])
+        chainer.add(key, row[0], geometryPaths(row[1]), values)
+# chain every group before any arc is deleted, so that a failure leaves CAF as it was
+lines = list(chainer.lines())
+
+## replace arcs of CAF with chained lines (and keep other fields!)
+addMsgAndPrint('Writing chained lines to ContactsAndFaults')
+arcpy.DeleteFeatures_management(inCaf)
+nLines = writeLines(inCaf, cafFields, lines)
+
+addMsgAndPrint(str(chainer.nArcs)+' rows in old CAF, '+str(nLines)+' rows in new CAF')
 
 
 
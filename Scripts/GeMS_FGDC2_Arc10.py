@@ -4,6 +4,8 @@
 #   -added function __updateCSdom to add codeset domains, specifically for GeoMaterial
 #   -re-wrote def __updateEdom to produce the same structure as the 'upgrade' function in mp
 #   -re-wrote def __updateRdom to catch ESRI fields shape, shape_length, and shape_area
+# 18 October 2026: Glossary, DataSources, DescriptionOfMapUnits, and GeoMaterialDict are read once into
+#   TableLookup caches shared by all entities, rather than queried once per value
 
 import sys, os, os.path, arcpy, copy, imp
 from GeMS_utilityFunctions import *
@@ -153,11 +155,9 @@ def __updateCSdom(fld, dom, csdomTextString, csdomSourceString):
 
 def __findInlineRef(sourceID):
     # finds the Inline reference for each DataSource_ID
-    query = '"DataSources_ID" = \'' + sourceID + '\''
-    rows = arcpy.SearchCursor(dataSources, query)
-    row = rows.next()
+    row = dataSourcesLookup.get(sourceID)
     if not row is None:
-        return row.Source
+        return row[0]
     else:
         return ""
 
@@ -221,20 +221,18 @@ def __updateEntityAttributes(fc, fldList, dom, logFile):
             #matchs a Term field value from the glossary
             if fld == 'MapUnit' and fc <> 'DescriptionOfMapUnits':
                 for t in valList:            
-                    query = '"MapUnit" = \'' + t + '\''
-                    rows = arcpy.SearchCursor(DMU, query)
-                    row = rows.next()
-                    #if the searchcursor contains a row
+                    row = dmuLookup.get(t)  # FullName, Name
+                    #if DMU has this map unit
                     if row:
                         #create an entry in the dictionary of term:[definition, source] key:value pairs
                         #this is how we will enumerate through the enumerated_domain section
                         defs[t] = []
-                        if row.FullName <> None:
-                            defs[t].append(row.FullName.encode('utf-8'))
+                        if row[0] <> None:
+                            defs[t].append(row[0].encode('utf-8'))
                             defs[t].append('this report, table DescriptionOfMapUnits')
                         else:
                             addMsgAndPrint('MapUnit = '+t+', FullName not defined')
-                            defs[t].append(row.Name.encode('utf-8'))
+                            defs[t].append(row[1].encode('utf-8'))
                             defs[t].append('this report, table DescriptionOfMapUnits')
                     else:
                         if not t in ('',' '): cantfindValue.append([fld,t])
@@ -247,19 +245,15 @@ def __updateEntityAttributes(fc, fldList, dom, logFile):
                 if debug:
                     addMsgAndPrint('DMU / GeoMaterials!')
                 for t in valList:
-                    query = '"GeoMaterial" = \'' + t + '\''
-                    if debug:
-                        addMsgAndPrint('query='+query)
-                    rows = arcpy.SearchCursor(gmDict, query)
-                    row = rows.next()
-                    #if the searchcursor contains a row
+                    row = gmDictLookup.get(t)  # Definition
+                    #if GeoMaterialDict has this GeoMaterial
                     if row:
                         if debug:
-                            addMsgAndPrint(row.GeoMaterial+' : '+row.Definition.encode('utf-8'))
+                            addMsgAndPrint(t+' : '+row[0].encode('utf-8'))
                         #create an entry in the dictionary of term:[definition, source] key:value pairs
                         #this is how we will enumerate through the enumerated_domain section
                         defs[t] = []
-                        defs[t].append(row.Definition.encode('utf-8'))
+                        defs[t].append(row[0].encode('utf-8'))
                         defs[t].append(' GeMS documentation')
                     else:
                         addMsgAndPrint('GeoMaterial = '+t+': not defined in GeoMaterialDict')
@@ -270,32 +264,26 @@ def __updateEntityAttributes(fc, fldList, dom, logFile):
                     if debug:
                         addMsgAndPrint('Field '+fld+', appending '+t+' to dataSourceValues')
                     dataSourceValues.append(t)
-                    query = '"DataSources_ID" = \'' + t + '\''
-                    rows = arcpy.SearchCursor(dataSources, query)
-                    row = rows.next()
-                    #if the searchcursor contains a row
+                    row = dataSourcesLookup.get(t)  # Source
+                    #if DataSources has this DataSources_ID
                     if row:
                         #create an entry in the dictionary of term:[definition, source] key:value pairs
                         #this is how we will enumerate through the enumerated_domain section
                         defs[t] = []
-                        defs[t].append(row.Source.encode('utf-8'))
+                        defs[t].append(row[0].encode('utf-8'))
                         defs[t].append('this report, table DataSources')
                     else:
                         cantfindValue.append([fld,t])
             else:
                 for t in valList:
-                    query = '"Term" = '+"'"+ t + "'"
-                    if debug:
-                        addMsgAndPrint('query='+query)
-                    rows = arcpy.SearchCursor(gloss, query)
-                    row = rows.next()
-                    #if the searchcursor contains a row
+                    row = glossLookup.get(t)  # Definition, DefinitionSourceID
+                    #if Glossary has this term
                     if row:
                         #create an entry in the dictionary of term:[definition, source] key:value pairs
                         #this is how we will enumerate through the enumerated_domain section
                         defs[t] = []
-                        defs[t].append(row.Definition.encode('utf-8'))
-                        defs[t].append(__findInlineRef(row.DefinitionSourceID).encode('utf-8'))
+                        defs[t].append(row[0].encode('utf-8'))
+                        defs[t].append(__findInlineRef(row[1]).encode('utf-8'))
                     else:
                         if fld <> 'GeoMaterial' and fc <> 'GeoMaterialDict':
                             cantfindValue.append([fld,t])
@@ -530,6 +518,12 @@ gloss = os.path.join(inGdb, 'Glossary')
 dataSources = os.path.join(inGdb, 'DataSources')
 DMU = os.path.join(inGdb, 'DescriptionOfMapUnits')
 gmDict = os.path.join(inGdb, 'GeoMaterialDict')
+# Glossary, DataSources, DMU, and GeoMaterialDict are each read once, when first needed,
+#   and shared by all entities
+glossLookup = TableLookup(gloss,'Term',['Definition','DefinitionSourceID'])
+dataSourcesLookup = TableLookup(dataSources,'DataSources_ID',['Source'])
+dmuLookup = TableLookup(DMU,'MapUnit',['FullName','Name'])
+gmDictLookup = TableLookup(gmDict,'GeoMaterial',['Definition'])
 logFileName = inGdb+'-metadataLog.txt'
 
 # read mrXML into domMR
@@ -0,0 +1,414 @@
+# GeMS_FlatGeobuf.py
+# FlatGeobuf (https://flatgeobuf.org) writer for GeMS_TranslateToShape_Arc10.py. Nothing
+#   here imports arcpy, or needs the flatbuffers package: the few FlatBuffers tables that
+#   FlatGeobuf uses are serialized by FlatTable
+#
+#   writer = FlatGeobufWriter(path, name, shapeType, columns, crs)
+#   writer.insertRow(geometry, values)   geometry is a GeMS_DataAccess.Geometry or None
+#   writer.close()
+#
+# Features are streamed to a temporary file as they are inserted, keeping only their
+#   envelopes and sizes in memory. close() sorts them along a Hilbert curve, writes the
+#   header and a packed Hilbert R-tree index, and copies the features in index order.
+#   Geometries are written in 2D
+# 18 October 2026: first version
+
+import os, os.path, struct, math, datetime
+from array import array
+from GeMS_DataAccess import polygonRings
+
+magicBytes = 'fgb\x03fgb\x00'
+defaultNodeSize = 16
+
+# FlatGeobuf GeometryType
+fgbPoint = 1
+fgbMultiPoint = 4
+fgbMultiLineString = 5
+fgbPolygon = 3
+fgbMultiPolygon = 6
+shapeTypes = {'Point':fgbPoint, 'Multipoint':fgbMultiPoint, 'Polyline':fgbMultiLineString,
+              'Polygon':fgbMultiPolygon}
+
+# arcpy field type: FlatGeobuf ColumnType
+columnTypes = {'SmallInteger':3, 'Integer':5, 'Single':9, 'Double':10, 'String':11,
+               'Date':13, 'GUID':11, 'GlobalID':11, 'Blob':14}
+
+##############################
+# FlatBuffers
+
+scalarFormats = {'ubyte':'<B', 'bool':'<B', 'ushort':'<H', 'int':'<i', 'uint':'<I', 'ulong':'<Q'}
+
+class FlatTable:
+    # a FlatBuffers table: fields[id] = (kind, value). kind is a key of scalarFormats, or
+    #   'string', 'doubles', 'uints', 'ubytes' (vectors), 'table', or 'tables' (vector of
+    #   FlatTables). Serialized front to back: vtable, table, then the objects it refers to,
+    #   which keeps every offset positive
+    def __init__(self):
+        self.fields = {}
+    def add(self, fieldId, kind, value):
+        if value <> None:
+            self.fields[fieldId] = (kind, value)
+        return self
+
+def _pad(buf, align, extra=0):
+    # pads buf so that len(buf) + extra is a multiple of align
+    while (len(buf) + extra) % align:
+        buf.append(0)
+
+def _writeVector(buf, kind, value):
+    if kind == 'string':
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        _pad(buf, 4)
+        pos = len(buf)
+        buf.extend(struct.pack('<I', len(value)) + value + '\x00')
+        return pos
+    if kind == 'doubles':
+        _pad(buf, 8, 4)
+        pos = len(buf)
+        buf.extend(struct.pack('<I', len(value)))
+        buf.extend(array('d', value).tostring())
+        return pos
+    if kind == 'uints':
+        _pad(buf, 4)
+        pos = len(buf)
+        buf.extend(struct.pack('<I%dI' % len(value), len(value), *value))
+        return pos
+    if kind == 'ubytes':
+        _pad(buf, 4)
+        pos = len(buf)
+        buf.extend(struct.pack('<I', len(value)) + value)
+        return pos
+    if kind == 'table':
+        return _writeTable(buf, value)
+    if kind == 'tables':
+        _pad(buf, 4)
+        pos = len(buf)
+        buf.extend(struct.pack('<I', len(value)) + '\x00\x00\x00\x00' * len(value))
+        for k in range(len(value)):
+            elemPos = pos + 4 + 4*k
+            tablePos = _writeTable(buf, value[k])
+            struct.pack_into('<I', buf, elemPos, tablePos - elemPos)
+        return pos
+    raise ValueError('unknown FlatBuffers field kind '+kind)
+
+def _writeTable(buf, table):
+    # inline fields, largest first so that each is aligned
+    fieldIds = sorted(table.fields.keys())
+    def size(fieldId):
+        kind = table.fields[fieldId][0]
+        if kind in scalarFormats:
+            return struct.calcsize(scalarFormats[kind])
+        return 4
+    offsets = {}
+    cur = 4  # after the soffset to the vtable
+    for fieldId in sorted(fieldIds, key=size, reverse=True):
+        n = size(fieldId)
+        cur = (cur + n - 1) // n * n
+        offsets[fieldId] = cur
+        cur = cur + n
+    tableSize = cur
+    nSlots = 0
+    if len(fieldIds) > 0:
+        nSlots = fieldIds[-1] + 1
+    vtable = [4 + 2*nSlots, tableSize] + [offsets.get(i, 0) for i in range(nSlots)]
+    _pad(buf, 2)
+    vtablePos = len(buf)
+    buf.extend(struct.pack('<%dH' % len(vtable), *vtable))
+    _pad(buf, 8)
+    tablePos = len(buf)
+    buf.extend('\x00' * tableSize)
+    struct.pack_into('<i', buf, tablePos, tablePos - vtablePos)
+    for fieldId in fieldIds:
+        kind, value = table.fields[fieldId]
+        if kind in scalarFormats:
+            struct.pack_into(scalarFormats[kind], buf, tablePos + offsets[fieldId], value)
+    for fieldId in fieldIds:
+        kind, value = table.fields[fieldId]
+        if not kind in scalarFormats:
+            fieldPos = tablePos + offsets[fieldId]
+            struct.pack_into('<I', buf, fieldPos, _writeVector(buf, kind, value) - fieldPos)
+    return tablePos
+
+def sizePrefixedBuffer(root):
+    # serialized root FlatTable, preceded by its size, as FlatGeobuf stores header and features
+    buf = bytearray('\x00' * 8)
+    rootPos = _writeTable(buf, root)
+    struct.pack_into('<I', buf, 4, rootPos - 4)
+    struct.pack_into('<I', buf, 0, len(buf) - 4)
+    return str(buf)
+
+##############################
+# packed Hilbert R-tree, as in the FlatGeobuf reference implementation
+
+hilbertMax = (1 << 16) - 1
+
+def hilbert(x, y):
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+    a = A; b = B; c = C; d = D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C = C ^ ((a & (c >> 2)) ^ (b & (d >> 2)))
+    D = D ^ ((b & (c >> 2)) ^ ((a ^ b) & (d >> 2)))
+    a = A; b = B; c = C; d = D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C = C ^ ((a & (c >> 4)) ^ (b & (d >> 4)))
+    D = D ^ ((b & (c >> 4)) ^ ((a ^ b) & (d >> 4)))
+    a = A; b = B; c = C; d = D
+    C = C ^ ((a & (c >> 8)) ^ (b & (d >> 8)))
+    D = D ^ ((b & (c >> 8)) ^ ((a ^ b) & (d >> 8)))
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+    i0 = (i0 | (i0 << 8)) & 0x00FF00FF
+    i0 = (i0 | (i0 << 4)) & 0x0F0F0F0F
+    i0 = (i0 | (i0 << 2)) & 0x33333333
+    i0 = (i0 | (i0 << 1)) & 0x55555555
+    i1 = (i1 | (i1 << 8)) & 0x00FF00FF
+    i1 = (i1 | (i1 << 4)) & 0x0F0F0F0F
+    i1 = (i1 | (i1 << 2)) & 0x33333333
+    i1 = (i1 | (i1 << 1)) & 0x55555555
+    return (i1 << 1) | i0
+
+def levelBounds(numItems, nodeSize):
+    # [first, end) node index of each level of the tree, leaves first. The root is node 0
+    n = numItems
+    levelNumNodes = [n]
+    numNodes = n
+    while True:
+        n = (n + nodeSize - 1) // nodeSize
+        numNodes = numNodes + n
+        levelNumNodes.append(n)
+        if n == 1:
+            break
+    bounds = []
+    n = numNodes
+    for size in levelNumNodes:
+        bounds.append([n - size, n])
+        n = n - size
+    return bounds, numNodes
+
+def packedRTree(minXs, minYs, maxXs, maxYs, offsets, nodeSize):
+    # returns the index bytes for leaf items (already in Hilbert order)
+    numItems = len(minXs)
+    bounds, numNodes = levelBounds(numItems, nodeSize)
+    inf = float('inf')
+    nMinX = array('d', [inf]) * numNodes
+    nMinY = array('d', [inf]) * numNodes
+    nMaxX = array('d', [-inf]) * numNodes
+    nMaxY = array('d', [-inf]) * numNodes
+    nOffset = array('d', [0.0]) * numNodes
+    first = bounds[0][0]
+    nMinX[first:] = minXs
+    nMinY[first:] = minYs
+    nMaxX[first:] = maxXs
+    nMaxY[first:] = maxYs
+    nOffset[first:] = offsets
+    for i in range(len(bounds) - 1):
+        pos, end = bounds[i]
+        newpos = bounds[i+1][0]
+        while pos < end:
+            nOffset[newpos] = pos
+            last = min(pos + nodeSize, end)
+            nMinX[newpos] = min(nMinX[pos:last])
+            nMinY[newpos] = min(nMinY[pos:last])
+            nMaxX[newpos] = max(nMaxX[pos:last])
+            nMaxY[newpos] = max(nMaxY[pos:last])
+            pos = last
+            newpos = newpos + 1
+    out = []
+    for n in range(numNodes):
+        out.append(struct.pack('<ddddQ', nMinX[n], nMinY[n], nMaxX[n], nMaxY[n], int(nOffset[n])))
+    return ''.join(out)
+
+##############################
+# features
+
+def geometryTable(geometry, fgbType):
+    # FlatGeobuf Geometry table for a GeMS_DataAccess Geometry, or None if it is empty
+    if geometry == None or len(geometry.paths) == 0:
+        return None
+    if fgbType == fgbMultiPolygon:
+        parts = []
+        for rings in polygonRings(geometry.paths):
+            parts.append(pathsTable(rings).add(6, 'ubyte', fgbPolygon))
+        return FlatTable().add(7, 'tables', parts)
+    if fgbType == fgbMultiPoint:
+        return pathsTable([[p for path in geometry.paths for p in path]], False)
+    if fgbType == fgbPoint:
+        return pathsTable([geometry.paths[0][:1]])
+    return pathsTable(geometry.paths)
+
+def pathsTable(paths, withEnds=True):
+    xy = []
+    ends = []
+    for path in paths:
+        for p in path:
+            xy.append(p[0])
+            xy.append(p[1])
+        ends.append(len(xy) // 2)
+    table = FlatTable().add(1, 'doubles', xy)
+    if withEnds and len(ends) > 1:
+        table.add(0, 'uints', ends)
+    return table
+
+def propertyBytes(columns, values):
+    out = []
+    for i in range(len(columns)):
+        value = values[i]
+        if value == None:
+            continue
+        cType = columns[i][1]
+        out.append(struct.pack('<H', i))
+        if cType == 3:
+            out.append(struct.pack('<h', value))
+        elif cType == 5:
+            out.append(struct.pack('<i', value))
+        elif cType == 9:
+            out.append(struct.pack('<f', value))
+        elif cType == 10:
+            out.append(struct.pack('<d', value))
+        else:
+            if cType == 13 and isinstance(value, (datetime.datetime, datetime.date)):
+                value = value.isoformat()
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            else:
+                value = str(value)
+            out.append(struct.pack('<I', len(value)) + value)
+    return ''.join(out)
+
+def envelope(geometry):
+    if geometry == None:
+        return None
+    pts = [p for path in geometry.paths for p in path]
+    if len(pts) == 0:
+        return None
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+class FlatGeobufWriter:
+    # columns is list of [name, arcpy field type, length]. crs is None or
+    #   [organization, code, name, wkt]
+    def __init__(self, path, name, shapeType, columns, crs=None, nodeSize=defaultNodeSize):
+        self.path = path
+        self.name = name
+        self.fgbType = shapeTypes[shapeType]
+        self.columns = [[c[0], columnTypes[c[1]], c[2]] for c in columns]
+        self.crs = crs
+        self.nodeSize = nodeSize
+        self.tempPath = path+'.features'
+        self.temp = open(self.tempPath, 'wb')
+        self.minXs = array('d')
+        self.minYs = array('d')
+        self.maxXs = array('d')
+        self.maxYs = array('d')
+        self.offsets = array('d')
+        self.sizes = array('L')
+        self.tempSize = 0
+    def insertRow(self, geometry, values):
+        feature = FlatTable()
+        feature.add(0, 'table', geometryTable(geometry, self.fgbType))
+        props = propertyBytes(self.columns, values)
+        if len(props) > 0:
+            feature.add(1, 'ubytes', props)
+        buf = sizePrefixedBuffer(feature)
+        self.temp.write(buf)
+        e = envelope(geometry)
+        if e == None:
+            inf = float('inf')
+            e = (inf, inf, -inf, -inf)
+        self.minXs.append(e[0])
+        self.minYs.append(e[1])
+        self.maxXs.append(e[2])
+        self.maxYs.append(e[3])
+        self.offsets.append(self.tempSize)
+        self.sizes.append(len(buf))
+        self.tempSize = self.tempSize + len(buf)
+    def header(self, extent, count, nodeSize):
+        header = FlatTable()
+        header.add(0, 'string', self.name)
+        if extent <> None:
+            header.add(1, 'doubles', extent)
+        header.add(2, 'ubyte', self.fgbType)
+        columns = []
+        for name, cType, length in self.columns:
+            column = FlatTable().add(0, 'string', name).add(1, 'ubyte', cType)
+            if cType == 11 and length > 0:
+                column.add(4, 'int', length)
+            columns.append(column)
+        if len(columns) > 0:
+            header.add(7, 'tables', columns)
+        header.add(8, 'ulong', count)
+        header.add(9, 'ushort', nodeSize)
+        if self.crs <> None:
+            org, code, name, wkt = self.crs
+            crs = FlatTable().add(0, 'string', org).add(1, 'int', code).add(2, 'string', name).add(4, 'string', wkt)
+            header.add(10, 'table', crs)
+        return sizePrefixedBuffer(header)
+    def close(self):
+        self.temp.close()
+        n = len(self.offsets)
+        # extent of non-empty features
+        finite = [i for i in range(n) if self.minXs[i] <= self.maxXs[i]]
+        extent = None
+        if len(finite) > 0:
+            extent = [min([self.minXs[i] for i in finite]), min([self.minYs[i] for i in finite]),
+                      max([self.maxXs[i] for i in finite]), max([self.maxYs[i] for i in finite])]
+        nodeSize = self.nodeSize
+        if n == 0 or extent == None:
+            nodeSize = 0
+        order = range(n)
+        if nodeSize > 0:
+            width = extent[2] - extent[0]
+            height = extent[3] - extent[1]
+            def hilbertValue(i):
+                if self.minXs[i] > self.maxXs[i]:
+                    return 0
+                x = y = 0
+                if width <> 0.0:
+                    x = int(math.floor(hilbertMax * ((self.minXs[i] + self.maxXs[i]) / 2 - extent[0]) / width))
+                if height <> 0.0:
+                    y = int(math.floor(hilbertMax * ((self.minYs[i] + self.maxYs[i]) / 2 - extent[1]) / height))
+                return hilbert(x, y)
+            order.sort(key=hilbertValue, reverse=True)
+        out = open(self.path, 'wb')
+        try:
+            out.write(magicBytes)
+            out.write(self.header(extent, n, nodeSize))
+            if nodeSize > 0:
+                offsets = array('d')
+                offset = 0
+                for i in order:
+                    offsets.append(offset)
+                    offset = offset + self.sizes[i]
+                out.write(packedRTree(array('d', [self.minXs[i] for i in order]), array('d', [self.minYs[i] for i in order]),
+                                      array('d', [self.maxXs[i] for i in order]), array('d', [self.maxYs[i] for i in order]),
+                                      offsets, nodeSize))
+            temp = open(self.tempPath, 'rb')
+            for i in order:
+                temp.seek(int(self.offsets[i]))
+                out.write(temp.read(self.sizes[i]))
+            temp.close()
+        finally:
+            out.close()
+        os.remove(self.tempPath)
+    def __enter__(self):
+        return self
+    def __exit__(self, excType, excValue, tb):
+        if excType == None:
+            self.close()
+        else:
+            self.temp.close()
+            os.remove(self.tempPath)
+        return False
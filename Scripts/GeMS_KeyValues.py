@@ -0,0 +1,176 @@
+# GeMS_KeyValues.py
+# key-value rules for GeMS_AttributeByKeyValues_Arc10.py. A key file (see
+#   Resources/Dig24K_KeyValues.txt) is compiled into KeyBlocks, one per feature-class
+#   paragraph, each with a dictionary from independent value to the rules for that value.
+#   A KeyValueUpdater then applies every block for a feature class to each row of a
+#   single UpdateCursor pass. Nothing here imports arcpy
+#
+# Rules are applied to a row in the order they appear in the file, just as the old
+#   select-and-calculate loop applied them to the whole table, so a key that appears twice
+#   gives the same result: with force, the last rule wins; without, the first value put
+#   into an empty field stays there.
+# 18 October 2026: first version
+
+import bisect
+
+separator = '|'
+numericFieldTypes = ('Double','Single','Integer','SmallInteger')
+
+class KeyBlock:
+    # One feature-class paragraph of a key file
+    #   fields     [independent field, dependent field 1, ...]
+    #   rules      list of [values, line number]. values are stripped, unquoted strings
+    #   errors     messages about lines with the wrong number of values
+    #   matched    per rule, number of rows whose independent value matched
+    #   changed    per rule, list of number of rows changed in each dependent field
+    def __init__(self, fc, fields):
+        self.fc = fc
+        self.fields = fields
+        self.rules = []
+        self.errors = []
+        self.matched = []
+        self.changed = []
+    def addRule(self, values, lineNumber):
+        self.rules.append([values, lineNumber])
+        self.matched.append(0)
+        self.changed.append([0] * (len(self.fields) - 1))
+
+def cleanValue(v):
+    # strip out quotes, and leading and trailing whitespace
+    return v.replace("'",'').replace('"','').strip()
+
+def readKeyFile(lines):
+    # returns list of KeyBlocks, in file order
+    blocks = []
+    block = None
+    expectFields = False
+    lineNumber = 0
+    for lin in lines:
+        lineNumber += 1
+        lin = lin.strip()
+        if len(lin) <= 1 or lin[0:1] == '#':
+            continue
+        terms = lin.split(separator)
+        if expectFields:
+            block.fields = [t.strip() for t in terms]
+            expectFields = False
+        elif len(terms) == 1:
+            block = KeyBlock(terms[0], [])
+            blocks.append(block)
+            expectFields = True
+        elif block <> None:
+            if len(terms) <> len(block.fields):
+                block.errors.append('line '+str(lineNumber)+':\n  '+lin+'\nhas wrong number of values')
+            else:
+                block.addRule([cleanValue(t) for t in terms], lineNumber)
+    return blocks
+
+def convertValue(value, fieldType):
+    # returns value as it should be stored in a field of fieldType. Raises ValueError if
+    #   it can't be converted, TypeError if fieldType is not String or numeric
+    if fieldType == 'String':
+        return value
+    if fieldType in ('Double','Single'):
+        return float(value)
+    if fieldType in ('Integer','SmallInteger'):
+        return int(float(value))
+    raise TypeError('cannot assign values to fields of type '+str(fieldType))
+
+def isEmpty(value, fieldType):
+    # NULL, blank, or 0: the values that a rule may fill in unless forced
+    if value == None:
+        return True
+    if fieldType == 'String':
+        return value in ('',' ')
+    if fieldType in numericFieldTypes:
+        return value == 0
+    return False
+
+def keyValue(value, fieldType):
+    # value of independent field, as used to look up rules
+    if value == None:
+        return None
+    if fieldType in numericFieldTypes:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return value
+
+class KeyValueUpdater:
+    # Applies KeyBlocks for one feature class to cursor rows
+    #   fieldTypes is dictionary of field name: field type (as arcpy.Field.type)
+    #   fields is the list of fields the cursor must have, in order
+    #   skipped is list of messages about blocks and values that cannot be applied
+    def __init__(self, blocks, fieldTypes, force=False):
+        self.force = force
+        self.fields = []
+        self.skipped = []
+        self.compiled = []  # [block, indepPos, indepType, [(depPos, depType)], rulesByKey, ruleValues]
+        for block in blocks:
+            missing = [f for f in block.fields if not f in fieldTypes]
+            if len(missing) > 0:
+                self.skipped.append(block.fc+': field(s) '+', '.join(missing)+' not found, rules for '+
+                                    block.fields[0]+' not applied')
+                continue
+            positions = [self.fieldPosition(f) for f in block.fields]
+            indepType = fieldTypes[block.fields[0]]
+            depTypes = [fieldTypes[f] for f in block.fields[1:]]
+            rulesByKey = {}
+            ruleValues = []
+            for r in range(len(block.rules)):
+                values, lineNumber = block.rules[r]
+                key = keyValue(values[0], indepType)
+                rulesByKey.setdefault(key, []).append(r)
+                newValues = []
+                for i in range(1, len(values)):
+                    try:
+                        newValues.append((True, convertValue(values[i], depTypes[i-1])))
+                    except (ValueError, TypeError), e:
+                        if isinstance(e, ValueError) or values[i] <> '':
+                            self.skipped.append(block.fc+', line '+str(lineNumber)+': '+block.fields[i]+
+                                                ' = '+values[i]+' not applied ('+str(e)+')')
+                        newValues.append((False, None))
+                ruleValues.append(newValues)
+            self.compiled.append([block, positions[0], indepType, zip(positions[1:], depTypes), rulesByKey, ruleValues])
+    def fieldPosition(self, field):
+        if not field in self.fields:
+            self.fields.append(field)
+        return self.fields.index(field)
+    def update(self, row):
+        # applies rules to row (a list, in the order of self.fields). Returns True if row changed
+        rowChanged = False
+        for block, indepPos, indepType, deps, rulesByKey, ruleValues in self.compiled:
+            last = -1
+            while True:
+                rules = rulesByKey.get(keyValue(row[indepPos], indepType))
+                if rules == None:
+                    break
+                n = bisect.bisect_right(rules, last)
+                if n == len(rules):
+                    break
+                r = rules[n]
+                last = r
+                block.matched[r] += 1
+                newValues = ruleValues[r]
+                for i in range(len(deps)):
+                    ok, newValue = newValues[i]
+                    if not ok:
+                        continue
+                    pos, depType = deps[i]
+                    if self.force or isEmpty(row[pos], depType):
+                        if row[pos] <> newValue:
+                            row[pos] = newValue
+                            block.changed[r][i] += 1
+                            rowChanged = True
+        return rowChanged
+
+def ruleReport(block):
+    # lines reporting the rows touched by each rule of block
+    lines = []
+    for r in range(len(block.rules)):
+        values = block.rules[r][0]
+        lines.append('    '+block.fields[0]+' = '+values[0]+': '+str(block.matched[r])+' rows')
+        for i in range(1, len(values)):
+            lines.append('        '+block.fields[i]+' = '+values[i]+': '+str(block.changed[r][i-1])+' changed')
+    return lines
@@ -0,0 +1,121 @@
+# GeMS_LineChainer.py
+# Merges groups of arcs into single lines in memory, in place of UnsplitLine_management
+#   (Deplanarize) and Dissolve_management(..., 'UNSPLIT_LINES') (TopologyCheck unplanarize).
+#   Arcs are added to a LineChainer with a group key, their paths, and their attribute
+#   values. The paths of each group are stitched end to end by chainPaths, and each chain
+#   becomes one single-part line, with the values of the first arc (lowest arc id) of the
+#   group, as the FIRST statistic of UnsplitLine does. writeLines writes the lines with one
+#   insert cursor, to an existing feature class or to one made by createLines.
+# Nothing here imports arcpy directly; writeLines goes through GeMS_DataAccess, so lines
+#   can be written to a geodatabase or to a GeoPackage.
+# 18 October 2026: first version
+# 18 October 2026: a group whose arcs don't all connect makes one line per chain, not one
+#   multipart line. Lines are written as Geometry objects with SHAPE@, keeping the Z and M
+#   of their points, rather than as 2D WKB
+
+import os.path
+import GeMS_DataAccess
+from GeMS_DataAccess import Geometry, pathLength
+from GeMS_Linework import NodeBuilder
+
+def chainPaths(paths, tolerance):
+    # stitches paths (lists of (x, y)) whose ends meet, within tolerance, into as few
+    #   paths as possible. A chain starts at a node with an odd number of path ends, if
+    #   there is one, so that an open line is walked from one end to the other. Paths are
+    #   reversed as needed, and each chain is then turned to run the way most of its length
+    #   was digitized. Where more than two path ends meet, the chain goes on along the first
+    #   unused path; what is left over starts new chains. Returns a list of paths. Points
+    #   may carry Z and M after x and y; they are kept
+    nodes = NodeBuilder(tolerance)
+    ends = []  # [start node, end node] of each path
+    for i in range(len(paths)):
+        path = paths[i]
+        ends.append([nodes.add(path[0][0], path[0][1], (i, 0)),
+                     nodes.add(path[-1][0], path[-1][1], (i, 1))])
+    used = [False] * len(paths)
+    nextEnd = [0] * len(nodes.nodes)  # first path end at each node that may be unused
+
+    def unusedEnd(n):
+        nodeEnds = nodes.nodes[n][2]
+        while nextEnd[n] < len(nodeEnds) and used[nodeEnds[nextEnd[n]][0]]:
+            nextEnd[n] += 1
+        if nextEnd[n] < len(nodeEnds):
+            return nodeEnds[nextEnd[n]]
+        return None
+
+    def walk(n):
+        chain = []
+        forward = backward = 0.0
+        end = unusedEnd(n)
+        while end <> None:
+            i, which = end
+            used[i] = True
+            pts = paths[i]
+            if which == 0:
+                forward += pathLength(pts)
+                n = ends[i][1]
+            else:
+                pts = pts[::-1]
+                backward += pathLength(pts)
+                n = ends[i][0]
+            if chain:
+                chain.extend(pts[1:])
+            else:
+                chain = list(pts)
+            end = unusedEnd(n)
+        if backward > forward:
+            chain.reverse()
+        return chain
+
+    chains = []
+    oddNodes = [n for n in range(len(nodes.nodes)) if len(nodes.nodes[n][2]) % 2 == 1]
+    for n in oddNodes + range(len(nodes.nodes)):
+        while unusedEnd(n) <> None:
+            chains.append(walk(n))
+    return chains
+
+class LineChainer:
+    # Collects arcs into groups and makes one line of each chain of connected arcs in a group
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.groups = {}  # key: [[arcID, paths, values], ...]
+        self.nArcs = 0
+    def __len__(self):
+        return len(self.groups)
+    def add(self, key, arcID, paths, values):
+        # adds an arc, with paths (a list of lists of (x, y)) and values (a sequence of
+        #   attribute values), to the group of key
+        self.groups.setdefault(key, []).append([arcID, paths, values])
+        self.nArcs += 1
+    def lines(self):
+        # yields [paths, values] for each chain of each group, paths holding the one path of
+        #   the chain. Groups come in order of their first arc id
+        groups = self.groups.values()
+        for group in groups:
+            group.sort()
+        groups.sort(key=lambda group: group[0][0])
+        for group in groups:
+            paths = [path for arc in group for path in arc[1] if len(path) > 1]
+            for chain in chainPaths(paths, self.tolerance):
+                yield [[chain], group[0][2]]
+
+def createLines(table, template, fields):
+    # creates line feature class table, with fields named in fields that have the types
+    #   and lengths they have in template, as Dissolve_management makes its output
+    templateFields = dict([(f.name, f) for f in GeMS_DataAccess.listFields(template)])
+    fieldDefs = []
+    for name in fields:
+        f = templateFields[name]
+        fieldDefs.append([name, f.type, 'NullsOK', f.length])
+    GeMS_DataAccess.createTable(os.path.dirname(table), os.path.basename(table), fieldDefs, 'Polyline')
+
+def writeLines(table, fields, lines):
+    # writes lines, a sequence of [paths, values], to table with one insert cursor. fields
+    #   are the names of values. Returns the number of lines written
+    n = 0
+    with GeMS_DataAccess.insertCursor(table, ['SHAPE@'] + list(fields)) as cursor:
+        for paths, values in lines:
+            if len(paths) > 0:
+                cursor.insertRow([Geometry('polyline', paths)] + list(values))
+                n += 1
+    return n
@@ -0,0 +1,231 @@
+# GeMS_Linework.py
+# pure-Python utilities for working with planar linework (ContactsAndFaults and the like)
+#   without scratch feature classes. Nothing here imports arcpy, so these can be used
+#   and timed outside of ArcGIS.
+# 18 October 2026: NodeBuilder, for grouping line endpoints into nodes
+# 18 October 2026: DisjointSet, for grouping arcs that are to be merged
+# 18 October 2026: CodeTable, ArcStore and ArcView, compact storage for planarized arc ends
+# 18 October 2026: sidePoints, for finding the polygons to the left and right of an arc
+# 18 October 2026: sidePoints offsets its points a few XY tolerances from the arc, not 1/100 of
+#   the longest segment, so they can't fall beyond a narrow polygon
+
+import math
+from array import array
+
+class NodeBuilder:
+    # Groups line endpoints into nodes.
+    # Endpoints are hashed into a grid of square cells, each tolerance on a side. An endpoint
+    #   joins the first existing node that is within tolerance of it in both x and y; because
+    #   such a node must lie in the same cell or one of the 8 neighbouring cells, only those
+    #   cells are searched. A node is located at the first endpoint added to it.
+    # nodes is a list of [x, y, [items]]
+    def __init__(self, tolerance):
+        if tolerance <= 0:
+            raise ValueError('NodeBuilder tolerance must be greater than 0')
+        self.tolerance = float(tolerance)
+        self.cells = {}  # (column, row): [indices of nodes located in cell]
+        self.nodes = []
+    def cell(self, x, y):
+        return int(math.floor(x / self.tolerance)), int(math.floor(y / self.tolerance))
+    def find(self, x, y):
+        # returns index of node within tolerance of (x, y), or None
+        tol = self.tolerance
+        i, j = self.cell(x, y)
+        for ii in (i-1, i, i+1):
+            for jj in (j-1, j, j+1):
+                for n in self.cells.get((ii, jj), ()):
+                    node = self.nodes[n]
+                    if abs(x - node[0]) < tol and abs(y - node[1]) < tol:
+                        return n
+        return None
+    def add(self, x, y, item):
+        # adds item (an arc end, or whatever) at (x, y) and returns the index of its node
+        n = self.find(x, y)
+        if n == None:
+            n = len(self.nodes)
+            self.nodes.append([x, y, [item]])
+            self.cells.setdefault(self.cell(x, y), []).append(n)
+        else:
+            self.nodes[n][2].append(item)
+        return n
+    def sortedNodes(self, key=None):
+        # returns list of nodes ordered by x, then y. If key is given, items
+        #   within each node are sorted by key
+        nodeList = sorted(self.nodes, key=lambda node: (node[0], node[1]))
+        if key <> None:
+            for node in nodeList:
+                node[2].sort(key=key)
+        return nodeList
+
+class DisjointSet:
+    # Union-find over hashable items (OBJECTIDs, node keys, ...), with path
+    #   compression and union by rank, so a long sequence of unions and finds
+    #   runs in very nearly linear time.
+    # Items are added implicitly by find and union.
+    def __init__(self):
+        self.parent = {}
+        self.rank = {}
+    def __len__(self):
+        return len(self.parent)
+    def __contains__(self, item):
+        return item in self.parent
+    def find(self, item):
+        # returns the representative of the set containing item
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.rank[item] = 0
+            return item
+        root = item
+        while parent[root] <> root:
+            root = parent[root]
+        # compress path
+        while parent[item] <> root:
+            parent[item], item = root, parent[item]
+        return root
+    def union(self, item1, item2):
+        # merges the sets containing item1 and item2, returns the new representative
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+        if root1 == root2:
+            return root1
+        rank = self.rank
+        if rank[root1] < rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if rank[root1] == rank[root2]:
+            rank[root1] += 1
+        return root1
+    def groups(self):
+        # returns dictionary of representative: [members]
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
+
+class CodeTable:
+    # Interns values (strings, tuples, None, ...) as small integer codes, so that
+    #   a column of repeated values can be held in an array of ints
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+    def __len__(self):
+        return len(self.values)
+    def __getitem__(self, code):
+        return self.values[code]
+    def code(self, value):
+        c = self.codes.get(value)
+        if c == None:
+            c = len(self.values)
+            self.codes[value] = c
+            self.values.append(value)
+        return c
+
+class ArcStore:
+    # Struct-of-arrays store of arc ends (or arcs). Each arc end is an integer index
+    #   into a set of typed array columns, instead of a Python object with a dict of
+    #   attributes. Repeated strings are interned:
+    #     type       code of Type, in self.types
+    #     attribs    code of the whole attribute tuple, in self.attribSets, so that
+    #                arcs with the same attributes have the same code
+    #     rmu, lmu   codes of right and left map units, in self.mapUnits
+    #   attribs is a sequence [Type, IsConcealed, ...] of any length, Type first and
+    #   IsConcealed second
+    toFromValues = ('From', 'To')
+    def __init__(self):
+        self.types = CodeTable()
+        self.mapUnits = CodeTable()
+        self.attribSets = CodeTable()
+        self.type = array('i')
+        self.attribs = array('i')
+        self.concealed = array('b')  # 1 if IsConcealed is Y or y
+        self.lineDir = array('d')    # NaN if None
+        self.toFrom = array('b')     # index into toFromValues, -1 if None
+        self.rmu = array('i')
+        self.lmu = array('i')
+        self.ofid = array('l')
+    def __len__(self):
+        return len(self.ofid)
+    def add(self, attribs, lineDir, toFrom, rmu, lmu, ofid):
+        # adds an arc end, returns its index
+        attribs = tuple(attribs)
+        self.type.append(self.types.code(attribs[0]))
+        self.attribs.append(self.attribSets.code(attribs))
+        isConc = attribs[1]
+        if isConc <> None and isConc.lower() == 'y':
+            self.concealed.append(1)
+        else:
+            self.concealed.append(0)
+        if lineDir == None:
+            self.lineDir.append(float('nan'))
+        else:
+            self.lineDir.append(lineDir)
+        if toFrom in self.toFromValues:
+            self.toFrom.append(self.toFromValues.index(toFrom))
+        else:
+            self.toFrom.append(-1)
+        self.rmu.append(self.mapUnits.code(rmu))
+        self.lmu.append(self.mapUnits.code(lmu))
+        self.ofid.append(ofid)
+        return len(self.ofid) - 1
+    # accessors, by index
+    def Type(self, i):
+        return self.types.values[self.type[i]]
+    def IsConc(self, i):
+        return self.attribSets.values[self.attribs[i]][1]
+    def isConcealed(self, i):
+        return self.concealed[i] == 1
+    def ToFrom(self, i):
+        if self.toFrom[i] < 0:
+            return None
+        return self.toFromValues[self.toFrom[i]]
+    def RMU(self, i):
+        return self.mapUnits.values[self.rmu[i]]
+    def LMU(self, i):
+        return self.mapUnits.values[self.lmu[i]]
+    def sameAttributes(self, i, j):
+        return self.attribs[i] == self.attribs[j]
+    def view(self, i):
+        return ArcView(self, i)
+
+class ArcView(object):
+    # Thin, attribute-style view of one arc in an ArcStore
+    __slots__ = ('store', 'i')
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+    def __cmp__(self, other):
+        return cmp(self.i, other.i)
+    Type = property(lambda self: self.store.Type(self.i))
+    IsConc = property(lambda self: self.store.IsConc(self.i))
+    LineDir = property(lambda self: self.store.lineDir[self.i])
+    ToFrom = property(lambda self: self.store.ToFrom(self.i))
+    RMU = property(lambda self: self.store.RMU(self.i))
+    LMU = property(lambda self: self.store.LMU(self.i))
+    OFID = property(lambda self: self.store.ofid[self.i])
+    def isConcealed(self):
+        return self.store.isConcealed(self.i)
+
+sideTolerances = 4  # XY tolerances between an arc and its sidePoints
+
+def sidePoints(path, tolerance):
+    # returns ((x, y) left of path, (x, y) right of path): points either side of the middle
+    #   of the longest segment, looking along the path, sideTolerances XY tolerances from it
+    #   (or 1/100 of the segment, if that is less). None if path has no length
+    best = None
+    for i in range(len(path) - 1):
+        dx = path[i+1][0] - path[i][0]
+        dy = path[i+1][1] - path[i][1]
+        d = math.hypot(dx, dy)
+        if d > 0 and (best == None or d > best[0]):
+            best = (d, i, dx, dy)
+    if best == None:
+        return None
+    d, i, dx, dy = best
+    xm = (path[i][0] + path[i+1][0]) / 2.0
+    ym = (path[i][1] + path[i+1][1]) / 2.0
+    # offset is perpendicular to the segment
+    f = min(1 / 100.0, sideTolerances * tolerance / d)
+    ox = -dy * f
+    oy = dx * f
+    return (xm + ox, ym + oy), (xm - ox, ym - oy)
@@ -3,10 +3,20 @@
 # 5 January 2018: Modified error message for topology that contains polys
 # 26 February 2021: More robust checking of input elements
 # 7 March 2021: Delete label points where MapUnit = null (line 194)
+# 18 October 2026: polygons are built and labeled by GeMS_Polygonizer.py rather than by
+#   FeatureToPolygon (twice), FeatureToPoint, and Identity_analysis (three times). Non-concealed
+#   ContactsAndFaults are read once and polygonized; each new polygon is labeled from the old
+#   MapUnitPolys polygon at its inside point and from labelPoints, and multi-label and unlabeled
+#   polygons are found in the same pass. MapUnitPolys is emptied and refilled rather than deleted
+#   and rebuilt, so it keeps its schema. Identity_analysis is still used to make changedPolys
+# 18 October 2026: ContactsAndFaults that cross, or end on the middle of, other lines are split
+#   there, as FeatureToPolygon splits them, rather than leaving the polygons they divide whole
 
 import arcpy, sys, os.path, os
 from GeMS_utilityFunctions import *
 from GeMS_Definition import tableDict
+from GeMS_Polygonizer import *
+from GeMS_DataAccess import geometryFromWkb, geometryToWkb
 
 versionString = 'GeMS_MakePolys3_Arc10.py, version of version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_MakePolys3_Arc10.py'
@@ -14,30 +24,6 @@ checkVersion(versionString, rawurl, 'gems-tools-arcmap')
 
 debug = False
 
-def checkMultiPts(multiPts, badPointList, badPolyList):
-    # checks list of label points, all in same poly. If MapUnits are not all same,
-    # adds mapunitID to badPolyList, adds labelPointIDs to badPointList
-    # multiPts fields = [mupID, cp2ID, 'MapUnit_1', 'MapUnit']
-    if len(multiPts) > 1:
-        # some tests, grow bad lists
-        polyID = multiPts[0][0]
-        ptIDs = [multiPts[0][1]]
-        mapUnits = set()
-        mapUnits.add(multiPts[0][2]); mapUnits.add(multiPts[0][3])
-        for i in range(0,len(multiPts)):
-            if multiPts[i][0] <> polyID:
-                addMsgAndPrint('PROBLEM IN CHECKMULTIPTS!')
-                addMsgAndPrint(str(multiPts))
-                forceExit()
-            ptIDs.append(multiPts[i][1])
-            mapUnits.add(multiPts[i][2])
-            mapUnits.add(multiPts[i][3])
-        if len(mapUnits) > 1:  # label pts reference more than one map unit
-            badPolyList.append(polyID)
-            for pt in ptIDs:
-                badPointList.append(pt)
-    return badPointList, badPolyList
-
 def findLyr(lname):
     lname.replace('//','_')
     if debug: addMsgAndPrint('finding layer, lname = '+lname)
@@ -122,11 +108,7 @@ for topol in topologies:
 badLabels = os.path.join(fds,'errors_'+nameToken+'multilabels')
 badPolys = os.path.join(fds,'errors_'+nameToken+'multilabelPolys')
 blankPolys = os.path.join(fds,'errors_'+nameToken+'unlabeledPolys')
-centerPoints = os.path.join(fds,'xxxCenterPoints')
-centerPoints2 = centerPoints+'2'
-centerPoints3 = centerPoints+'3'
 inPolys = mup
-temporaryPolys = 'xxxTempPolys'
 oldPolys = os.path.join(fds,'xxxOldPolys')
 changedPolys = os.path.join(fds,'edit_'+nameToken+'ChangedPolys')
 
@@ -161,80 +143,60 @@ for aLyr in [mup, badLabels, badPolys, blankPolys, changedPolys]:
 if debug:
     addMsgAndPrint('savedLayers ='+str(savedLayers))
 
-cafLayer = 'cafLayer'
-
 arcpy.env.workspace = fds
+tolerance = arcpy.Describe(fds).spatialReference.XYTolerance
 
-# make layer view of inCaf without concealed lines
-addMsgAndPrint('  Making layer view of CAF without concealed lines')
-sqlQuery = arcpy.AddFieldDelimiters(fds,'IsConcealed') + " NOT IN ('Y','y')"
-testAndDelete(cafLayer)
-arcpy.MakeFeatureLayer_management(caf,cafLayer,sqlQuery)
+# MapUnitPolys fields, carried to new polygons from old polygons and label points
+mupFields = [f.name for f in arcpy.ListFields(mup) if f.editable and not f.type in ('OID','Geometry','GlobalID')
+             and not f.name.lower() in ('shape_length','shape_area')]
+mapUnitPos = mupFields.index('MapUnit')
 
-#make temporaryPolys from layer view
-addMsgAndPrint('  Making '+temporaryPolys)
-testAndDelete(temporaryPolys)
-arcpy.FeatureToPolygon_management(cafLayer,temporaryPolys)
-if debug:
-    addMsgAndPrint('temporaryPolys fields are '+str(fieldNameList(temporaryPolys)))
+# read old polygons
+addMsgAndPrint('  Reading '+shortMup)
+oldPolygons = []
+with arcpy.da.SearchCursor(inPolys, ['SHAPE@WKB'] + mupFields) as cursor:
+    for row in cursor:
+        if row[0] <> None:
+            oldPolygons.append([geometryFromWkb(row[0]).paths, list(row[1:])])
+oldIndex = polygonIndex(oldPolygons)
+del oldPolygons
 
-#make center points (within) from temporarypolys
-addMsgAndPrint('  Making '+centerPoints)
-testAndDelete(centerPoints)               
-arcpy.FeatureToPoint_management(temporaryPolys, centerPoints, "INSIDE")
-if debug:
-    addMsgAndPrint('centerPoints fields are '+str(fieldNameList(centerPoints)))
-# get rid of ORIG_FID field
-arcpy.DeleteField_management(centerPoints,'ORIG_FID')
-
-#identity center points with inpolys
-testAndDelete(centerPoints2)
-arcpy.Identity_analysis(centerPoints, inPolys, centerPoints2, 'NO_FID')
-# delete points with MapUnit = '' or null
-## first, make layer view
-addMsgAndPrint("    Deleting centerPoints2 MapUnit = '' ")
-## next line is changed, 7 March 2021
-sqlQuery = arcpy.AddFieldDelimiters(fds,'MapUnit') + "= '' OR "+arcpy.AddFieldDelimiters(fds,'MapUnit')+" IS NULL"
-testAndDelete('cP2Layer')
-arcpy.MakeFeatureLayer_management(centerPoints2,'cP2Layer',sqlQuery)
-## then delete features
-if numberOfRows('cP2Layer') > 0:
-    arcpy.DeleteFeatures_management('cP2Layer')
-
-
-#adjust center point fields (delete extra, add any missing. Use NCGMP09_Definition as guide)
-## get list of fields in centerPoints2
-cp2Fields = fieldNameList(centerPoints2)
-## add fields not in MUP as defined in Definitions
-fieldDefs = tableDict['MapUnitPolys']
-for fDef in fieldDefs:
-    if fDef[0] not in cp2Fields:
-        addMsgAndPrint('field '+fd+' is missing')
-        try:
-            if fDef[1] == 'String':
-                arcpy.AddField_management(thisFC,fDef[0],transDict[fDef[1]],'#','#',fDef[3],'#',transDict[fDef[2]])
-            else:
-                arcpy.AddField_management(thisFC,fDef[0],transDict[fDef[1]],'#','#','#','#',transDict[fDef[2]])
-            cp2Fields.append(fDef[0])
-        except:
-            addMsgAndPrint('Failed to add field '+fDef[0]+' to feature class '+featureClass)
-            addMsgAndPrint(arcpy.GetMessages(2))        
-
-# if labelPoints specified
-## add any missing fields to centerPoints2
-if not labelPoints is None:                               
+# build polygons from CAF without concealed lines
+addMsgAndPrint('  Building polygons from '+shortCaf+' without concealed lines')
+sqlQuery = arcpy.AddFieldDelimiters(fds,'IsConcealed') + " NOT IN ('Y','y')"
+polygonizer = Polygonizer(tolerance)
+with arcpy.da.SearchCursor(caf, ['SHAPE@WKB'], sqlQuery) as cursor:
+    for row in cursor:
+        if row[0] <> None:
+            for path in geometryFromWkb(row[0]).paths:
+                polygonizer.addLine(path)
+faces = polygonizer.faces()
+addMsgAndPrint('    '+str(len(faces))+' polygons')
+
+# label points: a point inside each new polygon, with the attributes of the old polygon
+#   it falls in (points that fall in no old polygon, or one with MapUnit = '' or null, are
+#   not labels), then labelPoints. labelRows is [x, y, mupFields values] of each label
+addMsgAndPrint('  Labeling polygons')
+labelRows = []
+labels = []
+for face in faces:
+    x, y = face.interiorPoint()
+    old = findPolygon(oldIndex, x, y)
+    if old <> None:
+        labelRows.append([x, y, old])
+        labels.append([x, y, len(labelRows)-1, old[mapUnitPos], old])
+if not labelPoints is None:
     if arcpy.Exists(labelPoints):
-        lpFields = arcpy.ListFields(labelPoints)
-        for lpF in lpFields:
-            if not lpF.name in cp2Fields:
-                addMsgAndPrint(lpF.type)
-                if lpF.type in ('Text','STRING','String'):
-                    arcpy.AddField_management(centerPoints2,lpF.name,'TEXT','#','#',lpF.length)
-                else:
-                    if lpF.type in typeTransDict:
-                        arcpy.AddField_management(centerPoints2,lpF.name,typeTransDict[lpF.type])
-        # append labelPoints to centerPoints2
-        arcpy.Append_management(labelPoints,centerPoints2,'NO_TEST')
+        lpFields = fieldNameList(labelPoints)
+        commonFields = [f for f in mupFields if f in lpFields]
+        with arcpy.da.SearchCursor(labelPoints, ['SHAPE@XY'] + commonFields) as cursor:
+            for row in cursor:
+                values = dict(zip(commonFields, row[1:]))
+                lpRow = [values.get(f) for f in mupFields]
+                labelRows.append([row[0][0], row[0][1], lpRow])
+                labels.append([row[0][0], row[0][1], len(labelRows)-1, lpRow[mapUnitPos], lpRow])
+labelFaces(faces, labels)
+badPolyList, badPointList, blankPolyList = labelErrors(faces)
 
 #if inPolys are to be saved, copy inpolys to savedPolys
 if saveMUP:
@@ -261,11 +223,28 @@ for field in fields:
             addMsgAndPrint('     deleting '+field)
         arcpy.DeleteField_management(oldPolys,field)
 
-#make new mup from layer view, with centerpoints2
+def polyRow(face):
+    # SHAPE@WKB and mupFields values for a new polygon
+    row = face.row()
+    if row == None:
+        row = [None] * len(mupFields)
+        row[mapUnitPos] = ''
+    return [bytearray(geometryToWkb(face.geometry()))] + row
+
+def writePolys(fc, faceList):
+    # fc gets the fields of mup, and a row for each of faceList
+    testAndDelete(fc)
+    arcpy.CreateFeatureclass_management(fds, os.path.basename(fc), 'POLYGON', mup)
+    with arcpy.da.InsertCursor(fc, ['SHAPE@WKB'] + mupFields) as cursor:
+        for face in faceList:
+            cursor.insertRow(polyRow(face))
+
+#refill mup with new polygons
 addMsgAndPrint('  Making new MapUnitPolys')
-testAndDelete(mup)
-arcpy.FeatureToPolygon_management(cafLayer,mup,'','ATTRIBUTES',centerPoints2)
-testAndDelete(cafLayer)
+arcpy.DeleteFeatures_management(mup)
+with arcpy.da.InsertCursor(mup, ['SHAPE@WKB'] + mupFields) as cursor:
+    for face in faces:
+        cursor.insertRow(polyRow(face))
 
 addMsgAndPrint('  Making changedPolys')
 #intersect oldPolys with mup to make changedPolys
@@ -275,77 +254,35 @@ arcpy.Identity_analysis(mup,oldPolys,changedPolys)
 ## make feature layer, select MapUnit = OldMapUnit and delete
 addMsgAndPrint('     deleting features with MapUnit = OldMapUnit')
 sqlQuery = arcpy.AddFieldDelimiters(changedPolys,'MapUnit') + " = " +arcpy.AddFieldDelimiters(changedPolys,'OldMapUnit')
-#addMsgAndPrint('Fields in '+changedPolys+' are:')
-#addMsgAndPrint(str(fieldNameList(changedPolys)))
-#addMsgAndPrint('sqlQuery = '+sqlQuery)
 testAndDelete('cpLayer')
 arcpy.MakeFeatureLayer_management(changedPolys,'cpLayer',sqlQuery)
 arcpy.DeleteFeatures_management('cpLayer')
 addMsgAndPrint('     '+str(numberOfRows(changedPolys))+' rows in changedPolys')
 
-#identity centerpoints2 with mup
 addMsgAndPrint('  Finding label errors')
-testAndDelete(centerPoints3)
-arcpy.Identity_analysis(centerPoints2,mup,centerPoints3)
-if debug: addMsgAndPrint(str(fieldNameList(centerPoints3)))
-#make list from centerPoints3:  mupID, centerPoints2ID, cp2.MapUnit, mup.MapUnit
-cpList = []
-mupID = 'FID_'+os.path.basename(mup)
-cp2ID = 'FID_'+os.path.basename(centerPoints2)
-fields = [mupID,cp2ID,'MapUnit_1','MapUnit']
-with arcpy.da.SearchCursor(centerPoints3, fields) as cursor:
-    for row in cursor:
-        cpList.append([row[0],row[1],row[2],row[3]])
-#sort list on mupID
-cpList.sort()
-badPointList = []
-badPolyList = []
-#step through list. If more than 1 centerpoint with same mupID AND mapUnit1 <> MapUnit2 <>  ...:
-addMsgAndPrint('    Sorting through label points')
-lastPt = cpList[0]
-multiPts = [lastPt]
-for i in range(1,len(cpList)):
-    if cpList[i][0] <> lastPt[0]:  # different poly than lastPt
-        badPointList, badPolyList = checkMultiPts(multiPts,badPointList,badPolyList)
-        lastPt = cpList[i]
-        multiPts = [lastPt]
-    else: # we are looking at more points in same poly
-        multiPts.append(cpList[i])
-badPointList, badPolyList = checkMultiPts(multiPts,badPointList,badPolyList)
-
 #from badPolyList, make badPolys
 addMsgAndPrint('    Making '+badPolys)
-testAndDelete(badPolys)
-arcpy.Copy_management(mup,badPolys)
-with arcpy.da.UpdateCursor(badPolys,['OBJECTID']) as cursor:
-    for row in cursor:
-        if row[0] not in badPolyList:
-            cursor.deleteRow()
+writePolys(badPolys, badPolyList)
 
 #from badPointlist of badpoints, make badLabels
 addMsgAndPrint('    Making '+badLabels)
 testAndDelete(badLabels)
-arcpy.Copy_management(centerPoints2,badLabels)
-with arcpy.da.UpdateCursor(badLabels,['OBJECTID']) as cursor:
-    for row in cursor:
-        if row[0] not in badPointList:
-            cursor.deleteRow()
-               
+arcpy.CreateFeatureclass_management(fds, os.path.basename(badLabels), 'POINT', mup)
+with arcpy.da.InsertCursor(badLabels, ['SHAPE@XY'] + mupFields) as cursor:
+    for key in badPointList:
+        x, y, row = labelRows[key]
+        cursor.insertRow([(x, y)] + row)
+
 #make blankPolys
 addMsgAndPrint('    Making '+blankPolys)
-testAndDelete(blankPolys)
-arcpy.Copy_management(mup,blankPolys)
-query = arcpy.AddFieldDelimiters(blankPolys,'MapUnit')+" <> ''"
-testAndDelete('blankP')
-arcpy.MakeFeatureLayer_management(blankPolys,'blankP',query)
-arcpy.DeleteFeatures_management('blankP')
+writePolys(blankPolys, blankPolyList)
 addMsgAndPrint('    '+str(len(badPolyList))+' multi-label polys')
 addMsgAndPrint('    '+str(len(badPointList))+' multiple, conflicting, label points')
-addMsgAndPrint('    '+str(numberOfRows(blankPolys))+' unlabelled polys')
+addMsgAndPrint('    '+str(len(blankPolyList))+' unlabelled polys')
 
 addMsgAndPrint('  Cleaning up')
-#delete oldpolys, temporaryPolys, centerPoints, centerPoints2, centerPoints3
-for fc in oldPolys, temporaryPolys, centerPoints, centerPoints2, centerPoints3, cafLayer,'cP2Layer':
+#delete oldpolys
+for fc in oldPolys, 'cpLayer':
     testAndDelete(fc)
 
 # restore saved layers
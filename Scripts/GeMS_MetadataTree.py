@@ -0,0 +1,457 @@
+# GeMS_MetadataTree.py
+# builds CSDGM metadata records for GeMS_MetadataCSDGM2_Arc10.py with xml.etree
+#   The master record is parsed once per process (see masterRecord) and each entity's
+#   record starts as a deep copy of it. Records are written with ElementTree.write, which
+#   streams the document to the file as it is serialized. Entity records may be built by
+#   worker processes (see buildRecords); importing them into the geodatabase is left to
+#   the calling script, so that only one process writes to the geodatabase
+# Attribute elements are found through an index from attribute label to attr elements
+#   (see attrIndex), built once per record, rather than by searching every attrlabl
+#   element of the record for each field and each domain
+# 18 October 2026: first version, from the xml.dom.minidom functions of GeMS_MetadataCSDGM2_Arc10.py.
+#   The values of all enumerated-domain fields of a table are read in one cursor pass
+
+import os, os.path, sys, copy, imp
+import traceback
+try:
+    import xml.etree.cElementTree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+from GeMS_utilityFunctions import *
+from GeMS_Definition import enumeratedValueDomainFieldList, rangeDomainDict, unrepresentableDomainDict, attribDict, entityDict, GeoMatConfDict
+
+debug = False
+
+ncgmp = 'GeMS'
+ncgmpFullRef = '"GeMS (Geologic Map Schema)--a standard format for digital publication of geologic maps, version 2.0", available at http://ngmdb.usgs.gov/Info/standards/GeMS/'
+
+# fields that are not described in metadata
+skipFields = ('OBJECTID', 'SHAPE','Shape', 'Shape_Length', 'Shape_Area','SHAPE_Length','shape_Length','shape_Area',
+              'objectid','shape','shape_length','shape_area') #These are added for dbs extracted from sde dbs
+
+masterRecords = {}     # master record file: parsed root element, one per process
+lookupCache = {}       # geodatabase: dictionary of TableLookups, one per process
+definitionFiles = []   # definition-extension files already added in this process
+
+# I. Elements
+
+def newElement(tag, text):
+    nd = ET.Element(tag)
+    nd.text = text
+    return nd
+
+def firstElement(root, tag):
+    # first element with tag in document order (root included), or None
+    for nd in root.iter(tag):
+        return nd
+    return None
+
+def appendOrReplace(parent, newNode):
+    # replaces the first child of parent with the tag of newNode, or appends newNode
+    oldNode = parent.find(newNode.tag)
+    if oldNode is None:
+        parent.append(newNode)
+    else:
+        parent[list(parent).index(oldNode)] = newNode
+
+def attrIndex(root):
+    # attribute label: list of attr elements with that label
+    index = {}
+    for attr in root.iter('attr'):
+        attrlabl = attr.find('attrlabl')
+        if not attrlabl is None:
+            index.setdefault(attrlabl.text, []).append(attr)
+    return index
+
+def purgeChildren(root, nodeTag):
+    for aNode in root.iter(nodeTag):
+        for child in list(aNode):
+            aNode.remove(child)
+        aNode.text = None
+
+def purgeIdenticalSiblings(root, ndTag, ndTxt):
+    # removes all but the first parent of ndTag elements with text ndTxt
+    parents = dict((child, parent) for parent in root.iter() for child in parent)
+    parentNodes = [parents[nd] for nd in root.iter(ndTag) if nd.text == ndTxt]
+    for nd in parentNodes[1:]:
+        parents[nd].remove(nd)
+
+# II. Record edits
+
+def cleanTitle(root):
+    # trims all ": table...", ":  feature..." from title
+    title = firstElement(root, 'title')
+    titleText = title.text
+    for txt in (': feature',': table'):
+        cn = titleText.find(txt)
+        if cn > 0:
+            titleText = titleText[0:cn]
+    title.text = titleText
+
+def titleSuffix(root, suffix):
+    # adds suffix to title text
+    title = firstElement(root, 'title')
+    if title.text.find(suffix) == -1:  # titleSuffix isn't already present
+        title.text = title.text+suffix
+
+def addSupplinf(root, supplementaryInfo):
+    appendOrReplace(firstElement(root, 'descript'), newElement('supplinf', supplementaryInfo))
+
+def eaoverview(eainfo, eaoverText, edcTxt):
+    overview = ET.SubElement(eainfo, 'overview')
+    overview.append(newElement('eaover', eaoverText))
+    overview.append(newElement('eadetcit', edcTxt))
+
+def cleanMasterRecord(root):
+    # purges eainfo and spdoinfo, fixes title, and makes sure that there is an eainfo element
+    #   just before distinfo. Returns a list of messages
+    msgs = []
+    for nodeTag in ('eainfo','spdoinfo'):
+        purgeChildren(root, nodeTag)
+    ## get rid of extra <themekt>ISO 19115 Topic Categories entries
+    #purgeIdenticalSiblings(root,'themekt','ISO 19115 Topic Categories')
+    cleanTitle(root)
+    msgs.append('Checking for eainfo tag')
+    if firstElement(root, 'eainfo') is None:
+        msgs.append('Adding eainfo tag')
+        distNode = root.find('distinfo')
+        msgs.append('Inserting it where it should be')
+        #This keeps the order correct - should fail if there is no <distinfo> tag
+        root.insert(list(root).index(distNode), ET.Element('eainfo'))
+    return msgs
+
+def updateAttrDef(fld, attrs):
+    ##element tag names are
+    ## attr             = Attribute
+    ## attrlabl         = Attribute_Label
+    ## attrdef          = Attribute_Definition
+    ## attrdefs         = Attribute_Definition_Source
+    if fld.find('_ID') > -1:
+        # substitute generic _ID field for specific
+        attrdefText = attribDict['_ID']
+    else:
+        attrdefText = attribDict[fld]
+    for attr in attrs:
+        appendOrReplace(attr, newElement('attrdef', attrdefText))
+        appendOrReplace(attr, newElement('attrdefs', ncgmp))
+
+def updateEdom(defs, attrs):
+    ##element tag names are
+    ## attrdomv         = Attribute_Domain_Values
+    ## edom             = Enumerated_Domain
+    ## edomv            = Enumerated_Domain_Value
+    ## edomd            = Enumerated_Domain_Definition
+    ## edomvds          = Enumerated_Domain_Value_Definition_Source
+    for attr in attrs:
+        for k in defs.iteritems():
+            # one attrdomv per value; there are supposed to be multiple tags of this type
+            attrdomv = ET.SubElement(attr, 'attrdomv')
+            edom = ET.SubElement(attrdomv, 'edom')
+            edom.append(newElement('edomv', k[0]))
+            edom.append(newElement('edomvd', k[1][0]))
+            if len(k[1][1]) > 0:
+                edom.append(newElement('edomvds', k[1][1]))
+
+def updateRdom(fld, attrs):
+    for attr in attrs[0:1]:
+        attrdomv = ET.Element('attrdomv')
+        rdom = ET.SubElement(attrdomv, 'rdom')
+        rdom.append(newElement('rdommin', rangeDomainDict[fld][0]))
+        rdom.append(newElement('rdommax', rangeDomainDict[fld][1]))
+        rdom.append(newElement('attrunit', rangeDomainDict[fld][2]))
+        appendOrReplace(attr, attrdomv)
+
+def updateUdom(attrs, udomTextString):
+    for attr in attrs:
+        attrdomv = ET.Element('attrdomv')
+        attrdomv.append(newElement('udom', udomTextString))
+        appendOrReplace(attr, attrdomv)
+
+# III. Entities
+
+def loadDefinitions(defsFile):
+    # adds the definitions of a my_GeMSDefinitions.py-style file to the dictionaries of
+    #   GeMS_Definition, once per process. Worker processes do not inherit the definitions
+    #   that the calling script added, so each job names the file
+    if defsFile in (None, '', '#') or defsFile in definitionFiles or not os.path.exists(defsFile):
+        return
+    myDefs = imp.load_source('module1', defsFile)
+    myDefs.addDefs()
+    definitionFiles.append(defsFile)
+
+def masterRecord(xmlFile):
+    # root element of master record xmlFile, parsed once per process. Do not edit it: copy it
+    if not xmlFile in masterRecords:
+        masterRecords[xmlFile] = ET.parse(xmlFile).getroot()
+    return masterRecords[xmlFile]
+
+def gdbLookups(gdb):
+    # Glossary, DataSources, DMU, and GeoMaterialDict of gdb, each read once, when first
+    #   needed, and shared by all entities built in this process
+    if not gdb in lookupCache:
+        lookupCache[gdb] = {
+            'Glossary':TableLookup(os.path.join(gdb, 'Glossary'),'Term',['Definition','DefinitionSourceID']),
+            'DataSources':TableLookup(os.path.join(gdb, 'DataSources'),'DataSources_ID',['Source']),
+            'DescriptionOfMapUnits':TableLookup(os.path.join(gdb, 'DescriptionOfMapUnits'),'MapUnit',['FullName','Name']),
+            'GeoMaterialDict':TableLookup(os.path.join(gdb, 'GeoMaterialDict'),'GeoMaterial',['Definition'])
+            }
+    return lookupCache[gdb]
+
+def findInlineRef(sourceID, lookups):
+    # finds the Inline reference for each DataSource_ID
+    row = lookups['DataSources'].get(sourceID)
+    if not row is None:
+        return row[0]
+    else:
+        return ""
+
+def entityFieldNames(path):
+    #Returns a list of field names from Field.name in arcpy.ListFields
+    import arcpy
+    return [fld.name for fld in arcpy.ListFields(path) if not fld.name in skipFields]
+
+def fieldValues(path, fields):
+    # dictionary of field: set of the non-null values of field in table path, read in one pass
+    import arcpy
+    values = dict((fld, set()) for fld in fields)
+    if len(fields) > 0:
+        with arcpy.da.SearchCursor(path, fields) as rows:
+            for row in rows:
+                for i in range(len(fields)):
+                    if not row[i] is None:
+                        values[fields[i]].add(row[i])
+    return values
+
+def enumeratedDefs(fc, fld, valList, lookups, cantfindValue, msgs):
+    # dictionary of value: [definition, source] for the values of enumerated-domain field fld
+    defs = {}
+    #for each unique term, find its definition
+    if fld == 'MapUnit' and fc <> 'DescriptionOfMapUnits':
+        for t in valList:
+            row = lookups['DescriptionOfMapUnits'].get(t)  # FullName, Name
+            #if DMU has this map unit
+            if row:
+                #create an entry in the dictionary of term:[definition, source] key:value pairs
+                #this is how we will enumerate through the enumerated_domain section
+                if row[0] <> None:
+                    defs[t] = [row[0], 'this report, table DescriptionOfMapUnits']
+                else:
+                    msgs.append('MapUnit = '+t+', FullName not defined')
+                    defs[t] = [row[1], 'this report, table DescriptionOfMapUnits']
+            else:
+                if not t in ('',' '): cantfindValue.append([fld,t])
+    elif fld == 'GeoMaterialConfidence' and fc == 'DescriptionOfMapUnits':
+        if debug:
+            msgs.append('DMU / GeoMaterialsConfidence')
+        defs = GeoMatConfDict
+    elif fld == 'GeoMaterial' and fc == 'DescriptionOfMapUnits':
+        if debug:
+            msgs.append('DMU / GeoMaterials!')
+        for t in valList:
+            row = lookups['GeoMaterialDict'].get(t)  # Definition
+            #if GeoMaterialDict has this GeoMaterial
+            if row:
+                if debug:
+                    msgs.append(t+' : '+row[0])
+                defs[t] = [row[0], ' GeMS documentation']
+            else:
+                msgs.append('GeoMaterial = '+t+': not defined in GeoMaterialDict')
+                cantfindValue.append([fld,t])
+    elif fld.find('SourceID') > -1:  # is a source field
+        for t in valList:
+            row = lookups['DataSources'].get(t)  # Source
+            #if DataSources has this DataSources_ID
+            if row:
+                defs[t] = [row[0], 'this report, table DataSources']
+            else:
+                cantfindValue.append([fld,t])
+    else:
+        for t in valList:
+            row = lookups['Glossary'].get(t)  # Definition, DefinitionSourceID
+            #if Glossary has this term
+            if row:
+                defs[t] = [row[0], findInlineRef(row[1], lookups)]
+            else:
+                if fld <> 'GeoMaterial' and fc <> 'GeoMaterialDict':
+                    cantfindValue.append([fld,t])
+    return defs
+
+def updateEntityAttributes(root, path, fc, fldList, lookups, log, msgs):
+    """For each attribute (field) in fldList,
+        adds attribute definition and definition source,
+        classifies as range domain, unrepresentable-value domain or enumerated-value domain, and
+            for range domains, adds rangemin, rangemax, and units;
+            for unrepresentable value domains, adds unrepresentable value statement;
+            for enumerated value domains:
+            1) Finds all controlled-vocabulary fields in the table sent to it
+            2) Builds a set of unique terms in each field, ie, the domain
+            3) Matches each domain value to an entry in the glossary
+            4) Builds a dictionary of term:(definition, source) items
+            5) Takes the dictionary items and put them into the metadata
+              document as Attribute_Domain_Values
+        Field MapUnit in table DescriptionOfMapUnits is treated as a special case.
+        """
+    cantfindTerm = []
+    cantfindValue = []
+    index = attrIndex(root)
+    # values of every enumerated-domain field, in one pass through the table
+    enumFields = [fld for fld in fldList if fld in enumeratedValueDomainFieldList and
+                  not (unrepresentableDomainDict.has_key(fld) or rangeDomainDict.has_key(fld)) and
+                  not (fld == 'MapUnit' and fc == 'DescriptionOfMapUnits')]
+    values = fieldValues(path, enumFields)
+    for fld in fldList:
+        msgs.append('      Field: '+ fld)
+        attrs = index.get(fld, [])
+        # if is _ID field or if field definition is available, update definition
+        if fld.find('_ID') > -1 or attribDict.has_key(fld):
+            updateAttrDef(fld, attrs)
+        else:
+            cantfindTerm.append(fld)
+        #if this is an _ID field
+        if fld.find('_ID') > -1:
+            updateUdom(attrs, unrepresentableDomainDict['_ID'])
+        #if this is another unrepresentable-domain field
+        if unrepresentableDomainDict.has_key(fld):
+            updateUdom(attrs, unrepresentableDomainDict[fld])
+        #if this is a defined range-domain field
+        elif rangeDomainDict.has_key(fld):
+            updateRdom(fld, attrs)
+        #if this is MapUnit in DMU
+        elif fld == 'MapUnit' and fc == 'DescriptionOfMapUnits':
+            updateUdom(attrs, unrepresentableDomainDict['default'])
+        #if this is a defined Enumerated Value Domain field
+        elif fld in enumeratedValueDomainFieldList:
+            defs = enumeratedDefs(fc, fld, values[fld], lookups, cantfindValue, msgs)
+            updateEdom(defs, attrs)
+        else:  #presumed to be an unrepresentable domain
+            updateUdom(attrs, unrepresentableDomainDict['default'])
+    if len(cantfindValue) > 0:
+        log.append('Missing enumerated-domain values\n')
+        log.append('  ENTITY     TERM     VALUE\n')
+        for term in cantfindValue:
+            log.append('  '+fc+'  '+term[0]+' **'+term[1]+'**\n')
+    if len(cantfindTerm) > 0:
+        log.append('Missing terms\n')
+        log.append('  ENTITY     TERM\n')
+        for term in cantfindTerm:
+            log.append('  '+fc + '  '+term+'\n')
+
+def updateTableRecord(root, path, fc, lookups, log, msgs):
+    # adds entity and attribute information for table, raster, or feature class fc at path
+    import arcpy
+    desc = arcpy.Describe(path)
+    if desc.datasetType == 'FeatureClass' and desc.FeatureType == 'Annotation':
+        isAnno = True
+    else: isAnno = False
+    if entityDict.has_key(fc):
+        hasDesc = True
+        descText = entityDict[fc]
+        descSourceText = ncgmp
+    else:
+        hasDesc = False
+        if not isAnno:
+            descText = '**Need Description of '+fc+'**'
+            descSourceText = '**Need Description Source**'
+            log.append('No description for entity '+fc+'\n')
+            log.append('No description source for entity '+fc+'\n')
+
+    eainfo = firstElement(root, 'eainfo')
+    # DELETE EXISTING CHILD NODES
+    purgeChildren(eainfo, 'eainfo')
+    if isAnno:
+        if hasDesc: eaoverText = descText
+        else: eaoverText = 'annotation feature class'
+        if hasDesc: edcTxt = descSourceText
+        else: edcTxt = 'See ESRI documentation for structure of annotation feature classes.'
+        eaoverview(eainfo, eaoverText, edcTxt)
+    else:  # is table or non-Anno feature class
+        #add detailed/enttyp/enttypl nodes
+        detailed = ET.SubElement(eainfo, 'detailed')
+        enttyp = ET.SubElement(detailed, 'enttyp')
+        for nd in newElement('enttypl',fc), newElement('enttypd',descText), newElement('enttypds',descSourceText):
+            enttyp.append(nd)
+        #add an attr node for each field in the fc
+        fldNameList = entityFieldNames(path)
+        for fieldName in fldNameList:
+            attr = ET.SubElement(detailed, 'attr')
+            attr.append(newElement('attrlabl', fieldName))
+        #update the entity description and entity description source
+        if entityDict.has_key(fc) or ( fc[0:2] == 'CS' and entityDict.has_key(fc[2:]) ):
+            if fc[0:2] == 'CS':
+                descriptionText = entityDict[fc[3:]] #Changed this from a 2 to a 3
+            else:
+                descriptionText = entityDict[fc]
+            appendOrReplace(enttyp, newElement('enttypd', descriptionText))
+            appendOrReplace(enttyp, newElement('enttypds', ncgmp))
+        #update attribute descriptions and value domains
+        updateEntityAttributes(root, path, fc, fldNameList, lookups, log, msgs)
+
+def fdsOverview(anFds, log):
+    # [overview text, overview source] of feature dataset anFds
+    if entityDict.has_key(anFds):
+        return [entityDict[anFds], ncgmpFullRef]
+    elif anFds.find('CrossSection') == 0:
+        return [entityDict['CrossSection'], ncgmpFullRef]
+    log.append('No description for entity '+anFds+'\n')
+    log.append('No description source for entity '+anFds+'\n')
+    return ['**Need Description of '+anFds+'**', '**Need Description Source**']
+
+def writeRecord(root, xmlFile):
+    # ElementTree.write streams the record to the file as it is serialized
+    outf = open(xmlFile, 'wb')
+    try:
+        ET.ElementTree(root).write(outf, encoding='UTF-8', xml_declaration=True)
+    finally:
+        outf.close()
+
+# IV. Jobs
+# A job is [gdb, path, name, kind, masterFile, suffix, supplementaryInfo, overview, xmlFile, defsFile]
+#   kind is 'gdb', 'table', 'raster', 'fds', or 'fc'. suffix, if not None, is added to the
+#   title. overview is [text, source] for kind 'gdb'. The record is written to xmlFile
+
+def makeJob(gdb, path, name, kind, masterFile, suffix, supplementaryInfo, xmlFile, defsFile, overview=None):
+    return [gdb, path, name, kind, masterFile, suffix, supplementaryInfo, overview, xmlFile, defsFile]
+
+def buildRecord(job):
+    # builds and writes the metadata record of one entity. Returns [logfile text, messages]
+    gdb, path, name, kind, masterFile, suffix, supplementaryInfo, overview, xmlFile, defsFile = job
+    loadDefinitions(defsFile)
+    log = []
+    msgs = []
+    if kind == 'fc':
+        msgs.append('    Creating XML for '+name)
+    elif kind <> 'gdb':
+        msgs.append('  Creating XML for '+name)
+    root = copy.deepcopy(masterRecord(masterFile))
+    if suffix <> None:
+        titleSuffix(root, suffix)
+    addSupplinf(root, supplementaryInfo)
+    if kind == 'gdb':
+        eaoverview(firstElement(root, 'eainfo'), overview[0], overview[1])
+    elif kind == 'fds':
+        overText, overSrc = fdsOverview(name, log)
+        eaoverview(firstElement(root, 'eainfo'), overText, overSrc)
+    else:
+        updateTableRecord(root, path, name, gdbLookups(gdb), log, msgs)
+    writeRecord(root, xmlFile)
+    return [''.join(log), msgs]
+
+def poolJob(job):
+    # buildRecord for a worker process. An exception is returned as messages rather than
+    #   raised, so one bad entity does not stop the others
+    try:
+        return buildRecord(job)
+    except:
+        return ['', ['failed to build metadata for '+job[1], traceback.format_exc()]]
+
+def buildRecords(jobs, workers=1):
+    # runs buildRecord for each of jobs and returns a list of [logfile text, messages], in
+    #   the same order as jobs
+    if workers > 1 and len(jobs) > 1:
+        workers = min(workers, len(jobs))
+        addMsgAndPrint('  building '+str(len(jobs))+' metadata records with '+str(workers)+' worker processes')
+        return poolMap(poolJob, jobs, workers)
+    results = []
+    for job in jobs:
+        results.append(buildRecord(job))
+    return results
@@ -0,0 +1,130 @@
+# GeMS_PointThinning.py
+# pure-Python engine for assigning PlotAtScale values to points, as used by
+#   GeMS_SetPlotAtScales_Arc10.py. Nothing here imports arcpy.
+#
+# The SetPlotAtScales rule is: repeatedly take the closest remaining pair of points
+#   (ties broken by smaller first FID, then smaller second FID), choose one point of
+#   the pair (the second, or the less significant), give it
+#   PlotAtScale = separation / minimum separation, and drop it. Points that have no
+#   remaining neighbor within searchRadius keep the maximum PlotAtScale.
+# This was done with a PointDistance_analysis near table holding every pair within
+#   searchRadius, sorted, and a list.remove for every row of a dropped point. Here each
+#   live point keeps its nearest live neighbor in a heap. When a heap entry turns out
+#   to name a dropped neighbor it is recomputed and pushed back (lazy invalidation);
+#   because dropping points can only make neighbors farther away, the heap order stays
+#   correct.
+# 18 October 2026: first version
+
+import math, heapq
+
+def plotScale(separation,minSeparationMapUnits):
+    return int(round(separation / minSeparationMapUnits))
+
+class PointGrid:
+    # Grid-hash index of live points, for nearest-neighbor queries within a radius
+    # points is dictionary of fid: (x, y)
+    def __init__(self, points, cellSize):
+        self.points = points
+        self.cellSize = float(cellSize)
+        self.cells = {}
+        for fid in points:
+            self.cells.setdefault(self.cell(fid), set()).add(fid)
+    def cell(self, fid):
+        x, y = self.points[fid]
+        return int(math.floor(x / self.cellSize)), int(math.floor(y / self.cellSize))
+    def remove(self, fid):
+        c = self.cell(fid)
+        members = self.cells[c]
+        members.discard(fid)
+        if len(members) == 0:
+            del self.cells[c]
+    def nearest(self, fid, radius, exclude=()):
+        # returns (distance, nearFid) of the closest live point to fid that is within
+        #   radius (distance <= radius) and not in exclude, or None. Ties go to the smaller nearFid
+        x, y = self.points[fid]
+        i, j = self.cell(fid)
+        best = None
+        r = 0
+        while True:
+            limit = radius
+            if best <> None:
+                limit = best[0]
+            if (r - 1) * self.cellSize > limit:
+                break
+            if (2*r + 1)**2 >= len(self.cells):
+                # ring is bigger than the set of occupied cells; look at all of them and quit
+                candidateCells = self.cells.values()
+                r = -1
+            else:
+                candidateCells = []
+                for ii in range(i-r, i+r+1):
+                    for jj in range(j-r, j+r+1):
+                        if max(abs(ii-i), abs(jj-j)) == r and (ii, jj) in self.cells:
+                            candidateCells.append(self.cells[(ii, jj)])
+            for members in candidateCells:
+                for nearFid in members:
+                    if nearFid == fid or nearFid in exclude:
+                        continue
+                    nx, ny = self.points[nearFid]
+                    d = math.hypot(nx - x, ny - y)
+                    if d <= radius and (best == None or (d, nearFid) < best):
+                        best = (d, nearFid)
+            if r == -1:
+                break
+            r += 1
+        return best
+
+def defaultCellSize(points, searchRadius):
+    # about 2 points per cell on average, but never so small that a search
+    #   radius spans more than 64 cells
+    n = len(points)
+    xs = [p[0] for p in points.values()]
+    ys = [p[1] for p in points.values()]
+    area = (max(xs) - min(xs)) * (max(ys) - min(ys))
+    cellSize = math.sqrt(2.0 * area / n)
+    return max(cellSize, searchRadius / 64.0, 1e-9)
+
+def plotAtScales(points, searchRadius, minSeparationMapUnits, lessSignificant=None, cellSize=None):
+    # points is dictionary of fid: (x, y)
+    # lessSignificant(fid1, fid2), if given, returns the fid to drop, or None to leave
+    #   both points and ignore this pair. Otherwise the second fid is dropped
+    # returns dictionary of fid: PlotAtScale for dropped points
+    outPointDict = {}
+    if len(points) < 2:
+        return outPointDict
+    if cellSize == None:
+        cellSize = defaultCellSize(points, searchRadius)
+    grid = PointGrid(points, cellSize)
+    live = set(points)
+    excluded = {}   # fid: set of fids of pairs that lessSignificant declined to choose between
+    heap = []
+    for fid in points:
+        nearest = grid.nearest(fid, searchRadius)
+        if nearest <> None:
+            heap.append((nearest[0], fid, nearest[1]))
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        pointSep, fid1, fid2 = heapq.heappop(heap)
+        if fid1 not in live:
+            continue
+        if fid2 not in live or fid2 in excluded.get(fid1, ()):
+            # stale: find the current nearest neighbor of fid1 and try again
+            nearest = grid.nearest(fid1, searchRadius, excluded.get(fid1, ()))
+            if nearest <> None:
+                heapq.heappush(heap, (nearest[0], fid1, nearest[1]))
+            continue
+        if lessSignificant <> None:
+            pt = lessSignificant(fid1, fid2)
+        else:
+            pt = fid2
+        if pt == None:
+            excluded.setdefault(fid1, set()).add(fid2)
+            excluded.setdefault(fid2, set()).add(fid1)
+            heapq.heappush(heap, (pointSep, fid1, fid2))  # will be recomputed as stale
+            continue
+        outPointDict[pt] = plotScale(pointSep, minSeparationMapUnits)
+        live.discard(pt)
+        grid.remove(pt)
+        if pt == fid2:
+            heapq.heappush(heap, (pointSep, fid1, fid2))  # fid1 needs a new nearest neighbor
+    return outPointDict
@@ -0,0 +1,568 @@
+# GeMS_Polygonizer.py
+# pure-Python polygon building for GeMS_MakePolys3_Arc10.py. Builds polygons from linework,
+#   as FeatureToPolygon does, and labels them, as the Identity_analysis steps of MakePolys3
+#   did, without scratch feature classes. Nothing here imports arcpy.
+#
+# Lines are first split where they cross or touch one another, as FeatureToPolygon does
+#   (see splitPaths): where two segments cross, and where a vertex of one line is within
+#   tolerance of another line. Ends of the pieces within tolerance of one another are then
+#   snapped into nodes (see GeMS_Linework.NodeBuilder), and pieces that repeat another
+#   piece are dropped.
+# Faces are traced in a half-edge graph. Each line gives two half-edges, one in each
+#   direction. At each node the half-edges that leave it are sorted by angle, and the
+#   half-edge that follows h around the face on its left is the one just clockwise of the
+#   twin of h at the end of h. Counterclockwise cycles are polygon shells; clockwise
+#   cycles are holes, each put in the smallest shell, from another connected part of the
+#   linework, that contains it. Dangles and bridges (lines with the same face on both
+#   sides) bound nothing, and are dropped before faces are traced.
+# Points are located in polygons through an STR-packed R-tree of polygon envelopes.
+# 18 October 2026: first version
+# 18 October 2026: incremental rebuild, for GeMS_RebuildMapUnits_Arc10.py. A RebuildState
+#   keeps a hash and envelope of each arc used in the last build; changedArcs compares it
+#   with the current arcs, and rebuildFaces polygonizes only the arcs around the polygons
+#   that changed arcs touch
+# 18 October 2026: RebuildState keeps a hash of the OBJECTIDs, shapes, and attributes of the
+#   polygons (polygonsHash), not only of their OBJECTIDs, as a full rebuild numbers polygons
+#   1..N again and an edit that kept the count went unnoticed
+# 18 October 2026: lines are split where they cross or touch (splitPaths) before faces are
+#   traced. Unsplit, a line that crossed a polygon, or ended on the middle of another line,
+#   left the polygon whole
+
+import math
+import hashlib
+import cPickle as pickle
+from GeMS_Linework import NodeBuilder, DisjointSet
+from GeMS_DataAccess import Geometry, ringArea
+
+defaultNodeCapacity = 10
+
+class STRtree:
+    # Static R-tree, bulk-loaded by Sort-Tile-Recursive: entries are sorted on x into
+    #   vertical slices, each slice is sorted on y and cut into nodes, and the nodes are
+    #   packed the same way until one remains.
+    # items is a list of [xmin, ymin, xmax, ymax, value]. A node is
+    #   [xmin, ymin, xmax, ymax, value or list of child nodes, is an item]
+    def __init__(self, items, nodeCapacity=defaultNodeCapacity):
+        self.nodeCapacity = nodeCapacity
+        level = [[it[0], it[1], it[2], it[3], it[4], True] for it in items]
+        self.size = len(level)
+        while len(level) > 1:
+            level = self.pack(level)
+        if len(level) == 1:
+            self.root = level[0]
+        else:
+            self.root = None
+    def __len__(self):
+        return self.size
+    def pack(self, entries):
+        cap = self.nodeCapacity
+        nNodes = int(math.ceil(len(entries) / float(cap)))
+        sliceSize = int(math.ceil(math.sqrt(nNodes))) * cap
+        entries = sorted(entries, key=lambda e: e[0] + e[2])
+        nodes = []
+        for s in range(0, len(entries), sliceSize):
+            tile = sorted(entries[s:s+sliceSize], key=lambda e: e[1] + e[3])
+            for n in range(0, len(tile), cap):
+                children = tile[n:n+cap]
+                nodes.append([min([c[0] for c in children]), min([c[1] for c in children]),
+                              max([c[2] for c in children]), max([c[3] for c in children]),
+                              children, False])
+        return nodes
+    def search(self, xmin, ymin, xmax, ymax):
+        # yields the values of items whose envelopes intersect [xmin, ymin, xmax, ymax]
+        if self.root == None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if xmax < node[0] or xmin > node[2] or ymax < node[1] or ymin > node[3]:
+                continue
+            if node[5]:
+                yield node[4]
+            else:
+                stack.extend(node[4])
+    def query(self, x, y):
+        # yields the values of items whose envelopes contain (x, y)
+        if self.root == None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if x < node[0] or x > node[2] or y < node[1] or y > node[3]:
+                continue
+            if node[5]:
+                yield node[4]
+            else:
+                stack.extend(node[4])
+
+def pointInRing(x, y, ring):
+    # crossing-number test. ring is a closed list of coordinate tuples
+    inside = False
+    x0, y0 = ring[0][:2]
+    for p in ring[1:]:
+        x1, y1 = p[:2]
+        if (y0 > y) <> (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+        x0, y0 = x1, y1
+    return inside
+
+def pointInRings(x, y, rings):
+    # even-odd test over all rings of a (multipart) polygon
+    inside = False
+    for ring in rings:
+        if pointInRing(x, y, ring):
+            inside = not inside
+    return inside
+
+def envelope(ring):
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+def interiorPoint(rings):
+    # a point inside the polygon with rings (shell first, then holes), as FeatureToPoint
+    #   INSIDE: the middle of the widest span of a horizontal line, halfway between two
+    #   vertex y values near the middle of the shell, that lies inside the polygon
+    ys = sorted(set([p[1] for ring in rings for p in ring]))
+    if len(ys) < 2:
+        return tuple(rings[0][0][:2])
+    middle = (ys[0] + ys[-1]) / 2.0
+    i = 0
+    while i < len(ys) - 2 and ys[i+1] <= middle:
+        i = i + 1
+    y = (ys[i] + ys[i+1]) / 2.0
+    xs = []
+    for ring in rings:
+        x0, y0 = ring[0][:2]
+        for p in ring[1:]:
+            x1, y1 = p[:2]
+            if (y0 > y) <> (y1 > y):
+                xs.append(x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+            x0, y0 = x1, y1
+    xs.sort()
+    best = None
+    for k in range(0, len(xs) - 1, 2):
+        if best == None or xs[k+1] - xs[k] > best[1] - best[0]:
+            best = (xs[k], xs[k+1])
+    if best == None:
+        return tuple(rings[0][0][:2])
+    return ((best[0] + best[1]) / 2.0, y)
+
+def segmentCrossing(p0, p1, q0, q1):
+    # (t, u), the fractions of the way along p0-p1 and q0-q1 at which they cross, or None if
+    #   they are parallel or don't cross between their ends
+    dx = p1[0] - p0[0]
+    dy = p1[1] - p0[1]
+    ex = q1[0] - q0[0]
+    ey = q1[1] - q0[1]
+    den = float(dx*ey - dy*ex)
+    if den == 0:
+        return None
+    fx = q0[0] - p0[0]
+    fy = q0[1] - p0[1]
+    t = (fx*ey - fy*ex) / den
+    u = (fx*dy - fy*dx) / den
+    if 0 < t < 1 and 0 < u < 1:
+        return t, u
+    return None
+
+def nearestOnSegment(x, y, p0, p1):
+    # (t, distance) of the point of segment p0-p1 nearest (x, y), t being the fraction of
+    #   the way from p0 to p1
+    dx = p1[0] - p0[0]
+    dy = p1[1] - p0[1]
+    dd = float(dx*dx + dy*dy)
+    if dd == 0:
+        return 0.0, math.hypot(x - p0[0], y - p0[1])
+    t = min(max(((x - p0[0])*dx + (y - p0[1])*dy) / dd, 0.0), 1.0)
+    return t, math.hypot(x - p0[0] - t*dx, y - p0[1] - t*dy)
+
+def splitPaths(paths, tolerance):
+    # pieces of paths (lists of (x, y)), split where two segments cross and where a vertex
+    #   is within tolerance of another segment, other than the segments next to it on its own
+    #   path. Segments that may meet are found through an STRtree of segment envelopes
+    segments = []
+    for k in range(len(paths)):
+        pts = paths[k]
+        for i in range(len(pts) - 1):
+            (x0, y0), (x1, y1) = pts[i][:2], pts[i+1][:2]
+            segments.append([min(x0, x1) - tolerance, min(y0, y1) - tolerance,
+                             max(x0, x1) + tolerance, max(y0, y1) + tolerance, (k, i)])
+    index = STRtree(segments)
+    cuts = {}   # (path, segment): set of (t, (x, y)). t = 0 cuts at the segment's first vertex
+    def cut(seg, t, xy):
+        k, i = seg
+        p0, p1 = paths[k][i], paths[k][i+1]
+        d = math.hypot(p1[0] - p0[0], p1[1] - p0[1])
+        # a cut within tolerance of a vertex is made at the vertex
+        if t * d <= tolerance:
+            t, xy = 0.0, None
+        elif (1 - t) * d <= tolerance:
+            seg, t, xy = (k, i + 1), 0.0, None
+        cuts.setdefault(seg, set()).add((t, xy))
+    def adjacent(a, b):
+        # segments a and b, a before b, share a vertex of their path
+        if a[0] <> b[0]:
+            return False
+        n = len(paths[a[0]]) - 1
+        closed = tuple(paths[a[0]][0][:2]) == tuple(paths[a[0]][-1][:2])
+        return b[1] == a[1] + 1 or (closed and a[1] == 0 and b[1] == n - 1)
+    for seg in segments:
+        a = seg[4]
+        for b in index.search(seg[0], seg[1], seg[2], seg[3]):
+            if b <= a or adjacent(a, b):
+                continue
+            p0, p1 = paths[a[0]][a[1]], paths[a[0]][a[1]+1]
+            q0, q1 = paths[b[0]][b[1]], paths[b[0]][b[1]+1]
+            crossing = segmentCrossing(p0, p1, q0, q1)
+            if crossing <> None:
+                t, u = crossing
+                xy = (p0[0] + t*(p1[0] - p0[0]), p0[1] + t*(p1[1] - p0[1]))
+                cut(a, t, xy)
+                cut(b, u, xy)
+            for this, other, (e0, e1) in ((a, b, (q0, q1)), (b, a, (p0, p1))):
+                o0, o1 = paths[this[0]][this[1]], paths[this[0]][this[1]+1]
+                for t, end in ((0.0, o0), (1.0, o1)):
+                    u, d = nearestOnSegment(end[0], end[1], e0, e1)
+                    if d <= tolerance:
+                        cut(this, t, end[:2])
+                        cut(other, u, (end[0], end[1]))
+    pieces = []
+    for k in range(len(paths)):
+        pts = paths[k]
+        piece = [tuple(pts[0][:2])]
+        for i in range(len(pts) - 1):
+            for t, xy in sorted(cuts.get((k, i), [])):
+                if t == 0:
+                    if len(piece) > 1:
+                        pieces.append(piece)
+                        piece = [piece[-1]]
+                elif xy <> piece[-1]:
+                    piece.append(xy)
+                    pieces.append(piece)
+                    piece = [xy]
+            piece.append(tuple(pts[i+1][:2]))
+        if len(piece) > 1:
+            pieces.append(piece)
+    return pieces
+
+class Face:
+    # A polygon traced from the linework.
+    #   rings      shell (counterclockwise) then holes (clockwise), closed lists of (x, y)
+    #   area       area of the shell, not less its holes
+    #   labels     [key, MapUnit, row] of each label point inside the face, in label order
+    def __init__(self, shell, area):
+        self.rings = [shell]
+        self.area = area
+        self.labels = []
+    def envelope(self):
+        return envelope(self.rings[0])
+    def contains(self, x, y):
+        if not pointInRing(x, y, self.rings[0]):
+            return False
+        for hole in self.rings[1:]:
+            if pointInRing(x, y, hole):
+                return False
+        return True
+    def geometry(self):
+        return Geometry('polygon', self.rings)
+    def interiorPoint(self):
+        return interiorPoint(self.rings)
+    def mapUnit(self):
+        # as FeatureToPolygon with label features, the face takes one label: here, the first
+        if len(self.labels) == 0:
+            return ''
+        return self.labels[0][1]
+    def row(self):
+        if len(self.labels) == 0:
+            return None
+        return self.labels[0][2]
+
+class Polygonizer:
+    # add lines with addLine, then call faces() for the polygons they bound
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.paths = []
+        self.nodes = NodeBuilder(tolerance)
+        self.lines = []   # [points, from node, to node] of the pieces of paths
+    def addLine(self, pts):
+        # pts is a list of coordinate tuples. Multipart lines are added one part at a time
+        if len(pts) >= 2:
+            self.paths.append(pts)
+    def split(self):
+        # splits the lines where they cross or touch, and snaps the ends of the pieces into nodes
+        for pts in splitPaths(self.paths, self.tolerance):
+            n0 = self.nodes.add(pts[0][0], pts[0][1], 2*len(self.lines))
+            n1 = self.nodes.add(pts[-1][0], pts[-1][1], 2*len(self.lines)+1)
+            self.lines.append([pts, n0, n1])
+        self.paths = []
+    def nodeXY(self, n):
+        node = self.nodes.nodes[n]
+        return (node[0], node[1])
+    def cleanLines(self):
+        # snaps line ends to their nodes and drops repeated vertices. Returns a list of flags,
+        #   False for lines with no length (and closed lines with no area), and for lines that
+        #   repeat another line, as overlapping lines split at each other's ends do
+        alive = []
+        seen = set()
+        for line in self.lines:
+            pts, n0, n1 = line
+            clean = [self.nodeXY(n0)]
+            for p in pts[1:-1]:
+                if p[0] <> clean[-1][0] or p[1] <> clean[-1][1]:
+                    clean.append((p[0], p[1]))
+            end = self.nodeXY(n1)
+            if end <> clean[-1]:
+                clean.append(end)
+            line[0] = clean
+            key = tuple(clean)
+            if key in seen or key[::-1] in seen:
+                alive.append(False)
+            else:
+                seen.add(key)
+                alive.append(len(clean) > 1 and (n0 <> n1 or len(clean) > 3))
+        return alive
+    def halfEdgePoints(self, h):
+        pts = self.lines[h >> 1][0]
+        if h & 1:
+            return pts[::-1]
+        return pts
+    def origin(self, h):
+        return self.lines[h >> 1][1 + (h & 1)]
+    def star(self, alive):
+        # for each half-edge of a live line, the next half-edge around the face on its left
+        leaving = {}   # node: [(angle, half-edge)]
+        for e in range(len(self.lines)):
+            if not alive[e]:
+                continue
+            pts = self.lines[e][0]
+            leaving.setdefault(self.lines[e][1], []).append(
+                (math.atan2(pts[1][1]-pts[0][1], pts[1][0]-pts[0][0]), 2*e))
+            leaving.setdefault(self.lines[e][2], []).append(
+                (math.atan2(pts[-2][1]-pts[-1][1], pts[-2][0]-pts[-1][0]), 2*e+1))
+        nextEdge = {}
+        for node in leaving:
+            ccw = [h for angle, h in sorted(leaving[node])]
+            for i in range(len(ccw)):
+                # twin of h leaves this node as ccw[i]; h continues clockwise of it
+                nextEdge[ccw[i] ^ 1] = ccw[i-1]
+        return nextEdge
+    def cycles(self, alive):
+        nextEdge = self.star(alive)
+        visited = set()
+        cycles = []
+        for h in sorted(nextEdge):
+            if h in visited:
+                continue
+            cycle = []
+            g = h
+            while not g in visited:
+                visited.add(g)
+                cycle.append(g)
+                g = nextEdge[g]
+            cycles.append(cycle)
+        return cycles
+    def ring(self, cycle):
+        ring = []
+        for h in cycle:
+            ring.extend(self.halfEdgePoints(h)[:-1])
+        ring.append(ring[0])
+        return ring
+    def faces(self):
+        # returns list of Faces, largest first
+        self.split()
+        alive = self.cleanLines()
+        # drop lines with the same face on both sides
+        for cycle in self.cycles(alive):
+            lines = [h >> 1 for h in cycle]
+            seen = set()
+            for e in lines:
+                if e in seen:
+                    alive[e] = False
+                seen.add(e)
+        components = DisjointSet()
+        for e in range(len(self.lines)):
+            if alive[e]:
+                components.union(self.lines[e][1], self.lines[e][2])
+        shells = []
+        holes = []
+        for cycle in self.cycles(alive):
+            ring = self.ring(cycle)
+            area = ringArea(ring)
+            component = components.find(self.origin(cycle[0]))
+            if area > 0:
+                shells.append([Face(ring, area), component])
+            elif area < 0:
+                holes.append([ring, component])
+        shells.sort(key=lambda s: -s[0].area)
+        index = STRtree([s[0].envelope() + [s] for s in shells])
+        for ring, component in holes:
+            x, y = ring[0][:2]
+            best = None
+            for shell in index.query(x, y):
+                if shell[1] <> component and (best == None or shell[0].area < best[0].area):
+                    if pointInRing(x, y, shell[0].rings[0]):
+                        best = shell
+            # a hole in no shell is the outside of its part of the linework
+            if best <> None:
+                best[0].rings.append(ring)
+        return [s[0] for s in shells]
+
+def polygonIndex(polygons):
+    # STRtree of polygons, each [rings, value], for findPolygon. Polygons with no rings are skipped
+    items = []
+    for rings, value in polygons:
+        if len(rings) > 0:
+            env = envelope([p for ring in rings for p in ring])
+            items.append(env + [[rings, value]])
+    return STRtree(items)
+
+def findPolygon(index, x, y):
+    # value of the first polygon of index that contains (x, y), or None
+    for rings, value in index.query(x, y):
+        if pointInRings(x, y, rings):
+            return value
+    return None
+
+def faceIndex(faces):
+    # STRtree of faces, for findFace
+    return STRtree([f.envelope() + [f] for f in faces])
+
+def findFace(index, x, y):
+    # the face of index that contains (x, y), or None
+    for face in index.query(x, y):
+        if face.contains(x, y):
+            return face
+    return None
+
+def labelFaces(faces, labels, index=None):
+    # labels is a sequence of [x, y, key, MapUnit, row]. Labels whose MapUnit is None or blank
+    #   are ignored. Appends [key, MapUnit, row] of each label to the labels of the face that
+    #   contains it, and returns the keys of labels that are in no face
+    if index == None:
+        index = faceIndex(faces)
+    outside = []
+    for x, y, key, mapUnit, row in labels:
+        if mapUnit in (None, '', ' '):
+            continue
+        face = findFace(index, x, y)
+        if face == None:
+            outside.append(key)
+        else:
+            face.labels.append([key, mapUnit, row])
+    return outside
+
+def labelErrors(faces):
+    # returns (multi-label faces, keys of their labels, unlabeled faces). A face is
+    #   multi-labeled if its labels name more than one MapUnit
+    badFaces = []
+    badLabels = []
+    blankFaces = []
+    for face in faces:
+        if len(face.labels) == 0:
+            blankFaces.append(face)
+        elif len(set([label[1] for label in face.labels])) > 1:
+            badFaces.append(face)
+            badLabels.extend([label[0] for label in face.labels])
+    return badFaces, badLabels, blankFaces
+
+# Incremental rebuild
+#   Polygons that no changed arc touches keep their rows. Those that are touched (found by
+#   envelope, so a few more than strictly needed) are replaced by the faces that the
+#   current arcs around them make. Because the arcs on the edge of the touched polygons
+#   did not change, those faces fill the same area the touched polygons did, unless the
+#   edits moved the edge of the map; an arc that runs outside the old polygons means the
+#   map has grown, and rebuildFaces then asks for a full rebuild
+
+rebuildStateVersion = 2
+
+def arcHash(wkb):
+    return hashlib.md5(str(wkb)).digest()
+
+def polygonsHash(rows):
+    # hash of rows [OBJECTID, shape WKB, attribute values ...], in any order
+    h = hashlib.md5()
+    for row in sorted(rows, key=lambda row: row[0]):
+        h.update(repr([row[0], str(row[1])] + list(row[2:])))
+    return h.hexdigest()
+
+class RebuildState:
+    # What the last build was made from.
+    #   arcs      {arc OBJECTID: (arcHash, envelope)}, for arcs that were polygonized
+    #   polysHash polygonsHash of the polygons the build left, so that a polygon feature
+    #             class changed by other means is noticed
+    def __init__(self, linesPath, polysPath, arcs, polysHash):
+        self.linesPath = linesPath
+        self.polysPath = polysPath
+        self.arcs = arcs
+        self.polysHash = polysHash
+
+def loadRebuildState(stateFile, linesPath, polysPath):
+    # RebuildState saved in stateFile for these lines and polygons, or None
+    try:
+        f = open(stateFile, 'rb')
+        version, state = pickle.load(f)
+        f.close()
+    except:
+        return None
+    if version <> rebuildStateVersion or state.linesPath <> linesPath or state.polysPath <> polysPath:
+        return None
+    return state
+
+def saveRebuildState(stateFile, state):
+    f = open(stateFile, 'wb')
+    pickle.dump([rebuildStateVersion, state], f, pickle.HIGHEST_PROTOCOL)
+    f.close()
+
+def changedArcs(oldArcs, newArcs):
+    # oldArcs and newArcs are {OBJECTID: (arcHash, envelope)}. Returns a list of [OBJECTID,
+    #   envelope, is current] for arcs added, deleted, or changed: for a changed arc, both
+    #   its old and its new envelope
+    changed = []
+    for oid in newArcs:
+        if not oid in oldArcs:
+            changed.append([oid, newArcs[oid][1], True])
+        elif oldArcs[oid][0] <> newArcs[oid][0]:
+            changed.append([oid, oldArcs[oid][1], False])
+            changed.append([oid, newArcs[oid][1], True])
+    for oid in oldArcs:
+        if not oid in newArcs:
+            changed.append([oid, oldArcs[oid][1], False])
+    return changed
+
+def rebuildFaces(arcs, polygons, changed, tolerance):
+    # arcs is {OBJECTID: [paths, envelope]} of the current arcs, polygons is a list of
+    #   [OBJECTID, rings, row] of the polygons of the last build, and changed is from
+    #   changedArcs. Returns (touched polygons, new faces), or None if the polygons must
+    #   be rebuilt from scratch
+    polyIndex = polygonIndex([[poly[1], poly] for poly in polygons])
+    touched = {}
+    for oid, env, isCurrent in changed:
+        for rings, poly in polyIndex.search(*env):
+            touched[poly[0]] = poly
+    touched = [touched[oid] for oid in sorted(touched)]
+    if len(touched) == 0:
+        return None
+    touchedIndex = polygonIndex([[poly[1], poly] for poly in touched])
+    # a changed arc that runs outside the old polygons has grown the map
+    for oid, env, isCurrent in changed:
+        if isCurrent:
+            for path in arcs[oid][0]:
+                for i in range(len(path) - 1):
+                    x = (path[i][0] + path[i+1][0]) / 2.0
+                    y = (path[i][1] + path[i+1][1]) / 2.0
+                    if findPolygon(touchedIndex, x, y) == None:
+                        return None
+    polygonizer = Polygonizer(tolerance)
+    for oid in sorted(arcs):
+        paths, env = arcs[oid]
+        for hit in touchedIndex.search(*env):
+            for path in paths:
+                polygonizer.addLine(path)
+            break
+    faces = []
+    for face in polygonizer.faces():
+        x, y = face.interiorPoint()
+        if findPolygon(touchedIndex, x, y) <> None:
+            faces.append(face)
+    return touched, faces
@@ -25,9 +25,20 @@ Evan Thoms, USGS, Anchorage.
 Ralph Haugerud
 rhaugerud@usgs.gov
 '''
+# 18 October 2026: points are read and written with da cursors, a whole feature class at a
+#   time, and their section coordinates and orientation attributes are calculated a column at a
+#   time by GeMS_CrossSection.py. No more progress message every 50 rows
+# 18 October 2026: points are selected and located along the section line in memory by
+#   GeMS_CrossSection.SectionLine, in place of Buffer, Clip, LocateFeaturesAlongRoutes,
+#   DeleteIdentical, and MakeRouteEventLayer. Output point feature classes are made directly,
+#   without an intermediate ...a copy of the event layer
+# 18 October 2026: if the DEM is a GeoTIFF or .flt file in the coordinate system of GeologicMap,
+#   Z values of the section line and of points are read from it by GeMS_DEMSampler, in place
+#   of InterpolateShape and AddSurfaceInformation, and 3D Analyst is not checked out
 import arcpy, sys, os.path, math
 from GeMS_Definition import tableDict
 from GeMS_utilityFunctions import *
+from GeMS_CrossSection import *
 
 versionString = 'GeMS_ProjectCrossSectionData_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_ProjectCrossSectionData_Arc10.py'
@@ -72,56 +83,6 @@ def shortName(obj):
 def wsName(obj):
     return os.path.dirname(obj)
 
-def cartesianToGeographic(angle):
-    ctg = -90 - angle
-    if ctg < 0:
-        ctg = ctg+360
-    return ctg
-
-def isAxial(ptType):
-    m = False
-    for s in ('axis','lineation',' L'):
-        if ptType.upper().find(s.upper()) > -1:
-            m = True
-    return m
-
-def obliq(theta1,theta2):
-    obl = abs(theta1-theta2)
-    if obl > 180:
-        obl = obl-180
-    if obl > 90:
-        obl = 180 - obl
-    return obl
-
-def azimuthDifference(a,b):
-    # a, b are two azimuths in clockwise geographic notation
-    # azDiff is in range -180..180
-    # if azDiff < 0, a is counterclockwise of b
-    # if azDiff > 0, a is clockwise of b
-    azDiff = a - b
-    if azDiff > 180:
-        azDiff = azDiff - 360
-    if azDiff < -180:
-        azDiff = azDiff + 360
-    return azDiff
-
-def plotAzimuth(inclinationDirection, thetaXS, apparentInclination):
-    azDiff = azimuthDifference(thetaXS,inclinationDirection)
-    if azDiff >= -90 and azDiff <= 90:
-        return 270 + apparentInclination
-    else:
-        return 270 - apparentInclination
-
-def apparentPlunge(azi,inc,thetaXS):
-    obliquity = obliq(azi,thetaXS)  
-    appInc = math.degrees(math.atan(vertEx * math.tan(math.radians(inc)) * math.cos(math.radians(obliquity))))
-    return appInc,obliquity
-
-def apparentDip(azi,inc,thetaXS):
-    obliquity = obliq(azi,thetaXS) 
-    appInc = math.degrees(math.atan(vertEx * math.tan(math.radians(inc)) * math.sin(math.radians(obliquity))))
-    return appInc,obliquity
-
 def getIdField(fc):
     idField = ''
     fcFields = arcpy.ListFields(fc)
@@ -155,7 +116,16 @@ def locateEventTable(gdb,inFC,pts,dem,sDistance,eventProperties,zType,isLines =
 
     if not desc.hasZ:
         addMsgAndPrint('      adding Z values')
-        arcpy.AddSurfaceInformation_3d (pts, dem, zType, 'LINEAR')
+        if demSampler <> None:
+            arcpy.AddField_management(pts,zType,'DOUBLE')
+            zs = demSampler.values([row[0] for row in arcpy.da.SearchCursor(pts, ['SHAPE@XY'])])
+            with arcpy.da.UpdateCursor(pts, [zType]) as cursor:
+                i = 0
+                for row in cursor:
+                    cursor.updateRow([zs[i]])
+                    i = i + 1
+        else:
+            arcpy.AddSurfaceInformation_3d (pts, dem, zType, 'LINEAR')
 
     ## working around bug in LocateFeaturesAlongRoutes
     # add special field for duplicate detection
@@ -181,6 +151,35 @@ def locateEventTable(gdb,inFC,pts,dem,sDistance,eventProperties,zType,isLines =
     arcpy.DeleteField_management(eventTable,dupDetectField)
     return eventTable
 
+def readSectionLine(ZMline):
+    # SectionLine of the vertices and M values of route ZMline
+    vertices = []
+    measures = []
+    with arcpy.da.SearchCursor(ZMline, ['SHAPE@']) as cursor:
+        for row in cursor:
+            for part in row[0]:
+                for pnt in part:
+                    if pnt:
+                        vertices.append((pnt.X, pnt.Y))
+                        measures.append(pnt.M)
+    return SectionLine(vertices, measures)
+
+def interpolateShape(sampler, inLine, outLine):
+    # as InterpolateShape_3d, with Z values from a DEMSampler
+    sr = arcpy.Describe(inLine).spatialReference
+    arcpy.CreateFeatureclass_management(wsName(outLine),shortName(outLine),'POLYLINE',inLine,'DISABLED','ENABLED',sr)
+    fields = [f.name for f in arcpy.ListFields(inLine) if f.editable and not f.type in ('OID','Geometry','GlobalID')]
+    with arcpy.da.SearchCursor(inLine, ['SHAPE@'] + fields) as inRows:
+        with arcpy.da.InsertCursor(outLine, ['SHAPE@'] + fields) as outRows:
+            for row in inRows:
+                parts = arcpy.Array()
+                for part in row[0]:
+                    pts = sampler.profile([(pnt.X, pnt.Y) for pnt in part if pnt])
+                    if len(pts) > 1:
+                        parts.add(arcpy.Array([arcpy.Point(x, y, z) for x, y, z in pts]))
+                if parts.count > 0:
+                    outRows.insertRow([arcpy.Polyline(parts, sr, True)] + list(row[1:]))
+
 ###############################################################
 addMsgAndPrint('\n  '+versionString)
 
@@ -224,11 +223,15 @@ addMsgAndPrint('  Scratch directory is '+scratch)
 
 arcpy.env.overwriteOutput = True
 
-try:
-    arcpy.CheckOutExtension('3D')
-except:
-    addMsgAndPrint('\nCannot check out 3D-analyst extension.')
-    sys.exit()
+demSampler = openDEM(dem, arcpy.Describe(inFds).spatialReference)
+if demSampler <> None:
+    addMsgAndPrint('  Reading elevations directly from '+demSampler.path)
+else:
+    try:
+        arcpy.CheckOutExtension('3D')
+    except:
+        addMsgAndPrint('\nCannot check out 3D-analyst extension.')
+        sys.exit()
 
 
 ## Checking section line
@@ -284,15 +287,15 @@ else:
     #Add Z values
     addMsgAndPrint('    getting elevation values for ' + shortName(tempXsLine))
     Zline = arcpy.CreateScratchName('xx',outFdsTag+'_Z','FeatureClass',scratch)
-    arcpy.InterpolateShape_3d(dem, tempXsLine, Zline)
+    if demSampler <> None:
+        interpolateShape(demSampler, tempXsLine, Zline)
+    else:
+        arcpy.InterpolateShape_3d(dem, tempXsLine, Zline)
     #Add M values
     addMsgAndPrint('    measuring ' + shortName(Zline))
     ZMline = arcpy.CreateScratchName('xx',outFdsTag+'_ZM','FeatureClass',scratch)
     arcpy.CreateRoutes_lr(Zline, idField, ZMline, 'LENGTH', '#', '#', startQuadrant)
-## buffer line to get selection polygon
-addMsgAndPrint('    buffering '+shortName(tempXsLine)+' to get selection polygon')
-tempBuffer = arcpy.CreateScratchName('xx',outFdsTag+"xsBuffer",'FeatureClass',scratch)
-arcpy.Buffer_analysis(ZMline,tempBuffer,bufferDistance,'FULL','FLAT')
+section = readSectionLine(ZMline)
 
 
 
@@ -386,102 +389,78 @@ for pointClass in pointFCs:
     inFC = shortName(pointClass)
     addMsgAndPrint('    '+inFC)
     arcpy.env.workspace = wsName(pointClass)
-    # clip inputfc with selection polygon to make tempPoints
-    addMsgAndPrint('      clipping with selection polygon')
-    tempPoints = scratch+'/xxx'+outFdsTag+inFC
-    arcpy.Clip_analysis(pointClass,tempBuffer,tempPoints)
-    # check to see if nonZero number of rows and not in excluded feature classes
-    nPts = numberOfRows(tempPoints)
+    # select points within bufferDistance of the section line, and locate them along it
+    addMsgAndPrint('      selecting and locating points within '+str(bufferDistance)+' of section line')
+    desc = arcpy.Describe(pointClass)
+    fields = [f.name for f in arcpy.ListFields(pointClass) if f.editable and not f.type in ('OID','Geometry','GlobalID')]
+    shapeFields = ['OID@','SHAPE@XY']
+    if desc.hasZ:
+        shapeFields.append('SHAPE@Z')
+    rows = []
+    with arcpy.da.SearchCursor(pointClass, shapeFields + fields) as cursor:
+        for row in cursor:
+            rows.append(list(row))
+    located, ms, distances, locAngles = section.locatePoints([row[1] for row in rows], bufferDistance, True)
+    rows = [rows[n] for n in located]
+    nPts = len(rows)
     addMsgAndPrint('      '+str(nPts)+' points within selection polygon')
     if nPts > 0:
-        eventProperties = 'rtID POINT M fmp' 
-        eventTable = locateEventTable(gdb,inFC,tempPoints,dem,bufferDistance+200,eventProperties,'Z')
-        addMsgAndPrint('      placing events on section line')
-        eventLyr = 'xxxPtEvents'
-        arcpy.MakeRouteEventLayer_lr(ZMline,idField,eventTable,eventProperties,
-                                     eventLyr,'#','#','ANGLE_FIELD','TANGENT')
+        if desc.hasZ:
+            zs = [row[2] for row in rows]
+        else:
+            addMsgAndPrint('      adding Z values')
+            zs = surfaceZ([row[1] for row in rows], dem, desc.spatialReference)
         outFC = outFds+'/ed_CS'+outFdsTag+shortName(inFC)
-        outFCa = outFC+'a'
-        addMsgAndPrint('      copying event layer to '+shortName(outFCa))
-        arcpy.CopyFeatures_management(eventLyr,outFCa)   
+        addMsgAndPrint('      creating feature class '+shortName(outFC)+' in '+shortName(outFds))
+        testAndDelete(outFC)
+        arcpy.CreateFeatureclass_management(outFds,shortName(outFC),'POINT',pointClass,'DISABLED','DISABLED')
         addMsgAndPrint('      adding fields')
-        # add DistanceFromSection and LocalXsAzimuth
-        arcpy.AddField_management(outFCa,'DistanceFromSection','FLOAT')
-        arcpy.AddField_management(outFCa,'LocalCSAzimuth','FLOAT')
+        # add M, Z, DistanceFromSection and LocalXsAzimuth
+        newFields = [['M','DOUBLE'],['Z','DOUBLE'],['DistanceFromSection','FLOAT'],['LocalCSAzimuth','FLOAT']]
         # set isOrientationData
         addMsgAndPrint('      checking for Azimuth and Inclination fields')
-        inFieldNames = fieldNameList(inFC)
-        if 'Azimuth' in inFieldNames and 'Inclination' in inFieldNames:
+        if 'Azimuth' in fields and 'Inclination' in fields:
             isOrientationData = True
-            arcpy.AddField_management(outFCa,'ApparentInclination','FLOAT')
-            arcpy.AddField_management(outFCa,'Obliquity','FLOAT')
-            arcpy.AddField_management(outFCa,'MapAzimuth','FLOAT')                           
+            newFields = newFields + [['ApparentInclination','FLOAT'],['Obliquity','FLOAT'],['MapAzimuth','FLOAT']]
         else:
             isOrientationData = False
-        arcpy.CreateFeatureclass_management(outFds,shortName(outFC),'POINT',outFCa)
+        outFields = list(fields)
+        for fName,fType in newFields:
+            if not fName.lower() in [f.lower() for f in fields]:
+                arcpy.AddField_management(outFC,fName,fType)
+                outFields.append(fName)
         addMsgAndPrint('      calculating shapes and attributes')
-        ## open update cursor on outFC
-        cursor = arcpy.UpdateCursor(outFCa)
-        outCursor = arcpy.InsertCursor(outFC)
-        i = 0
-        ii = 0
-        for row in cursor:
-            # keep track of how many rows are processed
-            i = i+1
-            ii = ii+1
-            ####addMsgAndPrint(str(i))
-            if ii == 50:
-                addMsgAndPrint('       row '+str(i))
-                ii = 0
-            #   substitute M,Z for X,Y
-            try:
-                pntObj = arcpy.Point()
-                pntObj.X = row.M
-                if row.Z == None:
-                    pntObj.Y = -999
-                    addMsgAndPrint('OBJECTID = '+str(row.OBJECTID)+' Z missing, assigned value of -999')
-                else:
-                    pntObj.Y = row.Z * vertEx
-                row.Shape = pntObj
-            except:
-                addMsgAndPrint('Failed to make shape: OBJECTID = '+str(row.OBJECTID)+', M = '+str(row.M)+', Z = '+str(row.Z))
-                ## need to do something to flag rows that failed?
-            #   convert from cartesian  to geographic angle
-            ###addMsgAndPrint(str(pntObj.X)+'  '+str(pntObj.Y)+'  '+str(pntObj.Z))
-            csAzi = cartesianToGeographic(row.LOC_ANGLE)
-            row.LocalCSAzimuth = csAzi
-            row.DistanceFromSection = row.Distance
-            if isOrientationData:
-                row.MapAzimuth = row.Azimuth
-                if isAxial(row.Type):
-                    appInc,oblique = apparentPlunge(row.Azimuth,row.Inclination,csAzi)
-                    inclinationDirection = row.Azimuth
-                else:
-                    appInc,oblique = apparentDip(row.Azimuth,row.Inclination,csAzi)
-                    inclinationDirection = row.Azimuth + 90
-                    if inclinationDirection > 360:
-                        inclinationDirection = inclinationDirection - 360
-                plotAzi = plotAzimuth(inclinationDirection,csAzi,appInc)
-                row.Obliquity = round(oblique,2)
-                row.ApparentInclination = round(appInc,2)
-                row.Azimuth = round(plotAzi,2)
-            ## print row data
-            #fields = arcpy.ListFields(outFC)
-            #for field in fields:
-            #    addMsgAndPrint(field.name+' = '+str(row.getValue(field.name)))
-
-            #cursor.updateRow(row)
-            ##  update cursor (line above) doesn't always work, so build a new FC instead:     
-            outCursor.insertRow(row)
-            
-        for fld in 'Distance','LOC_ANGLE','rtID':
-            arcpy.DeleteField_management (outFC,fld)
-        del row
-        del cursor
-        ## clean up
-        if not saveIntermediate:
-          for f in (tempPoints,eventTable,eventLyr,outFCa):
-              testAndDelete(f)
+        # position in output row of each field, by lowercase name
+        fieldIndex = dict([(outFields[i].lower(), i+1) for i in range(len(outFields))])
+        def col(fieldName):
+            i = fieldIndex[fieldName.lower()] + len(shapeFields) - 1
+            return [row[i] for row in rows]
+        #   substitute M,Z for X,Y
+        xs, ys = sectionShapes(ms, zs, vertEx)
+        #   convert from cartesian  to geographic angle
+        csAzis = sectionAzimuths(locAngles)
+        if isOrientationData:
+            azimuths = col('Azimuth')
+            appIncs, obliquities, plotAzis = apparentInclinations(azimuths, col('Inclination'),
+                                                                  [isAxial(t) for t in col('Type')], csAzis, vertEx)
+        ## write outFC
+        with arcpy.da.InsertCursor(outFC, ['SHAPE@XY'] + outFields) as outCursor:
+            for i in xrange(nPts):
+                row = rows[i]
+                if zs[i] == None:
+                    addMsgAndPrint('OBJECTID = '+str(row[0])+' Z missing, assigned value of -999')
+                outRow = [(xs[i], ys[i])] + row[len(shapeFields):] + [None] * (len(outFields) - len(fields))
+                outRow[fieldIndex['m']] = ms[i]
+                outRow[fieldIndex['z']] = zs[i]
+                outRow[fieldIndex['distancefromsection']] = distances[i]
+                outRow[fieldIndex['localcsazimuth']] = valueOrNone(csAzis[i])
+                if isOrientationData:
+                    outRow[fieldIndex['mapazimuth']] = azimuths[i]
+                    outRow[fieldIndex['obliquity']] = valueOrNone(obliquities[i])
+                    outRow[fieldIndex['apparentinclination']] = valueOrNone(appIncs[i])
+                    outRow[fieldIndex['azimuth']] = valueOrNone(plotAzis[i])
+                outCursor.insertRow(outRow)
+    del rows
 
 
 addMsgAndPrint('\n  Projecting polygon feature classes:')
@@ -557,7 +536,7 @@ for polyFC in polyFCs:
 arcpy.CheckInExtension('3D')
 if not saveIntermediate:
   addMsgAndPrint('\n  Deleting intermediate data sets')
-  for fc in tempXsLine,ZMline,Zline,tempBuffer:
+  for fc in tempXsLine,ZMline,Zline:
       testAndDelete(fc)
 
 # make NCGMP09 cross-section feature classes if they are not present in output FDS
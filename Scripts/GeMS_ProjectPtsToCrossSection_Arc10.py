@@ -32,9 +32,25 @@ Attributes of output features are
       PlotAzimuth --assumes right-hand rule, unrotated symbols have
                     North strike/trend, and symbol rotation is geographic
 """
+# 18 October 2026: points are read and written with da cursors, and projected a column at a time
+#   by GeMS_CrossSection.py, which this tool now shares with Project Map Data to Cross Section.
+#   Lineations now plot on the side their trend is within 90 degrees of, as planes do, and
+#   obliquities are no longer negative for some azimuths
+# 18 October 2026: points within MaxDistanceFromSectionPlane of the section line are found in
+#   memory by GeMS_CrossSection.SectionLine, in place of Buffer and Clip, and the section line
+#   endpoints are read from its shape, in place of FeatureVerticesToPoints. No more temporary
+#   feature classes, other than the one surfaceZ uses to get Z values
+# 18 October 2026: Z values are read from GeoTIFF and .flt DEMs by GeMS_DEMSampler. 3D Analyst
+#   is checked out only for other DEMs
+# 18 October 2026: points are read with FeatureClassToNumPyArray and the output feature class is
+#   written with NumPyArrayToFeatureClass, from numpy columns. Null IDs, Types, Azimuths and
+#   Inclinations are read as '', -9999 or NaN; NaN results are written as nulls
 
 import arcpy, sys, os, os.path, math
+import numpy
 from GeMS_utilityFunctions import *
+from GeMS_CrossSection import alongAndAcross, apparentInclinations, isAxial, floatColumn
+from GeMS_CrossSection import SectionLine, linearDistance, openDEM, surfaceZ
 
 versionString = 'GeMS_ProjectPtsToCrossSection_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_ProjectPtsToCrossSection_Arc10.py'
@@ -76,10 +92,7 @@ if sys.argv[10] <> '#':
 else:
     tempWorkspace = outWorkspace
  
-tempBuff =  tempWorkspace+'/xxx1'  # temporary Poly fc created by Buffer
-tempPoints = tempWorkspace+'/xxx2' # temporary Point fc created by Clip
 secLine = 'xxx3'
-secLinePts = tempWorkspace+'/xxx4'
 
 if debug:
     addMsgAndPrint('idField='+str(idField))
@@ -102,46 +115,13 @@ def xyTheta(x,y):
         theta = theta + 360
     return theta
 
-def rThetaXY(r,theta):
-    th = math.radians(theta)
-    x = r*math.cos(th)
-    y = r*math.sin(th)
-    return x,y
-          
-def isAxial(ptType):
-    m = False
-    for s in ('axis','lineation',' L'):
-        if ptType.upper().find(s.upper()) > -1:
-            m = True
-    return m
-
-def obliq(theta1,theta2):
-    obl = abs(theta1-theta2)
-    if obl > 180:
-        obl = obl-180
-    if obl > 90:
-        obl = 180 - obl
-    return obl
-
-def plotAzimuth(azi, thetaXS, apparentInclination):
-    appAzi = 90-azi-thetaXS
-    while appAzi < 0:
-        appAzi = appAzi + 360
-    if appAzi <= 180:
-        plotAzimuth = 270 + apparentInclination
-    else:
-        plotAzimuth = 270 - apparentInclination
-    return plotAzimuth
-
-def apparentPlunge(azi,inc,thetaXS):
-    obliquity = obliq(90-azi,thetaXS)  # 90-azi to convert from geologic to cartesian angle
-    appInc = math.degrees(math.atan(vertEx * math.tan(math.radians(inc)) * math.cos(math.radians(obliquity))))
-    return appInc,obliquity
-
-def apparentDip(azi,inc,thetaXS):
-    obliquity = obliq(90-azi,thetaXS) # 90-azi to convert from geologic to cartesian angle
-    appInc = math.degrees(math.atan(vertEx * math.tan(math.radians(inc)) * math.sin(math.radians(obliquity))))
-    return appInc,obliquity
+def nullValue(fieldType):
+    # value read by FeatureClassToNumPyArray in place of nulls, which numpy arrays can't hold
+    if fieldType in ('Double','Single'):
+        return numpy.nan
+    if fieldType in ('Integer','SmallInteger','OID'):
+        return -9999
+    return ''
 
 def delArcStuff(deleteSet):
     for arcStuff in deleteSet:
@@ -150,134 +130,114 @@ def delArcStuff(deleteSet):
 
 #####################
 
-# check that 3D Analyst license is available
-addMsgAndPrint('  checking for 3D Analyst license')
-try:
-    if arcpy.CheckExtension("3D") == "Available":
-        arcpy.CheckOutExtension("3D")
-    else:
-        addMsgAndPrint('  No 3D Analyst license available!')
+sr = arcpy.Describe(pointClass).spatialReference
+if openDEM(DEM, sr) <> None:
+    addMsgAndPrint('  reading Z values directly from '+DEM)
+else:
+    # check that 3D Analyst license is available
+    addMsgAndPrint('  checking for 3D Analyst license')
+    try:
+        if arcpy.CheckExtension("3D") == "Available":
+            arcpy.CheckOutExtension("3D")
+        else:
+            addMsgAndPrint('  No 3D Analyst license available!')
+            sys.exit()
+    except:
+        addMsgAndPrint('  Failed to check out 3D Analyst license')
         sys.exit()
-except:
-    addMsgAndPrint('  Failed to check out 3D Analyst license')
-    sys.exit()
 
 ## clean up any existing temporary or output entitites
-delArcStuff( (tempBuff,tempPoints,secLinePts,outWorkspace+'/'+outFeatureClass) )
+delArcStuff( (outWorkspace+'/'+outFeatureClass,) )
 
 addMsgAndPrint('  getting cross-section line')
 # make feature layer that contains single line from sectionline featureclass
 whereExpr = '"Label" =\'%s\'' % sectionLineLabelValue
 arcpy.MakeFeatureLayer_management(sectionLineClass,secLine,whereExpr)
 
-# create subset of points within maxDistance of section line
-arcpy.Buffer_analysis (secLine, tempBuff, maxDistance)
-arcpy.Clip_analysis (pointClass, tempBuff, tempPoints)
-
-addMsgAndPrint('  adding Z and XY to points')
-# Add Z to subset of points
-arcpy.AddSurfaceInformation_3d (tempPoints, DEM, 'Z', 'LINEAR')
-# return 3D analyst license
-arcpy.CheckInExtension("3D")
-# Add XY values to subset of points
-arcpy.AddXY_management(tempPoints)
-
-addMsgAndPrint('  getting section line endpoints')
-# Get coordinates of section line endpoints
-### this is probably a r-e-a-l-l-l-ly clumsy way to do so
-arcpy.FeatureVerticesToPoints_management(secLine,secLinePts,'BOTH_ENDS')
-arcpy.AddXY_management(secLinePts)
-pts = []
-rows = arcpy.SearchCursor(secLinePts)
-for row in rows:
-    pts.append([row.POINT_X,row.POINT_Y])
-startX = pts[0][0]
-startY = pts[0][1]
-endX = pts[1][0]
-endY = pts[1][1]
+vertices = []
+with arcpy.da.SearchCursor(secLine, ['SHAPE@']) as cursor:
+    for row in cursor:
+        for part in row[0]:
+            for pnt in part:
+                if pnt:
+                    vertices.append((pnt.X, pnt.Y))
+section = SectionLine(vertices)
+startX, startY = vertices[0]
+endX, endY = vertices[-1]
 
 thetaXS = xyTheta(endX-startX,endY-startY)
 
 addMsgAndPrint('  getting field names')
 fieldNames = []
-fields = arcpy.ListFields(tempPoints)
+fields = arcpy.ListFields(pointClass)
 for field in fields:
     fieldNames.append(field.name)
     ## Note: this may reset the idField as set in the tool interface
-    if field.name == idField:
-        idFieldType = field.type
     if field.name.find('_ID') > 0:
         idField = field.name
-        idFieldType = field.type
 if 'Azimuth' in fieldNames:
     isOrientationData = True
 else:
     isOrientationData = False
 idField2 = idField.replace('_','')
 
+addMsgAndPrint('  reading points')
+fieldTypes = dict([(field.name, field.type) for field in fields])
+ptFields = [idField,'SHAPE@X','SHAPE@Y']
+if isOrientationData:
+    ptFields = ptFields + ['Type','Azimuth','Inclination']
+nulls = {'SHAPE@X':numpy.nan, 'SHAPE@Y':numpy.nan}
+for f in ptFields:
+    if f in fieldTypes:
+        nulls[f] = nullValue(fieldTypes[f])
+allPoints = arcpy.da.FeatureClassToNumPyArray(pointClass, ptFields, null_value=nulls)
+xys = numpy.column_stack((allPoints['SHAPE@X'], allPoints['SHAPE@Y'])).tolist()
+# select points within maxDistance of section line
+try:
+    metersPerUnit = sr.metersPerUnit
+except:
+    metersPerUnit = 1.0
+located = section.locatePoints(xys, linearDistance(maxDistance, metersPerUnit))[0]
+allPoints = allPoints[numpy.array(located, dtype=int)]
+xys = [xys[n] for n in located]
+addMsgAndPrint('  '+str(len(allPoints))+' points within '+maxDistance+' of section line')
+
+addMsgAndPrint('  adding Z to points')
+zs = floatColumn(surfaceZ(xys, DEM, sr))
+# return 3D analyst license
+arcpy.CheckInExtension("3D")
+for pt in allPoints[zs <> zs]:
+    addMsgAndPrint('Skipping '+idField+'='+str(pt[idField])+'. No Z value, probably outside DEM.')
+points = allPoints[zs == zs]
+zs = zs[zs == zs]
+
+addMsgAndPrint('    translating, rotating, collapsing, calculating')
+newXs, distsFromXS = alongAndAcross(points['SHAPE@X'], points['SHAPE@Y'], startX, startY, thetaXS)
+if isOrientationData:
+    # 90-thetaXS to convert from cartesian to geographic angle
+    appIncs, obliquities, plotAzis = apparentInclinations(points['Azimuth'], points['Inclination'],
+                                                          [isAxial(t) for t in points['Type']], (90 - thetaXS) % 360, vertEx)
+
 addMsgAndPrint('  making new feature class')
-# make output feature class
-arcpy.CreateFeatureclass_management(outWorkspace,outFeatureClass,'POINT')
+# new points at newX,newY with attributes ptID (stored in field idField without '_'), distFromXS
+newFields = [('XY','<f8',2), (str(idField2),points[idField].dtype), ('DistanceFromSection','<f4')]
+if isOrientationData:
+    newFields = newFields + [('Obliquity','<f4'), ('ApparentInclination','<f4'), ('PlotAzimuth','<f4')]
+newPoints = numpy.zeros(len(points), numpy.dtype(newFields))
+newPoints['XY'] = numpy.column_stack((newXs, zs * vertEx))
+newPoints[str(idField2)] = points[idField]
+newPoints['DistanceFromSection'] = distsFromXS
+if isOrientationData:
+    newPoints['Obliquity'] = obliquities
+    newPoints['ApparentInclination'] = appIncs
+    newPoints['PlotAzimuth'] = plotAzis
 newFC = outWorkspace+'/'+outFeatureClass
-# add basic fields
+arcpy.da.NumPyArrayToFeatureClass(newPoints, newFC, ['XY'])
 arcpy.AddField_management(newFC,outFeatureClass+'_ID','TEXT','','',50)
-arcpy.AddField_management(newFC,idField2,idFieldType,'','',50)
-arcpy.AddField_management(newFC,'DistanceFromSection','FLOAT')
-# If isOrientationData, add some more fields
-if isOrientationData:
-    arcpy.AddField_management(newFC,'Obliquity','FLOAT')
-    arcpy.AddField_management(newFC,'ApparentInclination','FLOAT')
-    arcpy.AddField_management(newFC,'PlotAzimuth','FLOAT')
 
-### NOW, step through points
-
-addMsgAndPrint('  stepping through points:')
-addMsgAndPrint('    translating, rotating, collapsing, calculating')
-newPoints = arcpy.InsertCursor(newFC)
-points = arcpy.SearchCursor(tempPoints)
-nProjected = 0
-for pt in points:
-    if str(pt.Z) == 'None':
-        addMsgAndPrint('Skipping '+idField+'='+str(pt.getValue(idField))+'. No Z value, probably outside DEM.')
-    else:
-        x = pt.Point_X - startX
-        y = pt.Point_Y - startY
-        r = math.sqrt(x*x + y*y)
-        theta = thetaXS - xyTheta(x,y)
-        newX,distFromXS = rThetaXY(r,theta)
-        newY = pt.Z * vertEx
-        ptID = pt.getValue(idField)
-        if isOrientationData:
-            if isAxial(pt.Type):
-                appInc,oblique = apparentPlunge(pt.Azimuth,pt.Inclination,thetaXS)
-            else: # is planar feature
-                appInc,oblique = apparentDip(pt.Azimuth,pt.Inclination,thetaXS)
-            plotAzi = plotAzimuth(pt.Azimuth,thetaXS,appInc)
-            #print 'Inc',pt.Inclination, 'Obliquity',int(round(oblique), 'ApparentDip',int(round(appInc))
-            #print int(round(thetaXS)), int(pt.Azimuth), int(round(plotAzi))
-            #print
-        # create new point at newX,newY with attributes _ID, ptID (stored in field idField without '_'), distFromXS
-        pnt = arcpy.Point()
-        pnt.X = newX
-        pnt.Y = newY
-        newPoint = newPoints.newRow()
-        newPoint.shape = pnt
-        newPoint.setValue(idField2,ptID)
-        newPoint.DistanceFromSection = distFromXS
-        if isOrientationData:
-            newPoint.Obliquity = round(oblique,2)
-            newPoint.ApparentInclination = round(appInc,2)
-            newPoint.PlotAzimuth = round(plotAzi,2)
-        newPoints.insertRow(newPoint)
-        nProjected = nProjected+1
-
-addMsgAndPrint('  Projected '+str(nProjected)+' points.')
+addMsgAndPrint('  Projected '+str(len(points))+' points.')
                
-delArcStuff( (tempBuff,tempPoints,secLinePts) )
-del newPoint
-del newPoints
-del pt
-del points
+delArcStuff( (secLine,) )
 
 
 
@@ -0,0 +1,214 @@
+# GeMS_ReIDRules.py
+# rules used by GeMS_reID_Arc10.py to make new _ID values. Nothing here imports arcpy
+# 18 October 2026: split out of GeMS_reID_Arc10.py so that the ID logic can be run and
+#   timed without ArcGIS
+# 18 October 2026: IdRemap, a compact map from old to new _ID values, and ReIDCheckpoint,
+#   a log from which an interrupted reID can be resumed
+# 18 October 2026: checkpoint maps record the OBJECTID of each row, as rows with equal sort
+#   keys may come back in a different order when a run is resumed
+# 18 October 2026: newPrimaryKey and remapForeignKeys, the per-row steps of buildIdDict and reID,
+#   so that the benchmark times the same code
+
+import os, os.path, math, uuid, bisect, json
+
+idRootDict = {
+        'CartographicLines':'CAL',
+        'ContactsAndFaults':'CAF',
+        'CMULines':'CMULIN',
+        'CMUMapUnitPolys':'CMUMUP',
+        'CMUPoints':'CMUPNT',
+        'CMUText':'CMUTXT',
+        'DataSources':'DAS',
+        'DataSourcePolys':'DSP',
+        'DescriptionOfMapUnits':'DMU',
+        'ExtendedAttributes':'EXA',
+        'FossilPoints':'FSP',
+        'GenericPoints':'GNP',
+        'GenericSamples':'GNS',
+        'GeochemPoints':'GCM',
+        'GeochronPoints':'GCR',
+        'GeologicEvents':'GEE',
+        'GeologicLines':'GEL',
+        'Glossary':'GLO',
+        'IsoValueLines':'IVL',
+        'MapUnitPoints':'MPT',
+        'MapUnitPolys':'MUP',
+        'MapUnitOverlayPolys':'MUO',
+        'MiscellaneousMapInformation':'MMI',
+        'OrientationPoints':'ORP',
+        'OtherLines':'OTL',
+        'OverlayPolys':'OVP',
+        'PhotoPoints':'PHP',
+        'RepurposedSymbols':'RPS',
+        'Stations':'STA',
+        'StandardLithology':'STL',
+        'MapUnitPointAnno24k':'ANO'
+               }
+
+exemptedPrefixes = ('errors_','ed_')  # prefixes that flag a feature class as not permanent data
+
+def doReID(fc):
+    doReID = True
+    for exPfx in exemptedPrefixes:
+        if fc.find(exPfx) == 0:
+            doReID = False
+    return doReID
+
+def idRoot(tb,rootCounter):
+    if tb in idRootDict:
+        return idRootDict[tb],rootCounter
+    else:
+        rootCounter = rootCounter + 1
+        return 'X'+str(rootCounter)+'X',rootCounter
+
+def idWidth(nrows):
+    # number of digits in new _ID values for a table of nrows rows
+    return int(math.ceil(math.log10(nrows+1)))
+
+def makeNewID(keyRoot,n,width,useGUIDs):
+    # new _ID value for the nth (1, 2, ...) row of a table
+    if useGUIDs:
+        return str(uuid.uuid4())
+    return keyRoot+str(n).zfill(width)
+
+def purgeQuasiNullKeys(idDict):
+    # deletes keys that are empty or all whitespace from idDict, returns list of them
+    purged = [key for key in idDict if len(key.split()) == 0]
+    for key in purged:
+        del idDict[key]
+    return purged
+
+class IdRemap:
+    # old _ID value: new _ID value, for the whole database
+    #   New values of the form keyRoot + zero-padded serial number are held as an integer
+    #   code into a per-table numbering, and only made into strings when looked up, so that
+    #   a database with millions of rows does not need millions of new-ID strings in memory.
+    #   GUIDs, and values read back from a checkpoint, are held as strings
+    def __init__(self):
+        self.ids = {}
+        self.starts = []      # first code of each numbering
+        self.numberings = []  # [keyRoot, width] of each numbering
+        self.nextCode = 0
+        self.base = 0
+    def __len__(self):
+        return len(self.ids)
+    def __contains__(self, old):
+        return old in self.ids
+    def startTable(self, keyRoot, width, nrows):
+        # starts a numbering for a table of nrows rows
+        self.starts.append(self.nextCode)
+        self.numberings.append([keyRoot, width])
+        self.base = self.nextCode
+        self.nextCode = self.nextCode + nrows + 1
+    def addNumbered(self, old, n):
+        # old maps to the nth new ID of the current table's numbering
+        self.ids[old] = self.base + n
+    def add(self, old, new):
+        self.ids[old] = new
+    def get(self, old):
+        v = self.ids.get(old)
+        if isinstance(v, (int, long)):
+            i = bisect.bisect_right(self.starts, v) - 1
+            keyRoot, width = self.numberings[i]
+            return keyRoot+str(v - self.starts[i]).zfill(width)
+        return v
+
+def newPrimaryKey(remap, oldID, n, keyRoot, width, useGUIDs):
+    # returns the new _ID of the nth row of a table, and adds oldID: new _ID to remap
+    newID = makeNewID(keyRoot, n, width, useGUIDs)
+    if oldID <> '' and oldID <> None:
+        if useGUIDs:
+            remap.add(oldID, newID)
+        else:
+            remap.addNumbered(oldID, n)
+    return newID
+
+def remapForeignKeys(remap, row):
+    # replaces the values of row (a list) with their new _IDs. Returns the indexes of values
+    #   that are not in remap, and so are left as they are
+    unmatched = []
+    for i in range(len(row)):
+        if row[i] in remap:
+            row[i] = remap.get(row[i])
+        else:
+            unmatched.append(i)
+    return unmatched
+
+class ReIDCheckpoint:
+    # Append-only log of reID progress, one JSON list per line, so that a run that is
+    #   interrupted can be resumed without re-mapping keys that have already been rewritten
+    #     ['settings', useGUIDs, noSources]
+    #     ['table', table]             starts the map of a table. A table that is re-done after
+    #                                  an interrupted save gets a new map
+    #     ['map', table, oid, old, new]  written for each row of a table, in sort order,
+    #                                  before its new primary keys are saved
+    #     ['saving', pass, table]      written just before the edits to a table are saved
+    #     ['done', pass, table]        written once they have been saved
+    #   pass is 1 (primary keys) or 2 (foreign keys)
+    def __init__(self, path):
+        self.path = path
+        self.done = set()       # (pass, table)
+        self.saving = None      # (pass, table) of edits that may or may not have been saved
+        self.maps = {}          # table: [[oid, old, new], ...] for tables in pass 1
+        self.settings = None
+        self.outfile = None
+        self.goodLength = None  # length of the log up to the end of its last whole line
+    def exists(self):
+        return os.path.exists(self.path)
+    def load(self):
+        maps = {}
+        f = open(self.path, 'rb')
+        self.goodLength = 0
+        for aline in f:
+            try:
+                if not aline.endswith('\n'):
+                    raise ValueError
+                rec = json.loads(aline)
+            except ValueError:  # partly written last line
+                break
+            self.goodLength += len(aline)
+            if rec[0] == 'settings':
+                self.settings = rec[1:]
+            elif rec[0] == 'table':
+                maps[rec[1]] = []
+            elif rec[0] == 'map':
+                maps.setdefault(rec[1], []).append(rec[2:])
+            elif rec[0] == 'saving':
+                self.saving = (rec[1], rec[2])
+            elif rec[0] == 'done':
+                self.done.add((rec[1], rec[2]))
+                self.saving = None
+        f.close()
+        # keep maps only for tables whose edits were, or may have been, saved
+        for table in maps:
+            if (1, table) in self.done or self.saving == (1, table):
+                self.maps[table] = maps[table]
+    def open(self, settings=None):
+        self.outfile = open(self.path, 'ab')
+        if self.goodLength <> None:
+            # drop a partly written last line
+            self.outfile.truncate(self.goodLength)
+        if settings <> None:
+            self.write(['settings'] + list(settings))
+    def write(self, rec):
+        self.outfile.write(json.dumps(rec)+'\n')
+    def flush(self):
+        self.outfile.flush()
+        os.fsync(self.outfile.fileno())
+    def writeMap(self, table, pairs):
+        # pairs is a list of [oid, old, new]
+        self.write(['table', table])
+        for oid, old, new in pairs:
+            self.write(['map', table, oid, old, new])
+        self.flush()
+    def startSave(self, passNo, table):
+        self.write(['saving', passNo, table])
+        self.flush()
+    def endSave(self, passNo, table):
+        self.write(['done', passNo, table])
+        self.flush()
+        self.done.add((passNo, table))
+    def remove(self):
+        if self.outfile <> None:
+            self.outfile.close()
+        os.remove(self.path)
@@ -8,13 +8,29 @@ A simpler version of the GeMS Make Polys tool
    
 Use this tool in ArcMap while editing ContactsAndFaults linework to quickly rebuild the 
 MapUnitPolygons feature class as you change the shape of polygons or want to add new ones.
+
+Incremental mode (optional 5th parameter, "incremental rebuild?") rebuilds only the polygons that
+arcs changed since the last rebuild touch; other polygons, and their attributes, are
+left as they are. A hash of each arc used, and of the polygons left, is saved next to
+the geodatabase in <gdb>_<MapUnitPolys>_rebuild.pkl. With no saved hashes, if
+MapUnitPolys has been changed by other means, or if the edits reach beyond the mapped
+area, the polygons are rebuilt from scratch as usual. A rebuild that is not incremental
+deletes the saved hashes.
 """
+# 18 October 2026: incremental mode, using the polygon builder of GeMS_Polygonizer.py
+# 18 October 2026: the saved state holds a hash of the polygons' shapes and attributes, not
+#   just of their OBJECTIDs, and is deleted by any rebuild that is not incremental, so it
+#   can't describe polygons that were rebuilt since. The backup copy of MapUnitPolys is also
+#   made before an incremental rebuild edits it
+# 18 October 2026: the incremental switch is a parameter of the tool in GeMS_ToolsArc105.tbx
 
 import arcpy
 import os
 import sys
 import re
 from GeMS_utilityFunctions import *
+from GeMS_Polygonizer import *
+from GeMS_DataAccess import geometryFromWkb, geometryToWkb
 
 versionString = 'GeMS_RebuildMapUnits_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_RebuildMapUnits_Arc10.py'
@@ -54,6 +70,120 @@ def pm(msg, severity=0):
 			arcpy.AddError(string) 
 	except: 
 		pass
+
+def readArcs():
+    # unconcealed lines of lineLayer, as {OBJECTID: [paths, envelope]} for rebuildFaces
+    #   and {OBJECTID: (arcHash, envelope)} for RebuildState
+    arcpy.SelectLayerByAttribute_management(lineLayer, "NEW_SELECTION", where)
+    arcs = {}
+    hashes = {}
+    with arcpy.da.SearchCursor(lineLayer, ['OID@', 'SHAPE@WKB']) as cursor:
+        for oid, wkb in cursor:
+            if wkb <> None:
+                paths = [path for path in geometryFromWkb(wkb).paths if len(path) > 1]
+                if len(paths) > 0:
+                    env = envelope([p for path in paths for p in path])
+                    arcs[oid] = [paths, env]
+                    hashes[oid] = (arcHash(wkb), env)
+    arcpy.SelectLayerByAttribute_management(lineLayer, "CLEAR_SELECTION")
+    return arcs, hashes
+
+def polygonFields():
+    # attribute fields of the polygons that are carried to rebuilt polygons
+    return [f.name for f in arcpy.ListFields(newPolys) if f.editable and not f.type in ('OID','Geometry','GlobalID')
+            and not f.name.lower() in ('shape_length','shape_area')]
+
+def polygonRows(mupFields):
+    # [OBJECTID, WKB, attributes] of every polygon
+    return [list(row) for row in arcpy.da.SearchCursor(newPolys, ['OID@', 'SHAPE@WKB'] + mupFields)]
+
+def backupPolys():
+    # copies the polygons to a feature class named for them with the next unused number
+    dsPath = os.path.dirname(newPolys)
+    arcpy.env.workspace = dsPath
+    pfcs = arcpy.ListFeatureClasses(discName + "*", "Polygon")
+    maxN = 0
+    for pfc in pfcs:
+        try:
+            n = int(get_trailing_number(pfc))
+            if n > maxN:
+                maxN = n
+        except:
+            pass
+    oldPolys = newPolys + str(maxN + 1)
+    pm("  saving " + polyLayer + ' to ' + oldPolys)
+   
+    try:
+        oldPolysPath = os.path.join(dsPath, oldPolys)
+        arcpy.Copy_management(newPolys, oldPolysPath, "FeatureClass")
+    except:
+        pm("  arcpy.Copy_management(mup,oldPolys) failed. Maybe you need to close ArcMap?")
+        sys.exit()
+
+def rebuildIncrementally():
+    # rebuilds the polygons touched by arcs changed since the last rebuild. Returns False
+    #   if the polygons must be rebuilt from scratch
+    state = loadRebuildState(stateFile, linesPath, newPolys)
+    if state == None:
+        pm("  no saved state from an earlier rebuild")
+        return False
+    mupFields = polygonFields()
+    rows = polygonRows(mupFields)
+    if state.polysHash <> polygonsHash(rows):
+        pm("  " + discName + " has changed since the last rebuild")
+        return False
+    arcs, hashes = readArcs()
+    changed = changedArcs(state.arcs, hashes)
+    pm("  " + str(len(set([c[0] for c in changed]))) + " arcs changed since the last rebuild")
+    if len(changed) == 0:
+        return True
+
+    mapUnitPos = mupFields.index('MapUnit')
+    polygons = [[row[0], geometryFromWkb(row[1]).paths, row[2:]] for row in rows if row[1] <> None]
+    del rows
+    tolerance = arcpy.Describe(newPolys).spatialReference.XYTolerance
+    result = rebuildFaces(arcs, polygons, changed, tolerance)
+    del polygons
+    if result == None:
+        pm("  edits reach beyond the mapped area")
+        return False
+    touched, faces = result
+
+    # label the new polygons from labelPoints or, as FeatureToPoint would, from the old polygons
+    labels = []
+    if labelPoints in ['#', '', None]:
+        oldIndex = polygonIndex([[poly[1], poly[2]] for poly in touched])
+        for face in faces:
+            x, y = face.interiorPoint()
+            old = findPolygon(oldIndex, x, y)
+            if old <> None:
+                labels.append([x, y, len(labels), old[mapUnitPos], old])
+    else:
+        lpFields = [f.name for f in arcpy.ListFields(labelPoints)]
+        commonFields = [f for f in mupFields if f in lpFields]
+        with arcpy.da.SearchCursor(labelPoints, ['SHAPE@XY'] + commonFields) as cursor:
+            for row in cursor:
+                values = dict(zip(commonFields, row[1:]))
+                lpRow = [values.get(f) for f in mupFields]
+                labels.append([row[0][0], row[0][1], len(labels), lpRow[mapUnitPos], lpRow])
+    labelFaces(faces, labels)
+
+    if saveMUP == 'true':
+        backupPolys()
+    pm("  replacing " + str(len(touched)) + " polygons with " + str(len(faces)))
+    touchedIDs = set([poly[0] for poly in touched])
+    with arcpy.da.UpdateCursor(newPolys, ['OID@']) as cursor:
+        for row in cursor:
+            if row[0] in touchedIDs:
+                cursor.deleteRow()
+    with arcpy.da.InsertCursor(newPolys, ['SHAPE@WKB'] + mupFields) as cursor:
+        for face in faces:
+            row = face.row()
+            if row == None:
+                row = [None] * len(mupFields)
+            cursor.insertRow([bytearray(geometryToWkb(face.geometry()))] + row)
+    saveRebuildState(stateFile, RebuildState(linesPath, newPolys, hashes, polygonsHash(polygonRows(mupFields))))
+    return True
             
 #********************************************************************************************
 #Get the parameters
@@ -61,6 +191,10 @@ lineLayer = arcpy.GetParameterAsText(0)
 polyLayer = arcpy.GetParameterAsText(1)
 labelPoints = arcpy.GetParameterAsText(2)
 saveMUP = arcpy.GetParameterAsText(3)
+incremental = arcpy.GetParameterAsText(4) == 'true'
+
+# select all unconcealed lines
+where = '"IsConcealed"  NOT IN (\'Y\',\'y\')'
 
 #collect the findLyr properties
 lyrProps = findLyr(polyLayer)
@@ -70,6 +204,17 @@ refLyr = lyrProps[2]                            #a layer above or below which th
 insertPos = lyrProps[3]                         #index above or below the reference layer
 newPolys = lyr.dataSource                       #the path to the dataSource of the polygon layer
 discName = os.path.basename(lyr.dataSource)     #the name in the geodatabase of the datasource
+linesPath = arcpy.Describe(lineLayer).catalogPath
+
+# arc hashes for incremental mode are saved to the folder of the geodatabase
+gdbName = os.path.splitext(os.path.basename(lyr.workspacePath))[0]
+stateFile = os.path.join(os.path.dirname(lyr.workspacePath), gdbName + '_' + discName + '_rebuild.pkl')
+if incremental:
+    pm("  rebuilding " + polyLayer + " where arcs have changed")
+    if rebuildIncrementally():
+        arcpy.RefreshActiveView()
+        sys.exit()
+    pm("  rebuilding all of " + polyLayer)
 
 # save a temporary layer file for the polygons to save rendering and other settings
 # including joins to other tables
@@ -111,34 +256,16 @@ arcpy.mapping.RemoveLayer(df, lyr)
 
 #save a copy of the polygons fc or delete
 if saveMUP == 'true':
-    # get new name
-    pfcs = arcpy.ListFeatureClasses(discName + "*", "Polygon")
-    maxN = 0
-    for pfc in pfcs:
-        try:
-            n = int(get_trailing_number(pfc))
-            if n > maxN:
-                maxN = n
-        except:
-            pass
-    oldPolys = lyr.dataSource + str(maxN + 1)
-    pm("  saving " + polyLayer + ' to ' + oldPolys)
-   
-    try:
-        oldPolysPath = os.path.join(dsPath, oldPolys)
-        arcpy.Copy_management(lyr.dataSource, oldPolysPath, "FeatureClass")
-    except:
-        pm("  arcpy.Copy_management(mup,oldPolys) failed. Maybe you need to close ArcMap?")
-        sys.exit()
+    backupPolys()
 
+# saved arc hashes won't describe the rebuilt polygons
+if os.path.exists(stateFile):
+    os.remove(stateFile)
 
 pm("  deleting " + lyr.dataSource)
 arcpy.Delete_management(lyr.dataSource)
 pm("  recreating " + newPolys + " from new linework")
 
-# select all unconcealed lines
-where = '"IsConcealed"  NOT IN (\'Y\',\'y\')'
-
 arcpy.SelectLayerByAttribute_management(lineLayer, "NEW_SELECTION", where)
 arcpy.FeatureToPolygon_management(lineLayer, newPolys, '#', '#', labelPoints)
 arcpy.RefreshCatalog(arcpy.env.workspace)
@@ -148,3 +275,8 @@ arcpy.SelectLayerByAttribute_management(lineLayer, "CLEAR_SELECTION")
 pm("  adding " + lyrPath + " to the map")
 addLyr = arcpy.mapping.Layer(lyrPath)
 arcpy.mapping.InsertLayer(df, refLyr, addLyr, insertPos)
+
+# save arc hashes for the next incremental rebuild
+if incremental:
+    arcs, hashes = readArcs()
+    saveRebuildState(stateFile, RebuildState(linesPath, newPolys, hashes, polygonsHash(polygonRows(polygonFields()))))
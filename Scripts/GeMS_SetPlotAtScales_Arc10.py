@@ -1,8 +1,12 @@
 # sets PlotAtScale values for a feature class
 
 # September 2017: now invokes edit session before setting values (line 135)
+# 18 October 2026: PlotAtScale values are calculated by GeMS_PointThinning.plotAtScales, which
+#   finds closest pairs with a grid index and a heap instead of a PointDistance_analysis near
+#   table (xxxPlotAtScales) and repeated list.remove. Assignments are unchanged
 import arcpy, os.path, sys
 from GeMS_utilityFunctions import *
+from GeMS_PointThinning import *
 
 versionString = 'GeMS_SetPlotAtScales_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_SetPlotAtScales_Arc10.py'
@@ -15,9 +19,6 @@ OPOCDDict = {}
 
 #############################
 
-def plotScale(separation,minSeparationMapUnits):
-    return int(round(separation / minSeparationMapUnits))
-
 def makeDictsOP(inFc):
     fields = ['OBJECTID','Type','LocationConfidenceMeters','OrientationConfidenceDegrees']
     with arcpy.da.SearchCursor(inFc,fields) as cursor:
@@ -82,8 +83,6 @@ if os.path.basename(inFc) == 'OrientationPoints':
 else:
     isOP = False
 
-outTable = gdb+'/xxxPlotAtScales'
-testAndDelete(outTable)
 mapUnits = 'meters'
 minSeparationMapUnits = minSeparation_mm/1000.0
 searchRadius = minSeparationMapUnits * maxPlotAtScale
@@ -93,44 +92,21 @@ if not 'meter' in arcpy.Describe(inFc).spatialReference.linearUnitName.lower():
     searchRadius = searchRadius * 3.2808
     minSeparationMapUnits = minSeparationMapUnits * 3.2808
 addMsgAndPrint('Search radius is '+str(searchRadius)+' '+mapUnits)
-addMsgAndPrint( 'Building near table' )
-arcpy.PointDistance_analysis(inFc,inFc,outTable,searchRadius)
-
-inPoints = []
-outPointDict = {}
 
-# read outTable into Python list inPoints, with each list component = [distance, fid1, fid2]
-fields = ['DISTANCE','INPUT_FID','NEAR_FID']
-with arcpy.da.SearchCursor(outTable,fields) as cursor:
+# read point locations into Python dictionary points, fid: (x, y)
+points = {}
+with arcpy.da.SearchCursor(inFc,['OBJECTID','SHAPE@XY']) as cursor:
     for row in cursor:
-       inPoints.append([row[0],row[1],row[2]])
-addMsgAndPrint('   '+ str(len(inPoints))+' rows in initial near table')
+        if row[1][0] <> None:
+            points[row[0]] = row[1]
+addMsgAndPrint('   '+str(len(points))+' points')
 
-# step through inPoints, smallest distance first, and write list of FID, PlotAtScale (outPoints)
-addMsgAndPrint('   Sorting through near table and calculating PlotAtScale values' )
-inPoints.sort()
-lastLenInPoints = 0
-while len(inPoints) > 1 and lastLenInPoints <> len(inPoints):
-    lastLenInPoints = len(inPoints)
-    pointSep = inPoints[0][0]
-    if isOP:  # figure out the most significant point
-        pt = lessSignificantOP(inPoints[0][1], inPoints[0][2])
-    else:     #take the second point
-        pt = inPoints[0][2]
-    outPointDict[pt] = plotScale(pointSep,minSeparationMapUnits)
-    inPoints.remove(inPoints[0])
-    j = len(inPoints)
-    for i in range(1,j+1):
-        #addMsgAndPrint(str(i)+', '+str(j))
-        aPt = inPoints[j-i]
-        if aPt[1] == pt or aPt[2] == pt:
-            inPoints.remove(aPt)
-            #addMsgAndPrint( 'removing '+str(aPt))
-    addMsgAndPrint('   # inPoints = '+str(len(inPoints)))
-
-for i in range(0,len(inPoints)):
-    addMsgAndPrint('      '+str(inPoints[i]))
-    
+addMsgAndPrint('   Finding closest pairs and calculating PlotAtScale values' )
+if isOP:  # figure out the most significant point
+    outPointDict = plotAtScales(points,searchRadius,minSeparationMapUnits,lessSignificantOP)
+else:     # take the second point
+    outPointDict = plotAtScales(points,searchRadius,minSeparationMapUnits)
+addMsgAndPrint('   '+str(len(outPointDict))+' points assigned PlotAtScale values less than maximum')
 
 # attach plotScale values from outPoints to inFc
 addMsgAndPrint('Updating '+os.path.basename(inFc) )
@@ -138,12 +114,8 @@ with arcpy.da.Editor(gdb) as edit:
     fields = ['OBJECTID','PlotAtScale']
     with arcpy.da.UpdateCursor(inFc,fields) as cursor:
         for row in cursor:
-            if row[0] in outPointDict.keys():
+            if row[0] in outPointDict:
                 row[1] = outPointDict[row[0]]
             else:
                 row[1] = maxPlotAtScale
             cursor.updateRow(row)
-
-# get rid of xxxPlotAtScales
-addMsgAndPrint('Deleting '+outTable)
-testAndDelete(outTable)
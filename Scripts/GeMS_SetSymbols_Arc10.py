@@ -1,58 +1,23 @@
 import arcpy, os.path, sys, math, shutil
 
 from GeMS_utilityFunctions import *
+from GeMS_SymbolRules import *
 
 # September 2017: now invokes arcpy.da.Editor in line 183
 # 5 October 2017: fixed crash when symbolizing CMU feature dataset
+# 18 October 2026: symbol dictionaries and the rules that choose a line or orientation-point
+#   symbol are now in GeMS_SymbolRules.py
 
 versionString = 'GeMS_SetSymbols_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_SetSymbols_Arc10.py'
 checkVersion(versionString, rawurl, 'gems-tools-arcmap')
 
-EightfoldLineDict = {}
-TwofoldOrientPointDict = {}
-MySymbolDict = {}
-
 unrecognizedTypes = []
 
 dictionaryFile = os.path.dirname(sys.argv[0])+'/../Resources/Type-FgdcSymbol.txt'
 
 debug1 = False
 
-def buildSymbolDicts(dFile):
-    df = open(dictionaryFile,'r')
-    for aline in df:
-        if aline[0] <> '#':
-            words = aline.split()
-            if len(words) > 0:
-                aline = aline[:-1]
-                newWords = []
-                words = aline.split('|')
-                for word in words:
-                    newWord = word.lstrip().rstrip()
-                    newWords.append(newWord)
-                if aline == '***Eight-fold Lines***':
-                    aDict = EightfoldLineDict
-                elif aline == '***Two-fold Orientation Points***':
-                    aDict = TwofoldOrientPointDict
-                elif aline == '***My Symbols***':
-                    aDict = MySymbolDict
-                else:
-                    key = newWords[0]
-                    val1 = newWords[1]
-                    if len(newWords) > 2:
-                        val2 = newWords[2]
-                        aDict[key] = [val1,val2]
-                    else:
-                        aDict[key] = val1
-    
-def incrementSymbol(sym,increment):
-    symWords = sym.split('.')
-    lastWord = symWords[len(symWords)-1]
-    newLastWord = str(int(lastWord)+increment).zfill(len(lastWord))
-    newSym = sym[0:0-len(lastWord)]+newLastWord
-    return newSym
-
 def unrecognizedType(t):
     if not t in unrecognizedTypes:
         unrecognizedTypes.append(t)
@@ -69,14 +34,6 @@ def hasCartoRep(fds,fc):
             repDomain = aDomain
     return hasRep, repDomain
 
-def trimLeftZeros(fgdc):
-    words = fgdc.split('.')
-    fgdc1 = ''
-    for word in words:
-        fgdc1 = fgdc1+'.'+str(int(word))
-    fgdc2 = fgdc1[1:]
-    return fgdc2
-
 def buildRepRuleDict(repDomain):
     newDict = {}
     domKeys = list(repDomain.codedValues.keys())
@@ -115,7 +72,7 @@ else:
 approxThreshold = mapScale * certain_Approxmm / 1000.0
 inferredThreshold = mapScale * approx_Inferredmm / 1000.0
 #read dictionaryFile to build symbolDicts
-buildSymbolDicts(dictionaryFile)
+EightfoldLineDict, TwofoldOrientPointDict, MySymbolDict = buildSymbolDicts(dictionaryFile)
 #set featureClasses  (ContactsAndFaults, OrientationPoints, GeologicLines)
 caf = getCaf(inFds)
 if inFds.find('CorrelationOfMapUnits') == -1:
@@ -146,27 +103,11 @@ for fc in caf,gel:
             for row in cursor:
                 rowChanged = False
                 typ = row[0]
-                isCon = row[1]
-                locConfM = row[2]
-                exConf = row[3]
-                idConf = row[4]
                 if debug1:  addMsgAndPrint(typ)
-                if typ in EightfoldLineDict.keys():
-                    if debug1: addMsgAndPrint(typ+' is in EightfoldLineDict')
-                    inc = 0                     
-                    if isQuestionable(exConf) or isQuestionable(idConf):
-                        inc = inc+1
-                    if isCon == 'N':
-                        if useInferred and locConfM > inferredThreshold:
-                            inc = inc+4
-                        elif locConfM > approxThreshold:
-                            inc = inc+2
-                    else: # isCon == 'Y'
-                        inc = inc+6
-                    row[5] = incrementSymbol(EightfoldLineDict[typ],inc)
-                    rowChanged = True
-                elif typ in MySymbolDict.keys():
-                    row[5] = MySymbolDict[typ]
+                sym = lineSymbol(EightfoldLineDict,MySymbolDict,typ,row[1],row[2],row[3],row[4],
+                                 approxThreshold,inferredThreshold,useInferred)
+                if sym <> None:
+                    row[5] = sym
                     rowChanged = True
                 else:
                     unrecognizedType(typ)
@@ -194,20 +135,13 @@ if arcpy.Exists(fc):
         with arcpy.da.UpdateCursor(fc, fields) as cursor:
             for row in cursor:
                 typ = row[0]
-                orConf = row[1]
                 rowChanged = False
-                if typ in TwofoldOrientPointDict.keys():
-                    rowChanged = True
-                    if orConf > orientThresholdDegrees and useApproxOrient:
-                        row[2] = TwofoldOrientPointDict[typ][1]
-                    else:
-                        row[2] = TwofoldOrientPointDict[typ][0]
-                elif typ in MySymbolDict.keys():
-                    #addMsgAndPrint('**'+typ+'**')
+                sym = orientationPointSymbol(TwofoldOrientPointDict,MySymbolDict,typ,row[1],
+                                             orientThresholdDegrees,useApproxOrient)
+                if sym <> None:
                     rowChanged = True
-                    row[2] = MySymbolDict[typ]
+                    row[2] = sym
                 else:
-                    #addMsgAndPrint('++'+typ+'++')
                     unrecognizedType(typ)
                 if rowChanged:
                     if hasRep:
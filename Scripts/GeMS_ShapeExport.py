@@ -0,0 +1,520 @@
+# GeMS_ShapeExport.py
+# field renaming and table export for GeMS_TranslateToShape_Arc10.py
+# 18 October 2026: split out of GeMS_TranslateToShape_Arc10.py. The field mapping for each
+#   table is worked out once, in the main process, as a plan of [input field, output field]
+#   pairs (see fieldPlan). An export job carries its plan, so a job can be run by a worker
+#   process that builds its arcpy.FieldMappings from the plan without listing fields again.
+#   exportJobs runs jobs serially or with a pool of worker processes and returns the
+#   logfile text and messages of each job in job order, so the logfile is the same either way.
+#   arcpy is imported only by exportJob
+# 18 October 2026: tables with long fields are written by a streaming writer that joins rows
+#   into large blocks, in pipe-delimited text (as before), RFC-4180 CSV, or newline-delimited
+#   JSON (see longFieldFormats). Memory use doesn't grow with table size. The stray '|' that
+#   the old writer put at the start of the first row of pipe-delimited text is gone
+# 18 October 2026: JoinPlan describes a shapefile whose attributes come partly from other
+#   tables (DescriptionOfMapUnits, DataSources, Glossary, ...), looked up in dictionaries that
+#   are read once. exportJoined writes such a shapefile in one cursor pass, so the simple
+#   version no longer needs AddJoin, CalculateField, and temporary copies of feature classes
+# 18 October 2026: outFormat 'gpkg' or 'fgb' writes a job to a GeoPackage table (with an R-tree
+#   index) or a FlatGeobuf file (with a packed Hilbert R-tree), streamed from the source cursor
+#   by exportNative. Field names are kept and text is not truncated, so these formats need
+#   neither field renaming nor long-field text files
+# 18 October 2026: spatial references are written as WKT alone, without the domains and
+#   tolerances that arcpy appends to it. Each custom spatial reference gets its own srs_id, and
+#   ESRI codes (100000 and up) are labeled ESRI, not EPSG. GeoPackage geometries are written
+#   in 2D, as their geometry columns declare
+
+import os, os.path, sys, io, json, datetime
+from collections import OrderedDict
+import traceback
+from GeMS_utilityFunctions import *
+
+debug = False
+
+shortFieldNameDict = {
+        'IdentityConfidence':'IdeConf',
+        'MapUnitPolys_ID':'MUPs_ID',
+        'Description':'Descr',
+        'HierarchyKey':'HKey',
+        'ParagraphStyle':'ParaSty',
+        'AreaFillRGB':'RGB',
+        'AreaFillPatternDescription':'PatDes',
+        'GeoMaterial':'GeoMat',
+        'GeoMaterialConfidence':'GeoMatConf',
+        'IsConcealed':'IsCon',
+        'LocationConfidenceMeters':'LocConfM',
+        'ExistenceConfidence':'ExiConf',
+        'ContactsAndFaults_ID':'CAFs_ID',
+        'PlotAtScale':'PlotAtSca'
+        }
+
+# format name: suffix that replaces '.shp' or '.csv' in the name of the long-field file
+longFieldFormats = {
+        'pipe':'.txt',
+        'csv':'_long.csv',
+        'ndjson':'.ndjson'
+        }
+# long-field files are written in blocks of about this many characters
+blockSize = 1048576
+
+# outFormat: what an export job writes
+outputFormats = {
+        'shape':'shapefiles and .csv tables',
+        'gpkg':'one GeoPackage',
+        'fgb':'FlatGeobuf files and .csv tables'
+        }
+# not written to GeoPackages or FlatGeobuf files, which calculate them if they are wanted
+nativeSkipFields = ('shape_length', 'shape_area', 'shape.len', 'shape.area', 'shape.stlength()', 'shape.starea()')
+
+# arcpy field type: shapefile field type for AddField_management
+shapefileFieldTypes = {
+        'String':'TEXT',
+        'Double':'DOUBLE',
+        'Single':'FLOAT',
+        'Integer':'LONG',
+        'SmallInteger':'SHORT',
+        'Date':'DATE',
+        'GUID':'TEXT',
+        'GlobalID':'TEXT'
+        }
+shapefileTextLength = 254
+
+forget = ['objectid', 'shape', 'ruleid', 'ruleid_1', 'override']
+
+joinTablePrefixDict = {
+        'DescriptionOfMapUnits_': 'DMU',
+        'DataSources_':'DS',
+        'Glossary_':'GL'
+        }
+
+def lookup_prefix(f_name):
+    for table in joinTablePrefixDict.keys():
+        if f_name.find(table) == 0:
+            return joinTablePrefixDict[table]
+    else:
+        return ''
+
+def remapFieldName(name):
+    if shortFieldNameDict.has_key(name):
+        return shortFieldNameDict[name]
+    elif len(name) <= 10:
+        return name
+    else:
+        name2 = name.replace('And','')
+        name2 = name2.replace('Of','')
+        name2 = name2.replace('Unit','Un')
+        name2 = name2.replace('Source','Src')
+        name2 = name2.replace('Shape','Shp')
+        name2 = name2.replace('shape','Shp')
+        name2 = name2.replace('SHAPE', 'Shp')
+        name2 = name2.replace('Hierarchy','H')
+        name2 = name2.replace('Description','Descript')
+        name2 = name2.replace('AreaFill','')
+        name2 = name2.replace('Structure','Struct')
+        name2 = name2.replace('STRUCTURE','STRUCT')
+        name2 = name2.replace('user','Usr')
+        name2 = name2.replace('created_','Cre')
+        name2 = name2.replace('edited_','Ed')
+        name2 = name2.replace('date','Dt')
+        name2 = name2.replace('last_','Lst')
+
+        newName = ''
+        for i in range(0,len(name2)):
+            if name2[i] == name2[i].upper():
+                newName = newName + name2[i]
+                j = 1
+            else:
+                j = j+1
+                if j < 4:
+                    newName = newName + name2[i]
+        if len(newName) > 10:
+            if newName[1:3] == newName[1:3].lower():
+                newName = newName[0]+newName[3:]
+        if len(newName) > 10:
+            if newName[3:5] == newName[3:5].lower():
+                newName = newName[0:2]+newName[5:]
+        if len(newName) > 10:
+            #as last resort, just truncate to 10 characters
+            #might be a duplicate, but exporting to shapefile will add numbers to the
+            #duplicates. Those names just won't match what will be recorded in the logfile
+            newName = newName[:10]
+        return newName
+
+def check_unique(mappings):
+    # renames duplicated output names in mappings, a list of [input field, output field]
+    out_names = [m[1] for m in mappings]
+    dup_names = set([x for x in out_names if out_names.count(x) > 1])
+    for dup_name in dup_names:
+        for m in mappings:
+            if m[1] == dup_name:
+                prefix = lookup_prefix(m[0])
+                m[1] = remapFieldName(prefix + dup_name)
+
+def fieldPlan(fields, fc, fcName):
+    # fields is list of [name, type, length] of the fields of fc. Returns
+    #   mappings    list of [input field, output field] for fields that are exported
+    #   longFields  names (without join prefixes) of fields longer than 254 characters
+    #   textFields  fields written to the .txt file of an open-version table with long fields
+    mappings = []
+    longFields = []
+    for name, fType, length in fields:
+        #get the name string and chop off the joined table name if necessary
+        fName = name
+        for prefix in ('DescriptionOfMapUnits', 'DataSources', 'Glossary', fcName):
+            if fc != prefix and fName.find(prefix) == 0 and fName != fcName+'_ID':
+                fName = fName[len(prefix)+1:]
+        if not fName.lower() in forget:
+            mappings.append([name, remapFieldName(fName)])
+        if length > 254:
+            longFields.append(fName)
+    check_unique(mappings)
+    textFields = [f[0] for f in fields if f[1] not in ['Blob', 'Geometry', 'Raster']]
+    return mappings, longFields, textFields
+
+class JoinPlan:
+    # The attributes of a shapefile made from one feature class and lookups in other tables
+    #   columns   column name: [source field, table, value index, field type, field length]
+    #             table is None for a column copied from source field; otherwise the column
+    #             is tables[table][value of source field][value index], or NULL if there is
+    #             no such key
+    #   fields    [column name, field type, field length] in output order, as for fieldPlan
+    #   tables    table: {key: [values]}
+    def __init__(self):
+        self.columns = {}
+        self.fields = []
+        self.tables = {}
+    def addField(self, name, fType, length):
+        self.columns[name] = [name, None, None, fType, length]
+        self.fields.append([name, fType, length])
+    def addLookup(self, name, keyField, table, valueIndex, fType, length):
+        self.columns[name] = [keyField, table, valueIndex, fType, length]
+        self.fields.append([name, fType, length])
+    def addTable(self, table, values):
+        self.tables[table] = values
+
+def makeJob(fcPath, fields, outName, isSpatial, outputDir, isOpen, fcName, longFormat='pipe', joins=None,
+            outFormat='shape'):
+    # returns an exportJob job for table or feature class fcPath. fcPath must be a full path,
+    #   as a worker process does not share arcpy.env.workspace. fcName is the name used to
+    #   strip prefixes from field names. longFormat is a key of longFieldFormats. If joins
+    #   is a JoinPlan, its fields are exported instead of fields. outFormat is a key of
+    #   outputFormats. For 'gpkg', outputDir is the GeoPackage and outName the table name
+    fc = os.path.basename(fcPath)
+    if outFormat <> 'shape':
+        if joins == None:
+            joins = JoinPlan()
+            for name, fType, length in fields:
+                if fType in shapefileFieldTypes and not name.lower() in nativeSkipFields:
+                    joins.addField(name, fType, length)
+        mappings = [[f[0], f[0]] for f in joins.fields]
+        return [fcPath, outName, isSpatial, outputDir, isOpen, mappings, [], [], longFormat, joins, outFormat]
+    if joins <> None:
+        fields = joins.fields
+    mappings, longFields, textFields = fieldPlan(fields, fc, fcName)
+    return [fcPath, outName, isSpatial, outputDir, isOpen, mappings, longFields, textFields, longFormat, joins, outFormat]
+
+def textValue(x):
+    if x == None:
+        return u''
+    return unicode(x)
+
+def csvValue(x):
+    # quoted as RFC 4180 requires
+    x = textValue(x)
+    if x.find(u'"') > -1 or x.find(u',') > -1 or x.find(u'\n') > -1 or x.find(u'\r') > -1:
+        return u'"'+x.replace(u'"',u'""')+u'"'
+    return x
+
+def jsonValue(x):
+    if x == None or isinstance(x, (int, long, float, bool)):
+        return x
+    if isinstance(x, (datetime.datetime, datetime.date, datetime.time)):
+        return x.isoformat()
+    return unicode(x)
+
+def pipeLine(names, row):
+    return u'|'.join([textValue(x) for x in row])+u'\n'
+
+def csvLine(names, row):
+    return u','.join([csvValue(x) for x in row])+u'\r\n'
+
+def ndjsonLine(names, row):
+    return json.dumps(OrderedDict(zip(names, [jsonValue(x) for x in row])), ensure_ascii=False)+u'\n'
+
+def writeRows(outFile, header, lineFunction, names, rows):
+    # writes header, then lineFunction(names, row) for each of rows, to outFile in blocks
+    #   of about blockSize characters
+    block = []
+    size = 0
+    if header <> None:
+        block.append(header)
+    for row in rows:
+        aline = lineFunction(names, row)
+        block.append(aline)
+        size += len(aline)
+        if size >= blockSize:
+            outFile.write(u''.join(block))
+            block = []
+            size = 0
+    if len(block) > 0:
+        outFile.write(u''.join(block))
+
+def writeLongFieldText(fcPath, textFields, outPath, longFormat='pipe'):
+    # writes all rows of fcPath to outPath, in longFormat
+    import arcpy
+    if longFormat == 'csv':
+        header = u','.join([csvValue(f) for f in textFields])+u'\r\n'
+        lineFunction = csvLine
+    elif longFormat == 'ndjson':
+        header = None
+        lineFunction = ndjsonLine
+    else:
+        header = u'|'.join(textFields)+u'\n'
+        lineFunction = pipeLine
+    # newline='' so that line endings are written as given
+    outFile = io.open(outPath, 'w', encoding="utf-8", newline='')
+    try:
+        with arcpy.da.SearchCursor(fcPath, textFields) as cursor:
+            writeRows(outFile, header, lineFunction, [unicode(f) for f in textFields], cursor)
+    finally:
+        outFile.close()
+
+def joinedValue(column, row, positions, tables, maxLength=shapefileTextLength):
+    # value of JoinPlan column for source row. Text longer than maxLength (unless it is None)
+    #   is truncated
+    sourceField, table, valueIndex, fType, length = column
+    value = row[positions[sourceField]]
+    if table <> None:
+        values = tables[table].get(value)
+        if values == None:
+            return None
+        value = values[valueIndex]
+    if fType in ('GUID','GlobalID') and value <> None:
+        value = unicode(value)
+    if maxLength <> None and isinstance(value, basestring) and len(value) > maxLength:
+        value = value[:maxLength]
+    return value
+
+def sourceFields(columns, shapeFields):
+    # returns the fields to read from the source, and their positions
+    fields = list(shapeFields)
+    for column in columns:
+        if not column[0] in fields:
+            fields.append(column[0])
+    return fields, dict(zip(fields, range(len(fields))))
+
+def spatialReference(sr):
+    # [organization, code, name, wkt] of an arcpy SpatialReference, or None if it is unknown.
+    #   organization and code are None for a custom spatial reference
+    if sr == None or sr.name in ('', 'Unknown'):
+        return None
+    # exportToString appends ;XY domain;Z;M;tolerances;IsHighPrecision to the WKT
+    wkt = sr.exportToString().split(';')[0]
+    code = sr.factoryCode
+    if code == None or code <= 0:
+        return [None, None, sr.name, wkt]
+    if code < 100000:
+        return ['EPSG', code, sr.name, wkt]
+    return ['ESRI', code, sr.name, wkt]
+
+def gpkgSpatialRefSys(ws, sr):
+    # srs_id of sr, from spatialReference, in GeoPackage workspace ws. A row is added to
+    #   gpkg_spatial_ref_sys if there is none for sr: numbered by its code if that is free,
+    #   and custom spatial references numbered from 100000, one for each distinct WKT
+    org, code, name, wkt = sr
+    if org <> None:
+        srid = ws.spatialRefSysID(org, code)
+        if srid == None:
+            srid = ws.unusedSpatialRefSysID(code)
+            ws.addSpatialRefSys(srid, name, org, code, wkt)
+    else:
+        srid = ws.spatialRefSysID('NONE', None, wkt)
+        if srid == None:
+            srid = ws.unusedSpatialRefSysID()
+            ws.addSpatialRefSys(srid, name, 'NONE', srid, wkt)
+    return srid
+
+def exportNative(fcPath, outputDir, outName, isSpatial, mappings, joins, outFormat):
+    # writes the columns of JoinPlan joins, with names from mappings, to GeoPackage table
+    #   outName in outputDir (outFormat 'gpkg') or to FlatGeobuf file outName in outputDir
+    #   (outFormat 'fgb'), in one pass through fcPath
+    import arcpy
+    import GeMS_DataAccess
+    columns = [joins.columns[m[0]] for m in mappings]
+    names = [m[1] for m in mappings]
+    shapeFields = []
+    sr = None
+    if isSpatial:
+        dsc = arcpy.Describe(fcPath)
+        shapeFields = ['SHAPE@WKB']
+        sr = spatialReference(dsc.spatialReference)
+    fields, positions = sourceFields(columns, shapeFields)
+    rows = arcpy.da.SearchCursor(fcPath, fields)
+    if outFormat == 'gpkg':
+        fieldDefs = []
+        for column, name in zip(columns, names):
+            fType, length = column[3:5]
+            if fType in ('GUID', 'GlobalID'):
+                fieldDefs.append([name, 'String', 'NullsOK', 38])
+            elif fType == 'String':
+                fieldDefs.append([name, 'String', 'NullsOK', length])
+            else:
+                fieldDefs.append([name, fType, 'NullsOK'])
+        shapeType = None
+        srid = 0
+        if isSpatial:
+            shapeType = dsc.shapeType
+            if sr <> None:
+                srid = gpkgSpatialRefSys(GeMS_DataAccess.sqliteWorkspace(outputDir), sr)
+        outPath = os.path.join(outputDir, outName)
+        GeMS_DataAccess.createTable(outputDir, outName, fieldDefs, shapeType, srid)
+        with GeMS_DataAccess.insertCursor(outPath, shapeFields + names) as outRows:
+            with rows:
+                for row in rows:
+                    shape = []
+                    if isSpatial:
+                        # 2D, as the geometry column is declared (z = 0, m = 0)
+                        shape = [row[0]]
+                        if row[0] <> None:
+                            shape = [bytearray(GeMS_DataAccess.geometryToWkb(GeMS_DataAccess.geometryFromWkb(row[0])))]
+                    outRows.insertRow(shape +
+                                      [joinedValue(column, row, positions, joins.tables, None) for column in columns])
+        if isSpatial:
+            GeMS_DataAccess.createSpatialIndex(outPath)
+    elif outFormat == 'fgb':
+        from GeMS_FlatGeobuf import FlatGeobufWriter
+        crs = sr
+        fgbColumns = [[name, column[3], column[4]] for column, name in zip(columns, names)]
+        with FlatGeobufWriter(os.path.join(outputDir, outName), os.path.splitext(outName)[0],
+                              dsc.shapeType, fgbColumns, crs) as writer:
+            with rows:
+                for row in rows:
+                    geometry = None
+                    if row[0] <> None:
+                        geometry = GeMS_DataAccess.geometryFromWkb(row[0])
+                    writer.insertRow(geometry, [joinedValue(column, row, positions, joins.tables, None) for column in columns])
+
+def exportJoined(fcPath, outputDir, outName, mappings, joins):
+    # writes shapefile outName, with the columns of JoinPlan joins renamed by mappings,
+    #   in one pass through fcPath
+    import arcpy
+    outPath = os.path.join(outputDir, outName)
+    dsc = arcpy.Describe(fcPath)
+    hasZ = 'DISABLED'
+    hasM = 'DISABLED'
+    if dsc.hasZ: hasZ = 'ENABLED'
+    if dsc.hasM: hasM = 'ENABLED'
+    arcpy.CreateFeatureclass_management(outputDir, outName, dsc.shapeType.upper(), '', hasM, hasZ, dsc.spatialReference)
+    columns = []
+    outFields = ['SHAPE@']
+    for inName, outField in mappings:
+        column = joins.columns[inName]
+        fType, length = column[3:5]
+        if not fType in shapefileFieldTypes:
+            continue
+        if shapefileFieldTypes[fType] == 'TEXT':
+            if fType in ('GUID','GlobalID'):
+                length = 38
+            arcpy.AddField_management(outPath, outField, 'TEXT', '', '', min(length, shapefileTextLength))
+        else:
+            arcpy.AddField_management(outPath, outField, shapefileFieldTypes[fType])
+        columns.append(column)
+        outFields.append(outField)
+    # CreateFeatureclass makes a shapefile with field Id, which FeatureClassToFeatureClass does not
+    if not 'Id' in outFields and len(outFields) > 1:
+        arcpy.DeleteField_management(outPath, 'Id')
+    fields, positions = sourceFields(columns, ['SHAPE@'])
+    with arcpy.da.InsertCursor(outPath, outFields) as outRows:
+        with arcpy.da.SearchCursor(fcPath, fields) as rows:
+            for row in rows:
+                outRows.insertRow([row[0]] + [joinedValue(column, row, positions, joins.tables) for column in columns])
+
+def exportJob(job):
+    # exports one table or feature class. Returns [logfile text, messages]. Runs in a
+    #   worker process if exportJobs uses a pool
+    import arcpy
+    arcpy.env.qualifiedFieldNames = False
+    arcpy.env.overwriteOutput = True
+    fcPath, outName, isSpatial, outputDir, isOpen, mappings, longFields, textFields, longFormat, joins, outFormat = job
+    fc = os.path.basename(fcPath)
+    log = []
+    msgs = []
+    dumpString = '  Dumping {}...'.format(outName)
+    if isSpatial: dumpString = '  '+dumpString
+    msgs.append(dumpString)
+    if outFormat <> 'shape':
+        if outFormat == 'gpkg':
+            where = 'GeoPackage table'
+        else:
+            where = 'FlatGeobuf file'
+        if isSpatial:
+            log.append('  feature class {} dumped to {} {}\n'.format(fc, where, outName))
+        else:
+            log.append('  table {} dumped to {} {}\n'.format(fc, where, outName))
+        try:
+            exportNative(fcPath, outputDir, outName, isSpatial, mappings, joins, outFormat)
+        except:
+            msgs.append('failed to translate table '+fc)
+            msgs.append(traceback.format_exc())
+        msgs.append('    Finished dump\n')
+        return [''.join(log), msgs]
+    if isSpatial:
+        log.append('  feature class {} dumped to shapefile {}\n'.format(fc, outName))
+    else:
+        log.append('  table {} dumped to table\n'.format(fc, outName))
+    log.append('    field name remapping: \n')
+    for inName, outField in mappings:
+        log.append('      {} > {}\n'.format(inName, outField))
+
+    if joins <> None:
+        try:
+            exportJoined(fcPath, outputDir, outName, mappings, joins)
+        except:
+            msgs.append('failed to translate table '+fc)
+    else:
+        fieldmappings = arcpy.FieldMappings()
+        for inName, outField in mappings:
+            fieldmap = arcpy.FieldMap()
+            fieldmap.addInputField(fcPath, inName)
+            out_field = fieldmap.outputField
+            out_field.name = outField
+            fieldmap.outputField = out_field
+            fieldmappings.addFieldMap(fieldmap)
+
+        if isSpatial:
+            if debug:  print 'dumping ',fcPath,outputDir,outName
+            try:
+                arcpy.FeatureClassToFeatureClass_conversion(fcPath, outputDir, outName, field_mapping=fieldmappings)
+            except:
+                msgs.append('failed to translate table '+fc)
+        else:
+            arcpy.TableToTable_conversion(fcPath, outputDir, outName, field_mapping=fieldmappings)
+
+    if isOpen:
+        # if any field lengths > 254, write .txt (or .csv or .ndjson) file
+        if len(longFields) > 0:
+            outText = outName[0:-4]+longFieldFormats[longFormat]
+            log.append('    table '+fc+' has long fields, thus dumped to file '+outText+'\n')
+            writeLongFieldText(fcPath, textFields, os.path.join(outputDir, outText), longFormat)
+    msgs.append('    Finished dump\n')
+    return [''.join(log), msgs]
+
+def poolJob(job):
+    # exportJob for a worker process. An exception is returned as messages rather than
+    #   raised, so one bad table does not stop the other exports
+    try:
+        return exportJob(job)
+    except:
+        return ['', ['failed to translate '+job[0], traceback.format_exc()]]
+
+def exportJobs(jobs, workers=1):
+    # runs exportJob for each of jobs and returns a list of [logfile text, messages], in the
+    #   same order as jobs
+    if workers > 1 and len(jobs) > 1:
+        workers = min(workers, len(jobs))
+        addMsgAndPrint('  exporting '+str(len(jobs))+' tables and feature classes with '+str(workers)+' worker processes')
+        return poolMap(poolJob, jobs, workers)
+    results = []
+    for job in jobs:
+        results.append(exportJob(job))
+    return results
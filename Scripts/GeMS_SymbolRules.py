@@ -0,0 +1,88 @@
+# GeMS_SymbolRules.py
+# rules used by GeMS_SetSymbols_Arc10.py to choose FGDC symbols from Type and
+#   confidence values. Nothing here imports arcpy
+# 18 October 2026: split out of GeMS_SetSymbols_Arc10.py so that the rules can be run and
+#   timed without ArcGIS. buildSymbolDicts now reads the file it is given and returns the
+#   dictionaries instead of filling global ones
+
+from GeMS_utilityFunctions import *
+
+def buildSymbolDicts(dFile):
+    # reads a Type-FgdcSymbol.txt style file, returns
+    #   EightfoldLineDict, TwofoldOrientPointDict, MySymbolDict
+    EightfoldLineDict = {}
+    TwofoldOrientPointDict = {}
+    MySymbolDict = {}
+    df = open(dFile,'r')
+    for aline in df:
+        if aline[0] <> '#':
+            words = aline.split()
+            if len(words) > 0:
+                aline = aline[:-1]
+                newWords = []
+                words = aline.split('|')
+                for word in words:
+                    newWord = word.lstrip().rstrip()
+                    newWords.append(newWord)
+                if aline == '***Eight-fold Lines***':
+                    aDict = EightfoldLineDict
+                elif aline == '***Two-fold Orientation Points***':
+                    aDict = TwofoldOrientPointDict
+                elif aline == '***My Symbols***':
+                    aDict = MySymbolDict
+                else:
+                    key = newWords[0]
+                    val1 = newWords[1]
+                    if len(newWords) > 2:
+                        val2 = newWords[2]
+                        aDict[key] = [val1,val2]
+                    else:
+                        aDict[key] = val1
+    df.close()
+    return EightfoldLineDict, TwofoldOrientPointDict, MySymbolDict
+
+def incrementSymbol(sym,increment):
+    symWords = sym.split('.')
+    lastWord = symWords[len(symWords)-1]
+    newLastWord = str(int(lastWord)+increment).zfill(len(lastWord))
+    newSym = sym[0:0-len(lastWord)]+newLastWord
+    return newSym
+
+def trimLeftZeros(fgdc):
+    words = fgdc.split('.')
+    fgdc1 = ''
+    for word in words:
+        fgdc1 = fgdc1+'.'+str(int(word))
+    fgdc2 = fgdc1[1:]
+    return fgdc2
+
+def lineSymbol(EightfoldLineDict,MySymbolDict,typ,isCon,locConfM,exConf,idConf,
+               approxThreshold,inferredThreshold,useInferred):
+    # returns Symbol for a line, or None if typ is not recognized
+    if typ in EightfoldLineDict:
+        inc = 0
+        if isQuestionable(exConf) or isQuestionable(idConf):
+            inc = inc+1
+        if isCon == 'N':
+            if useInferred and locConfM > inferredThreshold:
+                inc = inc+4
+            elif locConfM > approxThreshold:
+                inc = inc+2
+        else: # isCon == 'Y'
+            inc = inc+6
+        return incrementSymbol(EightfoldLineDict[typ],inc)
+    elif typ in MySymbolDict:
+        return MySymbolDict[typ]
+    return None
+
+def orientationPointSymbol(TwofoldOrientPointDict,MySymbolDict,typ,orConf,
+                           orientThresholdDegrees,useApproxOrient):
+    # returns Symbol for an orientation point, or None if typ is not recognized
+    if typ in TwofoldOrientPointDict:
+        if orConf > orientThresholdDegrees and useApproxOrient:
+            return TwofoldOrientPointDict[typ][1]
+        else:
+            return TwofoldOrientPointDict[typ][0]
+    elif typ in MySymbolDict:
+        return MySymbolDict[typ]
+    return None
@@ -43,9 +43,26 @@ Significant assumptions:
 # 2/3/21 - ET
 #   Had to create full path for connectedFIDs.txt in order to write to it
 # 8 March 2021: now imports utilityFunctions before checkVersion - RH
+# 18 October 2026: getNodes now reads arc endpoints directly from the planarized CAF and groups them
+#   with GeMS_Linework.NodeBuilder (a grid hash that also searches neighbouring cells). No more
+#   xxx_EndPoints scratch feature classes, and coincident endpoints are no longer missed when
+#   another point sorts between them on X
+# 18 October 2026: unplanarize groups connectFIDs with GeMS_Linework.DisjointSet instead of relabelling
+#   the whole newLineIDs dictionary each time two groups join
+# 18 October 2026: arc ends are held in a GeMS_Linework.ArcStore (typed array columns, interned Type and
+#   MapUnit values) instead of one CAF_arc object each. processNodes, insertNodes and adjacencyTables
+#   work on integer indexes into the store. adjacencyTables no longer modifies a shared field list
+# 18 October 2026: node rules (processNodes and the functions it uses) moved to GeMS_TopologyRules.py
+# 18 October 2026: unplanarize chains the arcs of each new line with GeMS_LineChainer.py instead of
+#   adding NewLineID to the planarized CAF and dissolving with UNSPLIT_LINES
+# 18 October 2026: arcs are read with SHAPE@, so that unplanarized lines keep their Z and M
 
 import arcpy, os, sys, math, os.path, operator, time
 from GeMS_utilityFunctions import *
+from GeMS_Linework import *
+from GeMS_TopologyRules import *
+from GeMS_LineChainer import LineChainer, createLines, writeLines
+from GeMS_DataAccess import geometryPaths
 
 versionString = 'GeMS_TopologyCheck_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_TopologyCheck_Arc10.py'
@@ -68,114 +85,12 @@ gemsFields = ['Type','IsConcealed','ExistenceConfidence',
                 'IdentityConfidence','LocationConfidenceMeters',
                 'DataSourceID','Label','Symbol']
 
-class CAF_arc:
-    fieldList = ['Type','IsConcealed','ExistenceConfidence',
-                 'IdentityConfidence','LocationConfidenceMeters',
-                 'DataSourceID','Notes','LineDir','ToFrom',
-                 'RIGHT_MapUnit','LEFT_MapUnit','ORIG_FID']
-    def __init__(self,attribs):
-        self.Type = attribs[0]
-        self.IsConc = attribs[1]
-        self.ExConf = attribs[2]
-        self.IdConf = attribs[3]
-        self.LCM = attribs[4]
-        self.DSID = attribs[5]
-        self.Notes = attribs[6]
-        self.LineDir = attribs[7]
-        self.ToFrom = attribs[8]
-        self.RMU = attribs[9]
-        self.LMU = attribs[10]
-        self.OFID = attribs[11]
-    def isConcealed(self):  # returns True if IsConcealed value is 'Y'
-        if self.IsConc.lower() == 'y':
-            return True
-        else:
-            return False
-
-def sameArcAttributes(a,b):  # a and b are CAF_arc
-    if a.Type==b.Type and a.IsConc==b.IsConc and a.ExConf==b.ExConf and a.IdConf==b.IdConf and a.LCM==b.LCM and a.DSID==b.DSID and a.Notes==b.Notes:
-        return True
-    else:
-        return False
-
-def sameTypeIndices(arcs): # arcs is triplet of CAF_arc
-    a=arcs[0]; b=arcs[1]; c=arcs[2]
-    if a.Type==b.Type:
-        same = [0,1]; diff = 2
-        if b.Type==c.Type:
-            same = [0,1,2]; diff = None
-    elif a.Type==c.Type:
-        same = [0,2]; diff = 1
-        if b.Type==c.Type:
-            same = [0,1,2]; diff = None
-    elif b.Type==c.Type:
-        same = [1,2]; diff = 0
-    else:
-        same = [0]; diff = [0,1,2]
-    return same, diff
-
-def sameToFrom(a,b,c=None):
-    if c == None:
-        c = a
-    if a.ToFrom == b.ToFrom == c.ToFrom:
-        return True
-    else:
-        return False
-
-def concealedArcs(arcs):  # arcs is a list of CAF_arc 
-    nConcealed = 0; concealedIndices = []
-    for a in arcs:
-        if a.isConcealed() == True:
-            nConcealed += 1
-            concealedIndices.append(arcs.index(a))
-    return nConcealed, concealedIndices
-
-def adjoiningMapUnits(arcs):
-    # for 3 arcs around a node, returns list ['a','b','c'] of adjoining map units
-    # 'a' is map unit opposite (not adjoining) arcs[0], 'b' is map unit opposite arcs[1], ...
-    mapUnits = []
-    if arcs[1].ToFrom == 'From':
-        mapUnits.append(arcs[1].RMU)
-    else:
-        mapUnits.append(arcs[1].LMU)
-    if arcs[2].ToFrom == 'From':
-        mapUnits.append(arcs[2].RMU)
-    else:
-        mapUnits.append(arcs[2].LMU)
-    if arcs[0].ToFrom == 'From':
-        mapUnits.append(arcs[0].RMU)
-    else:
-        mapUnits.append(arcs[0].LMU)
-    return mapUnits
-        
+# GeMS attributes of a CAF arc, in the order used by ArcStore (Type first, IsConcealed second)
+arcFields = ['Type','IsConcealed','ExistenceConfidence',
+             'IdentityConfidence','LocationConfidenceMeters',
+             'DataSourceID','Notes']
 
-def arcOrder(i):
-    # for 4 arcs around a node, indexed 0--3, returns index of arcOpposite and indices of arcsAdjacent
-    if i == 0:
-        return 2,[1,3]
-    elif i == 1:
-        return 3,[0,2]
-    elif i == 2:
-        return 0,[1,3]
-    elif i == 3:
-        return 1,[0,2]
-
-def ptsGeographicAzimuth(pt1,pt2):
-    dx = pt2[0]-pt1[0]
-    dy = pt2[1]-pt1[1]
-    azi = math.atan2(dy,dx)
-    azi = 90 - math.degrees(azi)
-    if azi < 0:
-        azi = azi + 360
-    return azi
-
-def startEndGeogDirections(lineSeg):
-    firstPoint = [lineSeg[0].X,lineSeg[0].Y]
-    secondPoint = [lineSeg[1].X,lineSeg[1].Y]
-    lpt = len(lineSeg) - 1
-    ntlPoint = [lineSeg[lpt-1].X,lineSeg[lpt-1].Y]
-    lastPoint= [lineSeg[lpt].X,lineSeg[lpt].Y]
-    return ptsGeographicAzimuth(firstPoint,secondPoint), ptsGeographicAzimuth(lastPoint,ntlPoint)
+# arcs, below, are lists of integer indexes into an ArcStore (see GeMS_Linework)
 
 def makeNodeFC(fd, fc):
     addMsgAndPrint('Building feature class '+fc)
@@ -210,154 +125,7 @@ def buildHKeyDict(DMU):
         sortedUnits.append(i[1])
     return hKeyDict, sortedUnits
 
-def youngestMapUnit(mapUnits,hKeyDict):
-    # returns youngest map unit in list mapUnits
-    ymu = mapUnits[0]
-    for mu in mapUnits[1:]:
-        if hKeyDict[mu] < hKeyDict[ymu]:
-            ymu = mu
-    return ymu
-
-def isCoveringUnit(mu,hKeyDict):
-    if mu == None or mu == '':  # stuff outside map, unmapped areas
-        return False
-    elif hKeyDict[mu] < hKeyTestValue:
-        return True
-    else:
-        return False
-
-def processNodes(nodeList,hKeyDict):
-    # nodes is a list of nodes (points at which one or more arcs begins or ends)
-    addMsgAndPrint('Processing nodes')
-    badNodes = []
-    connectFIDs = []  # pairs of OIDs denoting arcs that should be merged
-    missingConcealedArcNodes = []
-    faultFlipNodes = []
-    count1 = 0; count2 = 0; count3 = 0; count4 = 0; count5 = 0
-    for node in nodeList:
-        arcs = node[2]
-        nArcs = len(arcs)
-        ######################
-        if nArcs == 1:
-            count1 += 1
-            if not isFault(arcs[0].Type):  # is a contact
-                if arcs[0].isConcealed():
-                    node.append('dangling concealed contact')
-                    badNodes.append(node)
-                else: # dangling contact
-                    node.append('dangling contact')
-                    badNodes.append(node)
-        ######################
-        elif nArcs == 2:
-            count2 += 1
-            if arcs[0].Type <> arcs[1].Type:
-                node.append('mismatched Type values')
-                badNodes.append(node)
-            if arcs[0].IsConc <> arcs[1].IsConc:
-                node.append('one arc concealed, one not')
-                badNodes.append(node)
-            if sameArcAttributes(arcs[0],arcs[1]):
-                connectFIDs.append([arcs[0].OFID,arcs[1].OFID])
-            if isFault(arcs[0].Type) and isFault(arcs[1].Type) and sameToFrom(arcs[0],arcs[1]):
-                node.append(arcs[0].ToFrom+','+arcs[1].ToFrom)
-                faultFlipNodes.append(node)
-        ######################
-        elif nArcs == 3:
-            count3 += 1
-            nCon,conIndx = concealedArcs(arcs)
-            same,diff = sameTypeIndices(arcs)
-            mapUnits = adjoiningMapUnits(arcs) # map units are ordered by not-adjacent arcs
-            if nCon in (1,2): # 1 or 2 arcs are concealed
-                node.append('impossible number of concealed arcs')
-                badNodes.append(node)
-            elif len(same) < 2: # no two arcs have same type
-                node.append('at least 2 arcs must be same Type')
-                badNodes.append(node)
-            else:  # all arcs or none are concealed, at least two are of same type
-                if nCon == 3:
-                    if mapUnits[0] <> mapUnits[1] or mapUnits[1] <> mapUnits[2]:
-                        node.append('all arcs concealed but bounding map units not all the same')
-                        badNodes.append(node)
-                if len(same) == 2:  # only two arcs have same Type
-                    if isFault(arcs[same[0]].Type):
-                        if sameToFrom(arcs[same[0]],arcs[same[1]]):
-                            faultFlipNodes.append(node)
-                        elif sameArcAttributes(arcs[same[0]],arcs[same[1]]):
-                            connectFIDs.append([arcs[same[0]].OFID,arcs[same[1]].OFID])
-                    else:  # two arcs with same Type are not-faults; their shared adjacent poly should be youngest
-                        if youngestMapUnit(mapUnits,hKeyDict) == mapUnits[diff]:
-                            # if same arc attributes, flag for merge
-                            if sameArcAttributes(arcs[same[0]],arcs[same[1]]):
-                                connectFIDs.append([arcs[same[0]].OFID,arcs[same[1]].OFID])
-                            # test to see if we could add a concealed extension
-                            if isCoveringUnit(youngestMapUnit(mapUnits,hKeyDict),hKeyDict):
-                                missingConcealedArcNodes.append(node)
-                        else:
-                            node.append('# '+str(mapUnits[diff])+' is not youngest unit in '+str(mapUnits))
-                            badNodes.append(node)
-                else:  # all 3 arcs have same Type
-                    if isFault(arcs[same[0]].Type):
-                        if sameToFrom(arcs[0],arcs[1],arcs[2]):
-                            faultFlipNodes.append(node)
-                    else:   # all arcs are not-faults
-                        # find the arcs that bound the youngest map unit
-                        ymu = youngestMapUnit(mapUnits,hKeyDict)
-                        youngArcs = [0,1,2]
-                        youngArcs.remove(mapUnits.index(ymu))
-                        if sameArcAttributes(arcs[youngArcs[0]],arcs[youngArcs[1]]):
-                            connectFIDs.append([arcs[youngArcs[0]].OFID,arcs[youngArcs[1]].OFID])
-                        if isCoveringUnit(ymu,hKeyDict) == True:
-                            missingConcealedArcNodes.append(node)            
-        ######################
-        elif nArcs == 4:
-            nCon,conIndx = concealedArcs(arcs)
-            if nCon <> 0:
-                opp, adj = arcOrder(conIndx[0])
-            if nCon > 2:
-                node.append('too many concealed arcs') 
-                badNodes.append(node)
-            elif nCon == 2:
-                if arcs[conIndx[0]].Type <> arcs[conIndx[1]].Type or arcs[adj[0]].Type <> arcs[adj[1]].Type:
-                    node.append('opposite arcs must have same Type')
-                    badNodes.append(node)
-                elif not arcs[opp].isConcealed(): # thus the 2nd concealed arc must be adjacent
-                    node.append('adjacent arcs concealed')
-                    badNodes.append(node)
-                else:  #  geometry is OK. Test for arcs to be merged
-                    if sameArcAttributes(arcs[adj[0]],arcs[adj[1]]):
-                        connectFIDs.append([arcs[adj[0]].OFID,arcs[adj[1]].OFID])
-                    if isFault(arcs[conIndx[0]].Type) and sameToFrom(arcs[conIndx[0]],arcs[opp]):
-                        faultFlipNodes.append(node)
-                    elif sameArcAttributes(arcs[conIndx[0]],arcs[opp]): # don't merge arcs when one should be flipped
-                        connectFIDs.append([arcs[conIndx[0]].OFID,arcs[opp].OFID])
-            elif nCon == 1:
-                # adjacent arcs must be same-type contacts and opposite arc must be of same type
-                if isFault(arcs[adj[0]].Type):
-                    node.append('arcs adjacent to single concealed arc must not be faults')
-                    badNodes.append(node)
-                elif arcs[opp].Type <> arcs[conIndx[0]].Type:
-                    node.append('concealed arc and unconcealed continuation must be same Type')
-                    badNodes.append(node)
-                else:
-                    if sameArcAttributes(arcs[adj[0]],arcs[adj[1]]):
-                        connectFIDs.append([arcs[adj[0]].OFID,arcs[adj[1]].OFID])                       
-            else:  #nConc = 0
-                node.append('4 unconcealed arcs')
-                badNodes.append(node)
-            count4 += 1
-        ######################
-        else: # 5 or more arcs at this node
-            count5 += 1
-            node.append('too many arcs')
-            badNodes.append(node)
-    addMsgAndPrint('  '+str(count1)+' 1-arc nodes')
-    addMsgAndPrint('  '+str(count2)+' 2-arc nodes')
-    addMsgAndPrint('  '+str(count3)+' 3-arc nodes')
-    addMsgAndPrint('  '+str(count4)+' 4-arc nodes')
-    addMsgAndPrint('  '+str(count5)+' 5+ arc nodes')
-    return badNodes,faultFlipNodes,missingConcealedArcNodes,connectFIDs
-
-def insertNodes(ptFc,nodeList):
+def insertNodes(ptFc,nodeList,arcStore):
     # creates insertcursor in pointFc
     addMsgAndPrint('  inserting points into '+os.path.basename(ptFc))
     fields = ['SHAPE@XY','nArcs','ArcOIDs','ArcTypes','Note']
@@ -367,12 +135,12 @@ def insertNodes(ptFc,nodeList):
         arcoids = ''
         arctypes = ''
         for a in node[2]:
-            arcoids = arcoids+str(a.OFID)+', '
-            if a.isConcealed() == True:
+            arcoids = arcoids+str(arcStore.ofid[a])+', '
+            if arcStore.isConcealed(a) == True:
                 concealed = 'concealed '
             else:
                 concealed = ''
-            arctypes = arctypes+concealed+a.Type+', '
+            arctypes = arctypes+concealed+arcStore.Type(a)+', '
         row = [(node[0],node[1]),narcs,arcoids[:-2],arctypes[:-2],node[3]]
         cursor.insertRow(row)
         
@@ -385,39 +153,35 @@ def insertNodesXY(ptFc,nodeList):
         row = [(node[0],node[1])]
         cursor.insertRow(row)
 
-def getNodes(arcEndPoints):
-    #  sorts arcEndPoints into a Python list of nodes
+def getNodes(cafp):
+    #  reads arcs of planarized CAF, calculates StartAzimuth and EndAzimuth, and
+    #  sorts arc endpoints into a Python list of nodes [x, y, [arc end index, ...]]
+    #  returns nodeList and the ArcStore that the arc end indexes refer to
     addMsgAndPrint('Sorting segment endpoints into nodes')
-    addMsgAndPrint('  '+ str(numberOfRows(arcEndPoints))+' endpoints')                               
-    nodeList = []
-    # open searchCursor on arcEndPoints sorted by POINT_X and POINT_Y
-    sql = (None, 'ORDER BY POINT_X, POINT_Y')
-    fieldNames = ['POINT_X','POINT_Y']
-    fieldNames.extend(CAF_arc.fieldList)
-    lastX = -99999
-    lastY = -99999
-    nodeArcs = []
-    with arcpy.da.SearchCursor(arcEndPoints,fieldNames,None,None,False,sql) as cursor:
+    nodes = NodeBuilder(zeroValue)
+    arcStore = ArcStore()
+    fieldNames = ['SHAPE@','OID@','StartAzimuth','EndAzimuth','RIGHT_MapUnit','LEFT_MapUnit']
+    fieldNames.extend(arcFields)  # Type ... Notes
+    nEndPoints = 0
+    with arcpy.da.UpdateCursor(cafp,fieldNames) as cursor:
         for row in cursor:
-            x = row[0]; y = row[1]; thisArc = CAF_arc(row[2:])
-            if abs(x - lastX) < zeroValue and abs(y - lastY) < zeroValue:
-                nodeArcs.append(thisArc)
-            else:
-                if len(nodeArcs) > 0:
-                    # note that we sort arcs by LineDir, so that they are in clockwise order
-                    nodeArcs.sort(key=operator.attrgetter('LineDir'))
-                    nodeList.append([lastX,lastY,nodeArcs])
-                lastX = x
-                lastY = y
-                nodeArcs = [thisArc]
-        nodeArcs.sort(key=operator.attrgetter('LineDir'))
-        nodeList.append([lastX,lastY,nodeArcs])
+            shape = row[0]
+            row[2],row[3] = startEndGeogDirections(shape.getPart(0))
+            cursor.updateRow(row)
+            attribs = row[6:]
+            startPt = shape.firstPoint; endPt = shape.lastPoint
+            nodes.add(startPt.X, startPt.Y, arcStore.add(attribs,row[2],'From',row[4],row[5],row[1]))
+            nodes.add(endPt.X, endPt.Y, arcStore.add(attribs,row[3],'To',row[4],row[5],row[1]))
+            nEndPoints += 2
+    addMsgAndPrint('  '+str(nEndPoints)+' endpoints')
+    # note that we sort arcs by LineDir, so that they are in clockwise order
+    nodeList = nodes.sortedNodes(arcStore.lineDir.__getitem__)
     addMsgAndPrint('  '+str(len(nodeList))+' nodes')                                    
-    return nodeList
+    return nodeList, arcStore
 
-def planarizeAndGetArcEndPoints(fds,caf,mup,fdsToken):
-    # returns a feature class of endpoints of all caf lines, two per planarized line segment
-    addMsgAndPrint('Planarizing '+os.path.basename(caf)+' and getting segment endpoints')
+def planarize(caf,mup):
+    # returns planarized copy of caf, attributed with adjoining map units
+    addMsgAndPrint('Planarizing '+os.path.basename(caf))
     #   add LineID (so we can recover lines after planarization)
     arcpy.AddField_management(caf,'LineID','LONG')
     arcpy.CalculateField_management(caf,'LineID','!OBJECTID!','PYTHON_9.3')
@@ -441,81 +205,41 @@ def planarizeAndGetArcEndPoints(fds,caf,mup,fdsToken):
                 if hf in fns:
                     deleteFields.append(hf)
     arcpy.DeleteField_management(cafp,deleteFields)   
-    #   calculate azimuths startDir and endDir
-    addMsgAndPrint('  adding StartAzimuth and EndAzimuth')
+    #   add fields for azimuths startDir and endDir, which are calculated by getNodes
     for f in ('LineDir','StartAzimuth','EndAzimuth'):
         arcpy.AddField_management(cafp,f,'FLOAT')
     arcpy.AddField_management(cafp,'ToFrom','TEXT','','',4)                              
-    fields = ['SHAPE@','StartAzimuth','EndAzimuth']
-    with arcpy.da.UpdateCursor(cafp,fields) as cursor:
-        for row in cursor:
-            lineSeg = row[0].getPart(0)
-            row[1],row[2] = startEndGeogDirections(lineSeg)
-            cursor.updateRow(row)
-    #   make endpoint feature class
-    addMsgAndPrint('  converting line ends to points')
-    arcEndPoints = fds+'/'+fdsToken+'xxx_EndPoints'   # will be a feature class in fds
-    arcEndPoints2 = arcEndPoints+'_end'
-    testAndDelete(arcEndPoints)
-    arcpy.FeatureVerticesToPoints_management(cafp,arcEndPoints, 'START')
-    arcpy.CalculateField_management(arcEndPoints,'LineDir','!StartAzimuth!','PYTHON')
-    arcpy.CalculateField_management(arcEndPoints,'ToFrom','"From"','PYTHON')
-    testAndDelete(arcEndPoints2)
-    arcpy.FeatureVerticesToPoints_management(cafp,arcEndPoints2,'END')
-    arcpy.CalculateField_management(arcEndPoints2,'LineDir','!EndAzimuth!','PYTHON')
-    arcpy.CalculateField_management(arcEndPoints2,'ToFrom','"To"','PYTHON')
-    arcpy.Append_management(arcEndPoints2,arcEndPoints)
-    testAndDelete(arcEndPoints2)
-    #  delete some more fields
-    deleteFields = ['EndAzimuth','StartAzimuth','LEFT_MapUnitPolys','RIGHT_MapUnitPolys']
-    arcpy.DeleteField_management(arcEndPoints,deleteFields)      
-    addMsgAndPrint('  adding POINT_X and POINT_Y')
-    arcpy.AddXY_management(arcEndPoints)
     testAndDelete(planCaf)
-    return cafp, arcEndPoints
+    return cafp
 
 def unplanarize(cafp,caf,connectFIDs):
     addMsgAndPrint('Unplanarizing '+os.path.basename(cafp))
-    # add NewLineID to cafp
-    arcpy.AddField_management(cafp,'NewLineID','LONG')
     # go through connectFIDs to set NewLineID values
-    addMsgAndPrint('  building newLineIDs dictionary')
-    newLineIDs = {}
+    addMsgAndPrint('  building newLineIDs disjoint set')
+    newLineIDs = DisjointSet()
     for pair in connectFIDs:
-        f1 = pair[0]; f2 = pair[1]
-        if newLineIDs.has_key(f1):
-            if newLineIDs.has_key(f2):  # both keys in dict, set all values of f2 = f1
-                for i in newLineIDs.keys():
-                    if newLineIDs[i]==f2:
-                        newLineIDs[i] = newLineIDs[f1]
-            else:  # only f1 is in newLineIDs.keys()
-                newLineIDs[f2] = newLineIDs[f1]
-        elif newLineIDs.has_key(f2):  # only f2 in newLineIDs.keys()
-            newLineIDs[f1] = newLineIDs[f2]
-        else: # neither f1 nor f2 in newLineIDs.keys()
-            newLineIDs[f1] = f1
-            newLineIDs[f2] = f1
+        newLineIDs.union(pair[0],pair[1])
     addMsgAndPrint('  '+str(len(newLineIDs))+' entries in newLineIDs')
-    # update cursor on cafp, if newLineIDs.has_key(caf.OFID): NewLineID = newLineIDs(caf.OFID) else NewLineID = caf.OFID
-    addMsgAndPrint('  setting NewLineID values')
-    with arcpy.da.UpdateCursor(cafp, ['OBJECTID','NewLineID']) as cursor:
-        for row in cursor:
-            if newLineIDs.has_key(row[0]):
-                row[1] = newLineIDs[row[0]]
-            else:
-                row[1] = row[0]
-            cursor.updateRow(row)
-    # dissolve cafp on GeMS attribs and NewLineID to get cafu
+    # chain arcs of cafp that have the same GeMS attribs and NewLineID to get cafu
+    #   NewLineID = newLineIDs.find(OBJECTID). Arcs not in any pair are their own set
     cafu = cafp.replace('planarized','unplanarized')
-    addMsgAndPrint('  dissolving to get '+os.path.basename(cafu))
-    testAndDelete(cafu)
-    dissolveFields = gemsFields
+    dissolveFields = list(gemsFields)
     if 'Notes' in fieldNameList(cafp):
         dissolveFields.append('Notes')
-    dissolveFields.append('NewLineID')
-    arcpy.Dissolve_management(cafp,cafu,dissolveFields,'','','UNSPLIT_LINES')
-    # delete NewLineID from caf_unplanarized. maybe add _ID field??
-    arcpy.DeleteField_management(cafu,'NewLineID')
+    addMsgAndPrint('  chaining arcs')
+    chainer = LineChainer(zeroValue)
+    with arcpy.da.SearchCursor(cafp, ['OID@','SHAPE@'] + dissolveFields) as cursor:
+        for row in cursor:
+            if row[1] <> None:
+                if row[0] in newLineIDs:
+                    newLineID = newLineIDs.find(row[0])
+                else:
+                    newLineID = row[0]
+                chainer.add((newLineID,) + tuple(row[2:]), row[0], geometryPaths(row[1]), row[2:])
+    addMsgAndPrint('  writing '+os.path.basename(cafu))
+    testAndDelete(cafu)
+    createLines(cafu, cafp, dissolveFields)
+    writeLines(cafu, dissolveFields, chainer.lines())
     addMsgAndPrint(str(numberOfRows(caf))+' arcs in '+os.path.basename(caf))
     addMsgAndPrint(str(numberOfRows(cafp))+' arcs in '+os.path.basename(cafp))
     addMsgAndPrint(str(numberOfRows(cafu))+' arcs in '+os.path.basename(cafu))
@@ -524,7 +248,7 @@ def unplanarize(cafp,caf,connectFIDs):
     outTxt = open(txtPath,'w')
     connectFIDs.sort()
     for aline in connectFIDs:
-        outTxt.write(str(aline)+'  '+str(newLineIDs[aline[0]])+' '+str(newLineIDs[aline[1]])+'\n')
+        outTxt.write(str(aline)+'  '+str(newLineIDs.find(aline[0]))+' '+str(newLineIDs.find(aline[1]))+'\n')
     outTxt.close()
    
     return cafu
@@ -603,28 +327,28 @@ def adjacencyTables(cafp,sortedUnits,outHtml):
     contactLinesDict = {}
     internalContacts = []
     badConcealed = []
-    fields = CAF_arc.fieldList
-    fields.remove('ORIG_FID')
-    fields.extend(['OBJECTID','Shape_Length'])
+    arcStore = ArcStore()
+    fields = arcFields+['LineDir','ToFrom','RIGHT_MapUnit','LEFT_MapUnit','OBJECTID','Shape_Length']
     with arcpy.da.SearchCursor(cafp, fields) as cursor:
         for row in cursor:
-            thisArc = CAF_arc(row[:-1]); alength = row[12]
+            a = arcStore.add(row[:7],row[7],row[8],row[9],row[10],row[11]); alength = row[12]
+            lmu = arcStore.LMU(a); rmu = arcStore.RMU(a)
             try:
-                lr = thisArc.LMU+'|'+thisArc.RMU
+                lr = lmu+'|'+rmu
             except:
                 addMsgAndPrint(str(row))
                 lr = '--|--'
-            if thisArc.isConcealed():  # IsConcealed = Y
-                addRowToDict(lr,thisArc,alength,concealedLinesDict)
-                if thisArc.LMU <> thisArc.RMU:
-                    badConcealed.append([thisArc,alength])
-            elif isFault(thisArc.Type):  # it's a fault
-                addRowToDict(lr,thisArc,alength,faultLinesDict)
+            if arcStore.isConcealed(a):  # IsConcealed = Y
+                addRowToDict(lr,a,alength,concealedLinesDict)
+                if lmu <> rmu:
+                    badConcealed.append([arcStore.view(a),alength])
+            elif isFault(arcStore.Type(a)):  # it's a fault
+                addRowToDict(lr,a,alength,faultLinesDict)
             else:
-                if isContact(thisArc.Type):
-                    addRowToDict(lr,thisArc,alength,contactLinesDict)
-                if thisArc.LMU == thisArc.RMU:
-                    internalContacts.append([thisArc,alength])
+                if isContact(arcStore.Type(a)):
+                    addRowToDict(lr,a,alength,contactLinesDict)
+                if lmu == rmu:
+                    internalContacts.append([arcStore.view(a),alength])
     return badConcealed,internalContacts,concealedLinesDict,contactLinesDict,faultLinesDict
     
 def translateNone(s):
@@ -793,21 +517,20 @@ for infc in (inCaf,inMup):
 topoStuff = esriTopology(outFds,caf,mup)
 
 ### NODES
-planarizedCAF, arcEndPoints = planarizeAndGetArcEndPoints(outFds,caf,mup,fdsToken)
+planarizedCAF = planarize(caf,mup)
 
-# sort arcEndPoints into list of nodes
-nodeList = getNodes(arcEndPoints)
+# sort arc endpoints into list of nodes
+nodeList, arcStore = getNodes(planarizedCAF)
 # assign nodes to various groups
-badNodes,faultFlipNodes,missingConcealedArcNodes,connectFIDs = processNodes(nodeList,hKeyDict)
+badNodes,faultFlipNodes,missingConcealedArcNodes,connectFIDs = processNodes(nodeList,hKeyDict,arcStore,hKeyTestValue)
 addMsgAndPrint('Bad nodes: '+str(len(badNodes)))
 addMsgAndPrint('Fault-flip nodes: '+str(len(faultFlipNodes)))
 addMsgAndPrint('Missing concealed-arc nodes: '+str(len(missingConcealedArcNodes)))
 addMsgAndPrint('ConnectFIDs: '+str(len(connectFIDs)))
-testAndDelete(arcEndPoints)
 
 ### MAKE OUTPUT FEATURE CLASSES
 badNodesFC = makeNodeFC(outFds,'errors_'+fdsToken+'_BadNodes')
-insertNodes(badNodesFC,badNodes)
+insertNodes(badNodesFC,badNodes,arcStore)
 
 missingConcealedFC = makeNodeFCXY(outFds,fdsToken+'MissingConcealedCAF_nodes')
 insertNodesXY(missingConcealedFC,missingConcealedArcNodes)
@@ -0,0 +1,235 @@
+# GeMS_TopologyRules.py
+# node rules of GeMS_TopologyCheck_Arc10.py: given arc ends grouped into nodes (see
+#   GeMS_Linework.NodeBuilder) and held in a GeMS_Linework.ArcStore, classify each node
+#   as OK, bad, a fault-flip node, or a node missing a concealed continuation, and
+#   list the pairs of arcs that should be merged. Nothing here imports arcpy
+# 18 October 2026: split out of GeMS_TopologyCheck_Arc10.py so that the rules can be run and
+#   timed without ArcGIS. hKeyTestValue is now an argument to isCoveringUnit and processNodes
+#   rather than a global variable in the tool script
+
+import math
+from GeMS_utilityFunctions import *
+
+def sameArcAttributes(store,a,b):  # a and b are arc indexes
+    return store.sameAttributes(a,b)
+
+def sameTypeIndices(store,arcs): # arcs is triplet of arc indexes
+    a=store.type[arcs[0]]; b=store.type[arcs[1]]; c=store.type[arcs[2]]
+    if a==b:
+        same = [0,1]; diff = 2
+        if b==c:
+            same = [0,1,2]; diff = None
+    elif a==c:
+        same = [0,2]; diff = 1
+        if b==c:
+            same = [0,1,2]; diff = None
+    elif b==c:
+        same = [1,2]; diff = 0
+    else:
+        same = [0]; diff = [0,1,2]
+    return same, diff
+
+def sameToFrom(store,a,b,c=None):
+    if c == None:
+        c = a
+    if store.toFrom[a] == store.toFrom[b] == store.toFrom[c]:
+        return True
+    else:
+        return False
+
+def concealedArcs(store,arcs):  # arcs is a list of arc indexes
+    nConcealed = 0; concealedIndices = []
+    for n in range(len(arcs)):
+        if store.isConcealed(arcs[n]):
+            nConcealed += 1
+            concealedIndices.append(n)
+    return nConcealed, concealedIndices
+
+def adjoiningMapUnits(store,arcs):
+    # for 3 arcs around a node, returns list ['a','b','c'] of adjoining map units
+    # 'a' is map unit opposite (not adjoining) arcs[0], 'b' is map unit opposite arcs[1], ...
+    mapUnits = []
+    for a in (arcs[1],arcs[2],arcs[0]):
+        if store.ToFrom(a) == 'From':
+            mapUnits.append(store.RMU(a))
+        else:
+            mapUnits.append(store.LMU(a))
+    return mapUnits
+        
+
+def arcOrder(i):
+    # for 4 arcs around a node, indexed 0--3, returns index of arcOpposite and indices of arcsAdjacent
+    if i == 0:
+        return 2,[1,3]
+    elif i == 1:
+        return 3,[0,2]
+    elif i == 2:
+        return 0,[1,3]
+    elif i == 3:
+        return 1,[0,2]
+
+def ptsGeographicAzimuth(pt1,pt2):
+    dx = pt2[0]-pt1[0]
+    dy = pt2[1]-pt1[1]
+    azi = math.atan2(dy,dx)
+    azi = 90 - math.degrees(azi)
+    if azi < 0:
+        azi = azi + 360
+    return azi
+
+def startEndGeogDirections(lineSeg):
+    firstPoint = [lineSeg[0].X,lineSeg[0].Y]
+    secondPoint = [lineSeg[1].X,lineSeg[1].Y]
+    lpt = len(lineSeg) - 1
+    ntlPoint = [lineSeg[lpt-1].X,lineSeg[lpt-1].Y]
+    lastPoint= [lineSeg[lpt].X,lineSeg[lpt].Y]
+    return ptsGeographicAzimuth(firstPoint,secondPoint), ptsGeographicAzimuth(lastPoint,ntlPoint)
+
+def youngestMapUnit(mapUnits,hKeyDict):
+    # returns youngest map unit in list mapUnits
+    ymu = mapUnits[0]
+    for mu in mapUnits[1:]:
+        if hKeyDict[mu] < hKeyDict[ymu]:
+            ymu = mu
+    return ymu
+
+def isCoveringUnit(mu,hKeyDict,hKeyTestValue):
+    if mu == None or mu == '':  # stuff outside map, unmapped areas
+        return False
+    elif hKeyDict[mu] < hKeyTestValue:
+        return True
+    else:
+        return False
+
+def processNodes(nodeList,hKeyDict,arcStore,hKeyTestValue):
+    # nodes is a list of nodes (points at which one or more arcs begins or ends)
+    # node[2] is a list of indexes into arcStore
+    addMsgAndPrint('Processing nodes')
+    badNodes = []
+    connectFIDs = []  # pairs of OIDs denoting arcs that should be merged
+    missingConcealedArcNodes = []
+    faultFlipNodes = []
+    count1 = 0; count2 = 0; count3 = 0; count4 = 0; count5 = 0
+    s = arcStore
+    for node in nodeList:
+        arcs = node[2]
+        nArcs = len(arcs)
+        ######################
+        if nArcs == 1:
+            count1 += 1
+            if not isFault(s.Type(arcs[0])):  # is a contact
+                if s.isConcealed(arcs[0]):
+                    node.append('dangling concealed contact')
+                    badNodes.append(node)
+                else: # dangling contact
+                    node.append('dangling contact')
+                    badNodes.append(node)
+        ######################
+        elif nArcs == 2:
+            count2 += 1
+            if s.type[arcs[0]] <> s.type[arcs[1]]:
+                node.append('mismatched Type values')
+                badNodes.append(node)
+            if s.IsConc(arcs[0]) <> s.IsConc(arcs[1]):
+                node.append('one arc concealed, one not')
+                badNodes.append(node)
+            if sameArcAttributes(s,arcs[0],arcs[1]):
+                connectFIDs.append([s.ofid[arcs[0]],s.ofid[arcs[1]]])
+            if isFault(s.Type(arcs[0])) and isFault(s.Type(arcs[1])) and sameToFrom(s,arcs[0],arcs[1]):
+                node.append(s.ToFrom(arcs[0])+','+s.ToFrom(arcs[1]))
+                faultFlipNodes.append(node)
+        ######################
+        elif nArcs == 3:
+            count3 += 1
+            nCon,conIndx = concealedArcs(s,arcs)
+            same,diff = sameTypeIndices(s,arcs)
+            mapUnits = adjoiningMapUnits(s,arcs) # map units are ordered by not-adjacent arcs
+            if nCon in (1,2): # 1 or 2 arcs are concealed
+                node.append('impossible number of concealed arcs')
+                badNodes.append(node)
+            elif len(same) < 2: # no two arcs have same type
+                node.append('at least 2 arcs must be same Type')
+                badNodes.append(node)
+            else:  # all arcs or none are concealed, at least two are of same type
+                if nCon == 3:
+                    if mapUnits[0] <> mapUnits[1] or mapUnits[1] <> mapUnits[2]:
+                        node.append('all arcs concealed but bounding map units not all the same')
+                        badNodes.append(node)
+                if len(same) == 2:  # only two arcs have same Type
+                    if isFault(s.Type(arcs[same[0]])):
+                        if sameToFrom(s,arcs[same[0]],arcs[same[1]]):
+                            faultFlipNodes.append(node)
+                        elif sameArcAttributes(s,arcs[same[0]],arcs[same[1]]):
+                            connectFIDs.append([s.ofid[arcs[same[0]]],s.ofid[arcs[same[1]]]])
+                    else:  # two arcs with same Type are not-faults; their shared adjacent poly should be youngest
+                        if youngestMapUnit(mapUnits,hKeyDict) == mapUnits[diff]:
+                            # if same arc attributes, flag for merge
+                            if sameArcAttributes(s,arcs[same[0]],arcs[same[1]]):
+                                connectFIDs.append([s.ofid[arcs[same[0]]],s.ofid[arcs[same[1]]]])
+                            # test to see if we could add a concealed extension
+                            if isCoveringUnit(youngestMapUnit(mapUnits,hKeyDict),hKeyDict,hKeyTestValue):
+                                missingConcealedArcNodes.append(node)
+                        else:
+                            node.append('# '+str(mapUnits[diff])+' is not youngest unit in '+str(mapUnits))
+                            badNodes.append(node)
+                else:  # all 3 arcs have same Type
+                    if isFault(s.Type(arcs[same[0]])):
+                        if sameToFrom(s,arcs[0],arcs[1],arcs[2]):
+                            faultFlipNodes.append(node)
+                    else:   # all arcs are not-faults
+                        # find the arcs that bound the youngest map unit
+                        ymu = youngestMapUnit(mapUnits,hKeyDict)
+                        youngArcs = [0,1,2]
+                        youngArcs.remove(mapUnits.index(ymu))
+                        if sameArcAttributes(s,arcs[youngArcs[0]],arcs[youngArcs[1]]):
+                            connectFIDs.append([s.ofid[arcs[youngArcs[0]]],s.ofid[arcs[youngArcs[1]]]])
+                        if isCoveringUnit(ymu,hKeyDict,hKeyTestValue) == True:
+                            missingConcealedArcNodes.append(node)            
+        ######################
+        elif nArcs == 4:
+            nCon,conIndx = concealedArcs(s,arcs)
+            if nCon <> 0:
+                opp, adj = arcOrder(conIndx[0])
+            if nCon > 2:
+                node.append('too many concealed arcs') 
+                badNodes.append(node)
+            elif nCon == 2:
+                if s.type[arcs[conIndx[0]]] <> s.type[arcs[conIndx[1]]] or s.type[arcs[adj[0]]] <> s.type[arcs[adj[1]]]:
+                    node.append('opposite arcs must have same Type')
+                    badNodes.append(node)
+                elif not s.isConcealed(arcs[opp]): # thus the 2nd concealed arc must be adjacent
+                    node.append('adjacent arcs concealed')
+                    badNodes.append(node)
+                else:  #  geometry is OK. Test for arcs to be merged
+                    if sameArcAttributes(s,arcs[adj[0]],arcs[adj[1]]):
+                        connectFIDs.append([s.ofid[arcs[adj[0]]],s.ofid[arcs[adj[1]]]])
+                    if isFault(s.Type(arcs[conIndx[0]])) and sameToFrom(s,arcs[conIndx[0]],arcs[opp]):
+                        faultFlipNodes.append(node)
+                    elif sameArcAttributes(s,arcs[conIndx[0]],arcs[opp]): # don't merge arcs when one should be flipped
+                        connectFIDs.append([s.ofid[arcs[conIndx[0]]],s.ofid[arcs[opp]]])
+            elif nCon == 1:
+                # adjacent arcs must be same-type contacts and opposite arc must be of same type
+                if isFault(s.Type(arcs[adj[0]])):
+                    node.append('arcs adjacent to single concealed arc must not be faults')
+                    badNodes.append(node)
+                elif s.type[arcs[opp]] <> s.type[arcs[conIndx[0]]]:
+                    node.append('concealed arc and unconcealed continuation must be same Type')
+                    badNodes.append(node)
+                else:
+                    if sameArcAttributes(s,arcs[adj[0]],arcs[adj[1]]):
+                        connectFIDs.append([s.ofid[arcs[adj[0]]],s.ofid[arcs[adj[1]]]])                       
+            else:  #nConc = 0
+                node.append('4 unconcealed arcs')
+                badNodes.append(node)
+            count4 += 1
+        ######################
+        else: # 5 or more arcs at this node
+            count5 += 1
+            node.append('too many arcs')
+            badNodes.append(node)
+    addMsgAndPrint('  '+str(count1)+' 1-arc nodes')
+    addMsgAndPrint('  '+str(count2)+' 2-arc nodes')
+    addMsgAndPrint('  '+str(count3)+' 3-arc nodes')
+    addMsgAndPrint('  '+str(count4)+' 4-arc nodes')
+    addMsgAndPrint('  '+str(count5)+' 5+ arc nodes')
+    return badNodes,faultFlipNodes,missingConcealedArcNodes,connectFIDs
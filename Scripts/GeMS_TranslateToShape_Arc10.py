@@ -20,12 +20,33 @@
 #   unicode characters to text files. Changes made in def dumpTable so that output csv is created with unicode
 #   encoding and all strings written to it are encoded as unicode. Ran ok with demo data including degree symbol,
 #   plus/minus symbol, and smart (curly) quotes.
+# 18 October 2026: field renaming and exporting moved to GeMS_ShapeExport.py. dumpTable now plans
+#   the field mapping of a table once and queues an export job; writeDumps runs the queued jobs
+#   and writes the logfile in queue order. Optional command-line argument --workers N exports
+#   with N worker processes (N = 0 uses one worker per CPU). Main is now guarded by
+#   if __name__ == '__main__' so that worker processes can import this script
+# 18 October 2026: optional command-line argument --longformat pipe|csv|ndjson sets the format of
+#   the files written for open-version tables with fields longer than 254 characters. Default
+#   is pipe-delimited .txt, as before
+# 18 October 2026: the simple version no longer joins tables with AddJoin and CalculateField into
+#   temporary copies (MUP2, xxContactsAndFaults2, ...). DescriptionOfMapUnits, DataSources, and
+#   Glossary are read once into dictionaries by loadTable, and each shapefile is written from
+#   its feature class in one cursor pass (see JoinPlan and exportJoined in GeMS_ShapeExport.py)
+# 18 October 2026: optional command-line argument --format shape|gpkg|fgb sets the format of the
+#   open version. gpkg writes every feature class and table, with unchanged field names and
+#   untruncated text, to one GeoPackage <geodatabase (no extension)>.gpkg, exported serially
+#   as a GeoPackage has one writer at a time. fgb writes feature classes to FlatGeobuf files
+#   and tables to .csv files. Default is shape, as before
+# 18 October 2026: the number of worker processes is also the optional third argument, the
+#   toolbox's "Number of worker processes" parameter, and is read by workerCount in
+#   GeMS_utilityFunctions.py
 
 import arcpy
 import sys, os, glob, time
 import datetime
 import glob
 from GeMS_utilityFunctions import *
+from GeMS_ShapeExport import *
 from numbers import Number
 import io
 
@@ -33,8 +54,6 @@ versionString = 'GeMS_TranslateToShape_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_TranslateToShape_Arc10.py'
 checkVersion(versionString, rawurl, 'gems-tools-arcmap')
 
-debug = False
-
 # equivalentFraction is used to rank ProportionTerms from most 
 #  abundant to least
 equivalentFraction =   {'all':1.0,
@@ -51,7 +70,7 @@ equivalentFraction =   {'all':1.0,
 
 def usage():
 	addMsgAndPrint( """
-USAGE: GeMS_TranslateToShp_Arc10.5.py  <geodatabase> <outputWorkspace>
+USAGE: GeMS_TranslateToShp_Arc10.5.py  <geodatabase> <outputWorkspace> [<workers>]
 
   where <geodatabase> must be an existing ArcGIS geodatabase.
   <geodatabase> may be a personal or file geodatabase, and the 
@@ -59,184 +78,49 @@ USAGE: GeMS_TranslateToShp_Arc10.5.py  <geodatabase> <outputWorkspace>
   Output is written to directories <geodatabase (no extension)>-simple
   and <geodatabase (no extension)>-open in <outputWorkspace>. Output 
   directories, if they already exist, will be overwritten.
-""")
-
-shortFieldNameDict = {
-        'IdentityConfidence':'IdeConf',
-        'MapUnitPolys_ID':'MUPs_ID',
-        'Description':'Descr',
-        'HierarchyKey':'HKey',
-        'ParagraphStyle':'ParaSty',
-        'AreaFillRGB':'RGB',
-        'AreaFillPatternDescription':'PatDes',
-        'GeoMaterial':'GeoMat',
-        'GeoMaterialConfidence':'GeoMatConf',
-        'IsConcealed':'IsCon',
-        'LocationConfidenceMeters':'LocConfM',
-        'ExistenceConfidence':'ExiConf',
-        'ContactsAndFaults_ID':'CAFs_ID',
-        'PlotAtScale':'PlotAtSca'
-        }
-        
-forget = ['objectid', 'shape', 'ruleid', 'ruleid_1', 'override']
-        
-joinTablePrefixDict = {
-        'DescriptionOfMapUnits_': 'DMU',
-        'DataSources_':'DS',
-        'Glossary_':'GL'
-        }
-
-def lookup_prefix(f_name):
-    for table in joinTablePrefixDict.keys():
-        if f_name.find(table) == 0:
-            return joinTablePrefixDict[table]
-    else:
-        return ''
-        
-def remapFieldName(name):
-    if shortFieldNameDict.has_key(name):
-        return shortFieldNameDict[name]
-    elif len(name) <= 10:
-        return name
-    else:
-        name2 = name.replace('And','')
-        name2 = name2.replace('Of','')
-        name2 = name2.replace('Unit','Un')
-        name2 = name2.replace('Source','Src')
-        name2 = name2.replace('Shape','Shp')
-        name2 = name2.replace('shape','Shp')
-        name2 = name2.replace('SHAPE', 'Shp')
-        name2 = name2.replace('Hierarchy','H')
-        name2 = name2.replace('Description','Descript')
-        name2 = name2.replace('AreaFill','')
-        name2 = name2.replace('Structure','Struct')
-        name2 = name2.replace('STRUCTURE','STRUCT')
-        name2 = name2.replace('user','Usr')
-        name2 = name2.replace('created_','Cre')
-        name2 = name2.replace('edited_','Ed')
-        name2 = name2.replace('date','Dt')
-        name2 = name2.replace('last_','Lst')
 
-        newName = ''
-        for i in range(0,len(name2)):
-            if name2[i] == name2[i].upper():
-                newName = newName + name2[i]
-                j = 1
-            else:
-                j = j+1
-                if j < 4:
-                    newName = newName + name2[i]
-        if len(newName) > 10:
-            if newName[1:3] == newName[1:3].lower():
-                newName = newName[0]+newName[3:]
-        if len(newName) > 10:
-            if newName[3:5] == newName[3:5].lower():
-                newName = newName[0:2]+newName[5:]
-        if len(newName) > 10:
-            #as last resort, just truncate to 10 characters
-            #might be a duplicate, but exporting to shapefile will add numbers to the 
-            #duplicates. Those names just won't match what will be recorded in the logfile
-            newName = newName[:10]
-        return newName	
+  Options:
+    --workers N        export with N worker processes (0 = one per CPU), as
+                       does a third argument N
+    --longformat F     pipe, csv, or ndjson files for long open-version fields
+    --format F         open version as shape (shapefiles and .csv tables),
+                       gpkg (one GeoPackage), or fgb (FlatGeobuf files and
+                       .csv tables)
+""")
 
 def printFieldNames(fc):
     for f in fieldNameList(fc):
         print f
     print
 
-def check_unique(fieldmappings):
-    out_names = [fm.outputField.name for fm in fieldmappings]
-    dup_names = set([x for x in out_names if out_names.count(x) > 1])
-    for dup_name in dup_names:
-        i = 0
-        for fm in fieldmappings:
-            if fm.outputField.name == dup_name:
-                prefix = lookup_prefix(fm.getInputFieldName(0))
-                new_name = remapFieldName(prefix + dup_name)
-                out_field = fm.outputField
-                out_field.name = new_name
-                fm.outputField = out_field
-                fieldmappings.replaceFieldMap(i, fm)
-            i = i + 1
-
-def dumpTable(fc, outName, isSpatial, outputDir, logfile, isOpen, fcName):
-    dumpString = '  Dumping {}...'.format(outName)
-    if isSpatial: dumpString = '  '+dumpString
-    addMsgAndPrint(dumpString)
-    if isSpatial:
-        logfile.write('  feature class {} dumped to shapefile {}\n'.format(fc, outName))
+def dumpTable(fc, outName, isSpatial, outputDir, log, isOpen, fcName, longFormat='pipe', joins=None,
+              outFormat='shape'):
+    # plans the field mapping of fc (in arcpy.env.workspace) and adds an export job to log.
+    #   The job is run, and its part of the logfile written, by writeDumps. If joins is a
+    #   JoinPlan, its fields are exported instead of those of fc. outFormat is a key of
+    #   outputFormats; for 'gpkg', outputDir is the GeoPackage
+    fcPath = os.path.join(arcpy.env.workspace, fc)
+    if joins <> None:
+        fields = None
     else:
-        logfile.write('  table {} dumped to table\n'.format(fc, outName))
-    logfile.write('    field name remapping: \n')
+        fields = [[f.name, f.type, f.length] for f in arcpy.ListFields(fc)]
+    log.append(makeJob(fcPath, fields, outName, isSpatial, outputDir, isOpen, fcName, longFormat, joins, outFormat))
+
+def writeDumps(log, logfile, workers):
+    # log is a list of logfile text and export jobs, in logfile order. Runs the jobs,
+    #   serially or with workers worker processes, and writes log to logfile
+    jobs = [x for x in log if isinstance(x, list)]
+    results = iter(exportJobs(jobs, workers))
+    for x in log:
+        if isinstance(x, list):
+            text, msgs = results.next()
+            for msg in msgs:
+                addMsgAndPrint(msg)
+            logfile.write(text)
+        else:
+            logfile.write(x)
+    del log[:]
 
-    longFields = []
-    fieldmappings = arcpy.FieldMappings()
-    fields = arcpy.ListFields(fc)
-    for field in fields:
-        #get the name string and chop off the joined table name if necessary
-        fName = field.name
-        for prefix in ('DescriptionOfMapUnits', 'DataSources', 'Glossary', fcName):
-            if fc != prefix and fName.find(prefix) == 0 and fName != fcName+'_ID':
-                fName = fName[len(prefix)+1:]
-                
-        if not fName.lower() in forget:
-            #make the FieldMap object based on this field
-            fieldmap = arcpy.FieldMap()
-            fieldmap.addInputField(fc, field.name)
-            out_field = fieldmap.outputField
-           
-            #go back to the FieldMap object and set up the output field name
-            out_field.name = remapFieldName(fName)
-            fieldmap.outputField = out_field
-            #logfile.write('      '+field.name+' > '+out_field.name+'\n')
-            
-            #save the FieldMap in the FieldMappings
-            fieldmappings.addFieldMap(fieldmap)
-    
-        if field.length > 254:
-            longFields.append(fName)
-            
-    check_unique(fieldmappings)
-    for fm in fieldmappings:
-        logfile.write('      {} > {}\n'.format(fm.getInputFieldName(0), fm.outputField.name))
-    
-    if isSpatial:
-        if debug:  print 'dumping ',fc,outputDir,outName
-        try:
-            arcpy.FeatureClassToFeatureClass_conversion(fc, outputDir, outName, field_mapping=fieldmappings)
-        except:
-            addMsgAndPrint('failed to translate table '+fc)
-    else:
-        arcpy.TableToTable_conversion(fc, outputDir, outName, field_mapping=fieldmappings)
-        
-    if isOpen:
-        # if any field lengths > 254, write .txt file
-        if len(longFields) > 0:
-            outText = outName[0:-4]+'.txt'
-            logfile.write('    table '+fc+' has long fields, thus dumped to file '+outText+'\n')
-            csv_path = os.path.join(outputDir, outText)
-            csvFile = io.open(csv_path, 'w', encoding="utf-8")
-            fields = arcpy.ListFields(fc)
-            f_names = [f.name for f in fields if f.type not in ['Blob', 'Geometry', 'Raster']]
-            
-            col_names = "|".join(f_names)
-            csvFile.write(unicode("{}\n|".format(col_names)))
-            #addMsgAndPrint("FC name: "+ fc)
-            with arcpy.da.SearchCursor(fc, f_names) as cursor:
-                for row in cursor:
-                    rowString = str(row[0])
-                    for i in range(1,len(row)): #use enumeration here?
-                        #if debug: addMsgAndPrint("Index: "+str(i))
-                        #if debug: addMsgAndPrint("Current row is: " + str(row[i]))
-                        if row[i] <> None:
-                            xString = unicode(row[i])
-                            rowString = rowString+'|'+xString
-                        else:
-                            rowString = rowString+'|'
-                    csvFile.write(unicode(rowString+'\n'))
-            csvFile.close()
-    addMsgAndPrint('    Finished dump\n')
-              
 def makeOutputDir(gdb, outWS, isOpen):
     outputDir = os.path.join(outWS, os.path.basename(gdb)[0:-4])
     if isOpen:
@@ -272,125 +156,128 @@ def description(unitDesc):
 
 def makeStdLithDict():
     addMsgAndPrint('  Making StdLith dictionary...')
+    unitDescs = {}
+    fields = ['MapUnit','ProportionTerm','ProportionValue','PartType','Lithology']
+    with arcpy.da.SearchCursor('StandardLithology', fields) as rows:
+        for unit, pTerm, pVal, partType, lith in rows:
+            val = dummyVal(pTerm,pVal)
+            unitDescs.setdefault(unit, []).append([val,partType,lith,pTerm,pVal])
     stdLithDict = {}
-    rows = arcpy.SearchCursor('StandardLithology', '', '', '', "MapUnit")
-    row = rows.next()
-    unit = row.getValue('MapUnit')
-    unitDesc = []
-    pTerm = row.getValue('ProportionTerm'); pVal = row.getValue('ProportionValue')
-    val = dummyVal(pTerm,pVal)
-    unitDesc.append([val,row.getValue('PartType'),row.getValue('Lithology'),pTerm,pVal])
-    while row:
-        newUnit = row.getValue('MapUnit')
-        if newUnit <> unit:
-            stdLithDict[unit] = description(unitDesc)
-            unitDesc = []
-            unit = newUnit
-        pTerm = row.getValue('ProportionTerm'); pVal = row.getValue('ProportionValue')
-        val = dummyVal(pTerm,pVal)
-        unitDesc.append([val,row.getValue('PartType'),row.getValue('Lithology'),pTerm,pVal])
-        row = rows.next()
-    del row, rows
-    stdLithDict[unit] = description(unitDesc)
+    for unit in unitDescs:
+        stdLithDict[unit] = description(unitDescs[unit])
     return stdLithDict
 
-def mapUnitPolys(stdLithDict, outputDir, logfile):
+def loadTable(table, keyField, skipFields=()):
+    # returns [fields, {key value: [values]}] for table. fields are the arcpy Field objects
+    #   of the values, which leave out keyField, fields named (in lower case) in skipFields,
+    #   and fields that can't be written to a shapefile. Where a key value is repeated, the
+    #   first row is used, as by AddJoin
+    fields = []
+    for f in arcpy.ListFields(table):
+        if f.type in shapefileFieldTypes and f.name <> keyField and not f.name.lower() in skipFields:
+            fields.append(f)
+    values = {}
+    with arcpy.da.SearchCursor(table, [keyField]+[f.name for f in fields]) as rows:
+        for row in rows:
+            if not row[0] in values:
+                values[row[0]] = list(row[1:])
+    return [fields, values]
+
+def valueIndex(fields, fieldName):
+    names = [f.name for f in fields]
+    if fieldName in names:
+        return names.index(fieldName)
+    return None
+
+def mapUnitPolys(stdLithDict, outputDir, log, lookups):
+    # lookups is {table: loadTable result} for DescriptionOfMapUnits and DataSources
     addMsgAndPrint('  Translating {}...'.format(os.path.join('GeologicMap', 'MapUnitPolys')))
     try:
-        arcpy.MakeTableView_management('DescriptionOfMapUnits', 'DMU')
-        if stdLithDict <> 'None':
-            arcpy.AddField_management('DMU', "StdLith", "TEXT", '', '', '255')
-            rows = arcpy.UpdateCursor('DMU')
-            row = rows.next()
-            while row:
-                if row.MapUnit in stdLithDict:
-                    row.StdLith = stdLithDict[row.MapUnit]
-                    rows.updateRow(row)
-                row = rows.next()
-            del row, rows
-                
-        arcpy.MakeFeatureLayer_management("GeologicMap/MapUnitPolys", "MUP")
-        arcpy.AddJoin_management('MUP', 'MapUnit', 'DMU', 'MapUnit')
-        arcpy.AddJoin_management('MUP', 'DataSourceID', 'DataSources', 'DataSources_ID')
-       
-        arcpy.CopyFeatures_management('MUP', 'MUP2')
-        DM = 'descriptionofmapunits_'
-        DS = 'datasources_'
-        MU = 'mapunitpolys_'
-        delete_fields = [MU+'datasourceid', MU+MU+'id', DM+'mapunit', DM+'objectid', DM+DM+'id', DM+'label', 
-                        DM+'symbol', DM+'descriptionsourceid', DS+'objectid', DS+DS+'id', DS+'notes']
-        for f in arcpy.ListFields('MUP2'):
-            if f.name.lower() in delete_fields:
-                arcpy.DeleteField_management('MUP2', f.name)
-                
-        dumpTable('MUP2', 'MapUnitPolys.shp', True, outputDir, logfile, False, 'MapUnitPolys')
+        joins = JoinPlan()
+        for f in arcpy.ListFields('GeologicMap/MapUnitPolys'):
+            if f.type <> 'Geometry' and not f.name.lower() in ('datasourceid', 'mapunitpolys_id'):
+                joins.addField(f.name, f.type, f.length)
+        # joined fields are named as AddJoin would name them
+        for table, keyField in (('DescriptionOfMapUnits', 'MapUnit'), ('DataSources', 'DataSourceID')):
+            fields, values = lookups[table]
+            joins.addTable(table, values)
+            for i in range(len(fields)):
+                joins.addLookup(table+'_'+fields[i].name, keyField, table, i, fields[i].type, fields[i].length)
+            if table == 'DescriptionOfMapUnits' and stdLithDict <> 'None':
+                joins.addTable('StdLith', dict([[unit, [stdLithDict[unit]]] for unit in stdLithDict]))
+                joins.addLookup(table+'_StdLith', keyField, 'StdLith', 0, 'String', 255)
+        dumpTable('GeologicMap/MapUnitPolys', 'MapUnitPolys.shp', True, outputDir, log, False, 'MapUnitPolys', joins=joins)
     except:
         addMsgAndPrint(arcpy.GetMessages())
         addMsgAndPrint('  Failed to translate MapUnitPolys')
-        
-    for lyr in ['DMU', 'MUP', 'MUP2']:
-       if arcpy.Exists(lyr): arcpy.Delete_management(lyr)
 
-def linesAndPoints(fc, outputDir, logfile):
+def linesAndPoints(fc, outputDir, log, lookups):
+    # lookups is {table: loadTable result} for DataSources and Glossary
     addMsgAndPrint('  Translating {}...'.format(fc))
     cp = fc.find('/')
     fcShp = fc[cp+1:]+'.shp'
-    LIN2 = fc[cp+1:]+'2'
-    LIN = 'xx'+fc[cp+1:]
-
-    #addMsgAndPrint('    Copying features from {} to {}'.format(fc, LIN2))
-    arcpy.CopyFeatures_management(fc, LIN2) 
-    arcpy.MakeFeatureLayer_management(LIN2, LIN)
-    fieldNames = fieldNameList(LIN)
-    if 'Type' in fieldNames:
-        arcpy.AddField_management(LIN, 'Definition', 'TEXT', '#', '#', '254')
-        arcpy.AddJoin_management(LIN, 'Type', 'Glossary', 'Term')
-        arcpy.CalculateField_management(LIN, 'Definition', '!Glossary.Definition![0:254]', 'PYTHON')
-        arcpy.RemoveJoin_management(LIN, 'Glossary')
-        
-    # command below are 9.3+ specific
-    sourceFields = arcpy.ListFields(fc, '*SourceID')
+    joins = JoinPlan()
+    fields = arcpy.ListFields(fc)
+    sourceFields = [f for f in fields if f.name.lower().endswith('sourceid')]
+    for f in fields:
+        if f.type <> 'Geometry' and not f in sourceFields:
+            joins.addField(f.name, f.type, f.length)
+    if 'Type' in [f.name for f in fields]:
+        gFields, gValues = lookups['Glossary']
+        joins.addTable('Glossary', gValues)
+        joins.addLookup('Definition', 'Type', 'Glossary', valueIndex(gFields, 'Definition'), 'String', 254)
+    # each xxxSourceID field is replaced by field xxxSource, with DataSources.Source
+    dFields, dValues = lookups['DataSources']
+    joins.addTable('DataSources', dValues)
     for sField in sourceFields:
-        nFieldName = sField.name[:-2]
-        arcpy.AddField_management(LIN, nFieldName, 'TEXT', '#', '#', '254')
-        arcpy.AddJoin_management(LIN, sField.name, 'DataSources', 'DataSources_ID')
-        arcpy.CalculateField_management(LIN ,nFieldName, '!DataSources.Source![0:254]', 'PYTHON')
-        arcpy.RemoveJoin_management(LIN, 'DataSources')
-        arcpy.DeleteField_management(LIN, sField.name)
+        joins.addLookup(sField.name[:-2], sField.name, 'DataSources', valueIndex(dFields, 'Source'), 'String', 254)
+    dumpTable(fc, fcShp, True, outputDir, log, False, fc[cp+1:], joins=joins)
 
-    dumpTable(LIN2, fcShp, True, outputDir, logfile, False, fc[cp+1:])
-    arcpy.Delete_management(LIN)
-    arcpy.Delete_management(LIN2)
-    
-def main(gdbCopy, outWS, oldgdb):
+def main(gdbCopy, outWS, oldgdb, workers=1, longFormat='pipe', outFormat='shape'):
     #
     # Simple version
     #
     isOpen = False
     addMsgAndPrint('')
     outputDir, logfile = makeOutputDir(oldgdb, outWS, isOpen)
+    log = []  # logfile text and export jobs, see writeDumps
     arcpy.env.workspace = gdbCopy
     
     # if 'StandardLithology' in arcpy.ListTables():
         # stdLithDict = makeStdLithDict()
     # else:
     stdLithDict = 'None'
-    mapUnitPolys(stdLithDict, outputDir, logfile)
+    lookups = {}
+    lookups['DescriptionOfMapUnits'] = loadTable('DescriptionOfMapUnits', 'MapUnit',
+        ('objectid', 'descriptionofmapunits_id', 'label', 'symbol', 'descriptionsourceid'))
+    lookups['DataSources'] = loadTable('DataSources', 'DataSources_ID', ('objectid', 'notes'))
+    lookups['Glossary'] = loadTable('Glossary', 'Term')
+    mapUnitPolys(stdLithDict, outputDir, log, lookups)
     
     arcpy.env.workspace = os.path.join(gdbCopy, 'GeologicMap')
     pointfcs = arcpy.ListFeatureClasses('','POINT')
     linefcs = arcpy.ListFeatureClasses('','LINE')
     arcpy.env.workspace = gdbCopy
     for fc in linefcs:
-        linesAndPoints(fc, outputDir, logfile)
+        linesAndPoints('GeologicMap/'+fc, outputDir, log, lookups)
     for fc in pointfcs:
-        linesAndPoints(fc, outputDir, logfile)	
+        linesAndPoints('GeologicMap/'+fc, outputDir, log, lookups)
+    writeDumps(log, logfile, workers)
     logfile.close()
     #
     # Open version
     #
     isOpen = True
     outputDir, logfile = makeOutputDir(oldgdb, outWS, isOpen)
+    gpkg = None
+    if outFormat == 'gpkg':
+        import GeMS_DataAccess
+        gpkg = os.path.join(outputDir, os.path.basename(oldgdb)[0:-4]+'.gpkg')
+        addMsgAndPrint('  Making {}...'.format(gpkg))
+        GeMS_DataAccess.createGeoPackage(gpkg)
+        if workers > 1:
+            addMsgAndPrint('  GeoPackage output is written by one process, ignoring --workers')
+            workers = 1
     
     # list featuredatasets
     arcpy.env.workspace = gdbCopy
@@ -399,16 +286,16 @@ def main(gdbCopy, outWS, oldgdb):
     # for each featuredataset
     for fd in fds:
         addMsgAndPrint( '  Processing feature data set {}...'.format(fd))
-        logfile.write('Feature data set {}\n'.format(fd))
+        log.append('Feature data set {}\n'.format(fd))
         try:
             spatialRef = arcpy.Describe(fd).SpatialReference
-            logfile.write('  spatial reference framework\n')
-            logfile.write('    name = {}\n'.format(spatialRef.Name))
-            logfile.write('    spheroid = {}\n'.format(spatialRef.SpheroidName))
-            logfile.write('    projection = {}\n'.format(spatialRef.ProjectionName))
-            logfile.write('    units = {}\n'.format(spatialRef.LinearUnitName))
+            log.append('  spatial reference framework\n')
+            log.append('    name = {}\n'.format(spatialRef.Name))
+            log.append('    spheroid = {}\n'.format(spatialRef.SpheroidName))
+            log.append('    projection = {}\n'.format(spatialRef.ProjectionName))
+            log.append('    units = {}\n'.format(spatialRef.LinearUnitName))
         except:
-            logfile.write('  spatial reference framework appears to be undefined\n')
+            log.append('  spatial reference framework appears to be undefined\n')
             
         # generate featuredataset prefix
         pfx = ''
@@ -425,47 +312,77 @@ def main(gdbCopy, outWS, oldgdb):
                 if arcpy.GetCount_management(fc) > 0:
                     # don't dump Anno classes
                     if arcpy.Describe(fc).featureType <> 'Annotation':
-                        outName = '{}_{}.shp'.format(pfx, fc)
-                        dumpTable(fc, outName, True, outputDir, logfile, isOpen, fc)
+                        if outFormat == 'gpkg':
+                            dumpTable(fc, fc, True, gpkg, log, isOpen, fc, outFormat=outFormat)
+                        else:
+                            outName = '{}_{}.{}'.format(pfx, fc, {'shape':'shp', 'fgb':'fgb'}[outFormat])
+                            dumpTable(fc, outName, True, outputDir, log, isOpen, fc, longFormat, outFormat=outFormat)
                     else:
                         addMsgAndPrint('    Skipping annotation feature class {}\n'.format(fc))
         else:
             addMsgAndPrint('   No feature classes in this dataset!')
-        logfile.write('\n')
+        log.append('\n')
         
     # list tables
     arcpy.env.workspace = gdbCopy
     for tbl in arcpy.ListTables():
         if arcpy.GetCount_management(tbl) > 0:
-            outName = tbl+'.csv'
-            dumpTable(tbl, outName, False, outputDir, logfile, isOpen, tbl)
+            if outFormat == 'gpkg':
+                dumpTable(tbl, tbl, False, gpkg, log, isOpen, tbl, outFormat=outFormat)
+            else:
+                outName = tbl+'.csv'
+                dumpTable(tbl, outName, False, outputDir, log, isOpen, tbl, longFormat)
+    writeDumps(log, logfile, workers)
     logfile.close()
 
 
 ### START HERE ###
-if len(sys.argv) <> 3 or not os.path.exists(sys.argv[1]) or not os.path.exists(sys.argv[2]):
-    usage()
-else:
-    addMsgAndPrint('  '+versionString)
-    gdb = os.path.abspath(sys.argv[1])
-    gdb_name = os.path.basename(gdb)
-    ows = os.path.abspath(sys.argv[2])
-    
-    arcpy.env.QualifiedFieldNames = False
-    arcpy.env.overwriteoutput = True
+# main is guarded so that worker processes (see exportJobs) can import this script
+if __name__ == '__main__':
+    # optional --longformat pipe|csv|ndjson, see longFieldFormats in GeMS_ShapeExport.py
+    longFormat = 'pipe'
+    if '--longformat' in sys.argv:
+        i = sys.argv.index('--longformat')
+        longFormat = sys.argv[i+1].lower()
+        del sys.argv[i:i+2]
+    # optional --format shape|gpkg|fgb, see outputFormats in GeMS_ShapeExport.py
+    outFormat = 'shape'
+    if '--format' in sys.argv:
+        i = sys.argv.index('--format')
+        outFormat = sys.argv[i+1].lower()
+        del sys.argv[i:i+2]
+    # optional --workers N, or third argument N (the toolbox's Number of worker processes),
+    #   exports tables and feature classes with N worker processes (N = 0 uses one per CPU)
+    workers = workerCount(sys.argv, 3)
+    if not outFormat in outputFormats:
+        addMsgAndPrint('Unknown --format '+outFormat+', must be one of '+', '.join(sorted(outputFormats)))
+        usage()
+    elif not longFormat in longFieldFormats:
+        addMsgAndPrint('Unknown --longformat '+longFormat+', must be one of '+', '.join(sorted(longFieldFormats)))
+        usage()
+    elif len(sys.argv) <> 3 or not os.path.exists(sys.argv[1]) or not os.path.exists(sys.argv[2]):
+        usage()
+    else:
+        addMsgAndPrint('  '+versionString)
+        gdb = os.path.abspath(sys.argv[1])
+        gdb_name = os.path.basename(gdb)
+        ows = os.path.abspath(sys.argv[2])
+        
+        arcpy.env.QualifiedFieldNames = False
+        arcpy.env.overwriteoutput = True
 
-    # fix the new workspace name so it is guaranteed to be novel, no overwrite
-    newgdb = os.path.join(ows, 'xx{}'.format(gdb_name))
-    if arcpy.Exists(newgdb):
-        arcpy.Delete_management(newgdb)
-    addMsgAndPrint('  Copying {} to temporary geodatabase'.format(os.path.basename(gdb)))
-    arcpy.Copy_management(gdb, newgdb)
-    main(newgdb, ows, gdb)
-    
-    # cleanup
-    addMsgAndPrint('\n  Deleting temporary geodatabase')
-    try:
-        arcpy.Delete_management(newgdb)
-    except:
-        addMsgAndPrint('    As usual, failed to delete temporary geodatabase')
-        addMsgAndPrint('    Please delete '+newgdb+'\n')
+        # fix the new workspace name so it is guaranteed to be novel, no overwrite
+        newgdb = os.path.join(ows, 'xx{}'.format(gdb_name))
+        if arcpy.Exists(newgdb):
+            arcpy.Delete_management(newgdb)
+        addMsgAndPrint('  Copying {} to temporary geodatabase'.format(os.path.basename(gdb)))
+        arcpy.Copy_management(gdb, newgdb)
+        main(newgdb, ows, gdb, workers, longFormat, outFormat)
+        
+        # cleanup
+        addMsgAndPrint('\n  Deleting temporary geodatabase')
+        try:
+            arcpy.Delete_management(newgdb)
+        except:
+            addMsgAndPrint('    As usual, failed to delete temporary geodatabase')
+            addMsgAndPrint('    Please delete '+newgdb+'\n')
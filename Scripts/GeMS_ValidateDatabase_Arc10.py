@@ -26,11 +26,30 @@
 # 8 March 2021:  Added D_North_American_1983 to list of datums that don't generate a warning
 # 1/27/22: added clause to parse DataSourceIDs that might take the form of 'DAS1 | DAS2 | DAS3', etc. That is, allows for multiple datasources
 #        to be related to a table row. in def ScanTable under 'for i in dataSourceIndices:'
+# 18 October 2026: Glossary, DataSources, MapUnit, and _ID values are now accumulated in KeyRegistry
+#        objects (dicts and sets) rather than lists, so that missing, unused, and duplicated values
+#        are found in linear time. Output is unchanged.
+#    scanTable and its helper functions moved to GeMS_ValidateScan.py. scanTable now returns a TableScan
+#        object that is merged into the global lists by mergeScan. All tables and feature classes are
+#        inventoried and scanned before the level 2 and level 3 checks. Optional command-line argument
+#        --workers N scans them with N worker processes. Main is now guarded by if __name__ == '__main__'
+#    Scan results are cached in XXX_Validation.gdb/ValidationScanCache.pkl with a fingerprint of each
+#        table (row count, maximum OBJECTID, schema hash, hash of sampled rows). Tables whose fingerprint
+#        is unchanged are not rescanned. Optional command-line argument --nocache turns this off
+#    The scan cache is now off unless command-line argument --cache is given, every row of a table is
+#        fingerprinted, and the cache is written next to the _Validation.gdb as
+#        XXX_ValidationScanCache.pkl, not inside it
+#    KeyRegistry moved to GeMS_ValidateScan.py, which now reads tables through GeMS_DataAccess
+#    The scan cache fingerprint no longer reads every row: it uses the latest editor-tracking edit date,
+#        or hashes a sample of rows (see tableFingerprint in GeMS_ValidateScan.py)
+#    The number of worker processes is also the optional sixth argument, the toolbox's "Number of worker
+#        processes" parameter, and is read by workerCount in GeMS_utilityFunctions.py
 
 import arcpy, os, os.path, sys, time, glob
 import traceback
 from GeMS_utilityFunctions import *
 from GeMS_Definition import *
+from GeMS_ValidateScan import *
 import copy
 
 versionString = 'GeMS_ValidateDatabase_Arc10.py, version of 8 May 2023'
@@ -49,21 +68,6 @@ space2 = '&nbsp;&nbsp;'
 #######GLOBAL VARIABLES#######################################################
 geologicNamesDisclaimer = ', pending completion of a peer-reviewed Geologic Names report that includes identification of any suggested modifications to <a href="https://ngmdb.usgs.gov/Geolex/">Geolex</a>. '
 
-# fields we don't want listed or described when inventorying dataset:
-standardFields = ('OBJECTID','SHAPE','Shape','SHAPE_Length','SHAPE_Area','ZOrder',
-                  'AnnotationClassID','Status','TextString','FontName','FontSize','Bold',
-                  'Italic','Underline','VerticalAlignment','HorizontalAlignment',
-                  'XOffset','YOffset','Angle','FontLeading','WordSpacing','CharacterWidth',
-		  'CharacterSpacing','FlipAngle','Override','Shape_Length','Shape_Area',
-                  'last_edited_date','last_edited_user','created_date','created_user')
-lcStandardFields = []
-for f in standardFields:
-    lcStandardFields.append(f.lower())
-    
-# fields whose values must be defined in Glossary
-definedTermFieldsList = ('Type','ExistenceConfidence','IdentityConfidence','ParagraphStyle','GeoMaterialConfidence',
-                         'ErrorMeasure','AgeUnits','LocationMethod','ScientificConfidence')
-
 metadataChecked = False  # script will set to True if metadata record is checked
 
 requiredTables = ['DataSources','DescriptionOfMapUnits','Glossary','GeoMaterialDict']
@@ -76,23 +80,20 @@ schemaErrorsMissingFields = ['Missing or mis-defined fields']
 
 missingRequiredValues = ['Fields that are missing required values']    #  entries are [field, table]
 
-all_IDs = []  #  entries are [_IDvalue, table]
+all_IDs = KeyRegistry()  #  _ID values, defined in the table that carries them
 duplicate_IDs = ['Duplicated _ID values']  # entries are [value, table]
 
-dataSources_IDs = []  # _IDs from DataSources
-allDataSourcesRefs = [] # list of all references to DataSources. Entries are [value, table]
+dataSourcesKeys = KeyRegistry()  # _IDs from DataSources and all references to them
 missingSourceIDs = ['Missing DataSources entries. Only one reference to each missing entry is cited']
 unusedSourceIDs = ['Entries in DataSources that are not otherwise referenced in database']
 duplicatedSourceIDs = ['Duplicated source_IDs in DataSources']
 
-glossaryTerms = []   # Terms from Glossary
-allGlossaryRefs = [] # list of all references to Glossary. Entries are [value, table]
+glossaryKeys = KeyRegistry()   # Terms from Glossary and all references to them
 missingGlossaryTerms = ['Missing terms in Glossary. Only one reference to each missing term is cited']
 unusedGlossaryTerms = ['Terms in Glossary that are not otherwise used in geodatabase']
 glossaryTermDuplicates = ['Duplicated terms in Glossary']
 
-dmuMapUnits = []
-allMapUnits = []  # list of all MapUnit references. Entries are [value, table]
+mapUnitKeys = KeyRegistry()  # MapUnits from DMU and all MapUnit references elsewhere
 missingDmuMapUnits = ['MapUnits missing from DMU. Only one reference to each missing unit is cited']
 unusedDmuMapUnits =  ['MapUnits in DMU that are not present on map, in CMU, or elsewhere']
 dmuMapUnitsDuplicates = ['Duplicated MapUnit values in DescriptionOfMapUnits']
@@ -209,13 +210,6 @@ colorCodes = """
 
 ##########END HTML STUFF####################
 
-def fixSpecialChars(s):
-    try:
-        return s.encode('ascii','xmlcharrefreplace')
-    except:
-        addMsgAndPrint('**'+s)
-        return 'failed to encode special chars'    
-
 def getHKeyErrors(HKs):
     # getHKeyErrors collects values with bad separators, bad element sizes, duplicates, and missing sequential values
     addMsgAndPrint('Checking DescriptionOfMapUnits HKey values')
@@ -327,71 +321,66 @@ def checkTopology(workdir,inGdb,outGdb,fd,MUP,CAF,level=2):
             testAndDelete(fc)
     return nErrs - 1  # subtract the perimeter "Must not have gaps" error
 
-def removeDuplicates(alist):
-    nodupList = []
-    for i in alist:
-        if not i in nodupList:
-            nodupList.append(i)
-    return nodupList
-
-def matchRefs(definedVals, allRefs):
-    # for references to/from Glossary and DataSources
-    # allrefs are [value, field, table]
-    used = removeDuplicates(allRefs)
-    usedVals = []
+def matchRefs(keys):
+    # for references to/from Glossary, DataSources, and DMU
+    # keys is a KeyRegistry
     unused = []
     missing = []
     plainUnused = []
-    for i in used:
+    for i in keys.missing():
         ### problem here with values in Unicode. Not sure solution will be generally valid
-        if not i[0] in definedVals and not i[0] in usedVals:
-            missing.append('<span class="value">'+fixSpecialChars(i[0])+'</span>, field <span class="field">'+
-                           i[1]+'</span>, table <span class="table">'+fixSpecialChars(i[2])+'</span>')  #$@
-        usedVals.append(i[0])
+        missing.append('<span class="value">'+fixSpecialChars(i[0])+'</span>, field <span class="field">'+
+                       i[1]+'</span>, table <span class="table">'+fixSpecialChars(i[2])+'</span>')  #$@
     missing.sort()
-    for i in definedVals:
-        if not i in usedVals:
-            unused.append('<span class="value">'+i+'</span>')
-            plainUnused.append(i)
+    for i in keys.unused():
+        unused.append('<span class="value">'+i+'</span>')
+        plainUnused.append(i)
     unused.sort()
     return unused, missing, plainUnused
 
 def getDuplicateIDs(all_IDs):
     addMsgAndPrint('Getting duplicate _ID values')
-    # get values that are duplicates
-    all_IDs.sort()
-    lastID = ['','']
-    duplicateIDs = []
-    for ID in all_IDs:
-        if ID[0] == lastID[0]:
-            duplicateIDs.append(ID)
-        lastID = ID
-    # remove duplicates
-    dupIDs = removeDuplicates(duplicateIDs)
-    dupIDs.sort()
     dups = []
     # convert to formatted HTML
-    for ID in dupIDs:
+    for ID in all_IDs.duplicateDefinitions():
         dups.append('<span class="value">'+ID[0]+'</span> in table <span class="table">'+
                     ID[1]+'</span>')
     return dups
 
-def getDuplicates(termList):
-    termList.sort()
-    dups1 = []
-    lastTerm = ''
-    for t in termList:
-        if t == lastTerm:
-            dups1.append(t)
-        lastTerm = t
-    dups = removeDuplicates(dups1)
-    dups.sort()
-    return dups
-
 def appendValues(globalList, someValues):
     for v in someValues:
         globalList.append(v)
 
+def mergeScan(scan):
+    # adds results of scanTable (a TableScan object) to global lists and KeyRegistry objects
+    #   Returns list of MapUnit values used in scanned table
+    table = scan.table
+    appendValues(schemaExtensions, scan.schemaExtensions)
+    appendValues(schemaErrorsMissingFields, scan.schemaErrors)
+    appendValues(otherWarnings, scan.otherWarnings)
+    appendValues(allDMUHKeyValues, scan.hKeys)
+    for xx in scan.glossaryTerms:
+        glossaryKeys.define(xx, table)
+    for xx in scan.IDs:
+        all_IDs.define(xx, table)
+    for xx in scan.dataSourceIDs:
+        dataSourcesKeys.define(xx, table)
+    for xx in scan.dmuMapUnits:
+        mapUnitKeys.define(xx, table)
+    for xx in scan.mapUnitRefs:
+        mapUnitKeys.addRef(xx[0], xx[1], table)
+    appendValues(missingRequiredValues, scan.missingRequiredValues)
+    appendValues(zeroLengthStrings, scan.zeroLengthStrings)
+    appendValues(leadingTrailingSpaces, scan.leadingTrailingSpaces)
+    for xx in scan.geoMaterials:
+        if not xx in allGeoMaterialValues:
+            allGeoMaterialValues.append(xx)
+    for xx in scan.glossaryRefs:
+        glossaryKeys.addRef(xx[0], xx[1], table)
+    for xx in scan.dataSourceRefs:
+        dataSourcesKeys.addRef(xx[0], xx[1], table)
+    return scan.mapUnits
+
 def tableCell(contents):
     return '<td valign="top">'+contents+'</td>'
 
@@ -530,245 +519,6 @@ def checkForLockFiles(inGdb):
     os.chdir(oldDir)
     return
 
-def checkFieldDefinitions(def_table, compare_table=None):
-    """Compares the fields in a compare_table to those in a controlled def_table
-       There are two arguments, one optional, to catch the case where, for example
-       we want to compare the fields in CSAMapUnitPolys with MapUnitPolys. 
-       tableDict will not have the key 'CSAMapUnitPolys'. The key MapUnitPolys is derived in 
-       def ScanTable from CSAMapUnitPolys as the table to which it should be compared.
-       If the compare_table IS the name of a table in the GeMS definition; it doesn't need to be derived,
-       it does not need to be supplied. 
-    """
-   
-    # build dictionary of required fields 
-    requiredFields = {}
-    optionalFields = {}
-    requiredFieldDefs = copy.deepcopy(tableDict[def_table])
-    if compare_table:
-        # update the definition of the _ID field to include a 'CSX' prefix
-        prefix = compare_table[:3]
-        id_item = [n for n in requiredFieldDefs if n[0] == def_table + '_ID']
-        new_id = prefix + id_item[0][0]
-        i = requiredFieldDefs.index(id_item[0])
-        requiredFieldDefs[i][0] = new_id
-    else:
-        compare_table = def_table
-         
-    for fieldDef in requiredFieldDefs:
-        if fieldDef[2] <> 'Optional':
-            requiredFields[fieldDef[0]] = fieldDef
-        else:
-            optionalFields[fieldDef[0]] = fieldDef
-    # build dictionary of existing fields
-    try:
-        existingFields = {}
-        fields = arcpy.ListFields(compare_table)
-        for field in fields:
-          existingFields[field.name] = field
-        # now check to see what is excess / missing
-        for field in requiredFields.keys():
-          if field not in existingFields:
-            schemaErrorsMissingFields.append('<span class="table">'+compare_table+
-                                             '</span>, field <span class="field">'+field+'</span> is missing')
-        for field in existingFields.keys():
-            if not (field.lower() in lcStandardFields) and not (field in requiredFields.keys()) and not (field in optionalFields.keys()):
-                schemaExtensions.append('<span class="table">'+compare_table+'</span>, field <span class="field">'+field+'</span>')
-            # check field definition
-            fType = existingFields[field].type
-            if field in requiredFields.keys() and fType <> requiredFields[field][1]:
-                schemaErrorsMissingFields.append('<span class="table">'+compare_table+'</span>, field <span class="field">'+
-                                                 field+'</span>, type should be '+requiredFields[field][1])
-            if field in optionalFields.keys() and fType <> optionalFields[field][1]:
-                schemaErrorsMissingFields.append('<span class="table">'+compare_table+'</span>, field <span class="field">'+
-                                                 field+'</span>, type should be '+optionalFields[field][1])
-    except Exception:
-        s = traceback.format_exc()
-        arcpy.AddMessage(s)
-        schemaErrorsMissingFields.append('<span class="table">'+compare_table+
-                                     '</span> could not get field list. Fields not checked.')
-
-def notEmpty(x):
-    # will fail on not-String values of x
-    if x <> None and x.strip() <> '':
-        return True
-    else:
-        return False
-
-def empty(x):
-    if x == None:
-        return True
-    try:
-        if x.strip() == '':
-            return True
-        else:
-            return False
-    except:  # Fail because we tried to strip() on a non-string value
-        return False
-
-def isBadNull(x):
-    try:
-        if str(x).lower() == '<null>' or str(x) == '' or str(x).strip() == '':
-            return True
-    except:
-        return False
-    else:
-        return False
-
-def fixNull(x):
-    x = x.encode('ascii','xmlcharrefreplace')
-    if x.lower() == '<null>':
-        return '&lt;Null&gt;'
-    else:
-        return x
-
-def scanTable(table, fds=''):
-    addMsgAndPrint('  scanning '+table)
-    if debug:
-        addMsgAndPrint('wksp = '+arcpy.env.workspace)
-    dsc = arcpy.Describe(table)
-### check table and field definition against GeMS_Definitions
-    if table == 'GeoMaterialDict':
-        return ''
-    elif tableDict.has_key(table):  # table is defined in GeMS_Definitions
-        isExtension = False
-        fieldDefs = tableDict[table]
-        checkFieldDefinitions(table)
-    elif fds[:12] == 'CrossSection' and table[:3] == 'CS'+fds[12] and tableDict.has_key(table[3:]):
-        isExtension = False
-        fieldDefs = tableDict[table[3:]]
-        checkFieldDefinitions(table[3:], table)
-
-    else:  # is an extension
-        isExtension = True
-        schemaExtensions.append(dsc.dataType+' <span class="table">'+table+'</span>')
-### check for edit tracking
-    if dsc.editorTrackingEnabled:
-        otherWarnings.append('Editor tracking is enabled on <span class="table">'+table+'</span>')
-### assign fields to categories:
-    fields = arcpy.ListFields(table)
-    fieldNames = fieldNameList(table)
-    #HKeyfield
-    if table == 'DescriptionOfMapUnits' and 'HierarchyKey' in fieldNames:
-        hasHKey = True
-        hKeyIndex = fieldNames.index('HierarchyKey')
-    else: hasHKey = False
-    #idField
-    idField = table+'_ID'
-    if idField in fieldNames:
-        hasIdField = True
-        idIndex = fieldNames.index(idField)
-    else:
-        hasIdField = False
-        if isExtension:
-            schemaErrorsMissingFields.append('<span class="table">'+table+'</span> lacks an _ID field')
-    #Term field
-    if table == 'Glossary' and 'Term' in fieldNames:
-        hasTermField = True
-        termFieldIndex = fieldNames.index('Term')
-    else:
-        hasTermField = False
-    dataSourceIndices = []
-    glossTermIndices = []
-    noNullsFieldIndices = []
-    stringFieldIndices = []
-    mapUnitFieldIndex = []
-    geoMaterialFieldIndex = []
-    specialDmuFieldIndices = []
-    for f in fieldNames:
-        # dataSource fields
-        if f.find('SourceID') > -1:
-            dataSourceIndices.append(fieldNames.index(f))
-        # Glossary term fields
-        if f in definedTermFieldsList:
-            glossTermIndices.append(fieldNames.index(f))
-        # MapUnit fields
-        if f == 'MapUnit':
-            mapUnitFieldIndex.append(fieldNames.index(f))
-        fUpper = f.upper()
-        if fUpper == 'OBJECTID':
-            objIdIndex = fieldNames.index(f)
-        # GeoMaterial fields
-        if f == 'GeoMaterial':
-            geoMaterialFieldIndex.append(fieldNames.index(f))
-        # NoNulls fields
-        if not isExtension:
-            for fdef in fieldDefs:
-                if f == fdef[0] and fdef[2]=='NoNulls':
-                    noNullsFieldIndices.append(fieldNames.index(f))
-        # String fields
-        for ff in fields:
-            if f == ff.baseName and ff.type == 'String':
-                stringFieldIndices.append(fieldNames.index(f))
-    #special DMU fields, cannot be null if MapUnit is non-mull
-        if table == 'DescriptionOfMapUnits' and f in ('FullName','Age','GeoMaterial','GeoMaterialConfidence','DescriptionSourceID'):
-            specialDmuFieldIndices.append(fieldNames.index(f))
-
-    mapUnits = []
-### open search cursor and run through rows
-    with arcpy.da.SearchCursor(table, fieldNames) as cursor:
-        for row in cursor:
-            if hasHKey and row[hKeyIndex]<>None:
-                allDMUHKeyValues.append(row[hKeyIndex])
-            if hasTermField:
-                xx = row[termFieldIndex]
-                if notEmpty(xx):
-                    #addMsgAndPrint(xx)
-                    glossaryTerms.append(fixNull(xx))       # fixNull does xmlcharrefreplace
-            if hasIdField:
-                xx = row[idIndex]
-                if notEmpty(xx):
-                    all_IDs.append([xx,table])
-                    if table == 'DataSources':
-                        dataSources_IDs.append(fixNull(xx)) 
-            for i in mapUnitFieldIndex:
-                xx = row[i]
-                if notEmpty(xx):
-                    if table == 'DescriptionOfMapUnits':
-                        dmuMapUnits.append(fixNull(xx))
-                    else:
-                        if not xx in mapUnits:
-                            mapUnits.append(fixNull(xx))
-                        xxft = [row[i],'MapUnit',table]
-                        if not xxft in allMapUnits:
-                            allMapUnits.append(xxft)
-            for i in noNullsFieldIndices:
-                xx = row[i]
-                if empty(xx) or isBadNull(xx):
-                    missingRequiredValues.append('<span class="table">'+table+'</span>, field <span class="field">'+
-                                                 fieldNames[i]+'</span>, ObjectID '+str(row[objIdIndex]))
-            for i in stringFieldIndices:
-                xx = row[i]
-                oxxft = '<span class="table">'+table+'</span>, field <span class="field">'+fieldNames[i]+'</span>, ObjectID '+str(row[objIdIndex])
-                if i not in noNullsFieldIndices and xx <> None and (xx.strip() == '' or xx.lower()=='<null>'):
-                    zeroLengthStrings.append(oxxft)
-                if xx <> None and xx.strip() <> '' and xx.strip() <> xx:
-                    leadingTrailingSpaces.append(space4+oxxft)
-            for i in geoMaterialFieldIndex:
-                if notEmpty(row[i]):
-                    if not row[i] in allGeoMaterialValues:
-                        allGeoMaterialValues.append(row[i])                    
-            for i in glossTermIndices:
-                if notEmpty(row[i]):
-                    xxft = [fixSpecialChars(row[i]),fieldNames[i],table] #$@
-                    if not xxft in allGlossaryRefs:
-                        allGlossaryRefs.append(xxft)
-            for i in dataSourceIndices:
-                xx = row[i]
-                if notEmpty(xx):
-                    ids = [e.strip() for e in xx.split('|') if e.strip()]
-                    for xxref in ids:
-                        xxft = [xxref, fieldNames[i], table]
-                        if not xxref in allDataSourcesRefs:
-                            allDataSourcesRefs.append(xxft)
-            if mapUnitFieldIndex <> [] and row[mapUnitFieldIndex[0]] <> None:
-                for i in specialDmuFieldIndices:
-                    xx = row[i]
-                    if empty(xx) or isBadNull(xx):
-                        missingRequiredValues.append('<span class="table">'+table+'</span>, field <span class="field">'+
-                                                     fieldNames[i]+'</span>, ObjectID '+str(row[objIdIndex]))
-
-    return mapUnits
-
 def tableToHtml(table, html):
     # table is input table, html is output html file
     addMsgAndPrint('    '+str(table))
@@ -864,274 +614,320 @@ def deleteExtraRows(table,field,vals):
     
 
 ##############start main##################
-##get inputs
-inGdb = sys.argv[1]
-if sys.argv[2] <> '#':
-    workdir = sys.argv[2]
-else:
-    workdir = os.path.dirname(inGdb)
-gdbName = os.path.basename(inGdb)                                 
-refreshGeoMaterialDict = sys.argv[3]
-skipTopology = sys.argv[4]
-deleteExtraGlossaryDataSources = sys.argv[5]
-
-refgmd = os.path.dirname(sys.argv[0])+'/../Resources/GeMS_lib.gdb/GeoMaterialDict'
-
-##validate inputs
-
-if not arcpy.Exists(refgmd):
-    addMsgAndPrint('Cannot find reference GeoMaterialDict table at '+refgmd)
-    forceExit()
-try:
-    arcpy.env.workspace = inGdb
-except:
-    # is not ESRI database
-    addMsgAndPrint('This does not appear to be an ESRI database. Halting here.')
-    forceExit()
-else:
-    # write starting messages
-    addMsgAndPrint(versionString)
-
-    if editSessionActive(inGdb):
-        arcpy.AddWarning ("\nDatabase is being edited. Results may be incorrect if there are unsaved edits\n")
+# main is guarded so that worker processes (see scanTables) can import this script
+if __name__ == '__main__':
+    ##get inputs
+    # optional --cache saves the results of scanning each table in workdir, and reuses
+    #   them if the table has not changed since
+    useCache = False
+    if '--cache' in sys.argv:
+        useCache = True
+        sys.argv.remove('--cache')
+    # optional --workers N, or sixth argument N (the toolbox's Number of worker processes),
+    #   scans tables and feature classes with N worker processes (N = 0 uses one per CPU)
+    workers = workerCount(sys.argv, 6)
+    inGdb = sys.argv[1]
+    if sys.argv[2] <> '#':
+        workdir = sys.argv[2]
+    else:
+        workdir = os.path.dirname(inGdb)
+    gdbName = os.path.basename(inGdb)                                 
+    refreshGeoMaterialDict = sys.argv[3]
+    skipTopology = sys.argv[4]
+    deleteExtraGlossaryDataSources = sys.argv[5]
+
+    refgmd = os.path.dirname(sys.argv[0])+'/../Resources/GeMS_lib.gdb/GeoMaterialDict'
+
+    ##validate inputs
+
+    if not arcpy.Exists(refgmd):
+        addMsgAndPrint('Cannot find reference GeoMaterialDict table at '+refgmd)
+        forceExit()
+    try:
+        arcpy.env.workspace = inGdb
+    except:
+        # is not ESRI database
+        addMsgAndPrint('This does not appear to be an ESRI database. Halting here.')
+        forceExit()
+    else:
+        # write starting messages
+        addMsgAndPrint(versionString)
+
+        if editSessionActive(inGdb):
+            arcpy.AddWarning ("\nDatabase is being edited. Results may be incorrect if there are unsaved edits\n")
     
-    if refreshGeoMaterialDict == 'true':
-        addMsgAndPrint('Refreshing GeoMaterialDict')
-        gmd = inGdb+'/GeoMaterialDict'
-        testAndDelete(gmd)
-        arcpy.Copy_management(refgmd,gmd)
-        addMsgAndPrint('Replacing GeoMaterial domain')
-        ## remove domain from field
-        arcpy.RemoveDomainFromField_management(inGdb+'/DescriptionOfMapUnits', 'GeoMaterial')
-        ## DeleteDomain
-        arcpy.DeleteDomain_management(inGdb, 'GeoMaterials')
-        ##   make GeoMaterials domain
-        arcpy.TableToDomain_management(inGdb+'/GeoMaterialDict','GeoMaterial','IndentedName',inGdb,'GeoMaterials')
-        ##   attach it to DMU field GeoMaterial
-        arcpy.AssignDomainToField_management(inGdb+'/DescriptionOfMapUnits','GeoMaterial','GeoMaterials')       
+        if refreshGeoMaterialDict == 'true':
+            addMsgAndPrint('Refreshing GeoMaterialDict')
+            gmd = inGdb+'/GeoMaterialDict'
+            testAndDelete(gmd)
+            arcpy.Copy_management(refgmd,gmd)
+            addMsgAndPrint('Replacing GeoMaterial domain')
+            ## remove domain from field
+            arcpy.RemoveDomainFromField_management(inGdb+'/DescriptionOfMapUnits', 'GeoMaterial')
+            ## DeleteDomain
+            arcpy.DeleteDomain_management(inGdb, 'GeoMaterials')
+            ##   make GeoMaterials domain
+            arcpy.TableToDomain_management(inGdb+'/GeoMaterialDict','GeoMaterial','IndentedName',inGdb,'GeoMaterials')
+            ##   attach it to DMU field GeoMaterial
+            arcpy.AssignDomainToField_management(inGdb+'/DescriptionOfMapUnits','GeoMaterial','GeoMaterials')       
              
-    # open output files
-    summaryName = os.path.basename(inGdb)+'-Validation.html'
-    summary = open(workdir+'/'+summaryName,'w')
-    errorsName = os.path.basename(inGdb)+'-ValidationErrors.html'
-    errors = open(workdir+'/'+errorsName,'w')
-
-    mdTxtFile = workdir+'/'+os.path.basename(inGdb)+metadataSuffix
-    mdErrFile = workdir+'/'+os.path.basename(inGdb)+metadataErrorsSuffix
-    mdXmlFile = mdTxtFile[:-3]+'xml'
-
-    # delete errors gdb if it exists and make a new one
-    #outErrorsGdb = workdir+'/'+os.path.basename(inGdb)[:-4]+'_Validation.gdb'
-    gdbVal = '{}_Validation.gdb'.format(gdbName[:-4])
-    outErrorsGdb = os.path.join(workdir, gdbVal)                                           
-    if not arcpy.Exists(outErrorsGdb):
-        #outFolder,outName = os.path.split(outErrorsGdb)
-        arcpy.CreateFileGDB_management(workdir, gdbVal)
-
-    # level 2 compliance
-    addMsgAndPrint('Looking at level 2 compliance')
-    for tb in requiredTables:
-        if arcpy.Exists(tb):
-            scanTable(tb)
+        # open output files
+        summaryName = os.path.basename(inGdb)+'-Validation.html'
+        summary = open(workdir+'/'+summaryName,'w')
+        errorsName = os.path.basename(inGdb)+'-ValidationErrors.html'
+        errors = open(workdir+'/'+errorsName,'w')
+
+        mdTxtFile = workdir+'/'+os.path.basename(inGdb)+metadataSuffix
+        mdErrFile = workdir+'/'+os.path.basename(inGdb)+metadataErrorsSuffix
+        mdXmlFile = mdTxtFile[:-3]+'xml'
+
+        # delete errors gdb if it exists and make a new one
+        #outErrorsGdb = workdir+'/'+os.path.basename(inGdb)[:-4]+'_Validation.gdb'
+        gdbVal = '{}_Validation.gdb'.format(gdbName[:-4])
+        outErrorsGdb = os.path.join(workdir, gdbVal)                                           
+        if not arcpy.Exists(outErrorsGdb):
+            #outFolder,outName = os.path.split(outErrorsGdb)
+            arcpy.CreateFileGDB_management(workdir, gdbVal)
+
+        # inventory tables and feature classes, then scan them all. Results are
+        #   merged below in the order in which tables were once scanned one at a time
+        addMsgAndPrint('Scanning tables and feature classes')
+        tables = arcpy.ListTables()
+        fds = arcpy.ListDatasets('*','Feature')
+        scanJobs = []  # entries are [workspace, table, fds]
+        for tb in requiredTables:
+            if arcpy.Exists(tb):
+                scanJobs.append([inGdb, tb, ''])
+        if arcpy.Exists('GeologicMap'):
+            for fc in requiredGeologicMapFeatureClasses:
+                if arcpy.Exists('GeologicMap/'+fc):
+                    scanJobs.append([inGdb+'/GeologicMap', fc, ''])
+        for tb in tables:
+            if tb not in requiredTables:
+                scanJobs.append([inGdb, tb, ''])
+        fdsFcs = {}  # entries are fd: [all feature classes in fd, feature classes to be scanned]
+        for fd in fds:
+            arcpy.env.workspace = fd
+            fcs = arcpy.ListFeatureClasses()
+            scanFcs = []
+            for fc in fcs:
+                if not fc in requiredGeologicMapFeatureClasses:
+                    dsc = arcpy.Describe(fc)
+                    if dsc.featureType=='Simple':
+                        scanFcs.append(fc)
+                        scanJobs.append([inGdb+'/'+fd, fc, fd])
+                    else:
+                        addMsgAndPrint('  ** skipping data set '+fc+', featureType = '+dsc.featureType)
+            fdsFcs[fd] = [fcs, scanFcs]
+            arcpy.env.workspace = inGdb
+        cacheFile = os.path.join(workdir, gdbName[:-4]+'_ValidationScanCache.pkl')
+        if useCache:
+            scanCache = loadScanCache(cacheFile)
         else:
-            schemaErrorsMissingElements.append('Table <span class="table">'+tb+'</span>')
-    gMap_MapUnits = []
-    if not arcpy.Exists('GeologicMap'):
-        gMapSRF = ''
-        schemaErrorsMissingElements.append('Feature dataset <span class="table">GeologicMap</span>')
-    else:
-        srf = arcpy.Describe('GeologicMap').spatialReference
-        gMapSRF = srf.name
-
-        # check for NAD83 or WGS84
-        if srf.type == 'Geographic':
-            pcsd = srf.datumName
-        else: # is projected
-            pcsd = srf.PCSName
-        if pcsd.find('World_Geodetic_System_1984') < 0 and pcsd.find('NAD_1983') < 0 and pcsd.find('D_North_American_1983') < 0:
-            SRFWarnings.append('Spatial reference framework is '+pcsd+'. Consider reprojecting this dataset to NAD83 or WGS84')
-        
-        arcpy.env.workspace = 'GeologicMap'
-        gMap_MapUnits = []
-        for fc in requiredGeologicMapFeatureClasses:
-            if arcpy.Exists(fc):
-                mapUnits = scanTable(fc)
-                appendValues(gMap_MapUnits,mapUnits)
-            else:
-                schemaErrorsMissingElements.append('Feature class <span class="table">GeologicMap/'+fc+'</span>')
-        isMap,MUP,CAF = isFeatureDatasetAMap('GeologicMap')
-        if isMap:
-            if skipTopology == 'false':
-                nTopoErrors = checkTopology(workdir,inGdb,outErrorsGdb,'GeologicMap',MUP,CAF,2)
-                if nTopoErrors > 0:
-                    topologyErrors.append(str(nTopoErrors)+' Level 2 errors in <span class="table">GeologicMap</span>')
+            scanCache = None
+        scans = {}
+        for job, scan in zip(scanJobs, scanTables(scanJobs, workers, scanCache)):
+            scans[(job[0], job[1])] = scan
+        if useCache:
+            saveScanCache(cacheFile, scanCache)
+
+        # level 2 compliance
+        addMsgAndPrint('Looking at level 2 compliance')
+        for tb in requiredTables:
+            if arcpy.Exists(tb):
+                mergeScan(scans[(inGdb, tb)])
             else:
-                addMsgAndPrint('  skipping topology check')
-                topologyErrors.append('Level 2 topology check was skipped')
-        arcpy.env.workspace = inGdb
+                schemaErrorsMissingElements.append('Table <span class="table">'+tb+'</span>')
+        gMap_MapUnits = []
+        if not arcpy.Exists('GeologicMap'):
+            gMapSRF = ''
+            schemaErrorsMissingElements.append('Feature dataset <span class="table">GeologicMap</span>')
+        else:
+            srf = arcpy.Describe('GeologicMap').spatialReference
+            gMapSRF = srf.name
+
+            # check for NAD83 or WGS84
+            if srf.type == 'Geographic':
+                pcsd = srf.datumName
+            else: # is projected
+                pcsd = srf.PCSName
+            if pcsd.find('World_Geodetic_System_1984') < 0 and pcsd.find('NAD_1983') < 0 and pcsd.find('D_North_American_1983') < 0:
+                SRFWarnings.append('Spatial reference framework is '+pcsd+'. Consider reprojecting this dataset to NAD83 or WGS84')
+        
+            arcpy.env.workspace = 'GeologicMap'
+            gMap_MapUnits = []
+            for fc in requiredGeologicMapFeatureClasses:
+                if arcpy.Exists(fc):
+                    mapUnits = mergeScan(scans[(inGdb+'/GeologicMap', fc)])
+                    appendValues(gMap_MapUnits,mapUnits)
+                else:
+                    schemaErrorsMissingElements.append('Feature class <span class="table">GeologicMap/'+fc+'</span>')
+            isMap,MUP,CAF = isFeatureDatasetAMap('GeologicMap')
+            if isMap:
+                if skipTopology == 'false':
+                    nTopoErrors = checkTopology(workdir,inGdb,outErrorsGdb,'GeologicMap',MUP,CAF,2)
+                    if nTopoErrors > 0:
+                        topologyErrors.append(str(nTopoErrors)+' Level 2 errors in <span class="table">GeologicMap</span>')
+                else:
+                    addMsgAndPrint('  skipping topology check')
+                    topologyErrors.append('Level 2 topology check was skipped')
+            arcpy.env.workspace = inGdb
     
-    addMsgAndPrint('  getting unused, missing, and duplicated key values')
-    unused, missing, plainUnused = matchRefs(dataSources_IDs, allDataSourcesRefs)
-    appendValues(missingSourceIDs, missing)
-    for d in getDuplicates(dataSources_IDs):
-        duplicatedSourceIDs.append('<span class="value">'+d+'</span>')
+        addMsgAndPrint('  getting unused, missing, and duplicated key values')
+        unused, missing, plainUnused = matchRefs(dataSourcesKeys)
+        appendValues(missingSourceIDs, missing)
+        for d in dataSourcesKeys.duplicates():
+            duplicatedSourceIDs.append('<span class="value">'+d+'</span>')
     
-    unused, missing, plainUnused = matchRefs(glossaryTerms, allGlossaryRefs)
-    appendValues(missingGlossaryTerms, missing)
-    for d in getDuplicates(glossaryTerms):
-        glossaryTermDuplicates.append('<span class="value">'+d+'</span>')
+        unused, missing, plainUnused = matchRefs(glossaryKeys)
+        appendValues(missingGlossaryTerms, missing)
+        for d in glossaryKeys.duplicates():
+            glossaryTermDuplicates.append('<span class="value">'+d+'</span>')
    
-    unused, missing, plainUnused = matchRefs(dmuMapUnits, allMapUnits)
-    appendValues(missingDmuMapUnits, missing)
-    for d in getDuplicates(dmuMapUnits):
-        dmuMapUnitsDuplicates.append('<span class="value">'+d+'</span>')
-
-    isLevel2, summary2, errors2 = writeOutputLevel2(errorsName)
-
-    # reset some stuff
-    topologyErrors = ['Feature datasets with bad basic topology']
-    missingSourceIDs = ['Missing DataSources entries. Only one reference to each missing entry is cited']
-    missingGlossaryTerms = ['Missing terms in Glossary. Only one reference to each missing term is cited']
-    missingDmuMapUnits =   ['MapUnits missing from DMU. Only one reference to each missing unit is cited'] 
-
-    # level 3 compliance
-    addMsgAndPrint('Looking at level 3 compliance')
-    tables = arcpy.ListTables()
-    for tb in tables:
-        if tb not in requiredTables:
-            mapUnits = scanTable(tb)
-    # check for other stuff at top level of gdb
-    findOtherStuff(inGdb,tables)
-    fds_MapUnits = []
-    fds = arcpy.ListDatasets('*','Feature')
-    for fd in fds:
-        fdSRF = arcpy.Describe(fd).spatialReference.name
-        if fdSRF <> gMapSRF:
-            SRFWarnings.append('Spatial reference framework of '+fd+' does not match that of GeologicMap')
-        arcpy.env.workspace = fd
-        fcs = arcpy.ListFeatureClasses()
-        findOtherStuff(inGdb+'/'+fd,fcs)
-        if fd == 'GeologicMap':
-            fdMapUnitList = gMap_MapUnits
-        else:
-            fdMapUnitList = []                            
-        for fc in fcs:
-            if not fc in requiredGeologicMapFeatureClasses:
-                dsc = arcpy.Describe(fc)
-                if dsc.featureType=='Simple':
-                    mapUnits = scanTable(fc,fd)
-                    appendValues(fdMapUnitList,mapUnits)
-                else:
-                    addMsgAndPrint('  ** skipping data set '+fc+', featureType = '+dsc.featureType)
-        isMap,MUP,CAF = isFeatureDatasetAMap(fd)
-        if isMap:
-            if skipTopology == 'false':
-                nTopoErrors = checkTopology(workdir,inGdb,outErrorsGdb,fd,MUP,CAF,3)
-                if nTopoErrors > 0:
-                    topologyErrors.append(str(nTopoErrors)+' Level 3 errors in <span class="table">'+fd+'</span>')
+        unused, missing, plainUnused = matchRefs(mapUnitKeys)
+        appendValues(missingDmuMapUnits, missing)
+        for d in mapUnitKeys.duplicates():
+            dmuMapUnitsDuplicates.append('<span class="value">'+d+'</span>')
+
+        isLevel2, summary2, errors2 = writeOutputLevel2(errorsName)
+
+        # reset some stuff
+        topologyErrors = ['Feature datasets with bad basic topology']
+        missingSourceIDs = ['Missing DataSources entries. Only one reference to each missing entry is cited']
+        missingGlossaryTerms = ['Missing terms in Glossary. Only one reference to each missing term is cited']
+        missingDmuMapUnits =   ['MapUnits missing from DMU. Only one reference to each missing unit is cited'] 
+
+        # level 3 compliance
+        addMsgAndPrint('Looking at level 3 compliance')
+        for tb in tables:
+            if tb not in requiredTables:
+                mapUnits = mergeScan(scans[(inGdb, tb)])
+        # check for other stuff at top level of gdb
+        findOtherStuff(inGdb,tables)
+        fds_MapUnits = []
+        for fd in fds:
+            fdSRF = arcpy.Describe(fd).spatialReference.name
+            if fdSRF <> gMapSRF:
+                SRFWarnings.append('Spatial reference framework of '+fd+' does not match that of GeologicMap')
+            arcpy.env.workspace = fd
+            fcs, scanFcs = fdsFcs[fd]
+            findOtherStuff(inGdb+'/'+fd,fcs)
+            if fd == 'GeologicMap':
+                fdMapUnitList = gMap_MapUnits
             else:
-                addMsgAndPrint('  skipping topology check')
-                topologyErrors.append('Level 3 topology check was skipped')
-        fds_MapUnits.append([fd,fdMapUnitList])
-        arcpy.env.workspace = inGdb
+                fdMapUnitList = []                            
+            for fc in scanFcs:
+                mapUnits = mergeScan(scans[(inGdb+'/'+fd, fc)])
+                appendValues(fdMapUnitList,mapUnits)
+            isMap,MUP,CAF = isFeatureDatasetAMap(fd)
+            if isMap:
+                if skipTopology == 'false':
+                    nTopoErrors = checkTopology(workdir,inGdb,outErrorsGdb,fd,MUP,CAF,3)
+                    if nTopoErrors > 0:
+                        topologyErrors.append(str(nTopoErrors)+' Level 3 errors in <span class="table">'+fd+'</span>')
+                else:
+                    addMsgAndPrint('  skipping topology check')
+                    topologyErrors.append('Level 3 topology check was skipped')
+            fds_MapUnits.append([fd,fdMapUnitList])
+            arcpy.env.workspace = inGdb
 
-    checkGeoMaterialDict(inGdb)
+        checkGeoMaterialDict(inGdb)
     
-    addMsgAndPrint('  getting unused, missing, and duplicated key values')
+        addMsgAndPrint('  getting unused, missing, and duplicated key values')
 
-    unused, missing, plainUnused = matchRefs(dataSources_IDs, allDataSourcesRefs)
-    if deleteExtraGlossaryDataSources == 'true':
-        deleteExtraRows('DataSources','DataSources_ID',plainUnused)
-    else:
-        appendValues(unusedSourceIDs, unused)
-    appendValues(missingSourceIDs, missing)
+        unused, missing, plainUnused = matchRefs(dataSourcesKeys)
+        if deleteExtraGlossaryDataSources == 'true':
+            deleteExtraRows('DataSources','DataSources_ID',plainUnused)
+        else:
+            appendValues(unusedSourceIDs, unused)
+        appendValues(missingSourceIDs, missing)
 
-    unused, missing, plainUnused = matchRefs(glossaryTerms, allGlossaryRefs)
-    if deleteExtraGlossaryDataSources == 'true':
-        deleteExtraRows('Glossary','Term',plainUnused)
-    else:
-        appendValues(unusedGlossaryTerms, unused)
-    appendValues(missingGlossaryTerms, missing)
+        unused, missing, plainUnused = matchRefs(glossaryKeys)
+        if deleteExtraGlossaryDataSources == 'true':
+            deleteExtraRows('Glossary','Term',plainUnused)
+        else:
+            appendValues(unusedGlossaryTerms, unused)
+        appendValues(missingGlossaryTerms, missing)
     
-    unused, missing, plainUnused = matchRefs(dmuMapUnits, allMapUnits)
-    appendValues(unusedDmuMapUnits,unused)
-    appendValues(missingDmuMapUnits, missing)
+        unused, missing, plainUnused = matchRefs(mapUnitKeys)
+        appendValues(unusedDmuMapUnits,unused)
+        appendValues(missingDmuMapUnits, missing)
 
-    appendValues(duplicate_IDs, getDuplicateIDs(all_IDs))
-    appendValues(hKeyErrors, getHKeyErrors(allDMUHKeyValues))  # getHKeyErrors collects values with bad separators, bad element sizes, duplicates, and missing sequential values
+        appendValues(duplicate_IDs, getDuplicateIDs(all_IDs))
+        appendValues(hKeyErrors, getHKeyErrors(allDMUHKeyValues))  # getHKeyErrors collects values with bad separators, bad element sizes, duplicates, and missing sequential values
 
-    metadataChecked, passesMP = checkMetadata(inGdb,mdTxtFile,mdErrFile,mdXmlFile)
-    checkForLockFiles(inGdb)
+        metadataChecked, passesMP = checkMetadata(inGdb,mdTxtFile,mdErrFile,mdXmlFile)
+        checkForLockFiles(inGdb)
 
-    isLevel3, summary3, errors3 = writeOutputLevel3()
+        isLevel3, summary3, errors3 = writeOutputLevel3()
 
-### assemble output                                                
-    addMsgAndPrint( 'Writing output')
-    addMsgAndPrint( '  writing summary header')
+    ### assemble output                                                
+        addMsgAndPrint( 'Writing output')
+        addMsgAndPrint( '  writing summary header')
     
-    metadataTxt = os.path.basename(inGdb+metadataSuffix)
-    metadataErrs = os.path.basename(inGdb+metadataErrorsSuffix)
-###SUMMARY HEADER
-    summary.write(style)
-    summary.write('<h2><a name="overview"><i>GeMS validation of </i> '+os.path.basename(inGdb)+'</a></h2>\n')
-    summary.write('<div class="report">Database path: '+inGdb+'<br>\n')
-    summary.write('File written by <i>'+versionString+'</i><br>\n')
-    summary.write(time.asctime(time.localtime(time.time()))+'<br><br>\n')
-    summary.write('This file should be accompanied by '+errorsName+', '+metadataTxt+', and '+metadataErrs+', all in the same directory.<br><br>\n')
-    if isLevel3 and isLevel2:
-        summary.write('This database is <a href=#Level3><font size="+1"><b>LEVEL 3 COMPLIANT</b></a></font>'+geologicNamesDisclaimer+'\n')
-    elif isLevel2:
-        summary.write('This database is <a href=#Level2><font size="+1"><b>LEVEL 2 COMPLIANT</b></a></font>'+geologicNamesDisclaimer+'\n')
-    else:  # is level 1
-        summary.write('This database may be <a href=#Level1><font size="+1"><b>LEVEL 1 COMPLIANT</b></a>. </font>\n')
-
-    if metadataChecked:
-        if passesMP:
-            summary.write('The database-level FGDC metadata are formally correct. The <a href="'+metadataTxt
-                          +'">metadata record</a> should be examined by a human to verify that it is meaningful.<br>\n')
-        else:  # metadata fails mp
-            summary.write('The <a href="'+metadataTxt+'">FGDC metadata record</a> for this database has <a href="'
-                          +metadataErrs+'">formal errors</a>. Please fix! <br>\n')
-    else:  # metadata not checked
-        summary.write('FGDC metadata for this database have not been checked. <br>\n')
-
-###ERRORS HEADER
-    addMsgAndPrint('  writing errors header')
-    errors.write(style)
-    errors.write('<h2><a name="overview">'+os.path.basename(inGdb)+'-ValidationErrors</a></h2>\n')
-    errors.write('<div class="report">Database path: '+inGdb+'<br>\n')
-    errors.write('This file written by <i>'+versionString+'</i><br>\n')
-    errors.write(time.asctime(time.localtime(time.time()))+'<br>\n')
-    errors.write("""
+        metadataTxt = os.path.basename(inGdb+metadataSuffix)
+        metadataErrs = os.path.basename(inGdb+metadataErrorsSuffix)
+    ###SUMMARY HEADER
+        summary.write(style)
+        summary.write('<h2><a name="overview"><i>GeMS validation of </i> '+os.path.basename(inGdb)+'</a></h2>\n')
+        summary.write('<div class="report">Database path: '+inGdb+'<br>\n')
+        summary.write('File written by <i>'+versionString+'</i><br>\n')
+        summary.write(time.asctime(time.localtime(time.time()))+'<br><br>\n')
+        summary.write('This file should be accompanied by '+errorsName+', '+metadataTxt+', and '+metadataErrs+', all in the same directory.<br><br>\n')
+        if isLevel3 and isLevel2:
+            summary.write('This database is <a href=#Level3><font size="+1"><b>LEVEL 3 COMPLIANT</b></a></font>'+geologicNamesDisclaimer+'\n')
+        elif isLevel2:
+            summary.write('This database is <a href=#Level2><font size="+1"><b>LEVEL 2 COMPLIANT</b></a></font>'+geologicNamesDisclaimer+'\n')
+        else:  # is level 1
+            summary.write('This database may be <a href=#Level1><font size="+1"><b>LEVEL 1 COMPLIANT</b></a>. </font>\n')
+
+        if metadataChecked:
+            if passesMP:
+                summary.write('The database-level FGDC metadata are formally correct. The <a href="'+metadataTxt
+                              +'">metadata record</a> should be examined by a human to verify that it is meaningful.<br>\n')
+            else:  # metadata fails mp
+                summary.write('The <a href="'+metadataTxt+'">FGDC metadata record</a> for this database has <a href="'
+                              +metadataErrs+'">formal errors</a>. Please fix! <br>\n')
+        else:  # metadata not checked
+            summary.write('FGDC metadata for this database have not been checked. <br>\n')
+
+    ###ERRORS HEADER
+        addMsgAndPrint('  writing errors header')
+        errors.write(style)
+        errors.write('<h2><a name="overview">'+os.path.basename(inGdb)+'-ValidationErrors</a></h2>\n')
+        errors.write('<div class="report">Database path: '+inGdb+'<br>\n')
+        errors.write('This file written by <i>'+versionString+'</i><br>\n')
+        errors.write(time.asctime(time.localtime(time.time()))+'<br>\n')
+        errors.write("""
         </div>
         <div id="back-to-top"><a href="#overview">Back to Top</a></div>
 """)
-    errors.write(colorCodes)      
+        errors.write(colorCodes)      
 
-###CONTENTS
-    anchorRoot = os.path.basename(summaryName)+'#'
-    summary.write("""
+    ###CONTENTS
+        anchorRoot = os.path.basename(summaryName)+'#'
+        summary.write("""
         </div>
         <div id="back-to-top"><a href="#overview">Back to Top</a></div>
         <h3>Contents</h3>
         <div class="report" id="contents">
   """)
-    summary.write('          <a href="'+anchorRoot+'Compliance_Criteria">Compliance Criteria</a><br>\n')
-    summary.write('          <a href="'+anchorRoot+'Extensions">Content not specified in GeMS schema</a><br>\n')
-    summary.write('          <a href="'+anchorRoot+'MapUnits_Match">MapUnits in DescriptionOfMapUnits table, GeologicMap feature dataset, and other feature datasets</a><br>\n')
-    summary.write('          <a href="'+anchorRoot+'Contents_Nonspatial">Contents of Nonspatial Tables</a><br>\n')
-    tables.sort()
-    for tb in tables:
-        if tb <> 'GeoMaterialDict':
-            summary.write('&nbsp;&nbsp;&nbsp;&nbsp;<a href="'+anchorRoot+tb+'">'+tb+'</a><br>\n')
-    summary.write('    <a href="'+anchorRoot+'Database_Inventory">Database Inventory</a><br>\n')
-    summary.write('        </div>\n')
-
-###COMPLIANCE CRITERIA
-    summary.write('<h3><a name="Compliance_Criteria"></a>Compliance Criteria</h3>\n')
-    summary.write(rdiv)
-    summary.write('<h4><a name="Level1">LEVEL 1</a></h4>\n')
-    summary.write("""
+        summary.write('          <a href="'+anchorRoot+'Compliance_Criteria">Compliance Criteria</a><br>\n')
+        summary.write('          <a href="'+anchorRoot+'Extensions">Content not specified in GeMS schema</a><br>\n')
+        summary.write('          <a href="'+anchorRoot+'MapUnits_Match">MapUnits in DescriptionOfMapUnits table, GeologicMap feature dataset, and other feature datasets</a><br>\n')
+        summary.write('          <a href="'+anchorRoot+'Contents_Nonspatial">Contents of Nonspatial Tables</a><br>\n')
+        tables.sort()
+        for tb in tables:
+            if tb <> 'GeoMaterialDict':
+                summary.write('&nbsp;&nbsp;&nbsp;&nbsp;<a href="'+anchorRoot+tb+'">'+tb+'</a><br>\n')
+        summary.write('    <a href="'+anchorRoot+'Database_Inventory">Database Inventory</a><br>\n')
+        summary.write('        </div>\n')
+
+    ###COMPLIANCE CRITERIA
+        summary.write('<h3><a name="Compliance_Criteria"></a>Compliance Criteria</h3>\n')
+        summary.write(rdiv)
+        summary.write('<h4><a name="Level1">LEVEL 1</a></h4>\n')
+        summary.write("""
 <i>Criteria for a LEVEL 1 GeMS database are:</i>
 <ul>
   <li>No overlaps or internal gaps in map-unit polygon layer</li>
@@ -1139,132 +935,132 @@ else:
   <li>Map-unit polygon boundaries are covered by contacts and faults lines</li>
 </ul>
 <i>Databases with a variety of schema may meet these criteria. This script cannot confirm LEVEL 1 compliance.</i>\n""")
-    addMsgAndPrint('  writing Level 2')
-    summary.write('<h4><a name="Level2">LEVEL 2--MINIMALLY COMPLIANT</a></h4>\n')
-    summary.write('<i>A LEVEL 2 GeMS database is accompanied by a peer-reviewed Geologic Names report, including identification of suggested modifications to Geolex, and meets the following criteria:</i><br><br>\n')
-    for aln in summary2:
-        summary.write(aln+'\n')
-    errors.write('<h3>Level 2 errors</h3>\n')
-    for aln in errors2:
-        errors.write(aln+'\n')
+        addMsgAndPrint('  writing Level 2')
+        summary.write('<h4><a name="Level2">LEVEL 2--MINIMALLY COMPLIANT</a></h4>\n')
+        summary.write('<i>A LEVEL 2 GeMS database is accompanied by a peer-reviewed Geologic Names report, including identification of suggested modifications to Geolex, and meets the following criteria:</i><br><br>\n')
+        for aln in summary2:
+            summary.write(aln+'\n')
+        errors.write('<h3>Level 2 errors</h3>\n')
+        for aln in errors2:
+            errors.write(aln+'\n')
         
-    addMsgAndPrint('  writing Level 3')
-    summary.write('<h4><a name="Level3">LEVEL 3--FULLY COMPLIANT</a></h4>\n')
-    summary.write('<i>A LEVEL 3 GeMS database meets these additional criteria:</i><br>\n')
-    for aln in summary3:
-        summary.write(aln+'\n')
-    errors.write('<h3>Level 3 errors</h3>\n')
-    for aln in errors3:
-        errors.write(aln+'\n')
+        addMsgAndPrint('  writing Level 3')
+        summary.write('<h4><a name="Level3">LEVEL 3--FULLY COMPLIANT</a></h4>\n')
+        summary.write('<i>A LEVEL 3 GeMS database meets these additional criteria:</i><br>\n')
+        for aln in summary3:
+            summary.write(aln+'\n')
+        errors.write('<h3>Level 3 errors</h3>\n')
+        for aln in errors3:
+            errors.write(aln+'\n')
     
-###Warnings
-    summary.write('<br>\n')
-    nWarnings = -1 # leadingTrailingSpaces has a header line
-    for w in SRFWarnings,leadingTrailingSpaces,otherWarnings:
-        for aw in w:
-            nWarnings = nWarnings+1
-    summary.write('<a href="'+os.path.basename(errorsName)+'#Warnings">There are '+str(nWarnings)+' warnings<br></a>\n')
-    errors.write('<h3><a name="Warnings">Warnings</a></h3>\n')
-    errors.write(rdiv)
-    for w in SRFWarnings,otherWarnings:
-        for aw in w:
-            errors.write(aw+'<br>\n')
-    if len(leadingTrailingSpaces) > 1:
-        for aw in leadingTrailingSpaces:
-            errors.write(aw+'<br>\n')
-    errors.write(divend)
-    summary.write(divend)
+    ###Warnings
+        summary.write('<br>\n')
+        nWarnings = -1 # leadingTrailingSpaces has a header line
+        for w in SRFWarnings,leadingTrailingSpaces,otherWarnings:
+            for aw in w:
+                nWarnings = nWarnings+1
+        summary.write('<a href="'+os.path.basename(errorsName)+'#Warnings">There are '+str(nWarnings)+' warnings<br></a>\n')
+        errors.write('<h3><a name="Warnings">Warnings</a></h3>\n')
+        errors.write(rdiv)
+        for w in SRFWarnings,otherWarnings:
+            for aw in w:
+                errors.write(aw+'<br>\n')
+        if len(leadingTrailingSpaces) > 1:
+            for aw in leadingTrailingSpaces:
+                errors.write(aw+'<br>\n')
+        errors.write(divend)
+        summary.write(divend)
     
 
-###EXTENSIONS TO SCHEMA
-    addMsgAndPrint('  listing schema extensions')
-    summary.write('<h3><a name="Extensions"></a>Content not specified in GeMS schema</h3>\n')
-    summary.write(rdiv)
-    if len(schemaExtensions) > 1:
-        summary.write(schemaExtensions[0]+'<br>\n')
-        for i in schemaExtensions[1:]:
-            summary.write(space4+i+'<br>\n')
-    else:
-        summary.write('None<br>\n')
-    summary.write(divend)
-
-###MAPUNITS MATCH
-    addMsgAndPrint('  writing table of MapUnit presence/absence')
-    summary.write('<h3><a name="MapUnits_Match"></a>MapUnits in DescriptionOfMapUnits table, GeologicMap feature dataset, and other feature datasets</h3>\n')
-    fds_MapUnits.sort()  # put feature datasets in alphabetical order
-    #fds_MapUnits = [ [dataset name [included map units]],[dsname, [incMapUnit]] ]
-    summary.write(rdiv)
-    summary.write('<table class="ess-tables"; style="text-align:center"><tr><th>MapUnit</th><th>&nbsp; DMU &nbsp;</th>')
-    for f in fds_MapUnits:
-        summary.write('<th>'+f[0]+'</th>')
-    summary.write('</tr>\n')       
-    # open search cursor on DMU sorted by HKey
-    sql = (None, 'ORDER BY HierarchyKey')
-    # see note in changelog in header
-    with arcpy.da.SearchCursor('DescriptionOfMapUnits',('MapUnit', 'HierarchyKey'),None,None,False,sql) as cursor:
-        for row in cursor:
-            mu = row[0]
-            if notEmpty(mu):
-                summary.write('<tr><td>'+fixSpecialChars(mu)+'</td><td>X</td>')   #  2nd cell: value is, by definition, in DMU               
-                for f in fds_MapUnits:
-                    if mu in f[1]:
-                        summary.write('<td>X</td>')
-                    else:
-                        summary.write('<td>---</td>')
-                summary.write('</tr>\n')
-    # for mapunits not in DMU 
-    for aline in missingDmuMapUnits[1:]:
-        mu = aline.split(',')[0]
-        summary.write('<tr><td>'+str(mu)+'</td><td>---</td>')
+    ###EXTENSIONS TO SCHEMA
+        addMsgAndPrint('  listing schema extensions')
+        summary.write('<h3><a name="Extensions"></a>Content not specified in GeMS schema</h3>\n')
+        summary.write(rdiv)
+        if len(schemaExtensions) > 1:
+            summary.write(schemaExtensions[0]+'<br>\n')
+            for i in schemaExtensions[1:]:
+                summary.write(space4+i+'<br>\n')
+        else:
+            summary.write('None<br>\n')
+        summary.write(divend)
+
+    ###MAPUNITS MATCH
+        addMsgAndPrint('  writing table of MapUnit presence/absence')
+        summary.write('<h3><a name="MapUnits_Match"></a>MapUnits in DescriptionOfMapUnits table, GeologicMap feature dataset, and other feature datasets</h3>\n')
+        fds_MapUnits.sort()  # put feature datasets in alphabetical order
+        #fds_MapUnits = [ [dataset name [included map units]],[dsname, [incMapUnit]] ]
+        summary.write(rdiv)
+        summary.write('<table class="ess-tables"; style="text-align:center"><tr><th>MapUnit</th><th>&nbsp; DMU &nbsp;</th>')
         for f in fds_MapUnits:
-            if mu in f[1]:
-                summary.write('<td>X</td>')
-            else:
-                summary.write('<td>---</td>')
-        summary.write('</tr>\n')
-    summary.write('</table>\n')
-    summary.write(divend)
-
-###CONTENTS OF NONSPATIAL TABLES
-    addMsgAndPrint('  dumping contents of nonspatial tables')
-    summary.write('<h3><a name="Contents_Nonspatial"></a>Contents of Nonspatial Tables</h3>\n')
-    for tb in tables:
-        if tb <> 'GeoMaterialDict':
-            summary.write(rdiv)
-            summary.write('<h4><a name="'+tb+'"></a>'+tb+'</h4>\n')
-            tableToHtml(tb,summary)
-            summary.write(divend)
-
-###DATABASE INVENTORY
-    addMsgAndPrint('  writing database inventory')
-    summary.write('<h3><a name="Database_Inventory"></a>Database Inventory</h3>\n')
-    summary.write(rdiv)
-    summary.write('<i>This summary of database content is provided as a convenience to GIS analysts, reviewers, and others. It is not part of the GeMS compliance criteria.</i><br><br>\n')
-    for tb in tables:
-        summary.write(tb+', nonspatial table, '+str(numberOfRows(tb))+' rows<br>\n')
-    fds.sort()
-    for fd in fds:
-        summary.write(fd+', feature dataset, ')
-        srfName = arcpy.Describe(fd).spatialReference.name
-        summary.write('<i>'+srfName+'</i><br>\n')
-        arcpy.env.workspace = fd
-        fcs = arcpy.ListFeatureClasses()
-        fcs.sort()
-        for fc in fcs:
-            dsc = arcpy.Describe(fc)
-            if dsc.featureType == 'Annotation':
-                shp = 'annotation'
-            elif dsc.featureType <> 'Simple':
-                shp = dsc.featureType
-            else:
-                shp = dsc.shapeType.lower()
-            summary.write(space4+fc+', '+shp+' feature class, '+str(numberOfRows(fc))+' rows<br>\n')
-        arcpy.env.workspace = inGdb
-    summary.write(divend)
-
-summary.close()
-errors.close()
-addMsgAndPrint('DONE')
+            summary.write('<th>'+f[0]+'</th>')
+        summary.write('</tr>\n')       
+        # open search cursor on DMU sorted by HKey
+        sql = (None, 'ORDER BY HierarchyKey')
+        # see note in changelog in header
+        with arcpy.da.SearchCursor('DescriptionOfMapUnits',('MapUnit', 'HierarchyKey'),None,None,False,sql) as cursor:
+            for row in cursor:
+                mu = row[0]
+                if notEmpty(mu):
+                    summary.write('<tr><td>'+fixSpecialChars(mu)+'</td><td>X</td>')   #  2nd cell: value is, by definition, in DMU               
+                    for f in fds_MapUnits:
+                        if mu in f[1]:
+                            summary.write('<td>X</td>')
+                        else:
+                            summary.write('<td>---</td>')
+                    summary.write('</tr>\n')
+        # for mapunits not in DMU 
+        for aline in missingDmuMapUnits[1:]:
+            mu = aline.split(',')[0]
+            summary.write('<tr><td>'+str(mu)+'</td><td>---</td>')
+            for f in fds_MapUnits:
+                if mu in f[1]:
+                    summary.write('<td>X</td>')
+                else:
+                    summary.write('<td>---</td>')
+            summary.write('</tr>\n')
+        summary.write('</table>\n')
+        summary.write(divend)
+
+    ###CONTENTS OF NONSPATIAL TABLES
+        addMsgAndPrint('  dumping contents of nonspatial tables')
+        summary.write('<h3><a name="Contents_Nonspatial"></a>Contents of Nonspatial Tables</h3>\n')
+        for tb in tables:
+            if tb <> 'GeoMaterialDict':
+                summary.write(rdiv)
+                summary.write('<h4><a name="'+tb+'"></a>'+tb+'</h4>\n')
+                tableToHtml(tb,summary)
+                summary.write(divend)
+
+    ###DATABASE INVENTORY
+        addMsgAndPrint('  writing database inventory')
+        summary.write('<h3><a name="Database_Inventory"></a>Database Inventory</h3>\n')
+        summary.write(rdiv)
+        summary.write('<i>This summary of database content is provided as a convenience to GIS analysts, reviewers, and others. It is not part of the GeMS compliance criteria.</i><br><br>\n')
+        for tb in tables:
+            summary.write(tb+', nonspatial table, '+str(numberOfRows(tb))+' rows<br>\n')
+        fds.sort()
+        for fd in fds:
+            summary.write(fd+', feature dataset, ')
+            srfName = arcpy.Describe(fd).spatialReference.name
+            summary.write('<i>'+srfName+'</i><br>\n')
+            arcpy.env.workspace = fd
+            fcs = arcpy.ListFeatureClasses()
+            fcs.sort()
+            for fc in fcs:
+                dsc = arcpy.Describe(fc)
+                if dsc.featureType == 'Annotation':
+                    shp = 'annotation'
+                elif dsc.featureType <> 'Simple':
+                    shp = dsc.featureType
+                else:
+                    shp = dsc.shapeType.lower()
+                summary.write(space4+fc+', '+shp+' feature class, '+str(numberOfRows(fc))+' rows<br>\n')
+            arcpy.env.workspace = inGdb
+        summary.write(divend)
+
+    summary.close()
+    errors.close()
+    addMsgAndPrint('DONE')
 
 """
 To be done:
@@ -0,0 +1,534 @@
+# GeMS_ValidateScan.py
+# table-scanning engine for GeMS_ValidateDatabase_Arc10.py
+# 18 October 2026: split out of GeMS_ValidateDatabase_Arc10.py. scanTable no longer writes
+#   to global variables in the validation script. Instead it returns a TableScan object
+#   that the validation script merges into its reports. Because a TableScan contains only
+#   strings and lists, tables can be scanned in parallel by worker processes (see scanTables)
+#   TableScan objects may also be cached between runs, keyed by a fingerprint of each
+#   table (see tableFingerprint, loadScanCache, saveScanCache)
+# 18 October 2026: tables are read through GeMS_DataAccess, with paths built from each job's
+#   workspace rather than by setting arcpy.env.workspace, so that a GeoPackage can be scanned
+#   without ArcGIS. KeyRegistry moved here from GeMS_ValidateDatabase_Arc10.py
+# 18 October 2026: tableFingerprint hashes every row of every table. Sampling the rows of
+#   large tables let an edit to an unsampled row go unnoticed, and a stale TableScan be reused.
+#   scanTables reports which tables were taken from the cache
+# 18 October 2026: hashing every row made fingerprinting a large table nearly as slow as
+#   scanning it. tableFingerprint now uses the latest edit date where editor tracking keeps
+#   one, and otherwise hashes the first and last rows and rows at fixed OBJECTID strides
+
+import os, os.path, sys, copy
+import traceback
+import hashlib
+import cPickle as pickle
+from GeMS_utilityFunctions import *
+from GeMS_Definition import *
+import GeMS_Definition
+import GeMS_DataAccess
+
+debug = False
+
+space4 = '&nbsp;&nbsp;&nbsp;&nbsp;'
+
+# fields we don't want listed or described when inventorying dataset:
+standardFields = ('OBJECTID','SHAPE','Shape','SHAPE_Length','SHAPE_Area','ZOrder',
+                  'AnnotationClassID','Status','TextString','FontName','FontSize','Bold',
+                  'Italic','Underline','VerticalAlignment','HorizontalAlignment',
+                  'XOffset','YOffset','Angle','FontLeading','WordSpacing','CharacterWidth',
+		  'CharacterSpacing','FlipAngle','Override','Shape_Length','Shape_Area',
+                  'last_edited_date','last_edited_user','created_date','created_user')
+lcStandardFields = []
+for f in standardFields:
+    lcStandardFields.append(f.lower())
+
+# fields whose values must be defined in Glossary
+definedTermFieldsList = ('Type','ExistenceConfidence','IdentityConfidence','ParagraphStyle','GeoMaterialConfidence',
+                         'ErrorMeasure','AgeUnits','LocationMethod','ScientificConfidence')
+
+class TableScan:
+    # Results of scanning one table or feature class
+    #   Lists of HTML-formatted report lines are appended, in order, to the matching
+    #   lists in the validation script. Defined key values and references to key values
+    #   are added to its KeyRegistry objects. References are [value, field], unique
+    #   within the table and in order of first occurrence.
+    def __init__(self, table, fds=''):
+        self.table = table
+        self.fds = fds
+        self.mapUnits = []          # MapUnit values in table (other than DMU)
+        self.schemaExtensions = []
+        self.schemaErrors = []      # missing or mis-defined fields
+        self.otherWarnings = []
+        self.glossaryTerms = []     # Term values in Glossary
+        self.dataSourceIDs = []     # DataSources_ID values in DataSources
+        self.dmuMapUnits = []       # MapUnit values in DescriptionOfMapUnits
+        self.IDs = []               # _ID values
+        self.glossaryRefs = []
+        self.dataSourceRefs = []
+        self.mapUnitRefs = []
+        self.hKeys = []
+        self.geoMaterials = []
+        self.missingRequiredValues = []
+        self.zeroLengthStrings = []
+        self.leadingTrailingSpaces = []
+
+class KeyRegistry:
+    # Index of key values (Glossary terms, DataSources_IDs, DMU MapUnits, _IDs) and
+    #   of the references to them from elsewhere in the database. Replaces lists that
+    #   were searched with "in", so that matching is linear in the number of rows.
+    #     defined = {value: {table: number of times value is defined in table}}
+    #     refs = set of (value, field, table)
+    #     firstRef = {value: (field, table)} of first reference to value, for reporting
+    def __init__(self):
+        self.defined = {}
+        self.refs = set()
+        self.firstRef = {}
+    def define(self, value, table):
+        tables = self.defined.setdefault(value, {})
+        tables[table] = tables.get(table, 0) + 1
+    def addRef(self, value, field, table):
+        key = (value, field, table)
+        if not key in self.refs:
+            self.refs.add(key)
+            if not value in self.firstRef:
+                self.firstRef[value] = (field, table)
+    def missing(self):
+        # [value, field, table] for first reference to each value that is not defined
+        missing = []
+        for value in set(self.firstRef).difference(self.defined):
+            field, table = self.firstRef[value]
+            missing.append([value, field, table])
+        return missing
+    def unused(self):
+        # defined values that are never referenced, repeated as often as they are defined
+        unused = []
+        for value in set(self.defined).difference(self.firstRef):
+            unused.extend([value] * sum(self.defined[value].values()))
+        return unused
+    def duplicates(self):
+        # sorted list of values defined more than once
+        dups = [v for v in self.defined if sum(self.defined[v].values()) > 1]
+        dups.sort()
+        return dups
+    def duplicateDefinitions(self):
+        # [value, table] for values defined more than once. As with the old sort-and-compare
+        #   approach, the first (alphabetical) table is only listed if it holds the value twice
+        dups = []
+        for value in self.duplicates():
+            tables = self.defined[value]
+            tbs = sorted(tables)
+            if tables[tbs[0]] > 1:
+                dups.append([value, tbs[0]])
+            for tb in tbs[1:]:
+                dups.append([value, tb])
+        dups.sort()
+        return dups
+
+def fixSpecialChars(s):
+    try:
+        return s.encode('ascii','xmlcharrefreplace')
+    except:
+        addMsgAndPrint('**'+s)
+        return 'failed to encode special chars'
+
+def tablePath(workspace, table):
+    if workspace:
+        return os.path.join(workspace, table)
+    return table
+
+def checkFieldDefinitions(scan, def_table, compare_table=None, workspace=''):
+    """Compares the fields in a compare_table to those in a controlled def_table
+       There are three arguments, one optional, to catch the case where, for example
+       we want to compare the fields in CSAMapUnitPolys with MapUnitPolys.
+       tableDict will not have the key 'CSAMapUnitPolys'. The key MapUnitPolys is derived in
+       def ScanTable from CSAMapUnitPolys as the table to which it should be compared.
+       If the compare_table IS the name of a table in the GeMS definition; it doesn't need to be derived,
+       it does not need to be supplied.
+       Errors and extensions are appended to scan, a TableScan object.
+       compare_table is in workspace.
+    """
+
+    # build dictionary of required fields
+    requiredFields = {}
+    optionalFields = {}
+    requiredFieldDefs = copy.deepcopy(tableDict[def_table])
+    if compare_table:
+        # update the definition of the _ID field to include a 'CSX' prefix
+        prefix = compare_table[:3]
+        id_item = [n for n in requiredFieldDefs if n[0] == def_table + '_ID']
+        new_id = prefix + id_item[0][0]
+        i = requiredFieldDefs.index(id_item[0])
+        requiredFieldDefs[i][0] = new_id
+    else:
+        compare_table = def_table
+
+    for fieldDef in requiredFieldDefs:
+        if fieldDef[2] <> 'Optional':
+            requiredFields[fieldDef[0]] = fieldDef
+        else:
+            optionalFields[fieldDef[0]] = fieldDef
+    # build dictionary of existing fields
+    try:
+        existingFields = {}
+        fields = GeMS_DataAccess.listFields(tablePath(workspace, compare_table))
+        for field in fields:
+          existingFields[field.name] = field
+        # now check to see what is excess / missing
+        for field in requiredFields.keys():
+          if field not in existingFields:
+            scan.schemaErrors.append('<span class="table">'+compare_table+
+                                     '</span>, field <span class="field">'+field+'</span> is missing')
+        for field in existingFields.keys():
+            if not (field.lower() in lcStandardFields) and not (field in requiredFields.keys()) and not (field in optionalFields.keys()):
+                scan.schemaExtensions.append('<span class="table">'+compare_table+'</span>, field <span class="field">'+field+'</span>')
+            # check field definition
+            fType = existingFields[field].type
+            if field in requiredFields.keys() and fType <> requiredFields[field][1]:
+                scan.schemaErrors.append('<span class="table">'+compare_table+'</span>, field <span class="field">'+
+                                         field+'</span>, type should be '+requiredFields[field][1])
+            if field in optionalFields.keys() and fType <> optionalFields[field][1]:
+                scan.schemaErrors.append('<span class="table">'+compare_table+'</span>, field <span class="field">'+
+                                         field+'</span>, type should be '+optionalFields[field][1])
+    except Exception:
+        s = traceback.format_exc()
+        addMsgAndPrint(s)
+        scan.schemaErrors.append('<span class="table">'+compare_table+
+                                 '</span> could not get field list. Fields not checked.')
+
+def notEmpty(x):
+    # will fail on not-String values of x
+    if x <> None and x.strip() <> '':
+        return True
+    else:
+        return False
+
+def empty(x):
+    if x == None:
+        return True
+    try:
+        if x.strip() == '':
+            return True
+        else:
+            return False
+    except:  # Fail because we tried to strip() on a non-string value
+        return False
+
+def isBadNull(x):
+    try:
+        if str(x).lower() == '<null>' or str(x) == '' or str(x).strip() == '':
+            return True
+    except:
+        return False
+    else:
+        return False
+
+def fixNull(x):
+    x = x.encode('ascii','xmlcharrefreplace')
+    if x.lower() == '<null>':
+        return '&lt;Null&gt;'
+    else:
+        return x
+
+def addRef(refs, refSet, value, field):
+    # appends [value, field] to refs if it is not already there
+    if not (value, field) in refSet:
+        refSet.add((value, field))
+        refs.append([value, field])
+
+def scanTable(table, fds='', workspace=''):
+    # scans table (in workspace) and returns a TableScan object
+    addMsgAndPrint('  scanning '+table)
+    scan = TableScan(table, fds)
+    if debug:
+        addMsgAndPrint('wksp = '+workspace)
+    path = tablePath(workspace, table)
+    dsc = GeMS_DataAccess.describe(path)
+### check table and field definition against GeMS_Definitions
+    if table == 'GeoMaterialDict':
+        return scan
+    elif tableDict.has_key(table):  # table is defined in GeMS_Definitions
+        isExtension = False
+        fieldDefs = tableDict[table]
+        checkFieldDefinitions(scan, table, None, workspace)
+    elif fds[:12] == 'CrossSection' and table[:3] == 'CS'+fds[12] and tableDict.has_key(table[3:]):
+        isExtension = False
+        fieldDefs = tableDict[table[3:]]
+        checkFieldDefinitions(scan, table[3:], table, workspace)
+
+    else:  # is an extension
+        isExtension = True
+        scan.schemaExtensions.append(dsc.dataType+' <span class="table">'+table+'</span>')
+### check for edit tracking
+    if dsc.editorTrackingEnabled:
+        scan.otherWarnings.append('Editor tracking is enabled on <span class="table">'+table+'</span>')
+### assign fields to categories:
+    fields = GeMS_DataAccess.listFields(path)
+    fieldNames = [f.name for f in fields]
+    #HKeyfield
+    if table == 'DescriptionOfMapUnits' and 'HierarchyKey' in fieldNames:
+        hasHKey = True
+        hKeyIndex = fieldNames.index('HierarchyKey')
+    else: hasHKey = False
+    #idField
+    idField = table+'_ID'
+    if idField in fieldNames:
+        hasIdField = True
+        idIndex = fieldNames.index(idField)
+    else:
+        hasIdField = False
+        if isExtension:
+            scan.schemaErrors.append('<span class="table">'+table+'</span> lacks an _ID field')
+    #Term field
+    if table == 'Glossary' and 'Term' in fieldNames:
+        hasTermField = True
+        termFieldIndex = fieldNames.index('Term')
+    else:
+        hasTermField = False
+    dataSourceIndices = []
+    glossTermIndices = []
+    noNullsFieldIndices = []
+    stringFieldIndices = []
+    mapUnitFieldIndex = []
+    geoMaterialFieldIndex = []
+    specialDmuFieldIndices = []
+    for f in fieldNames:
+        # dataSource fields
+        if f.find('SourceID') > -1:
+            dataSourceIndices.append(fieldNames.index(f))
+        # Glossary term fields
+        if f in definedTermFieldsList:
+            glossTermIndices.append(fieldNames.index(f))
+        # MapUnit fields
+        if f == 'MapUnit':
+            mapUnitFieldIndex.append(fieldNames.index(f))
+        fUpper = f.upper()
+        if fUpper == 'OBJECTID':
+            objIdIndex = fieldNames.index(f)
+        # GeoMaterial fields
+        if f == 'GeoMaterial':
+            geoMaterialFieldIndex.append(fieldNames.index(f))
+        # NoNulls fields
+        if not isExtension:
+            for fdef in fieldDefs:
+                if f == fdef[0] and fdef[2]=='NoNulls':
+                    noNullsFieldIndices.append(fieldNames.index(f))
+        # String fields
+        for ff in fields:
+            if f == ff.baseName and ff.type == 'String':
+                stringFieldIndices.append(fieldNames.index(f))
+    #special DMU fields, cannot be null if MapUnit is non-mull
+        if table == 'DescriptionOfMapUnits' and f in ('FullName','Age','GeoMaterial','GeoMaterialConfidence','DescriptionSourceID'):
+            specialDmuFieldIndices.append(fieldNames.index(f))
+
+    mapUnitSet = set()
+    glossaryRefSet = set()
+    dataSourceRefSet = set()
+    mapUnitRefSet = set()
+    geoMaterialSet = set()
+### open search cursor and run through rows
+    with GeMS_DataAccess.searchCursor(path, fieldNames) as cursor:
+        for row in cursor:
+            if hasHKey and row[hKeyIndex]<>None:
+                scan.hKeys.append(row[hKeyIndex])
+            if hasTermField:
+                xx = row[termFieldIndex]
+                if notEmpty(xx):
+                    #addMsgAndPrint(xx)
+                    scan.glossaryTerms.append(fixNull(xx))       # fixNull does xmlcharrefreplace
+            if hasIdField:
+                xx = row[idIndex]
+                if notEmpty(xx):
+                    scan.IDs.append(xx)
+                    if table == 'DataSources':
+                        scan.dataSourceIDs.append(fixNull(xx))
+            for i in mapUnitFieldIndex:
+                xx = row[i]
+                if notEmpty(xx):
+                    if table == 'DescriptionOfMapUnits':
+                        scan.dmuMapUnits.append(fixNull(xx))
+                    else:
+                        if not xx in mapUnitSet:
+                            mapUnitSet.add(xx)
+                            scan.mapUnits.append(fixNull(xx))
+                        addRef(scan.mapUnitRefs, mapUnitRefSet, row[i], 'MapUnit')
+            for i in noNullsFieldIndices:
+                xx = row[i]
+                if empty(xx) or isBadNull(xx):
+                    scan.missingRequiredValues.append('<span class="table">'+table+'</span>, field <span class="field">'+
+                                                      fieldNames[i]+'</span>, ObjectID '+str(row[objIdIndex]))
+            for i in stringFieldIndices:
+                xx = row[i]
+                oxxft = '<span class="table">'+table+'</span>, field <span class="field">'+fieldNames[i]+'</span>, ObjectID '+str(row[objIdIndex])
+                if i not in noNullsFieldIndices and xx <> None and (xx.strip() == '' or xx.lower()=='<null>'):
+                    scan.zeroLengthStrings.append(oxxft)
+                if xx <> None and xx.strip() <> '' and xx.strip() <> xx:
+                    scan.leadingTrailingSpaces.append(space4+oxxft)
+            for i in geoMaterialFieldIndex:
+                if notEmpty(row[i]):
+                    if not row[i] in geoMaterialSet:
+                        geoMaterialSet.add(row[i])
+                        scan.geoMaterials.append(row[i])
+            for i in glossTermIndices:
+                if notEmpty(row[i]):
+                    addRef(scan.glossaryRefs, glossaryRefSet, fixSpecialChars(row[i]), fieldNames[i]) #$@
+            for i in dataSourceIndices:
+                xx = row[i]
+                if notEmpty(xx):
+                    ids = [e.strip() for e in xx.split('|') if e.strip()]
+                    for xxref in ids:
+                        addRef(scan.dataSourceRefs, dataSourceRefSet, xxref, fieldNames[i])
+            if mapUnitFieldIndex <> [] and row[mapUnitFieldIndex[0]] <> None:
+                for i in specialDmuFieldIndices:
+                    xx = row[i]
+                    if empty(xx) or isBadNull(xx):
+                        scan.missingRequiredValues.append('<span class="table">'+table+'</span>, field <span class="field">'+
+                                                          fieldNames[i]+'</span>, ObjectID '+str(row[objIdIndex]))
+
+    return scan
+
+# change scanCacheVersion whenever scanTable, TableScan, or tableFingerprint changes, so that
+#   old caches are ignored
+scanCacheVersion = 3
+
+# tableFingerprint hashes the first and last fingerprintRows rows of a table, and the rows at
+#   about fingerprintStrides evenly spaced OBJECTIDs in between
+fingerprintRows = 100
+fingerprintStrides = 1000
+
+def tableFingerprint(table, workspace=''):
+    # returns a summary of table (in workspace): number of rows, maximum OBJECTID, hash of
+    #   schema, and either the latest edit date, if editor tracking records one, or a hash of
+    #   the attributes of a sample of rows. Returns None if table has no OBJECTID field.
+    #   Shapes are not hashed, as scanTable does not look at them
+    # Without editor tracking, an edit that changes no sampled row, nor the number of rows,
+    #   is not noticed. That is why the scan cache is off unless asked for
+    path = tablePath(workspace, table)
+    dsc = GeMS_DataAccess.describe(path)
+    if not dsc.hasOID:
+        return None
+    oidField = dsc.OIDFieldName
+    fields = GeMS_DataAccess.listFields(path)
+    schema = [dsc.editorTrackingEnabled]
+    hashFields = []
+    for f in fields:
+        schema.append([f.name, f.type, f.length, f.isNullable])
+        if not f.type in ('Geometry','Blob','Raster'):
+            hashFields.append(f.name)
+    schemaHash = hashlib.md5(repr(schema)).hexdigest()
+    nRows = GeMS_DataAccess.getCount(path)
+    def firstRows(fields, orderBy, where=None, n=fingerprintRows):
+        rows = []
+        if n > 0:
+            with GeMS_DataAccess.searchCursor(path, fields, where, orderBy) as cursor:
+                for row in cursor:
+                    rows.append(row)
+                    if len(rows) == n:
+                        break
+        return rows
+    maxOID = None
+    lastOID = firstRows([oidField], oidField+' DESC', None, 1)
+    if lastOID <> []:
+        maxOID = lastOID[0][0]
+    editedAt = getattr(dsc, 'editedAtFieldName', '')
+    if dsc.editorTrackingEnabled and editedAt:
+        lastEdit = firstRows([editedAt], editedAt+' DESC', editedAt+' IS NOT NULL', 1)
+        if lastEdit <> []:
+            return [nRows, maxOID, schemaHash, str(lastEdit[0][0])]
+    rowHash = hashlib.md5()
+    if nRows <= 2*fingerprintRows + fingerprintStrides:
+        for row in firstRows(hashFields, oidField, None, nRows):
+            rowHash.update(repr(row))
+    else:
+        head = firstRows(hashFields+[oidField], oidField)
+        tail = firstRows(hashFields+[oidField], oidField+' DESC')
+        lo = head[-1][-1]
+        hi = tail[-1][-1]
+        step = max(1, (hi - lo) // (fingerprintStrides + 1))
+        oids = range(lo + step, hi, step)[:fingerprintStrides]
+        middle = []
+        for i in range(0, len(oids), 250):
+            where = oidField+' IN ('+','.join([str(oid) for oid in oids[i:i+250]])+')'
+            middle = middle + firstRows(hashFields+[oidField], oidField, where, len(oids))
+        for row in head + middle + tail:
+            rowHash.update(repr(row))
+    return [nRows, maxOID, schemaHash, rowHash.hexdigest()]
+
+def loadScanCache(cacheFile):
+    # returns dictionary of cached TableScans, {(workspace, table, fds): [fingerprint, TableScan]}
+    #   Returns an empty dictionary if cacheFile doesn't exist or was written by another version
+    if not os.path.exists(cacheFile):
+        return {}
+    try:
+        f = open(cacheFile, 'rb')
+        version, scans = pickle.load(f)
+        f.close()
+    except:
+        addMsgAndPrint('  could not read '+cacheFile+', ignoring it')
+        return {}
+    if version <> [scanCacheVersion, GeMS_Definition.versionString]:
+        return {}
+    return scans
+
+def saveScanCache(cacheFile, cache):
+    try:
+        f = open(cacheFile, 'wb')
+        pickle.dump([[scanCacheVersion, GeMS_Definition.versionString], cache], f, pickle.HIGHEST_PROTOCOL)
+        f.close()
+    except:
+        addMsgAndPrint('  could not write '+cacheFile)
+
+def scanJob(job):
+    # job is [workspace, table, fds]. Runs in a worker process if scanTables uses a pool
+    return scanTable(job[1], job[2], job[0])
+
+def scanTables(jobs, workers=1, cache=None):
+    # scans each [workspace, table, fds] in jobs and returns a list of TableScan objects
+    #   in the same order as jobs, so that results merge in the same order whether
+    #   or not they were obtained in parallel
+    # cache, if not None, is a dictionary from loadScanCache. Tables whose fingerprint
+    #   matches the cached fingerprint are not re-scanned, and cache is updated in place
+    scans = [None] * len(jobs)
+    fingerprints = [None] * len(jobs)
+    dirty = []  # indices of jobs that must be scanned
+    for n in range(len(jobs)):
+        key = tuple(jobs[n])
+        if cache <> None:
+            fingerprints[n] = tableFingerprint(jobs[n][1], jobs[n][0])
+            if fingerprints[n] <> None and key in cache and cache[key][0] == fingerprints[n]:
+                scans[n] = cache[key][1]
+                addMsgAndPrint('  '+jobs[n][1]+' unchanged since last validation, using cached scan')
+                continue
+        dirty.append(n)
+    if cache <> None:
+        addMsgAndPrint('  '+str(len(jobs)-len(dirty))+' of '+str(len(jobs))+' tables and feature classes unchanged since last validation')
+    dirtyJobs = [jobs[n] for n in dirty]
+    if workers > 1 and len(dirtyJobs) > 1:
+        workers = min(workers, len(dirtyJobs))
+        addMsgAndPrint('  scanning '+str(len(dirtyJobs))+' tables and feature classes with '+str(workers)+' worker processes')
+        newScans = poolMap(scanJob, dirtyJobs, workers)
+        for scan in newScans:
+            addMsgAndPrint('  scanned '+scan.table)
+    else:
+        newScans = []
+        for job in dirtyJobs:
+            newScans.append(scanJob(job))
+    for n, scan in zip(dirty, newScans):
+        scans[n] = scan
+    if cache <> None:
+        # replace cache contents, which drops tables that no longer exist
+        cache.clear()
+        for n in range(len(jobs)):
+            if fingerprints[n] <> None:
+                cache[tuple(jobs[n])] = [fingerprints[n], scans[n]]
+    return scans
+
+def workspaceJobs(workspace):
+    # returns scanTables jobs, [workspace, table, fds], for every table and feature class
+    #   in workspace and its feature datasets
+    jobs = []
+    for table in GeMS_DataAccess.listTables(workspace):
+        jobs.append([workspace, table, ''])
+    for fc in GeMS_DataAccess.listFeatureClasses(workspace):
+        jobs.append([workspace, fc, ''])
+    for fds in GeMS_DataAccess.listDatasets(workspace):
+        for fc in GeMS_DataAccess.listFeatureClasses(workspace, fds):
+            jobs.append([os.path.join(workspace, fds), fc, fds])
+    return jobs
@@ -5,6 +5,7 @@
 import arcpy, sys, time, os.path, math, uuid
 from string import whitespace
 from GeMS_utilityFunctions import *
+from GeMS_ReIDRules import *
 
 versionString = 'GeMS_reID_Arc10.py, version of 8 May 2023'
 rawurl = 'https://raw.githubusercontent.com/doi-usgs/gems-tools-arcmap/master/Scripts/GeMS_reID_Arc10.py'
@@ -18,44 +19,19 @@ checkVersion(versionString, rawurl, 'gems-tools-arcmap')
 #   MUP to MPT! With this table missing, a user reported that MUP_IDs were being written with the 
 #   prefix 'X3X'. I think it's absence is the reason for line "if tableName == 'MapUnitPoints'" 
 #   around line 208.  - Evan Thoms
+# 18 October 2026: idRootDict, idRoot, doReID, and the rules for making new ID values and
+#   purging quasi-null keys are now in GeMS_ReIDRules.py
+# 18 October 2026: rebuilt as two passes with arcpy.da cursors in one edit session, new
+#   primary keys first and then foreign keys. Field lists and sort keys come from the
+#   inventory instead of being read again for each table. Edits are saved table by table
+#   and logged to <database>_reID.checkpoint, so a run that is interrupted can be resumed
+#   by running the tool again with the same settings
+# 18 October 2026: a resumed run checks that a table's new _IDs were saved row by row, by
+#   OBJECTID, rather than in sort order, which is not fixed for rows with equal sort keys
+# 18 October 2026: the per-row steps are newPrimaryKey and remapForeignKeys in GeMS_ReIDRules.py
 
-idRootDict = {
-        'CartographicLines':'CAL',
-        'ContactsAndFaults':'CAF',
-        'CMULines':'CMULIN',
-        'CMUMapUnitPolys':'CMUMUP',
-        'CMUPoints':'CMUPNT',
-        'CMUText':'CMUTXT',
-        'DataSources':'DAS',
-        'DataSourcePolys':'DSP',
-        'DescriptionOfMapUnits':'DMU',
-        'ExtendedAttributes':'EXA',
-        'FossilPoints':'FSP',
-        'GenericPoints':'GNP',
-        'GenericSamples':'GNS',
-        'GeochemPoints':'GCM',
-        'GeochronPoints':'GCR',
-        'GeologicEvents':'GEE',
-        'GeologicLines':'GEL',
-        'Glossary':'GLO',
-        'IsoValueLines':'IVL',
-        'MapUnitPoints':'MPT',
-        'MapUnitPolys':'MUP',
-        'MapUnitOverlayPolys':'MUO',
-        'MiscellaneousMapInformation':'MMI',
-        'OrientationPoints':'ORP',
-        'OtherLines':'OTL',
-        'OverlayPolys':'OVP',
-        'PhotoPoints':'PHP',
-        'RepurposedSymbols':'RPS',
-        'Stations':'STA',
-        'StandardLithology':'STL',
-        'MapUnitPointAnno24k':'ANO'
-               }
-
-idDict = {}
+remap = IdRemap()  # old _ID: new _ID
 fctbs = []  # feature class and table inventory
-exemptedPrefixes = ('errors_','ed_')  # prefixes that flag a feature class as not permanent data
 
 
 def usage():
@@ -78,26 +54,11 @@ def usage():
 """
 
 
-def doReID(fc):
-    doReID = True
-    for exPfx in exemptedPrefixes:
-        if fc.find(exPfx) == 0:
-            doReID = False
-    return doReID
-
-
 def elapsedTime(lastTime):
     thisTime = time.time()
     addMsgAndPrint('    %.1f sec' %(thisTime - lastTime))
     return thisTime
 
-def idRoot(tb,rootCounter):
-    if tb in idRootDict:
-        return idRootDict[tb],rootCounter
-    else:
-        rootCounter = rootCounter + 1
-        return 'X'+str(rootCounter)+'X',rootCounter
-
 def getPFKeys(table):
     #addMsgAndPrint(table)
     fields2 = arcpy.ListFields(table)
@@ -112,9 +73,20 @@ def getPFKeys(table):
                 fKeys.append(field.name)
     addMsgAndPrint("  pKey: "+pKey)
     addMsgAndPrint("  fKeys: "+str(fKeys))
-    return pKey,fKeys
+    return pKey,fKeys,[f.name for f in fields2]
+
+def getSortKey(tableName,fieldNames):
+    if tableName == 'Glossary': return 'Term'
+    elif tableName == 'DescriptionOfMapUnits': return 'HierarchyKey'
+    elif tableName == 'StandardLithology': return 'MapUnit'
+    elif "OBJECTID" in fieldNames: return 'OBJECTID'
+    elif "objectid" in fieldNames: return 'objectid'
+    else:
+        addMsgAndPrint("Warning: OBJECTID field not present")
+        return ''
 
 def inventoryDatabase(dbf,noSources):
+    # fills fctbs with [dbf, fdset, table, pKey, fKeys, sortKey, fieldNames]
     arcpy.env.workspace = dbf
     tables = arcpy.ListTables()
     if noSources:  # then don't touch DataSource_ID values
@@ -124,8 +96,8 @@ def inventoryDatabase(dbf,noSources):
                 addMsgAndPrint('    skipping DataSources')
     for table in tables:
         addMsgAndPrint(" Table: "+table)
-        pKey,fKeys = getPFKeys(table)
-        fctbs.append([dbf,'',table,pKey,fKeys])
+        pKey,fKeys,fieldNames = getPFKeys(table)
+        fctbs.append([dbf,'',table,pKey,fKeys,getSortKey(table,fieldNames),fieldNames])
     fdsets = arcpy.ListDatasets()
     for fdset in fdsets:
         arcpy.env.workspace = dbf+'/'+fdset
@@ -133,96 +105,116 @@ def inventoryDatabase(dbf,noSources):
         for fc in fcs:
             addMsgAndPrint(" FC: " +fc)
             if doReID(fc): #Does a check for exempted prefixes
-                pKey,fKeys = getPFKeys(fc)
-                fctbs.append([dbf,fdset,fc,pKey,fKeys])
-
-def buildIdDict(table,sortKey,keyRoot,pKey,lastTime,useGUIDs):
-    addMsgAndPrint('  Setting new _IDs for '+table)
-    result = arcpy.GetCount_management(table)
-    nrows = int(result.getOutput(0))
-    width = int(math.ceil(math.log10(nrows+1)))
+                pKey,fKeys,fieldNames = getPFKeys(fc)
+                fctbs.append([dbf,fdset,fc,pKey,fKeys,getSortKey(fc,fieldNames),fieldNames])
     arcpy.env.workspace = dbf
-    edit = arcpy.da.Editor(arcpy.env.workspace)
+
+def saveEdits(edit,checkpoint,passNo,table):
+    # saves the edits made so far, bracketed by checkpoint records, and carries on
+    #   editing. Saving table by table is what lets an interrupted run be resumed
+    checkpoint.startSave(passNo,table)
+    edit.stopOperation()
+    edit.stopEditing(True)
+    checkpoint.endSave(passNo,table)
     edit.startEditing(False, True)
     edit.startOperation()
-    rows = arcpy.UpdateCursor(table,"","","",sortKey)
+
+def wasSaved(table,pKey,pairs):
+    # True if each row of table already has the new _ID that pairs ([oid, old, new]) gives it
+    if len(pairs) == 0:
+        return False
+    newIDs = {}
+    for oid,oldID,newID in pairs:
+        newIDs[oid] = newID
+    n = 0
+    with arcpy.da.SearchCursor(table,['OID@',pKey]) as rows:
+        for row in rows:
+            if not row[0] in newIDs or row[1] <> newIDs[row[0]]:
+                return False
+            n = n+1
+    return n == len(pairs)
+
+def buildIdDict(edit,table,sortKey,keyRoot,pKey,lastTime,useGUIDs,checkpoint):
+    pairs = checkpoint.maps.get(table,[])
+    # if the last run stopped while saving this table, its edits may or may not have been saved
+    if (1,table) in checkpoint.done or (checkpoint.saving == (1,table) and wasSaved(table,pKey,pairs)):
+        addMsgAndPrint('  New _IDs for '+table+' already saved')
+        for oid,oldID,newID in pairs:
+            if oldID <> '' and oldID <> None:
+                remap.add(oldID,newID)
+        if not (1,table) in checkpoint.done:
+            checkpoint.endSave(1,table)
+        return lastTime
+    addMsgAndPrint('  Setting new _IDs for '+table)
+    nrows = int(arcpy.GetCount_management(table).getOutput(0))
+    width = idWidth(nrows)
+    remap.startTable(keyRoot,width,nrows)
+    pairs = []
     n = 1
-    for row in rows:
-        oldID = row.getValue(pKey)
-        # calculate newID
-        if useGUIDs:
-            newID = str(uuid.uuid4())
-        else:
-            newID = keyRoot+str(n).zfill(width)
-        try:
-            row.setValue(pKey,newID)
-            rows.updateRow(row)
-        except:
-            print 'ERROR'
-            print 'pKey = '+str(pKey)+'  newID = '+str(newID)
-        n = n+1
-        #print oldID, newID
-        #add oldID,newID to idDict
-        if oldID <> '' and oldID <> None:
-            idDict[oldID] = newID
-    edit.stopOperation()
-    edit.stopEditing(True)
+    with arcpy.da.UpdateCursor(table,[pKey,'OID@'],sql_clause=(None,'ORDER BY '+sortKey)) as rows:
+        for row in rows:
+            oldID = row[0]
+            # calculate newID, and add oldID,newID to remap
+            newID = newPrimaryKey(remap,oldID,n,keyRoot,width,useGUIDs)
+            try:
+                row[0] = newID
+                rows.updateRow(row)
+            except:
+                print 'ERROR'
+                print 'pKey = '+str(pKey)+'  newID = '+str(newID)
+            pairs.append([row[1],oldID,newID])
+            n = n+1
+    checkpoint.writeMap(table,pairs)
+    saveEdits(edit,checkpoint,1,table)
     return elapsedTime(lastTime)
 
-def reID(table,keyFields,lastTime,outfile):
+def reID(edit,table,keyFields,lastTime,outfile,checkpoint):
+    if (2,table) in checkpoint.done:
+        addMsgAndPrint('  IDs for '+table+' already reset')
+        return lastTime
     addMsgAndPrint('  resetting IDs for '+table)
-    arcpy.env.workspace = dbf
-    edit = arcpy.da.Editor(arcpy.env.workspace)
-    edit.startEditing(False, True)
-    edit.startOperation()
-    rows = arcpy.UpdateCursor(table)
-    n = 1
-    row = rows.next()
-    while row:
-        for field in keyFields:
-            oldValue = row.getValue(field)
-            if oldValue in idDict:
-                row.setValue(field,idDict[oldValue])
-            else:
-                outfile.write(table+' '+field+' '+str(oldValue)+'\n')
-        rows.updateRow(row)
-        n = n+1
-        row = rows.next()
-    edit.stopOperation()
-    edit.stopEditing(True)
+    with arcpy.da.UpdateCursor(table,keyFields) as rows:
+        for row in rows:
+            for i in remapForeignKeys(remap,row):
+                outfile.write(table+' '+keyFields[i]+' '+str(row[i])+'\n')
+            rows.updateRow(row)
+    saveEdits(edit,checkpoint,2,table)
     return elapsedTime(lastTime)
 
 def main(lastTime, dbf, useGUIDs, noSources):
     rootCounter = 0
+    checkpoint = ReIDCheckpoint(dbf+'_reID.checkpoint')
+    resuming = checkpoint.exists()
+    if resuming:
+        checkpoint.load()
+        if checkpoint.settings <> [useGUIDs, noSources]:
+            addMsgAndPrint('Checkpoint file '+checkpoint.path+' is from a run with UseGUIDs, noSources = '+
+                           str(checkpoint.settings)+'.')
+            addMsgAndPrint('Re-run with those settings to finish that run, or restore the database from backup and delete the checkpoint file.')
+            forceExit()
+        if checkpoint.saving <> None and checkpoint.saving[0] == 2:
+            addMsgAndPrint('Last run stopped while saving new foreign keys for '+checkpoint.saving[1]+
+                           ', which may be partly rewritten. Restore the database from backup and delete '+checkpoint.path+'.')
+            forceExit()
+        addMsgAndPrint('Resuming reID from checkpoint file '+checkpoint.path)
+        checkpoint.open()
+    else:
+        checkpoint.open([useGUIDs, noSources])
     addMsgAndPrint('Inventorying database')
     inventoryDatabase(dbf, noSources)
     addMsgAndPrint("Inventory done...")
     addMsgAndPrint("--------------------------")
     #lastTime = elapsedTime(lastTime)
-    arcpy.env.workspace = dbf
+    edit = arcpy.da.Editor(dbf)
+    edit.startEditing(False, True)
+    edit.startOperation()
     addMsgAndPrint('Cycling through inventory')
-    addMsgAndPrint(str(fctbs))
     for fctb in fctbs:
-            addMsgAndPrint(fctb)
+            addMsgAndPrint(fctb[:6])
             arcpy.env.workspace = fctb[0]+fctb[1]
             tabName = tableName = fctb[2]
-            pKey,fKeys = getPFKeys(tableName) #Why does this have to be called again (already in inventorDatadase)
-            #TODO figure out the intention behind the next two line more - creates an error for me
-            # if tableName == 'MapUnitPoints':
-            #     pKey = 'MapUnitPolys_ID'
-            fields = arcpy.ListFields(tableName)
-            fieldNames = [x.name for x in fields]
-            if "OBJECTID" in fieldNames:
-                case = "UPPER"
-            elif "objectid" in fieldNames:
-                case = "LOWER"
-            if tableName == 'Glossary': sortKey = 'Term A'
-            elif tableName == 'DescriptionOfMapUnits': sortKey = 'HierarchyKey A'
-            elif tableName == 'StandardLithology': sortKey = 'MapUnit A'
-            elif case == "UPPER": sortKey = 'OBJECTID A'
-            elif case == "LOWER": sortKey = 'objectid A'
-            else:
-                addMsgAndPrint("Warning: OBJECTID field not present")
+            pKey = fctb[3]
+            sortKey = fctb[5]
             # deal with naming of CrossSection tables as CSxxTableName
             if fctb[1].find('CrossSection') == 0:
                     csSuffix = fctb[1][12:]
@@ -233,29 +225,31 @@ def main(lastTime, dbf, useGUIDs, noSources):
             else:
                     prefix = idRt
             if pKey <> '':
-                if sortKey[:-2] in fieldNameList(tableName):
-                    lastTime = buildIdDict(tableName,sortKey,prefix,pKey,lastTime,useGUIDs)
+                if sortKey <> '' and sortKey in fctb[6]:
+                    lastTime = buildIdDict(edit,tableName,sortKey,prefix,pKey,lastTime,useGUIDs,checkpoint)
                 else:
-                    addMsgAndPrint('Skipping '+tableName+', no field '+sortKey[:-2])
+                    addMsgAndPrint('Skipping '+tableName+', no field '+sortKey)
 
-    # purge IdDict of quasi-null keys
+    # purge remap of quasi-null keys
     addMsgAndPrint('Purging idDict of quasi-null keys')
-    idKeys = idDict.keys()
-    for key in idKeys:
-            if len(key.split()) == 0:
-                    print 'NullKey', len(key)
-                    del idDict[key]
+    for key in purgeQuasiNullKeys(remap.ids):
+            print 'NullKey', len(key)
 
-    outfile = open(dbf+'.txt','w')
-    outfile.write('Database '+dbf+'. \nList of ID values that do not correspond to any primary key in the database\n')
-    outfile.write('--table---field----field value---\n')
+    if resuming and os.path.exists(dbf+'.txt'):
+        outfile = open(dbf+'.txt','a')
+    else:
+        outfile = open(dbf+'.txt','w')
+        outfile.write('Database '+dbf+'. \nList of ID values that do not correspond to any primary key in the database\n')
+        outfile.write('--table---field----field value---\n')
     for fctb in fctbs:
             arcpy.env.workspace = fctb[0]+fctb[1]
             keyFields = fctb[4]
-            #keyFields.append(fctb[3])
-            if fctb[3] <> '':  # primary key is identified as '' (i.e., doesn't exist, so not an NCGMP09 feature class)
-                lastTime = reID(fctb[2],keyFields,lastTime,outfile)
+            if fctb[3] <> '' and len(keyFields) > 0:  # primary key is identified as '' (i.e., doesn't exist, so not an NCGMP09 feature class)
+                lastTime = reID(edit,fctb[2],keyFields,lastTime,outfile,checkpoint)
     outfile.close()
+    edit.stopOperation()
+    edit.stopEditing(True)
+    checkpoint.remove()
     return lastTime
 
 ### START HERE ###
@@ -263,6 +257,7 @@ def main(lastTime, dbf, useGUIDs, noSources):
 startTime = time.time()
 lastTime = time.time()
 useGUIDs = False
+noSources = False
 addMsgAndPrint(versionString)
 
 if not os.path.exists(sys.argv[1]):
@@ -1,219 +1,349 @@
-# utility functions for scripts that work with GeMS geodatabase schema
-## 28 December 2020: added function editSessionActive(gdb)   - RH
-## 7 March 2021: Extended list of keywords for isPlanar()
-# 24 August 2021: editSessionActive now looks for ed.lock files in gdb folder. Was running into 
-#   problems with gdb's that did not have GeoMaterialDict. Though a violation of the schema, discovering
-#   that absence is not the point of editSessionActive. Looking for ed.lock files is very easy. This won't 
-#   be a good method if trying to validate a format other than gdb, but we'll kick the can until then.
-
-import arcpy
-import os.path
-import time
-import glob
-import requests
-editPrefixes = ('xxx','edit_','errors_','ed_')
-debug = False
-
-# I. General utilities
-
-# tests for null string values and <Null> numeric values
-# Does not test for numeric nulls -9, -9999, etc. 
-def stringIsGeMSNull(val):
-    if val == None:
-        return True
-    elif isinstance(val,(basestring)) and val in ('#', '#null'):
-        return True
-    else:
-        return False
-
-def addMsgAndPrint(msg, severity=0): 
-    # prints msg to screen and adds msg to the geoprocessor (in case this is run as a tool) 
-    print msg 
-    try: 
-        for string in msg.split('\n'): 
-            # Add appropriate geoprocessing message 
-            if severity == 0: 
-                arcpy.AddMessage(string) 
-            elif severity == 1: 
-                arcpy.AddWarning(string) 
-            elif severity == 2: 
-                arcpy.AddError(string) 
-    except: 
-        pass
-
-def forceExit():
-    addMsgAndPrint('Forcing exit by raising ExecuteError')
-    raise arcpy.ExecuteError
-
-def numberOfRows(aTable):
-    return int(str(arcpy.GetCount_management(aTable)))
-
-def testAndDelete(fc):
-    if arcpy.Exists(fc):
-        arcpy.Delete_management(fc)
-
-def fieldNameList(aTable):
-    fns = arcpy.ListFields(aTable)
-    fns2 = []
-    for fn in fns:
-        fns2.append(fn.name)
-    return fns2
-
-def writeLogfile(gdb,msg):
-    timeUser = '['+time.asctime()+']['+os.environ['USERNAME']+'] '
-    logfileName = os.path.join(gdb,'00log.txt')
-    try:
-        logfile = open(os.path.join(gdb,logfileName),'a')
-        logfile.write(timeUser+msg+'\n')
-        logfile.close()
-    except:
-        addMsgAndPrint('Failed to write to '+logfileName)
-        addMsgAndPrint('  maybe file is already open?')
-
-def getSaveName(fc):
-    # fc is entire pathname
-    # builds new, unused name in form oldNameNNN
-    oldWS = arcpy.env.workspace
-    arcpy.env.workspace = os.path.dirname(fc)
-    shortFc = os.path.basename(fc)
-    pfcs = arcpy.ListFeatureClasses(shortFc+'*')
-    if debug: addMsgAndPrint(str(pfcs))
-    maxN = 0
-    for pfc in pfcs:
-        try:
-            n = int(pfc.replace(shortFc,''))
-            if n > maxN:
-                maxN = n
-        except:
-            pass
-    saveName = fc+str(maxN+1).zfill(3)
-    arcpy.env.workspace = oldWS
-    if debug:
-        addMsgAndPrint('fc = '+fc)
-        addMsgAndPrint('saveName = '+saveName)
-    return saveName
-
-#dictionary of translations from field types (as described) to field types as
-#  needed for AddField
-typeTransDict =     { 'String': 'TEXT',
-			'Single': 'FLOAT',
-			'Double': 'DOUBLE',
-			'NoNulls':'NON_NULLABLE',
-			'NullsOK':'NULLABLE',
-			'Date'  : 'DATE',
-                        'SmallInteger' : 'SHORT',
-                        'Integer': 'LONG',
-                        'Blob' : 'BLOB',
-                        'GlobalID' : 'GUID',
-                        'Guid' : 'GUID'}
-
-# II. Functions that presume extensions to naming scheme
-
-## getCaf needs to be recoded to use a prefix value
-def getCaf(inFds, prefix = ''):
-    arcpy.env.workspace = inFds
-    fcs = arcpy.ListFeatureClasses()
-    cafs = []
-    for fc in fcs:
-        if fc.find('ContactsAndFaults') > -1 or (inFds.find('CorrelationOfMapUnits') > -1 and fc.find('Lines') > -1):
-            cafs.append(fc)
-    for fc in cafs:
-        for pfx in editPrefixes:
-            if fc.find(pfx) > -1:  # no prefix
-                cafs.remove(fc)
-    cafs2 = []
-    for fc in cafs:
-        if fc[-17:] == 'ContactsAndFaults' or (inFds.find('CorrelationOfMapUnits') > -1 and fc[-5:] == 'Lines'):
-            cafs2.append(fc)
-    #addMsgAndPrint(str(cafs))
-    if len(cafs2) <> 1:
-        addMsgAndPrint('  Cannot resolve ContactsAndFaults feature class in feature dataset')
-        addMsgAndPrint('    '+inFds)
-        addMsgAndPrint('    '+str(cafs2))
-        raise arcpy.ExecuteError
-    return os.path.join(inFds,cafs2[0])
-
-def getMup(fds):
-    caf = getCaf(fds)
-    return caf.replace('ContactsAndFaults','MapUnitPolys')
-
-def getNameToken(fds):
-    if os.path.basename(fds) == 'CorrelationOfMapUnits':
-        return 'CMU'
-    else:
-        caf = os.path.basename(getCaf(fds))
-        return caf.replace('ContactsAndFaults','')
-
-#III. Functions that presume Type (vocabulary) values
-
-def isFault(lType):
-    if lType.upper().find('FAULT') > -1:
-        return True
-    else:
-        return False
-
-def isContact(lType):
-    uType = lType.upper()
-    if uType.find('CONTACT') > -1:
-        val = True
-    elif uType.find('FAULT') > -1:
-        val = False
-    elif uType.find('SHORE') > -1 or uType.find('WATER') > -1:
-        val = True
-    elif uType.find('SCRATCH') > -1:
-        val = True
-    elif uType.find('MAP') > -1 or uType.find('NEATLINE') > -1: # is map boundary?
-        val = False
-    elif uType.find('GLACIER') > -1 or uType.find('SNOW') > -1 or uType.find('ICE') > -1:
-        val = True
-    else:
-        addMsgAndPrint('function isContact, lType not recognized, lType = '+lType)
-        val = False
-    if debug: addMsgAndPrint(lType+'  '+uType+'  '+str(val))
-    return val
-
-
-# evaluates values of ExistenceConfidence and IdentifyConfidence 
-#   to see if a feature should be queried
-def isQuestionable(confidenceValue):
-    if confidenceValue <> None:
-        if confidenceValue.lower() <> 'certain' and confidenceValue.lower() <> 'unspecified':
-            return True
-        else:
-            return False
-    else:
-        return False
-
-# returns True if orientationType is a planar (not linear) feature
-def isPlanar(orientationType):
-    planarTypes = ['joint','bedding','cleavage','foliation','parting','layering','dike','fault','plane']
-    isPlanarType = False
-    for pT in planarTypes:
-        if pT in orientationType.lower():
-            isPlanarType = True
-    return isPlanarType
-
-def editSessionActive(gdb_path):
-    if glob.glob(os.path.join(gdb_path, '*.ed.lock')):
-        edit_session = True
-    else:
-        edit_session = False
-
-    return edit_session
-    
-def checkVersion(vString, rawurl, toolbox):
-    # compares versionString of tool script to the current script at the repo
-    repourl = 'https://github.com/doi-usgs/{}/releases'.format(toolbox)
-    try:
-        page = requests.get(rawurl)
-        raw = page.text
-        if vString in raw:
-            pass
-        else:
-            arcpy.AddWarning('You are using an obsolete version of this tool!\n' +
-                             'Please download the latest version from {}'.format(repourl))
-    except:
-        arcpy.AddWarning('Could not connect to GitHub to determine if this version of the tool is the most recent.\n')
-        arcpy.AddWarning('The latest release is at {}'.format(repourl))
-
-
+# utility functions for scripts that work with GeMS geodatabase schema
+## 28 December 2020: added function editSessionActive(gdb)   - RH
+## 7 March 2021: Extended list of keywords for isPlanar()
+# 24 August 2021: editSessionActive now looks for ed.lock files in gdb folder. Was running into 
+#   problems with gdb's that did not have GeoMaterialDict. Though a violation of the schema, discovering
+#   that absence is not the point of editSessionActive. Looking for ed.lock files is very easy. This won't 
+#   be a good method if trying to validate a format other than gdb, but we'll kick the can until then.
+# 18 October 2026: checkVersion now runs in a background thread with a short timeout and caches its
+#   result for a day per tool, so tool startup never waits on GitHub. Set environment variable
+#   GEMS_NO_VERSION_CHECK to skip the check, GEMS_VERSION_CACHE to choose where results are cached.
+# 18 October 2026: the version-check thread only writes the cache, as arcpy messages can't be added
+#   from it. checkVersion reports an obsolete or unreachable result from the cache, on the next run.
+#   GEMS_NO_VERSION_CHECK set to 0 or false no longer skips the check
+# 18 October 2026: workerCount and poolMap, the --workers option and worker pool shared by
+#   GeMS_TranslateToShape_Arc10.py, GeMS_MetadataCSDGM2_Arc10.py, and GeMS_ValidateDatabase_Arc10.py
+# 18 October 2026: added class TableLookup, a read-through cache of a table keyed on one field
+# 18 October 2026: numberOfRows, fieldNameList, and TableLookup read through GeMS_DataAccess, so they
+#   also work on GeoPackage and SQLite tables. arcpy and requests are optional imports, so that
+#   scripts built on these functions can run where ArcGIS is not installed
+
+try:
+    import arcpy
+except ImportError:  # no ArcGIS: only GeoPackage and SQLite databases can be read
+    arcpy = None
+import os.path
+import sys
+import time
+import glob
+import json
+import tempfile
+import threading
+import multiprocessing
+try:
+    import requests
+except ImportError:  # checkVersion will report that it could not connect
+    requests = None
+import GeMS_DataAccess
+editPrefixes = ('xxx','edit_','errors_','ed_')
+debug = False
+
+# I. General utilities
+
+# tests for null string values and <Null> numeric values
+# Does not test for numeric nulls -9, -9999, etc. 
+def stringIsGeMSNull(val):
+    if val == None:
+        return True
+    elif isinstance(val,(basestring)) and val in ('#', '#null'):
+        return True
+    else:
+        return False
+
+def addMsgAndPrint(msg, severity=0): 
+    # prints msg to screen and adds msg to the geoprocessor (in case this is run as a tool) 
+    print msg 
+    try: 
+        for string in msg.split('\n'): 
+            # Add appropriate geoprocessing message 
+            if severity == 0: 
+                arcpy.AddMessage(string) 
+            elif severity == 1: 
+                arcpy.AddWarning(string) 
+            elif severity == 2: 
+                arcpy.AddError(string) 
+    except: 
+        pass
+
+def forceExit():
+    addMsgAndPrint('Forcing exit by raising ExecuteError')
+    if arcpy == None:
+        raise SystemExit(1)
+    raise arcpy.ExecuteError
+
+def numberOfRows(aTable):
+    return GeMS_DataAccess.getCount(aTable)
+
+def testAndDelete(fc):
+    if arcpy.Exists(fc):
+        arcpy.Delete_management(fc)
+
+def fieldNameList(aTable):
+    fns = GeMS_DataAccess.listFields(aTable)
+    fns2 = []
+    for fn in fns:
+        fns2.append(fn.name)
+    return fns2
+
+def writeLogfile(gdb,msg):
+    timeUser = '['+time.asctime()+']['+os.environ['USERNAME']+'] '
+    logfileName = os.path.join(gdb,'00log.txt')
+    try:
+        logfile = open(os.path.join(gdb,logfileName),'a')
+        logfile.write(timeUser+msg+'\n')
+        logfile.close()
+    except:
+        addMsgAndPrint('Failed to write to '+logfileName)
+        addMsgAndPrint('  maybe file is already open?')
+
+def getSaveName(fc):
+    # fc is entire pathname
+    # builds new, unused name in form oldNameNNN
+    oldWS = arcpy.env.workspace
+    arcpy.env.workspace = os.path.dirname(fc)
+    shortFc = os.path.basename(fc)
+    pfcs = arcpy.ListFeatureClasses(shortFc+'*')
+    if debug: addMsgAndPrint(str(pfcs))
+    maxN = 0
+    for pfc in pfcs:
+        try:
+            n = int(pfc.replace(shortFc,''))
+            if n > maxN:
+                maxN = n
+        except:
+            pass
+    saveName = fc+str(maxN+1).zfill(3)
+    arcpy.env.workspace = oldWS
+    if debug:
+        addMsgAndPrint('fc = '+fc)
+        addMsgAndPrint('saveName = '+saveName)
+    return saveName
+
+class TableLookup:
+    # Read-through cache of a table (Glossary, DataSources, DMU, ...), keyed on one field.
+    # The whole table is read with one cursor the first time a value is asked for;
+    #   every later get is a dictionary lookup. As with a WHERE-clause query, the
+    #   first row with a given key wins. A missing table acts as an empty one.
+    # get returns a tuple of the values of fields, or None if key is not in the table
+    def __init__(self, table, keyField, fields):
+        self.table = table
+        self.keyField = keyField
+        self.fields = list(fields)
+        self.rows = None
+    def load(self):
+        self.rows = {}
+        if GeMS_DataAccess.exists(self.table):
+            with GeMS_DataAccess.searchCursor(self.table, [self.keyField]+self.fields) as cursor:
+                for row in cursor:
+                    if not row[0] in self.rows:
+                        self.rows[row[0]] = row[1:]
+        if debug: addMsgAndPrint('  '+str(len(self.rows))+' keys read from '+os.path.basename(self.table))
+    def get(self, key):
+        if self.rows == None:
+            self.load()
+        return self.rows.get(key)
+
+def workerCount(argv, position):
+    # returns the number of worker processes asked for, and removes the request from argv.
+    #   From the command line: --workers N, anywhere. From the toolboxes: N at argv[position],
+    #   where '#' (an empty parameter) means 1. N = 0 uses one worker per CPU
+    workers = '1'
+    if '--workers' in argv:
+        i = argv.index('--workers')
+        workers = argv[i+1]
+        del argv[i:i+2]
+    elif len(argv) > position:
+        workers = argv.pop(position)
+    if workers in ('', '#'):
+        return 1
+    workers = int(workers)
+    if workers < 1:
+        workers = multiprocessing.cpu_count()
+    return workers
+
+def poolMap(function, jobs, workers):
+    # returns [function(job) for job in jobs], computed by a pool of workers worker processes.
+    #   function must be defined at the top level of a module, so that workers can import it
+    # when run from inside ArcMap or ArcCatalog, sys.executable is not python.exe
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
+    pool = multiprocessing.Pool(min(workers, len(jobs)))
+    try:
+        # chunksize 1 so that one large job doesn't hold up a queue of small ones
+        return pool.map(function, jobs, 1)
+    finally:
+        pool.close()
+        pool.join()
+
+#dictionary of translations from field types (as described) to field types as
+#  needed for AddField
+typeTransDict =     { 'String': 'TEXT',
+			'Single': 'FLOAT',
+			'Double': 'DOUBLE',
+			'NoNulls':'NON_NULLABLE',
+			'NullsOK':'NULLABLE',
+			'Date'  : 'DATE',
+                        'SmallInteger' : 'SHORT',
+                        'Integer': 'LONG',
+                        'Blob' : 'BLOB',
+                        'GlobalID' : 'GUID',
+                        'Guid' : 'GUID'}
+
+# II. Functions that presume extensions to naming scheme
+
+## getCaf needs to be recoded to use a prefix value
+def getCaf(inFds, prefix = ''):
+    arcpy.env.workspace = inFds
+    fcs = arcpy.ListFeatureClasses()
+    cafs = []
+    for fc in fcs:
+        if fc.find('ContactsAndFaults') > -1 or (inFds.find('CorrelationOfMapUnits') > -1 and fc.find('Lines') > -1):
+            cafs.append(fc)
+    for fc in cafs:
+        for pfx in editPrefixes:
+            if fc.find(pfx) > -1:  # no prefix
+                cafs.remove(fc)
+    cafs2 = []
+    for fc in cafs:
+        if fc[-17:] == 'ContactsAndFaults' or (inFds.find('CorrelationOfMapUnits') > -1 and fc[-5:] == 'Lines'):
+            cafs2.append(fc)
+    #addMsgAndPrint(str(cafs))
+    if len(cafs2) <> 1:
+        addMsgAndPrint('  Cannot resolve ContactsAndFaults feature class in feature dataset')
+        addMsgAndPrint('    '+inFds)
+        addMsgAndPrint('    '+str(cafs2))
+        raise arcpy.ExecuteError
+    return os.path.join(inFds,cafs2[0])
+
+def getMup(fds):
+    caf = getCaf(fds)
+    return caf.replace('ContactsAndFaults','MapUnitPolys')
+
+def getNameToken(fds):
+    if os.path.basename(fds) == 'CorrelationOfMapUnits':
+        return 'CMU'
+    else:
+        caf = os.path.basename(getCaf(fds))
+        return caf.replace('ContactsAndFaults','')
+
+#III. Functions that presume Type (vocabulary) values
+
+def isFault(lType):
+    if lType.upper().find('FAULT') > -1:
+        return True
+    else:
+        return False
+
+def isContact(lType):
+    uType = lType.upper()
+    if uType.find('CONTACT') > -1:
+        val = True
+    elif uType.find('FAULT') > -1:
+        val = False
+    elif uType.find('SHORE') > -1 or uType.find('WATER') > -1:
+        val = True
+    elif uType.find('SCRATCH') > -1:
+        val = True
+    elif uType.find('MAP') > -1 or uType.find('NEATLINE') > -1: # is map boundary?
+        val = False
+    elif uType.find('GLACIER') > -1 or uType.find('SNOW') > -1 or uType.find('ICE') > -1:
+        val = True
+    else:
+        addMsgAndPrint('function isContact, lType not recognized, lType = '+lType)
+        val = False
+    if debug: addMsgAndPrint(lType+'  '+uType+'  '+str(val))
+    return val
+
+
+# evaluates values of ExistenceConfidence and IdentifyConfidence 
+#   to see if a feature should be queried
+def isQuestionable(confidenceValue):
+    if confidenceValue <> None:
+        if confidenceValue.lower() <> 'certain' and confidenceValue.lower() <> 'unspecified':
+            return True
+        else:
+            return False
+    else:
+        return False
+
+# returns True if orientationType is a planar (not linear) feature
+def isPlanar(orientationType):
+    planarTypes = ['joint','bedding','cleavage','foliation','parting','layering','dike','fault','plane']
+    isPlanarType = False
+    for pT in planarTypes:
+        if pT in orientationType.lower():
+            isPlanarType = True
+    return isPlanarType
+
+def editSessionActive(gdb_path):
+    if glob.glob(os.path.join(gdb_path, '*.ed.lock')):
+        edit_session = True
+    else:
+        edit_session = False
+
+    return edit_session
+    
+versionCheckTTL = 24 * 60 * 60   # seconds before the version of a tool is checked again
+versionCheckTimeout = 5          # seconds to wait for GitHub
+
+def versionCacheFile(rawurl, cacheDir=None):
+    # one cache file per tool script, named for the script
+    if cacheDir == None:
+        cacheDir = os.environ.get('GEMS_VERSION_CACHE', tempfile.gettempdir())
+    return os.path.join(cacheDir, os.path.basename(rawurl)+'.versionCheck')
+
+def readVersionCache(cacheFile):
+    try:
+        f = open(cacheFile)
+        cached = json.load(f)
+        f.close()
+        return cached
+    except:
+        return None
+
+def envFlag(name):
+    # True if environment variable name is set to anything but '', 0, false, no, or off
+    return os.environ.get(name, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+def fetchVersion(vString, rawurl, cacheFile):
+    # gets the current script from the repo and caches whether vString is in it (None if the
+    #   repo could not be reached). Runs in the thread started by checkVersion, so it only
+    #   writes the cache: checkVersion reports the result, on the next run
+    try:
+        page = requests.get(rawurl, timeout=versionCheckTimeout)
+        page.raise_for_status()
+        isCurrent = vString in page.text
+    except:
+        isCurrent = None
+    try:
+        f = open(cacheFile, 'w')
+        json.dump({'vString': vString, 'time': time.time(), 'isCurrent': isCurrent}, f)
+        f.close()
+    except:
+        pass
+    return isCurrent
+
+def checkVersion(vString, rawurl, toolbox, cacheDir=None):
+    # compares versionString of tool script to the current script at the repo
+    # Never waits for the network: the result of the last check is reported, and the repo is
+    #   checked again in a background (daemon) thread if that result is older than
+    #   versionCheckTTL seconds, or if the repo could not be reached. Returns that thread,
+    #   or None if no check was started
+    if envFlag('GEMS_NO_VERSION_CHECK'):
+        return None
+    repourl = 'https://github.com/doi-usgs/{}/releases'.format(toolbox)
+    cacheFile = versionCacheFile(rawurl, cacheDir)
+    cached = readVersionCache(cacheFile)
+    if cached <> None and cached.get('vString') == vString:
+        if cached.get('isCurrent') == False:
+            addMsgAndPrint('You are using an obsolete version of this tool!\n' +
+                           'Please download the latest version from {}'.format(repourl), 1)
+        elif cached.get('isCurrent') == None:
+            addMsgAndPrint('Could not connect to GitHub to determine if this version of the tool is the most recent.\n' +
+                           'The latest release is at {}'.format(repourl), 1)
+        if cached.get('isCurrent') <> None and time.time() - cached.get('time', 0) < versionCheckTTL:
+            return None
+    thread = threading.Thread(target=fetchVersion, args=(vString, rawurl, cacheFile))
+    thread.daemon = True
+    thread.start()
+    return thread
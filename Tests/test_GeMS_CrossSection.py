@@ -0,0 +1,30 @@
+# test_GeMS_CrossSection.py
+# Tests of SectionLine in GeMS_CrossSection.py, which need no arcpy.
+#
+# Usage:  python -m unittest discover Tests     (from the folder above Tests)
+# 18 October 2026: first version
+
+import sys, os.path, unittest
+
+scriptsFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts')
+sys.path.insert(0, scriptsFolder)
+
+from GeMS_CrossSection import SectionLine
+
+class SectionLineTests(unittest.TestCase):
+    def testLocate(self):
+        # a repeated vertex makes a zero-length segment, which is skipped
+        section = SectionLine([(0, 0), (10, 0), (10, 0), (10, 10)])
+        station, offset, angle = section.locate(4, -1, 5)
+        self.assertAlmostEqual(station, 4.0)
+        self.assertAlmostEqual(offset, 1.0)
+        self.assertAlmostEqual(angle, 0.0)
+        self.assertEqual(section.locate(4, -10, 5), None)
+        self.assertEqual(section.locate(-1, 0, 5, True), None)
+
+    def testNoSegments(self):
+        for vertices in ([], [(1, 1)], [(1, 1), (1, 1), (1, 1)]):
+            self.assertRaises(ValueError, SectionLine, vertices)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# test_GeMS_LineChainer.py
+# Tests of GeMS_LineChainer.py, writing to a GeoPackage, which need no arcpy.
+#
+# Usage:  python -m unittest discover Tests     (from the folder above Tests)
+# 18 October 2026: first version
+
+import sys, os.path, unittest, shutil, tempfile
+
+scriptsFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts')
+sys.path.insert(0, scriptsFolder)
+
+import GeMS_DataAccess
+from GeMS_DataAccess import Geometry, geometryFromWkb, geometryToWkb
+from GeMS_LineChainer import LineChainer, writeLines
+
+tolerance = 0.001
+
+class ChainTests(unittest.TestCase):
+    def testOneLinePerChain(self):
+        # two arcs that meet, and a third of the same group that touches neither
+        chainer = LineChainer(tolerance)
+        chainer.add('a', 1, [[(0, 0), (1, 0)]], ['contact'])
+        chainer.add('a', 2, [[(1, 0), (2, 0)]], ['contact'])
+        chainer.add('a', 3, [[(5, 5), (6, 5)]], ['contact'])
+        lines = list(chainer.lines())
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(sorted([len(paths) for paths, values in lines]), [1, 1])
+        self.assertEqual(sorted([paths[0] for paths, values in lines]),
+                         [[(0, 0), (1, 0), (2, 0)], [(5, 5), (6, 5)]])
+
+    def testZMKept(self):
+        chainer = LineChainer(tolerance)
+        chainer.add('a', 1, [[(0, 0, 10.0, 1.0), (1, 0, 11.0, 2.0)]], [])
+        chainer.add('a', 2, [[(1, 0, 11.0, 2.0), (2, 0, 12.0, 3.0)]], [])
+        self.assertEqual(list(chainer.lines()),
+                         [[[[(0, 0, 10.0, 1.0), (1, 0, 11.0, 2.0), (2, 0, 12.0, 3.0)]], []]])
+
+class WkbTests(unittest.TestCase):
+    def testRoundTrip(self):
+        for path in ([(0.0, 0.0), (1.0, 2.0)],
+                     [(0.0, 0.0, 5.0), (1.0, 2.0, 6.0)],
+                     [(0.0, 0.0, None, 7.0), (1.0, 2.0, None, 8.0)],
+                     [(0.0, 0.0, 5.0, 7.0), (1.0, 2.0, 6.0, 8.0)]):
+            hasZ = len(path[0]) > 2 and path[0][2] <> None
+            hasM = len(path[0]) > 3
+            wkb = geometryToWkb(Geometry('polyline', [path]), hasZ, hasM)
+            self.assertEqual(geometryFromWkb(wkb).paths, [path])
+
+    def testDefaultIs2D(self):
+        wkb = geometryToWkb(Geometry('polyline', [[(0.0, 0.0, 5.0), (1.0, 2.0, 6.0)]]))
+        self.assertEqual(geometryFromWkb(wkb).paths, [[(0.0, 0.0), (1.0, 2.0)]])
+
+class WriteTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        gpkg = os.path.join(self.folder, 'test.gpkg')
+        workspace = GeMS_DataAccess.createGeoPackage(gpkg)
+        GeMS_DataAccess.createTable(gpkg, 'ContactsAndFaults', [['Type', 'String', 'NullsOK', 50]], 'Polyline')
+        # allow Z and M, which createTable does not
+        workspace.connection.execute("UPDATE gpkg_geometry_columns SET z = 2, m = 2 WHERE table_name = 'ContactsAndFaults'")
+        workspace.connection.commit()
+        self.table = gpkg+'/ContactsAndFaults'
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testWriteLines(self):
+        chainer = LineChainer(tolerance)
+        chainer.add('a', 1, [[(0, 0, 10.0), (1, 0, 11.0)]], ['contact'])
+        chainer.add('a', 2, [[(1, 0, 11.0), (2, 0, 12.0)]], ['contact'])
+        chainer.add('a', 3, [[(5, 5, 20.0), (6, 5, 21.0)]], ['contact'])
+        self.assertEqual(writeLines(self.table, ['Type'], chainer.lines()), 2)
+        with GeMS_DataAccess.searchCursor(self.table, ['SHAPE@', 'Type']) as cursor:
+            rows = [[row[0].paths, row[1]] for row in cursor]
+        self.assertEqual(sorted(rows), [[[[(0, 0, 10.0), (1, 0, 11.0), (2, 0, 12.0)]], 'contact'],
+                                        [[[(5, 5, 20.0), (6, 5, 21.0)]], 'contact']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# test_GeMS_Polygonizer.py
+# Tests of GeMS_Polygonizer.py, which need no arcpy.
+#
+# Usage:  python -m unittest discover Tests     (from the folder above Tests)
+# 18 October 2026: first version
+
+import sys, os.path, unittest
+
+scriptsFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts')
+sys.path.insert(0, scriptsFolder)
+
+from GeMS_Polygonizer import Polygonizer, arcHash, changedArcs, rebuildFaces, envelope
+from GeMS_DataAccess import ringArea
+
+tolerance = 0.001
+square = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+
+def faceAreas(lines):
+    polygonizer = Polygonizer(tolerance)
+    for line in lines:
+        polygonizer.addLine(line)
+    return sorted([round(face.area, 6) for face in polygonizer.faces()])
+
+class SplitTests(unittest.TestCase):
+    def testCrossing(self):
+        # a line that crosses the square, its ends outside it
+        self.assertEqual(faceAreas([square, [(-2, 5), (12, 5)]]), [50.0, 50.0])
+
+    def testTJunction(self):
+        # a line whose ends touch the middle of the square's bottom and top sides
+        self.assertEqual(faceAreas([square, [(5, 0), (5, 10)]]), [50.0, 50.0])
+
+    def testTJunctionWithinTolerance(self):
+        # an end that stops short of the side by less than tolerance still splits it
+        self.assertEqual(len(faceAreas([square, [(5, tolerance / 2), (5, 10)]])), 2)
+
+    def testCrossingAtVertex(self):
+        # two lines that cross at an interior vertex of one of them
+        self.assertEqual(faceAreas([square, [(5, 0), (5, 5), (5, 10)], [(0, 5), (10, 5)]]), [25.0] * 4)
+
+    def testPlanar(self):
+        # lines that meet only at their ends are not changed
+        lines = [[(0, 0), (10, 0), (10, 10)], [(10, 10), (0, 10), (0, 0)], [(0, 0), (10, 10)]]
+        self.assertEqual(faceAreas(lines), [50.0, 50.0])
+
+    def testRepeatedLine(self):
+        # a side repeated by another line adds no face
+        self.assertEqual(faceAreas([square, [(0, 0), (10, 0)]]), [100.0])
+
+def gridArcs(n, size):
+    # {OBJECTID: [paths, envelope]} of the sides of an n x n grid of square cells
+    arcs = {}
+    for i in range(n + 1):
+        for j in range(n):
+            for path in ([(i*size, j*size), (i*size, (j+1)*size)], [(j*size, i*size), ((j+1)*size, i*size)]):
+                arcs[len(arcs) + 1] = [[path], envelope(path)]
+    return arcs
+
+def fullBuild(arcs):
+    polygonizer = Polygonizer(tolerance)
+    for oid in sorted(arcs):
+        for path in arcs[oid][0]:
+            polygonizer.addLine(path)
+    return polygonizer.faces()
+
+def hashes(arcs):
+    return dict([(oid, (arcHash(repr(arcs[oid][0])), arcs[oid][1])) for oid in arcs])
+
+def polygonKeys(ringsList):
+    # envelope and area (less holes) of each polygon, rounded, in a fixed order
+    keys = []
+    for rings in ringsList:
+        area = sum([ringArea(ring) for ring in rings])
+        keys.append(tuple([round(v, 6) for v in envelope(rings[0]) + [area]]))
+    return sorted(keys)
+
+class RebuildTests(unittest.TestCase):
+    # an incremental rebuild after an edit gives the same polygons as a full rebuild
+    def rebuildAfter(self, edit):
+        arcs = gridArcs(3, 10.0)
+        polygons = [[k + 1, face.rings, None] for k, face in enumerate(fullBuild(arcs))]
+        oldHashes = hashes(arcs)
+        edit(arcs)
+        result = rebuildFaces(arcs, polygons, changedArcs(oldHashes, hashes(arcs)), tolerance)
+        self.assertNotEqual(result, None)
+        touched, faces = result
+        touchedIDs = set([poly[0] for poly in touched])
+        incremental = [poly[1] for poly in polygons if not poly[0] in touchedIDs] + [face.rings for face in faces]
+        full = [face.rings for face in fullBuild(arcs)]
+        self.assertEqual(polygonKeys(incremental), polygonKeys(full))
+        return len(full)
+
+    def testMovedArc(self):
+        # the arc between the two lower left cells gets a vertex pushed into its neighbor
+        def edit(arcs):
+            for oid in arcs:
+                if arcs[oid][0] == [[(10.0, 0.0), (10.0, 10.0)]]:
+                    path = [(10.0, 0.0), (13.0, 5.0), (10.0, 10.0)]
+                    arcs[oid] = [[path], envelope(path)]
+        self.assertEqual(self.rebuildAfter(edit), 9)
+
+    def testAddedArc(self):
+        # a new arc across the middle cell, its ends on the middles of the cell's sides
+        def edit(arcs):
+            path = [(10.0, 15.0), (20.0, 15.0)]
+            arcs[max(arcs) + 1] = [[path], envelope(path)]
+        self.assertEqual(self.rebuildAfter(edit), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+# test_GeMS_utilityFunctions.py
+# Tests of GeMS_utilityFunctions.py. The version check is tested against a stub HTTP server
+#   on localhost, and needs the requests module. None of the tests need arcpy.
+#
+# Usage:  python -m unittest discover Tests     (from the folder above Tests)
+# 18 October 2026: first version
+
+import sys, os, os.path, unittest, shutil, tempfile, threading, time, json
+import BaseHTTPServer
+
+scriptsFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scripts')
+sys.path.insert(0, scriptsFolder)
+
+import GeMS_utilityFunctions
+from GeMS_utilityFunctions import checkVersion, versionCacheFile, readVersionCache, workerCount, poolMap
+import multiprocessing
+
+vString = 'GeMS_Test_Arc10.py, version of 18 October 2026'
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # /current.py holds vString, /old.py does not, /slow.py answers after 2 seconds
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == '/slow.py':
+            time.sleep(2)
+        if self.path in ('/current.py', '/slow.py'):
+            body = "versionString = '"+vString+"'\n"
+        else:
+            body = "versionString = 'GeMS_Test_Arc10.py, version of 1 January 2020'\n"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    def log_message(self, *args):
+        pass
+
+class StubServer(BaseHTTPServer.HTTPServer):
+    def handle_error(self, request, clientAddress):
+        pass  # the client of /slow.py has given up by the time it is answered
+
+@unittest.skipIf(GeMS_utilityFunctions.requests == None, 'requests is not installed')
+class VersionCheckTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubServer(('127.0.0.1', 0), StubHandler)
+        cls.server.requests = []
+        cls.serverThread = threading.Thread(target=cls.server.serve_forever)
+        cls.serverThread.daemon = True
+        cls.serverThread.start()
+        cls.baseurl = 'http://127.0.0.1:{}/'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.cacheDir = tempfile.mkdtemp()
+        self.server.requests[:] = []
+        self.warnings = []
+        self.saved = GeMS_utilityFunctions.addMsgAndPrint, GeMS_utilityFunctions.versionCheckTimeout
+        self.savedEnv = os.environ.pop('GEMS_NO_VERSION_CHECK', None)
+        GeMS_utilityFunctions.addMsgAndPrint = lambda msg, severity=0: self.warnings.append(msg)
+        GeMS_utilityFunctions.versionCheckTimeout = 0.5
+
+    def tearDown(self):
+        GeMS_utilityFunctions.addMsgAndPrint, GeMS_utilityFunctions.versionCheckTimeout = self.saved
+        if self.savedEnv <> None:
+            os.environ['GEMS_NO_VERSION_CHECK'] = self.savedEnv
+        else:
+            os.environ.pop('GEMS_NO_VERSION_CHECK', None)
+        shutil.rmtree(self.cacheDir)
+
+    def check(self, script):
+        thread = checkVersion(vString, self.baseurl+script, 'gems-tools-arcmap', self.cacheDir)
+        if thread <> None:
+            thread.join()
+        return thread
+
+    def cached(self, script):
+        return readVersionCache(versionCacheFile(self.baseurl+script, self.cacheDir))
+
+    def testCurrentIsCachedForTTL(self):
+        self.assertNotEqual(self.check('current.py'), None)
+        self.assertEqual(self.cached('current.py')['isCurrent'], True)
+        # within versionCheckTTL, no request and no warning
+        self.assertEqual(self.check('current.py'), None)
+        self.assertEqual(self.server.requests, ['/current.py'])
+        self.assertEqual(self.warnings, [])
+
+    def testExpiredCacheIsChecked(self):
+        self.check('current.py')
+        cached = self.cached('current.py')
+        cached['time'] = cached['time'] - GeMS_utilityFunctions.versionCheckTTL - 1
+        with open(versionCacheFile(self.baseurl+'current.py', self.cacheDir), 'w') as f:
+            json.dump(cached, f)
+        self.assertNotEqual(self.check('current.py'), None)
+        self.assertEqual(self.server.requests, ['/current.py', '/current.py'])
+
+    def testObsoleteIsReportedNextRun(self):
+        # the thread only caches the result; it is reported by the next checkVersion
+        self.check('old.py')
+        self.assertEqual(self.cached('old.py')['isCurrent'], False)
+        self.assertEqual(self.warnings, [])
+        self.assertEqual(self.check('old.py'), None)
+        self.assertEqual(len(self.warnings), 1)
+        self.assertTrue('obsolete' in self.warnings[0])
+
+    def testTimeout(self):
+        start = time.time()
+        self.check('slow.py')
+        self.assertTrue(time.time() - start < 1.5)
+        self.assertEqual(self.cached('slow.py')['isCurrent'], None)
+        # an unreachable repo is reported, and checked again, on the next run
+        self.assertNotEqual(self.check('slow.py'), None)
+        self.assertEqual(len(self.warnings), 1)
+        self.assertTrue('Could not connect' in self.warnings[0])
+
+    def testEnvironmentSwitch(self):
+        os.environ['GEMS_NO_VERSION_CHECK'] = '1'
+        self.assertEqual(self.check('current.py'), None)
+        self.assertEqual(self.server.requests, [])
+        for value in ('0', 'false', 'False', ''):
+            os.environ['GEMS_NO_VERSION_CHECK'] = value
+            shutil.rmtree(self.cacheDir)
+            os.mkdir(self.cacheDir)
+            self.assertNotEqual(self.check('current.py'), None)
+        self.assertEqual(len(self.server.requests), 4)
+
+def square(x):
+    return x * x
+
+class WorkerTests(unittest.TestCase):
+    def testCommandLineOption(self):
+        argv = ['script.py', 'a.gdb', '--workers', '3', 'out']
+        self.assertEqual(workerCount(argv, 3), 3)
+        self.assertEqual(argv, ['script.py', 'a.gdb', 'out'])
+
+    def testToolboxArgument(self):
+        argv = ['script.py', 'a.gdb', 'out', '2']
+        self.assertEqual(workerCount(argv, 3), 2)
+        self.assertEqual(argv, ['script.py', 'a.gdb', 'out'])
+        # an empty toolbox parameter, or none at all
+        self.assertEqual(workerCount(['script.py', 'a.gdb', 'out', '#'], 3), 1)
+        self.assertEqual(workerCount(['script.py', 'a.gdb', 'out'], 3), 1)
+
+    def testOnePerCPU(self):
+        self.assertEqual(workerCount(['script.py', '0'], 1), multiprocessing.cpu_count())
+
+    def testPoolMap(self):
+        jobs = range(20)
+        self.assertEqual(poolMap(square, jobs, 3), [square(x) for x in jobs])
+
+if __name__ == '__main__':
+    unittest.main()